@@ -1,15 +1,43 @@
-from outcome.eventkit.data import CloudEventData
-from outcome.eventkit.data import json as json_data_coder
-from outcome.eventkit.data.coder import DataCoder
-from outcome.eventkit.event import CloudEvent
-from outcome.eventkit.formats import CloudEventFormat
-from outcome.eventkit.formats import json as json_format
+"""A toolkit for emitting and handling events, following the CloudEvent spec.
 
-# Register known data content types
-DataCoder.data_content_types[json_data_coder.content_type_name] = json_data_coder.coder
+The package namespace is populated lazily (PEP 562), so that importing
+`outcome.eventkit` doesn't pull in pydantic, pendulum or the MIME parser
+until they're actually needed.
+"""
 
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:  # pragma: no cover
+    from outcome.eventkit.data import CloudEventData  # noqa: F401
+    from outcome.eventkit.event import CloudEvent  # noqa: F401
+
+# Maps the public names of the package to the module that defines them
+_lazy_attributes = {
+    'CloudEventData': 'outcome.eventkit.data',
+    'CloudEvent': 'outcome.eventkit.event',
+}
+
+_lazy_submodules = {'data', 'dispatch', 'event', 'formats', 'mime', 'protocol_bindings'}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _lazy_attributes:
+        module = importlib.import_module(_lazy_attributes[name])
+    elif name in _lazy_submodules:
+        module = importlib.import_module(f'{__name__}.{name}')
+        globals()[name] = module
+        return module
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *_lazy_attributes, *_lazy_submodules})
 
-# Register known cloud event format types
-CloudEventFormat.format_content_types[json_format.content_type_name] = json_format.cloud_event_format
 
 __all__ = ['CloudEventData', 'CloudEvent']
@@ -0,0 +1,417 @@
+"""Windowed aggregates of events, e.g. the number of events of each type per minute.
+
+A `WindowedAggregator` is an event handler (or a dispatcher) that keeps the count,
+sum, min, max and approximate number of distinct values of the events of each key
+(by default, the event type) per time window, and emits a summary event for each
+key when a window closes. Handlers that only count or sum events can then handle a
+summary per window, instead of every event.
+
+Windows are based on the `time` of the events, and can be tumbling (consecutive
+windows of a fixed size) or sliding (windows of a fixed size that start at a fixed
+interval, so that they overlap). The aggregator tracks a watermark, which is the
+latest event time seen minus the allowed lateness: a window closes once the watermark
+passes its end, and events that only belong to closed windows are late, and dropped.
+
+Memory is bounded: each key of a window holds a fixed-size state, the number of keys
+per window is capped by `max_keys`, and only the windows that can still receive
+events are open.
+"""
+
+import functools
+import hashlib
+import math
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+import pendulum
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.dispatch import CloudEventDispatcher, CloudEventHandlerRegistry, cloud_event_handler_registry, dispatch
+from outcome.eventkit.event import CloudEvent
+
+Clock = Callable[[], float]
+# Maps an event to the key its aggregates are kept under
+KeyFunction = Callable[[CloudEvent], Hashable]
+# Maps an event to the value that's summed, or None to only count it
+ValueFunction = Callable[[CloudEvent], Optional[float]]
+# Maps an event to the value that's counted once, or None
+DistinctFunction = Callable[[CloudEvent], Optional[str]]
+
+default_max_keys = 10_000
+# 1KiB per HyperLogLog, with a standard error of about 3%
+default_precision = 10
+default_summary_type = 'co.outcome.eventkit.aggregate'
+default_summary_source = 'outcome.eventkit.aggregation'
+
+_min_precision = 4
+_max_precision = 16
+_hash_bits = 64
+_inverse_powers = tuple(2.0 ** -rank for rank in range(_hash_bits + 1))
+
+
+def by_type(event: CloudEvent) -> str:
+    return event.type
+
+
+def by_type_and_subject(event: CloudEvent) -> Tuple[str, Optional[str]]:
+    return (event.type, event.subject)
+
+
+def data_field(name: str) -> ValueFunction:
+    """Return a function that reads a numeric field of the data of an event.
+
+    Args:
+        name (str): The name of the field, or attribute of a payload model.
+
+    Returns:
+        ValueFunction: The function, which returns None if the event doesn't have a numeric value for the field.
+    """
+
+    def get_field(event: CloudEvent) -> Optional[float]:
+        if event.data is None:
+            return None
+
+        data = event.data.data
+        field_value = data.get(name) if isinstance(data, Mapping) else getattr(data, name, None)
+
+        if isinstance(field_value, bool) or not isinstance(field_value, (int, float)):
+            return None
+        return field_value
+
+    return get_field
+
+
+class HyperLogLog:
+    """An estimate of the number of distinct strings, in a fixed amount of memory.
+
+    The standard error of the estimate is about `1.04 / sqrt(2 ** precision)`, for
+    `2 ** precision` bytes. Strings are hashed with BLAKE2, so estimates from different
+    processes can be merged.
+    """
+
+    __slots__ = ('precision', '_registers')
+
+    def __init__(self, precision: int = default_precision) -> None:
+        if not _min_precision <= precision <= _max_precision:
+            raise ValueError(f'The precision must be between {_min_precision} and {_max_precision}')
+
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:  # noqa: WPS110
+        hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+        # The first bits select a register, which keeps the longest run of leading zeros of the other bits
+        remaining_bits = _hash_bits - self.precision
+        index = hashed >> remaining_bits
+        rank = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge estimates with different precisions')
+        self._registers = bytearray(map(max, self._registers, other._registers))  # noqa: WPS437
+
+    def count(self) -> int:
+        registers = self._registers
+        size = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(_inverse_powers[rank] for rank in registers)
+
+        # Small cardinalities are estimated from the number of empty registers
+        empty = registers.count(0)
+        if empty and estimate <= 2.5 * size:
+            estimate = size * math.log(size / empty)
+
+        return round(estimate)
+
+
+# Ratios of a timestamp to a window size within this relative tolerance of an integer are rounded
+# to it, since float division can miss by a bit, e.g. 0.7 / 0.1 == 6.999999999999999
+_ratio_tolerance = 4 * sys.float_info.epsilon
+
+
+def _window_index(timestamp: float, size: float) -> int:
+    # The number of whole windows of `size` seconds between the epoch and the timestamp
+    ratio = timestamp / size
+    nearest = round(ratio)
+    if math.isclose(ratio, nearest, rel_tol=_ratio_tolerance):
+        return nearest
+    return math.floor(ratio)
+
+
+class TumblingWindows:
+    """Consecutive windows of `size` seconds, aligned on the epoch."""
+
+    __slots__ = ('size',)
+
+    def __init__(self, size: float) -> None:
+        if size <= 0:
+            raise ValueError('The size of a window must be positive')
+        self.size = size
+
+    def starts(self, timestamp: float) -> Tuple[float, ...]:
+        """The starts of the windows that contain a timestamp."""
+        return (_window_index(timestamp, self.size) * self.size,)
+
+
+class SlidingWindows:
+    """Windows of `size` seconds that start every `slide` seconds, aligned on the epoch."""
+
+    __slots__ = ('size', 'slide')
+
+    def __init__(self, size: float, slide: float) -> None:
+        if size <= 0 or slide <= 0:
+            raise ValueError('The size and slide of a window must be positive')
+        self.size = size
+        self.slide = slide
+
+    def starts(self, timestamp: float) -> Tuple[float, ...]:
+        """The starts of the windows that contain a timestamp, from the latest.
+
+        The window `k` starts at `k * slide`, and contains the timestamps in `[k * slide, k * slide + size)`.
+        The windows are counted in slides, so that float errors don't accumulate from one start to the next.
+        """
+        # The latest window starts at or before the timestamp, the earliest ends after it
+        last = _window_index(timestamp, self.slide)
+        first = _window_index(timestamp - self.size, self.slide) + 1
+        return tuple(index * self.slide for index in range(last, first - 1, -1))
+
+
+Windows = Union[TumblingWindows, SlidingWindows]
+
+
+class Aggregate:
+    """The aggregates of the events of a key in a window."""
+
+    __slots__ = ('count', 'sum', 'min', 'max', 'distinct')
+
+    def __init__(self, distinct: Optional[HyperLogLog] = None) -> None:
+        self.count = 0
+        self.sum = 0  # noqa: WPS125
+        self.min: Optional[float] = None  # noqa: WPS125
+        self.max: Optional[float] = None  # noqa: WPS125
+        self.distinct = distinct
+
+    def add(self, aggregated_value: Optional[float], distinct_value: Optional[str]) -> None:
+        self.count += 1
+
+        if aggregated_value is not None:
+            self.sum += aggregated_value
+            if self.min is None or aggregated_value < self.min:
+                self.min = aggregated_value
+            if self.max is None or aggregated_value > self.max:
+                self.max = aggregated_value
+
+        if distinct_value is not None and self.distinct is not None:
+            self.distinct.add(distinct_value)
+
+
+class AggregationStats(NamedTuple):
+    # The events that were added to at least one window
+    aggregated: int
+    # The events that only belonged to closed windows
+    late: int
+    # The events whose key didn't fit in a full window
+    overflowed: int
+    # The summary events
+    emitted: int
+    open_windows: int
+
+
+# The closed windows, as (start, aggregates by key)
+_ClosedWindows = List[Tuple[float, Dict[Hashable, Aggregate]]]
+
+
+class WindowedAggregator:  # noqa: WPS214, WPS230
+    """Aggregates events per key and time window, and emits a summary event per key when a window closes.
+
+    The aggregator can be registered as a handler of the aggregated event types, or
+    used as a dispatcher. The summary events are dispatched to the handler registry,
+    or passed to `emit`.
+
+    The summaries are emitted in order of window start by the call that closes the
+    windows. When events are handled concurrently, the summaries of windows closed
+    by different calls can be emitted in any order.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        windows: Windows,
+        emit: Optional[CloudEventDispatcher] = None,
+        registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+        key: KeyFunction = by_type,
+        value: Optional[ValueFunction] = None,  # noqa: WPS110
+        distinct: Optional[DistinctFunction] = None,
+        allowed_lateness: float = 0,
+        max_keys: int = default_max_keys,
+        precision: int = default_precision,
+        summary_type: str = default_summary_type,
+        summary_source: str = default_summary_source,
+        clock: Clock = time.time,
+    ) -> None:
+        """Create an aggregator.
+
+        Args:
+            windows (Windows): The windows, e.g. `TumblingWindows(60)`.
+            emit (CloudEventDispatcher, optional): Dispatches the summary events. Defaults to the registry.
+            registry (CloudEventHandlerRegistry): The handler registry. Defaults to the global registry.
+            key (KeyFunction): The key of an event. Defaults to its type.
+            value (ValueFunction, optional): The value of an event that's summed, e.g. `data_field('amount')`.
+            distinct (DistinctFunction, optional): The value of an event whose distinct values are counted.
+            allowed_lateness (float): How long to wait for late events, in seconds, before closing a window.
+            max_keys (int): The maximum number of keys per window.
+            precision (int): The precision of the distinct counts.
+            summary_type (str): The type of the summary events.
+            summary_source (str): The source of the summary events.
+            clock (Clock): The time of events that don't have one, and of `advance`. Defaults to `time.time`.
+
+        Raises:
+            ValueError: If the allowed lateness is negative, or the max keys less than 1.
+        """
+        if allowed_lateness < 0:
+            raise ValueError('The allowed lateness cannot be negative')
+        if max_keys < 1:
+            raise ValueError('A window must be able to hold at least one key')
+
+        self.windows = windows
+        self.emit = emit or functools.partial(dispatch, registry=registry)
+        self.key = key
+        self.value = value
+        self.distinct = distinct
+        self.allowed_lateness = allowed_lateness
+        self.max_keys = max_keys
+        self.precision = precision
+        self.summary_type = summary_type
+        self.summary_source = summary_source
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        # The aggregates of each open window, by start
+        self._open: Dict[float, Dict[Hashable, Aggregate]] = {}
+        self._max_time = -math.inf
+        # The end of the first open window, so closing windows is only checked when it's due
+        self._next_close = math.inf
+
+        self.aggregated = 0
+        self.late = 0
+        self.overflowed = 0
+        self.emitted = 0
+
+    @property
+    def watermark(self) -> float:
+        """The time before which windows are closed, as a timestamp."""
+        return self._max_time - self.allowed_lateness
+
+    def __call__(self, event: CloudEvent) -> None:
+        timestamp = event.time.timestamp() if event.time is not None else self.clock()
+        aggregated_value = self.value(event) if self.value is not None else None
+        distinct_value = self.distinct(event) if self.distinct is not None else None
+        event_key = self.key(event)
+
+        with self._lock:
+            if timestamp > self._max_time:
+                self._max_time = timestamp
+            self._add(event_key, timestamp, aggregated_value, distinct_value)
+            closed = self._close(self.watermark)
+
+        self._emit(closed)
+
+    def advance(self, timestamp: Optional[float] = None) -> None:
+        """Move the watermark forward, e.g. when no events have been received for a while.
+
+        Args:
+            timestamp (float, optional): The latest event time. Defaults to the time of the clock.
+        """
+        if timestamp is None:
+            timestamp = self.clock()
+
+        with self._lock:
+            self._max_time = max(self._max_time, timestamp)
+            closed = self._close(self.watermark)
+
+        self._emit(closed)
+
+    def flush(self) -> None:
+        """Close all of the open windows, e.g. on shutdown."""
+        with self._lock:
+            closed = self._close(math.inf)
+
+        self._emit(closed)
+
+    def stats(self) -> AggregationStats:
+        return AggregationStats(self.aggregated, self.late, self.overflowed, self.emitted, len(self._open))
+
+    def _add(self, event_key: Hashable, timestamp: float, aggregated_value: Optional[float], distinct_value: Any) -> None:
+        size = self.windows.size
+        watermark = self.watermark
+        added = False
+
+        for start in self.windows.starts(timestamp):
+            end = start + size
+            if end <= watermark:
+                continue
+
+            aggregates = self._open.get(start)
+            if aggregates is None:
+                aggregates = {}
+                self._open[start] = aggregates
+                self._next_close = min(self._next_close, end)
+
+            aggregate = aggregates.get(event_key)
+            if aggregate is None:
+                if len(aggregates) >= self.max_keys:
+                    self.overflowed += 1
+                    continue
+                aggregate = Aggregate(HyperLogLog(self.precision) if self.distinct is not None else None)
+                aggregates[event_key] = aggregate
+
+            aggregate.add(aggregated_value, None if distinct_value is None else str(distinct_value))
+            added = True
+
+        if added:
+            self.aggregated += 1
+        else:
+            self.late += 1
+
+    def _close(self, watermark: float) -> _ClosedWindows:
+        if watermark < self._next_close:
+            return []
+
+        size = self.windows.size
+        closed = [(start, self._open.pop(start)) for start in sorted(self._open) if start + size <= watermark]
+        self._next_close = min(self._open, default=math.inf) + size
+        return closed
+
+    def _emit(self, closed: _ClosedWindows) -> None:
+        # Summaries are emitted outside of the lock, so their handlers can't block the aggregation
+        for start, aggregates in closed:
+            for event_key, aggregate in aggregates.items():
+                with self._lock:
+                    self.emitted += 1
+                self.emit(self._summary(start, event_key, aggregate))
+
+    def _summary(self, start: float, event_key: Hashable, aggregate: Aggregate) -> CloudEvent:
+        end = start + self.windows.size
+        summary: Dict[str, Any] = {
+            'key': list(event_key) if isinstance(event_key, tuple) else event_key,
+            'start': pendulum.from_timestamp(start).isoformat(),
+            'end': pendulum.from_timestamp(end).isoformat(),
+            'count': aggregate.count,
+        }
+
+        if self.value is not None:
+            summary.update(sum=aggregate.sum, min=aggregate.min, max=aggregate.max)
+        if aggregate.distinct is not None:
+            summary['distinct'] = aggregate.distinct.count()
+
+        return CloudEvent(
+            type=self.summary_type,
+            source=self.summary_source,
+            subject=event_key if isinstance(event_key, str) else None,
+            time=pendulum.from_timestamp(end),
+            data=CloudEventData(data=summary, data_content_type='application/json'),
+        )
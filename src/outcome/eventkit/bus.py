@@ -0,0 +1,251 @@
+"""An in-process event bus that decouples event producers from the handlers.
+
+Events are assigned to a partition based on their `subject` (or `source`), so
+events with the same key are always handled in the order they were published.
+Each partition has a bounded queue, and a worker thread that dispatches the events.
+"""
+
+import enum
+import functools
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, List, NamedTuple, Optional
+
+from outcome.eventkit.dispatch import CloudEventDispatcher, CloudEventHandlerRegistry, cloud_event_handler_registry, dispatch
+from outcome.eventkit.event import CloudEvent
+
+logger = logging.getLogger(__name__)
+
+ErrorCallback = Callable[[CloudEvent, Exception], None]
+
+
+class Backpressure(enum.Enum):
+    """What to do when an event is published to a full partition."""
+
+    # Wait until there's room in the partition
+    block = 'block'
+    # Discard the oldest event in the partition to make room
+    drop_oldest = 'drop_oldest'
+    # Refuse the event, raising a `BusFullError`
+    reject = 'reject'
+
+
+class PartitionKey(enum.Enum):
+    """The event attribute used to assign events to partitions."""
+
+    # Events without a subject fall back to their source
+    subject = 'subject'
+    source = 'source'
+
+
+class BusFullError(Exception):
+    ...
+
+
+class BusClosedError(Exception):
+    ...
+
+
+class PartitionStats(NamedTuple):
+    partition: int
+    # The number of events that have been published, but not yet handled or dropped
+    lag: int
+    published: int
+    processed: int
+    dropped: int
+    rejected: int
+    errors: int
+
+
+def log_error(event: CloudEvent, exc: Exception) -> None:
+    logger.error('Error dispatching event %s (%s)', event.id, event.type, exc_info=exc)
+
+
+class Partition:  # noqa: WPS214, WPS230
+    """A bounded queue of events, with a worker thread that dispatches them in order."""
+
+    def __init__(
+        self, index: int, max_size: int, backpressure: Backpressure, dispatcher: CloudEventDispatcher, on_error: ErrorCallback,
+    ) -> None:
+        self.index = index
+        self.max_size = max_size
+        self.backpressure = backpressure
+        self.dispatcher = dispatcher
+        self.on_error = on_error
+
+        self._queue: Deque[CloudEvent] = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'eventkit-bus-{index}', daemon=True)
+
+        self.published = 0
+        self.processed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def put(self, event: CloudEvent, timeout: Optional[float] = None) -> None:
+        with self._condition:
+            if self._closed:
+                raise BusClosedError('The bus is closed')
+
+            if len(self._queue) >= self.max_size:
+                self._make_room(timeout)
+
+            self._queue.append(event)
+            self.published += 1
+            self._condition.notify_all()
+
+    def _make_room(self, timeout: Optional[float]) -> None:
+        if self.backpressure is Backpressure.drop_oldest:
+            self._queue.popleft()
+            self.dropped += 1
+            return
+
+        if self.backpressure is Backpressure.block:
+            has_room = self._condition.wait_for(lambda: self._closed or len(self._queue) < self.max_size, timeout)
+            if self._closed:
+                raise BusClosedError('The bus is closed')
+            if has_room:
+                return
+
+        self.rejected += 1
+        raise BusFullError(f'Partition {self.index} is full')
+
+    def close(self, drain: bool) -> None:
+        with self._condition:
+            self._closed = True
+            if not drain:
+                self.dropped += len(self._queue)
+                self._queue.clear()
+            self._condition.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def stats(self) -> PartitionStats:
+        with self._condition:
+            return PartitionStats(
+                partition=self.index,
+                lag=self.published - self.processed - self.dropped,
+                published=self.published,
+                processed=self.processed,
+                dropped=self.dropped,
+                rejected=self.rejected,
+                errors=self.errors,
+            )
+
+    def _run(self) -> None:
+        while True:  # noqa: WPS457
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or self._queue)
+                if not self._queue:
+                    # The partition is closed, and there's nothing left to handle
+                    return
+                event = self._queue.popleft()
+                # Wake up any producers waiting for room
+                self._condition.notify_all()
+
+            try:
+                self.dispatcher(event)
+            except Exception as exc:
+                self.errors += 1
+                self.on_error(event, exc)
+
+            with self._condition:
+                self.processed += 1
+
+
+class EventBus:
+    """Dispatches events asynchronously, across a fixed number of ordered partitions.
+
+    The bus can be used as a context manager, it's started on entry and drained on exit.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        partitions: int = 4,
+        max_queue_size: int = 1000,
+        backpressure: Backpressure = Backpressure.block,
+        partition_key: PartitionKey = PartitionKey.subject,
+        registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+        dispatcher: Optional[CloudEventDispatcher] = None,
+        on_error: ErrorCallback = log_error,
+    ) -> None:
+        """Creates the bus, and its partitions.
+
+        Args:
+            partitions (int): The number of partitions. Defaults to 4.
+            max_queue_size (int): The maximum number of pending events per partition. Defaults to 1000.
+            backpressure (Backpressure): What to do when a partition is full. Defaults to blocking.
+            partition_key (PartitionKey): The attribute used to assign events to partitions. Defaults to the subject.
+            registry (CloudEventHandlerRegistry): The handler registry. Defaults to the global registry.
+            dispatcher (CloudEventDispatcher, optional): Used to dispatch events instead of the registry.
+            on_error (ErrorCallback): Called when the dispatcher raises an exception. Defaults to logging the error.
+
+        Raises:
+            ValueError: If the number of partitions or the queue size is less than 1.
+        """
+        if partitions < 1 or max_queue_size < 1:
+            raise ValueError('The bus needs at least one partition, with room for at least one event')
+
+        self.partition_key = partition_key
+        self.dispatcher = dispatcher or functools.partial(dispatch, registry=registry)
+        self.partitions = [
+            Partition(index, max_queue_size, backpressure, self.dispatcher, on_error) for index in range(partitions)
+        ]
+        self._started = False
+
+    def __enter__(self) -> 'EventBus':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        for partition in self.partitions:
+            partition.start()
+
+    def partition_for(self, event: CloudEvent) -> Partition:
+        key = event.source
+        if self.partition_key is PartitionKey.subject and event.subject is not None:
+            key = event.subject
+
+        return self.partitions[hash(key) % len(self.partitions)]
+
+    def publish(self, event: CloudEvent, timeout: Optional[float] = None) -> None:
+        """Queue an event for dispatch.
+
+        Args:
+            event (CloudEvent): The event.
+            timeout (float, optional): How long to wait for room in the partition, with the `block` policy.
+
+        Raises:
+            BusFullError: If the partition is full, and the event couldn't be queued.
+            BusClosedError: If the bus has been closed.
+        """
+        self.partition_for(event).put(event, timeout)
+
+    def close(self, drain: bool = True, timeout: Optional[float] = None) -> None:
+        """Stop accepting events and wait for the workers to finish.
+
+        Args:
+            drain (bool): Whether to handle the queued events, or drop them. Defaults to True.
+            timeout (float, optional): How long to wait for each partition to finish.
+        """
+        for partition in self.partitions:
+            partition.close(drain)
+        for partition in self.partitions:  # noqa: WPS440
+            partition.join(timeout)
+
+    def stats(self) -> List[PartitionStats]:
+        return [partition.stats() for partition in self.partitions]
@@ -0,0 +1,91 @@
+"""A bounded cache, for the lookups that are keyed by input.
+
+Many lookups are cached by values that come from the events or the messages, e.g.
+content types, header and extension names, event types and attribute values. These
+values can come from untrusted input, so every such cache is a `BoundedCache`, and
+input with many distinct values can't make it grow without limit.
+
+When it's full, the cache evicts its oldest entry. Lookups are plain dict lookups,
+without locking. Adding an entry locks, so that concurrent evictions don't remove the
+same entry, and so that concurrent additions of a key agree on a single value.
+"""
+
+import threading
+from typing import Dict, Generic, Iterator, List, Tuple, TypeVar
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+default_max_size = 1024
+
+
+class BoundedCache(Generic[K, V]):
+    """A mapping that keeps at most `max_size` entries, evicting the oldest entry when it's full."""
+
+    __slots__ = ('max_size', 'get', '_entries', '_lock')
+
+    def __init__(self, max_size: int = default_max_size) -> None:
+        """Create an empty cache.
+
+        Args:
+            max_size (int): The maximum number of entries.
+
+        Raises:
+            ValueError: If `max_size` is less than 1.
+        """
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+
+        self.max_size = max_size
+        self._entries: Dict[K, V] = {}
+        self._lock = threading.Lock()
+
+        # Lookups are the method of the dict, to avoid the cost of a Python call
+        self.get = self._entries.get
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __getitem__(self, key: K) -> V:
+        return self._entries[key]
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self.keys())
+
+    def keys(self) -> List[K]:
+        with self._lock:
+            return list(self._entries)
+
+    def items(self) -> List[Tuple[K, V]]:
+        with self._lock:
+            return list(self._entries.items())
+
+    def add(self, key: K, cached_value: V) -> V:
+        """Add an entry, unless the key is already cached.
+
+        Args:
+            key (K): The key.
+            cached_value (V): The value.
+
+        Returns:
+            V: The cached value, which is the existing value if the key was added first by another thread.
+        """
+        entries = self._entries
+        with self._lock:
+            try:
+                return entries[key]
+            except KeyError:
+                pass
+
+            if len(entries) >= self.max_size:
+                # The entries are in insertion order
+                del entries[next(iter(entries))]  # noqa: WPS420
+            entries[key] = cached_value
+            return cached_value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,195 @@
+"""A compact, immutable representation of CloudEvents.
+
+`CloudEvent` instances are pydantic models, which carry validation machinery and a
+per-instance `__dict__`. When large numbers of events are buffered in memory, for
+batching or replay, they can be converted to `CompactCloudEvent` instances instead.
+
+Compact events are accepted wherever an event is encoded (formats and protocol bindings),
+and can be converted back to a `CloudEvent` without loss.
+"""
+
+import datetime
+from typing import Any, Dict, Optional, Tuple, Union
+
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.data.coder import DecodedData, EncodedData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.extensions import Extensions, no_extensions
+
+
+class ImmutableSlots:
+    """A base class for immutable objects that use `__slots__`."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __eq__(self, o: Any) -> bool:
+        if type(o) is not type(self):
+            return NotImplemented
+        return o._values() == self._values()
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{slot}={getattr(self, slot)!r}' for slot in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+    def __reduce__(self):
+        return (_restore, (type(self), self._values()))
+
+
+def _restore(cls, values: Tuple[Any, ...]) -> ImmutableSlots:
+    instance = object.__new__(cls)
+    for slot, value in zip(cls.__slots__, values):
+        object.__setattr__(instance, slot, value)
+    return instance
+
+
+class CompactCloudEventData(ImmutableSlots):
+    __slots__ = ('data', 'data_content_type', 'data_schema')
+
+    data: DecodedData
+    data_content_type: Optional[str]
+    data_schema: Optional[str]
+
+    def __init__(self, data: DecodedData = None, data_content_type: Optional[str] = None, data_schema: Optional[str] = None):
+        object.__setattr__(self, 'data', data)
+        object.__setattr__(self, 'data_content_type', data_content_type)
+        object.__setattr__(self, 'data_schema', data_schema)
+
+    @classmethod
+    def from_data(cls, data: CloudEventData) -> 'CompactCloudEventData':
+        return cls(data.data, data.data_content_type, data.data_schema)
+
+    def to_data(self) -> CloudEventData:
+        return CloudEventData(data=self.data, data_content_type=self.data_content_type, data_schema=self.data_schema)
+
+    @property
+    def encoded_data(self) -> EncodedData:
+        if self.data is None:
+            return None
+
+        if self.data_content_type is None:
+            raise ValueError('Cannot encode data without content type')
+
+        coder = CloudEventData.get_coder(self.data_content_type)
+
+        return coder.encode(self.data, self.data_content_type)
+
+
+class CompactCloudEvent(ImmutableSlots):
+    """An immutable CloudEvent, with the same attributes as `CloudEvent`.
+
+    Compact events aren't validated, they're meant to be created from `CloudEvent` instances
+    with `from_event`, which have already been validated.
+    """
+
+    __slots__ = ('id', 'source', 'spec_version', 'type', 'subject', 'time', 'data', '_extensions')  # noqa: WPS125
+
+    id: str  # noqa: WPS125, A003
+    source: str
+    spec_version: str
+    type: str  # noqa: WPS125, A003
+    subject: Optional[str]
+    time: Optional[datetime.datetime]
+    data: Optional[CompactCloudEventData]
+    _extensions: Optional[Dict[str, Any]]
+
+    def __init__(  # noqa: WPS211
+        self,
+        id: str,  # noqa: WPS125, A002
+        source: str,
+        type: str,  # noqa: WPS125, A002
+        subject: Optional[str] = None,
+        time: Optional[datetime.datetime] = None,
+        data: Optional[CompactCloudEventData] = None,
+        spec_version: str = '1.0',
+        extensions: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'source', source)
+        object.__setattr__(self, 'spec_version', spec_version)
+        object.__setattr__(self, 'type', type)
+        object.__setattr__(self, 'subject', subject)
+        object.__setattr__(self, 'time', time)
+        object.__setattr__(self, 'data', data)
+        # Compact events are created from validated events, their extensions are shared
+        object.__setattr__(self, '_extensions', extensions or None)
+
+    @classmethod
+    def from_event(cls, event: CloudEvent) -> 'CompactCloudEvent':
+        data = None
+        if event.data is not None:
+            data = CompactCloudEventData.from_data(event.data)
+
+        return cls(
+            id=event.id,
+            source=event.source,
+            type=event.type,
+            subject=event.subject,
+            time=event.time,
+            data=data,
+            spec_version=event.spec_version,
+            extensions=event._extensions,  # noqa: WPS437
+        )
+
+    def to_event(self) -> CloudEvent:
+        return CloudEvent(
+            id=self.id,
+            source=self.source,
+            type=self.type,
+            subject=self.subject,
+            time=self.time,
+            data=self.data.to_data() if self.data is not None else None,
+            specversion=self.spec_version,
+            extensions=self._extensions,
+        )
+
+    @property
+    def extensions(self) -> Extensions:
+        if self._extensions is None:
+            return no_extensions
+        return self._extensions
+
+    @property
+    def data_content_type(self) -> Optional[str]:
+        if self.data:
+            return self.data.data_content_type
+        return None
+
+    @property
+    def data_schema(self) -> Optional[str]:
+        if self.data:
+            return self.data.data_schema
+        return None
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        # This mirrors CloudEvent.attributes, including the order of the keys
+        attributes = {'id': self.id, 'source': self.source, 'specversion': self.spec_version, 'type': self.type}
+
+        if self.subject is not None:
+            attributes['subject'] = self.subject
+        if self.time is not None:
+            attributes['time'] = self.time
+
+        if self.data:
+            if self.data.data_content_type is not None:
+                attributes['datacontenttype'] = self.data.data_content_type
+            if self.data.data_schema is not None:
+                attributes['dataschema'] = self.data.data_schema
+
+        if self._extensions is not None:
+            attributes.update(self._extensions)
+
+        return attributes
+
+
+# Any of the event representations that can be encoded
+AnyCloudEvent = Union[CloudEvent, CompactCloudEvent]
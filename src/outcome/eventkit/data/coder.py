@@ -1,9 +1,12 @@
 """An abstract data encoder/decoder used to serialize the data payload."""
 
-from typing import Any, ClassVar, Optional, Union
+from typing import TYPE_CHECKING, Any, ClassVar, Optional, Type, Union
 
 from outcome.eventkit.mime import MIMETypeDict
 
+if TYPE_CHECKING:  # pragma: no cover
+    import pydantic  # noqa: WPS433
+
 EncodedData = Optional[Union[str, bytes]]
 DecodedData = Optional[Any]
 
@@ -22,6 +25,20 @@ class DataCoder:
     def decode(cls, encoded_data: EncodedData, content_type: str) -> DecodedData:  # pragma: no cover
         raise NotImplementedError
 
+    @classmethod
+    def decode_model(
+        cls, encoded_data: EncodedData, content_type: str, model: Type['pydantic.BaseModel'],
+    ) -> 'pydantic.BaseModel':
+        """Decode the data into an instance of a payload model.
+
+        Coders can override this to parse the encoded data straight into the model.
+        """
+        return model.parse_obj(cls.decode(encoded_data, content_type))
+
     @classmethod
     def validate(cls, data: DecodedData, content_type: str, schema_name: Optional[str] = None) -> None:  # pragma: no cover
         raise NotImplementedError
+
+
+# Register known data content types, they're imported on first lookup
+DataCoder.data_content_types.register_lazy('application/json', 'outcome.eventkit.data.json:coder')
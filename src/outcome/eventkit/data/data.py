@@ -4,7 +4,8 @@ from typing import Any, Optional
 
 import pydantic
 from outcome.eventkit.data.coder import DataCoder, DecodedData, EncodedData
-from outcome.eventkit.mime import parse_mime_type
+from outcome.eventkit.data.models import payload_models
+from outcome.eventkit.mime import resolve_content_type
 
 
 class CloudEventData(pydantic.BaseModel):
@@ -35,7 +36,7 @@ class CloudEventData(pydantic.BaseModel):
     def validate_data_content_type(cls, value) -> str:  # noqa: N805
         if value is None:
             return None
-        return parse_mime_type(value).name
+        return resolve_content_type(value).name
 
     @property
     def encoded_data(self) -> EncodedData:
@@ -51,14 +52,24 @@ class CloudEventData(pydantic.BaseModel):
 
     @classmethod
     def from_encoded(
-        cls, encoded_data: EncodedData, data_content_type: str, data_schema: Optional[str] = None,
+        cls,
+        encoded_data: EncodedData,
+        data_content_type: str,
+        data_schema: Optional[str] = None,
+        event_type: Optional[str] = None,
     ) -> 'CloudEventData':
-        data_content_type = parse_mime_type(data_content_type).name
+        data_content_type = resolve_content_type(data_content_type).name
         coder = cls.get_coder(data_content_type)
-        decoded_data = coder.decode(encoded_data, data_content_type)
 
-        if data_schema:
-            coder.validate(decoded_data, data_content_type, data_schema)
+        # If there's a payload model for the event type, the data is decoded straight into the model
+        model = payload_models.model_for(event_type, data_schema)
+        if model is not None:
+            decoded_data = coder.decode_model(encoded_data, data_content_type, model)
+        else:
+            decoded_data = coder.decode(encoded_data, data_content_type)
+
+            if data_schema:
+                coder.validate(decoded_data, data_content_type, data_schema)
 
         return cls(data=decoded_data, data_content_type=data_content_type, data_schema=data_schema)
 
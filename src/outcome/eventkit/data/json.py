@@ -1,20 +1,27 @@
 """A bare-bones implementation of a JSON data payload coder."""
 
 import json
-from typing import Optional
+from typing import Optional, Type
 
+import pydantic
 from outcome.eventkit.data.coder import DataCoder, DecodedData, EncodedData
 
 
 class JSONDataCoder(DataCoder):
     @classmethod
     def encode(cls, data: DecodedData, content_type: str) -> str:
+        if isinstance(data, pydantic.BaseModel):
+            return data.json()
         return json.dumps(data)
 
     @classmethod
     def decode(cls, encoded_data: EncodedData, content_type: str) -> DecodedData:
         return json.loads(encoded_data)
 
+    @classmethod
+    def decode_model(cls, encoded_data: EncodedData, content_type: str, model: Type[pydantic.BaseModel]) -> pydantic.BaseModel:
+        return model.parse_raw(encoded_data)
+
     @classmethod
     def validate(cls, data: DecodedData, content_type: str, schema_name: Optional[str]) -> None:  # pragma: no cover
         ...
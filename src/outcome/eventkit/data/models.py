@@ -0,0 +1,116 @@
+"""A registry of the models of event payloads, by event type (and data schema).
+
+When a model is registered for an event type, the data of the events of that type is
+decoded directly into an instance of the model, instead of a plain dict, and encoded
+directly from the model. Handlers can use `event.data.data` as the model, without
+validating the payload again.
+
+```py
+@payload_model('co.outcome.invoice.created')
+class InvoiceCreated(pydantic.BaseModel):
+    invoice_id: str
+    amount: int
+```
+"""
+
+import threading
+from typing import Callable, Dict, Optional, Tuple, Type, TypeVar
+
+import pydantic
+from outcome.eventkit.cache import BoundedCache
+
+Model = Type[pydantic.BaseModel]
+M = TypeVar('M', bound=Model)
+_ModelKey = Tuple[str, Optional[str]]
+
+max_cached_lookups = 1024
+# Lookups can be cached as None, when there's no model
+_not_cached = object()
+
+
+def _lookup_cache() -> BoundedCache[_ModelKey, Optional[Model]]:
+    return BoundedCache(max_cached_lookups)
+
+
+class PayloadModelRegistry:
+    """Maps event types, optionally qualified by a data schema, to payload models.
+
+    A model registered for an event type and a data schema takes precedence over a
+    model registered for the event type alone. Lookups are cached.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._models: Dict[_ModelKey, Model] = {}
+        self._cache = _lookup_cache()
+
+    def register(self, event_type: str, model: Model, data_schema: Optional[str] = None) -> None:
+        """Register the payload model of an event type.
+
+        Args:
+            event_type (str): The event type.
+            model (Model): The pydantic model of the payload.
+            data_schema (str, optional): Only use the model for events with this data schema.
+        """
+        with self._lock:
+            self._models[(event_type, data_schema)] = model
+            self._cache = _lookup_cache()
+
+    def unregister(self, event_type: str, data_schema: Optional[str] = None) -> None:
+        with self._lock:
+            self._models.pop((event_type, data_schema), None)
+            self._cache = _lookup_cache()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models = {}
+            self._cache = _lookup_cache()
+
+    def model_for(self, event_type: Optional[str], data_schema: Optional[str] = None) -> Optional[Model]:
+        """Return the payload model for an event type, if there's one.
+
+        Args:
+            event_type (str, optional): The event type.
+            data_schema (str, optional): The data schema of the event.
+
+        Returns:
+            Optional[Model]: The model.
+        """
+        if event_type is None:
+            return None
+
+        key = (event_type, data_schema)
+        cache = self._cache
+        model = cache.get(key, _not_cached)
+        if model is not _not_cached:
+            return model
+
+        model = self._models.get(key)
+        if model is None and data_schema is not None:
+            model = self._models.get((event_type, None))
+
+        return cache.add(key, model)
+
+
+payload_models = PayloadModelRegistry()
+
+
+def payload_model(
+    event_type: str, data_schema: Optional[str] = None, registry: PayloadModelRegistry = payload_models,
+) -> Callable[[M], M]:
+    """A decorator that registers the decorated model as the payload model of an event type.
+
+    Args:
+        event_type (str): The event type.
+        data_schema (str, optional): Only use the model for events with this data schema.
+        registry (PayloadModelRegistry): The model registry. Defaults to the global registry.
+
+    Returns:
+        Callable[[M], M]: The decorator.
+    """
+
+    def payload_model_decorator(model: M) -> M:
+        registry.register(event_type, model, data_schema)
+        return model
+
+    return payload_model_decorator
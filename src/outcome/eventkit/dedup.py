@@ -0,0 +1,203 @@
+"""Tools to drop duplicate events before they're dispatched.
+
+According to the spec, the `source` and `id` attributes uniquely identify an event, so
+an event that has the same `source` and `id` as a previous event is a duplicate.
+https://github.com/cloudevents/spec/blob/v1.0/spec.md#id
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union
+
+from outcome.eventkit.dispatch import CloudEventDispatcher, CloudEventHandlerRegistry, cloud_event_handler_registry, dispatch
+from outcome.eventkit.event import CloudEvent
+
+EventKey = Tuple[str, str]
+Clock = Callable[[], float]
+
+default_max_size = 100_000
+default_ttl = 3600
+
+
+class DeduplicationCache:  # noqa: WPS214
+    """A bounded set of `(source, id)` pairs, whose entries expire after a TTL.
+
+    When the cache is full, the least recently seen pair is evicted. Timestamps come
+    from the wall clock by default, so that a persisted cache can be reloaded after a restart.
+    """
+
+    def __init__(self, max_size: int = default_max_size, ttl: Optional[float] = default_ttl, clock: Clock = time.time) -> None:
+        """Creates an empty cache.
+
+        Args:
+            max_size (int): The maximum number of pairs to remember.
+            ttl (float, optional): How long to remember pairs for, in seconds. `None` means forever.
+            clock (Clock): The function that returns the current time. Defaults to `time.time`.
+
+        Raises:
+            ValueError: If the max size is less than 1.
+        """
+        if max_size < 1:
+            raise ValueError('The cache must be able to hold at least one entry')
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+
+        # Maps each pair to the time it was last seen, from the least to the most recently seen
+        self._entries: OrderedDict[EventKey, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: EventKey) -> bool:
+        with self._lock:
+            return self._get(key, self.clock()) is not None
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        if not lookups:
+            return 0
+        return self.hits / lookups
+
+    def add(self, key: EventKey) -> bool:
+        """Add a pair to the cache, if it's not already there.
+
+        Args:
+            key (EventKey): The `(source, id)` pair.
+
+        Returns:
+            bool: True if the pair was added, False if it was already in the cache.
+        """
+        with self._lock:
+            now = self.clock()
+
+            if self._get(key, now) is not None:
+                # The pair is now the most recently seen, and the entries stay ordered by time
+                self._entries[key] = now
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return False
+
+            self.misses += 1
+            self._insert(key, now)
+            return True
+
+    def discard(self, key: EventKey) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _get(self, key: EventKey, now: float) -> Optional[float]:
+        seen_at = self._entries.get(key)
+        if seen_at is not None and self._expired(seen_at, now):
+            del self._entries[key]  # noqa: WPS420
+            return None
+        return seen_at
+
+    def _expired(self, seen_at: float, now: float) -> bool:
+        return self.ttl is not None and now - seen_at > self.ttl
+
+    def _insert(self, key: EventKey, seen_at: float) -> None:
+        self._entries[key] = seen_at
+
+        # Drop expired entries from the least recently seen end, then make room if needed
+        while self._entries:
+            oldest_key, oldest_seen_at = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and not self._expired(oldest_seen_at, seen_at):
+                break
+            del self._entries[oldest_key]  # noqa: WPS420
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Persist the cache to a file, so it can be reloaded after a restart.
+
+        Args:
+            path (Union[str, Path]): The file path.
+        """
+        with self._lock:
+            entries = [[source, event_id, seen_at] for (source, event_id), seen_at in self._entries.items()]
+
+        tmp_path = Path(f'{path}.tmp')
+        tmp_path.write_text(json.dumps(entries))
+        # Replacing the file is atomic, so a crash during a save doesn't lose the previous state
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], **kwargs) -> 'DeduplicationCache':
+        """Create a cache from a file written by `save`.
+
+        Expired entries are skipped, and a missing file results in an empty cache.
+
+        Args:
+            path (Union[str, Path]): The file path.
+            kwargs: Passed to the constructor.
+
+        Returns:
+            DeduplicationCache: The cache.
+        """
+        cache = cls(**kwargs)
+
+        try:
+            entries = json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            return cache
+
+        now = cache.clock()
+        for source, event_id, seen_at in entries:
+            if not cache._expired(seen_at, now):
+                cache._insert((source, event_id), seen_at)
+
+        return cache
+
+
+class Deduplicator:
+    """A dispatch stage that drops events with a `(source, id)` pair that has already been seen.
+
+    If the dispatcher raises an exception, the pair is forgotten, so that the event
+    can be handled when it's redelivered.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[DeduplicationCache] = None,
+        registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+        dispatcher: Optional[CloudEventDispatcher] = None,
+    ) -> None:
+        self.cache = cache if cache is not None else DeduplicationCache()
+        self.dispatcher = dispatcher or functools.partial(dispatch, registry=registry)
+
+    def __call__(self, event: CloudEvent) -> bool:
+        """Dispatch the event, unless it's a duplicate.
+
+        Args:
+            event (CloudEvent): The event.
+
+        Returns:
+            bool: True if the event was dispatched, False if it was dropped.
+        """
+        key = (event.source, event.id)
+
+        if not self.cache.add(key):
+            return False
+
+        try:
+            self.dispatcher(event)
+        except Exception:
+            self.cache.discard(key)
+            raise
+
+        return True
@@ -1,18 +1,259 @@
 """Basic tools to register event handlers and dispatch events."""
 
-from collections import defaultdict
-from typing import Callable, Dict, List
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
 
 from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.filters import Filter, FilterLike, Predicate, as_filter, compile_filter
 
 CloudEventHandler = Callable[[CloudEvent], None]
-CloudEventHandlerRegistry = Dict[str, List[CloudEventHandler]]
+# A dispatcher delivers an event to its handlers, e.g. `dispatch` bound to a registry
+CloudEventDispatcher = Callable[[CloudEvent], None]
+CloudEventHandlers = Tuple[CloudEventHandler, ...]
+# (event type, handler) or (event type, handler, filter)
+HandlerRegistration = Union[Tuple[str, CloudEventHandler], Tuple[str, CloudEventHandler, Optional[FilterLike]]]
 
-cloud_event_handler_registry: CloudEventHandlerRegistry = defaultdict(list)
+_Subscription = Tuple[Optional[Filter], CloudEventHandler]
+# The handlers that share a filter, and the compiled filter (None for unfiltered handlers)
+_Route = Tuple[Optional[Predicate], CloudEventHandlers]
+
+_no_handlers: CloudEventHandlers = ()
+
+
+def _subscription(registration: HandlerRegistration) -> Tuple[str, _Subscription]:
+    event_type, handler, *rest = registration
+    event_filter = rest[0] if rest else None
+    return event_type, (as_filter(event_filter) if event_filter is not None else None, handler)
+
+
+def _routes(subscriptions: Sequence[_Subscription]) -> Tuple[_Route, ...]:
+    # Group the handlers by filter, in order of the first registration of each filter
+    grouped: Dict[Optional[Filter], List[CloudEventHandler]] = {}
+    for event_filter, handler in subscriptions:
+        grouped.setdefault(event_filter, []).append(handler)
+
+    return tuple(
+        (compile_filter(event_filter) if event_filter is not None else None, tuple(handlers))
+        for event_filter, handlers in grouped.items()
+    )
+
+
+class _Snapshot:
+    __slots__ = ('subscriptions', 'handlers', 'routes')
+
+    def __init__(
+        self,
+        subscriptions: Dict[str, Tuple[_Subscription, ...]],
+        handlers: Dict[str, CloudEventHandlers],
+        routes: Dict[str, Tuple[_Route, ...]],
+    ) -> None:
+        # The source of truth, in order of registration
+        self.subscriptions = subscriptions
+        # All of the handlers of each event type
+        self.handlers = handlers
+        # Only for the event types that have filtered handlers
+        self.routes = routes
+
+
+_empty_snapshot = _Snapshot({}, {}, {})
+
+
+class HandlerRegistry(Mapping[str, CloudEventHandlers]):  # noqa: WPS214
+    """A thread-safe registry of event handlers, keyed by event type.
+
+    The registry is copy-on-write: each change builds a new mapping of event types to
+    tuples of handlers, and publishes it by replacing a single reference. Readers
+    always see a consistent snapshot, without taking a lock, and handlers can be
+    (un)registered while events are being dispatched on other threads.
+
+    Handlers can be registered with a filter (see `outcome.eventkit.filters`), and are
+    then only called for the events of their type that match the filter. Handlers with
+    equal filters share a single compiled filter, that's evaluated once per event.
+
+    Writers are serialized with a lock. Changes are relatively expensive, so when
+    replacing a set of handlers, use the bulk methods to publish a single snapshot.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshot = _empty_snapshot
+
+    def handlers(self, event_type: str) -> CloudEventHandlers:
+        """Return the handlers for an event type, regardless of their filters.
+
+        Unknown event types don't modify the registry.
+
+        Args:
+            event_type (str): The event type.
+
+        Returns:
+            CloudEventHandlers: The handlers, in order of registration.
+        """
+        return self._snapshot.handlers.get(event_type, _no_handlers)
+
+    def handlers_for(self, event: CloudEvent) -> Sequence[CloudEventHandler]:
+        """Return the handlers for an event, i.e. for its type, and whose filter matches the event.
+
+        The unfiltered handlers are returned in order of registration. Filtered handlers
+        are grouped by filter, and the groups are in order of their first registration.
+
+        Args:
+            event (CloudEvent): The event.
+
+        Returns:
+            Sequence[CloudEventHandler]: The handlers.
+        """
+        snapshot = self._snapshot
+        routes = snapshot.routes.get(event.type)
+        if routes is None:
+            return snapshot.handlers.get(event.type, _no_handlers)
+
+        matched: List[CloudEventHandler] = []
+        for predicate, handlers in routes:
+            if predicate is None or predicate(event):
+                matched.extend(handlers)
+        return matched
+
+    def snapshot(self) -> Mapping[str, CloudEventHandlers]:
+        """Return a read-only view of the current handlers.
+
+        The view isn't affected by later changes to the registry.
+
+        Returns:
+            Mapping[str, CloudEventHandlers]: The handlers for each event type.
+        """
+        return MappingProxyType(self._snapshot.handlers)
+
+    def register(self, event_type: str, handler: CloudEventHandler, event_filter: Optional[FilterLike] = None) -> None:
+        """Register a handler for an event type.
+
+        Args:
+            event_type (str): The event type.
+            handler (CloudEventHandler): The event handler.
+            event_filter (FilterLike, optional): Only call the handler for events that match the filter.
+        """
+        self.register_many([(event_type, handler, event_filter)])
+
+    def unregister(self, event_type: str, handler: CloudEventHandler, event_filter: Optional[FilterLike] = None) -> None:
+        """Remove a handler for an event type.
+
+        Args:
+            event_type (str): The event type.
+            handler (CloudEventHandler): The event handler.
+            event_filter (FilterLike, optional): The filter the handler was registered with.
+
+        Raises:
+            KeyError: If the handler isn't registered for the event type.
+        """
+        self.unregister_many([(event_type, handler, event_filter)])
+
+    def register_many(self, registrations: Iterable[HandlerRegistration]) -> None:
+        """Register several handlers, in a single change.
+
+        Args:
+            registrations (Iterable[HandlerRegistration]): The (event type, handler[, filter]) tuples.
+        """
+        subscriptions = [_subscription(registration) for registration in registrations]
+
+        with self._lock:
+            updated = dict(self._snapshot.subscriptions)
+            for event_type, subscription in subscriptions:
+                updated[event_type] = (*updated.get(event_type, ()), subscription)
+            self._publish(self._snapshot, updated, {event_type for event_type, _ in subscriptions})
+
+    def unregister_many(self, registrations: Iterable[HandlerRegistration]) -> None:
+        """Remove several handlers, in a single change.
+
+        If any of the handlers isn't registered, the registry isn't changed.
+
+        Args:
+            registrations (Iterable[HandlerRegistration]): The (event type, handler[, filter]) tuples.
+
+        Raises:
+            KeyError: If a handler isn't registered for its event type.
+        """
+        subscriptions = [_subscription(registration) for registration in registrations]
+
+        with self._lock:
+            updated = dict(self._snapshot.subscriptions)
+            for event_type, subscription in subscriptions:
+                event_type_subscriptions = list(updated.get(event_type, ()))
+                try:
+                    event_type_subscriptions.remove(subscription)
+                except ValueError:
+                    raise KeyError(f'Handler not registered for {event_type}: {subscription[1]!r}')
+
+                if event_type_subscriptions:
+                    updated[event_type] = tuple(event_type_subscriptions)
+                else:
+                    updated.pop(event_type)
+            self._publish(self._snapshot, updated, {event_type for event_type, _ in subscriptions})
+
+    def replace(self, registrations: Iterable[HandlerRegistration]) -> None:
+        """Replace all of the handlers, in a single change.
+
+        This is useful to reload the handlers of a long-running process: events that
+        are dispatched concurrently go to either the previous or the new handlers.
+
+        Args:
+            registrations (Iterable[HandlerRegistration]): The (event type, handler[, filter]) tuples.
+        """
+        updated: Dict[str, Tuple[_Subscription, ...]] = {}
+        for registration in registrations:
+            event_type, subscription = _subscription(registration)
+            updated[event_type] = (*updated.get(event_type, ()), subscription)
+
+        with self._lock:
+            # The new snapshot is built from scratch, and replaces the previous one in a single assignment
+            self._publish(_empty_snapshot, updated, set(updated))
+
+    def clear(self) -> None:
+        """Remove all of the handlers."""
+        with self._lock:
+            self._snapshot = _empty_snapshot
+
+    def __getitem__(self, event_type: str) -> CloudEventHandlers:
+        return self._snapshot.handlers[event_type]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.handlers)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.handlers)
+
+    def _publish(
+        self, base: _Snapshot, subscriptions: Dict[str, Tuple[_Subscription, ...]], changed_event_types: Set[str],
+    ) -> None:
+        # Only the changed event types are rebuilt, the others are shared with the base snapshot
+        handlers = dict(base.handlers)
+        routes = dict(base.routes)
+
+        for event_type in changed_event_types:
+            handlers.pop(event_type, None)
+            routes.pop(event_type, None)
+
+            event_type_subscriptions = subscriptions.get(event_type)
+            if not event_type_subscriptions:
+                continue
+
+            handlers[event_type] = tuple(handler for _, handler in event_type_subscriptions)
+            if any(event_filter is not None for event_filter, _ in event_type_subscriptions):
+                routes[event_type] = _routes(event_type_subscriptions)
+
+        self._snapshot = _Snapshot(subscriptions, handlers, routes)
+
+
+CloudEventHandlerRegistry = HandlerRegistry
+
+cloud_event_handler_registry = HandlerRegistry()
 
 
 def register_handler(
-    event_type: str, handler: CloudEventHandler, registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+    event_type: str,
+    handler: CloudEventHandler,
+    registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+    filter: Optional[FilterLike] = None,  # noqa: WPS125
 ) -> None:
     """Register a handler for an event type.
 
@@ -20,24 +261,29 @@ def register_handler(
         event_type (str): The event type
         handler (CloudEventHandler): The event handler.
         registry (CloudEventHandlerRegistry): The handler registry. Defaults to the global registry.
+        filter (FilterLike, optional): Only call the handler for events that match the filter.
     """
-    registry[event_type].append(handler)
+    registry.register(event_type, handler, filter)
 
 
-def handles_events(*event_types: str, registry: CloudEventHandlerRegistry = cloud_event_handler_registry):
+def handles_events(
+    *event_types: str,
+    registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+    filter: Optional[FilterLike] = None,  # noqa: WPS125
+):
     """A decorator that registers the decorated function as a handler for the specified event types.
 
     Args:
         event_types (*str): The event types.
         registry (CloudEventHandlerRegistry): The handler registry. Defaults to the global registry.
+        filter (FilterLike, optional): Only call the handler for events that match the filter.
 
     Returns:
         Callable[[CloudEventHandler], CloudEventHandler]: The decorator.
     """
 
     def handles_events_decorator(fn: CloudEventHandler) -> CloudEventHandler:
-        for event_type in event_types:
-            register_handler(event_type, fn, registry)
+        registry.register_many((event_type, fn, filter) for event_type in event_types)
 
         return fn
 
@@ -45,11 +291,24 @@ def handles_events(*event_types: str, registry: CloudEventHandlerRegistry = clou
 
 
 def dispatch(event: CloudEvent, registry: CloudEventHandlerRegistry = cloud_event_handler_registry) -> None:
-    """Send an event to all of the registered handlers.
+    """Send an event to all of the registered handlers, whose filter matches the event.
 
     Args:
         event (CloudEvent): The event to dispatch.
         registry (CloudEventHandlerRegistry): The handler registry. Defaults to the global registry.
     """
-    for handler in cloud_event_handler_registry[event.type]:
+    for handler in registry.handlers_for(event):
         handler(event)
+
+
+def has_handlers(event_type: str, registry: CloudEventHandlerRegistry = cloud_event_handler_registry) -> bool:
+    """Check whether any handlers are registered for an event type.
+
+    Args:
+        event_type (str): The event type.
+        registry (CloudEventHandlerRegistry): The handler registry. Defaults to the global registry.
+
+    Returns:
+        bool: True if there's at least one handler.
+    """
+    return bool(registry.handlers(event_type))
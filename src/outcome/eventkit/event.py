@@ -7,9 +7,12 @@ import uuid
 import pendulum
 import pydantic
 from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.extensions import Extensions, extension_types, no_extensions, split_attributes
 
 non_empty_string = pydantic.constr(strip_whitespace=True, min_length=1)
 
+_non_attribute_keys = frozenset(('data',))
+
 
 def generate_event_id() -> str:
     return str(uuid.uuid4())
@@ -63,6 +66,38 @@ class CloudEventV1_0(pydantic.BaseModel):  # noqa: N801, WPS214
     # Data in its decoded form, i.e. some object
     data: typing.Optional[CloudEventData] = None
 
+    # The extension attributes aren't validated by pydantic, and are only allocated if there are any
+    _extensions: typing.Optional[typing.Dict[str, typing.Any]] = pydantic.PrivateAttr(None)
+
+    def __init__(__pydantic_self__, extensions: typing.Optional[typing.Mapping[str, typing.Any]] = None, **data) -> None:  # noqa: N805
+        super().__init__(**data)
+        if extensions:
+            __pydantic_self__._extensions = extension_types.validate(extensions)
+
+    @classmethod
+    def from_attributes(cls, attributes: typing.Dict[str, typing.Any]) -> 'CloudEventV1_0':
+        """Create an event from its attributes, as named in the spec, separating the extensions.
+
+        Args:
+            attributes (Dict[str, Any]): The attributes, and the data. The dict is modified.
+
+        Returns:
+            CloudEventV1_0: The event.
+        """
+        attributes, extensions = split_attributes(attributes)
+        return cls(extensions=extensions, **attributes)
+
+    @property
+    def extensions(self) -> Extensions:
+        if self._extensions is None:
+            return no_extensions
+        return self._extensions
+
+    def __eq__(self, o: typing.Any) -> bool:
+        if isinstance(o, CloudEventV1_0) and o._extensions != self._extensions:  # noqa: WPS437
+            return False
+        return super().__eq__(o)
+
     @pydantic.validator('data')
     def validate_data(cls, value, values) -> CloudEventData:  # noqa: N805
         if value is not None:
@@ -71,10 +106,13 @@ class CloudEventV1_0(pydantic.BaseModel):  # noqa: N801, WPS214
 
     @property
     def attributes(self) -> typing.Dict[str, typing.Any]:
-        non_attribute_keys = {'data'}
-        attributes = {
-            attr: value for attr, value in self.dict(by_alias=True, exclude_none=True).items() if attr not in non_attribute_keys
-        }
+        # The attributes are read directly, instead of with `.dict()`, which also copies the data
+        attributes = {}
+        for name, field in self.__fields__.items():
+            if name not in _non_attribute_keys:
+                attribute_value = getattr(self, name)
+                if attribute_value is not None:
+                    attributes[field.alias] = attribute_value
 
         if self.data:
             if self.data.data_content_type is not None:
@@ -82,6 +120,9 @@ class CloudEventV1_0(pydantic.BaseModel):  # noqa: N801, WPS214
             if self.data.data_schema is not None:
                 attributes['dataschema'] = self.data.data_schema
 
+        if self._extensions is not None:
+            attributes.update(self._extensions)
+
         return attributes
 
 
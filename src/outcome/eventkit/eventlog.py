@@ -0,0 +1,340 @@
+"""An append-only, newline-delimited log of events, for archival and replay.
+
+Each event is encoded with a `CloudEventFormat` (JSON by default) and written as a
+single line. The log is read through a memory map, so iterating over it doesn't
+require reading the whole file into memory.
+
+A sparse index of `(time, offset)` pairs is written alongside the log, every
+`index_interval` events. Replay can then seek to a timestamp with a binary search,
+instead of decoding every event in the log. The index assumes that events are
+appended in (roughly) chronological order.
+"""
+
+import bisect
+import datetime
+import mmap
+import os
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from outcome.eventkit.compact import AnyCloudEvent
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.formats import CloudEventFormat
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+
+PathLike = Union[str, Path]
+
+_record_separator = b'\n'
+_index_suffix = '.idx'
+
+default_buffer_size = 1024 * 1024
+default_index_interval = 1000
+
+_repair_chunk_size = 64 * 1024
+
+
+def index_path(path: PathLike) -> Path:
+    return Path(f'{path}{_index_suffix}')
+
+
+def _complete_size(log_file: IO[bytes]) -> int:
+    # The size of the log up to the end of its last complete record
+    end = log_file.seek(0, os.SEEK_END)
+    while end > 0:
+        start = max(0, end - _repair_chunk_size)
+        log_file.seek(start)
+        boundary = log_file.read(end - start).rfind(_record_separator)
+        if boundary >= 0:
+            return start + boundary + 1
+        end = start
+    return 0
+
+
+def _drop_incomplete_record(path: Path) -> None:
+    # A crash can leave an incomplete record at the end of the log. It's truncated, or the
+    # records appended after it would be unreadable, and so are the index entries that point past it
+    try:
+        log_file = open(path, 'r+b')  # noqa: WPS515
+    except FileNotFoundError:
+        return
+
+    with log_file:
+        size = log_file.seek(0, os.SEEK_END)
+        complete_size = _complete_size(log_file)
+        if complete_size == size:
+            return
+        log_file.truncate(complete_size)
+
+    try:
+        index_lines = index_path(path).read_text().splitlines()
+    except FileNotFoundError:
+        return
+
+    kept_lines = []
+    for line in index_lines:
+        _, _, offset = line.partition(' ')
+        if offset.isdigit() and int(offset) < complete_size:
+            kept_lines.append(f'{line}\n')
+    index_path(path).write_text(''.join(kept_lines))
+
+
+class EventLogWriter:
+    """Appends events to a log file, through a write buffer.
+
+    The writer can be used as a context manager, the log is flushed and closed on exit.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        event_format: Type[CloudEventFormat] = JSONCloudEventFormat,
+        buffer_size: int = default_buffer_size,
+        index_interval: int = default_index_interval,
+    ) -> None:
+        """Opens the log for appending, creating it if needed.
+
+        An incomplete record at the end of the log (e.g. after a crash) is truncated.
+
+        Args:
+            path (PathLike): The path of the log.
+            event_format (Type[CloudEventFormat]): The format used to encode the events. Defaults to JSON.
+            buffer_size (int): The size of the write buffer, in bytes. Defaults to 1MiB.
+            index_interval (int): The number of events between each index entry. Defaults to 1000.
+        """
+        self.path = Path(path)
+        self.event_format = event_format
+        self.index_interval = index_interval
+
+        _drop_incomplete_record(self.path)
+
+        self._file: IO[bytes] = open(self.path, 'ab', buffering=buffer_size)  # noqa: WPS515
+        self._index_file: IO[str] = open(index_path(self.path), 'a')  # noqa: WPS515
+        self._offset = self._file.tell()
+        self._since_index_entry = index_interval
+
+    def __enter__(self) -> 'EventLogWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def append(self, event: AnyCloudEvent) -> int:
+        """Append an event to the log.
+
+        Args:
+            event (AnyCloudEvent): The event.
+
+        Returns:
+            int: The offset of the event in the log.
+
+        Raises:
+            ValueError: If the encoded event contains a line break.
+        """
+        return self.append_record(self.event_format.encode(event), event.time)
+
+    def append_record(self, record: Union[bytes, str], time: Optional[datetime.datetime] = None) -> int:
+        """Append an event that's already encoded with the log's format.
+
+        Args:
+            record (Union[bytes, str]): The encoded event.
+            time (datetime.datetime, optional): The time of the event, for the index.
+
+        Returns:
+            int: The offset of the event in the log.
+
+        Raises:
+            ValueError: If the encoded event contains a line break.
+        """
+        if isinstance(record, str):
+            record = record.encode('utf-8')
+
+        if _record_separator in record:
+            raise ValueError('Encoded events cannot contain line breaks')
+
+        offset = self._offset
+        self._file.write(record + _record_separator)
+        self._offset += len(record) + 1
+
+        if self._since_index_entry >= self.index_interval and time is not None:
+            self._index_file.write(f'{time.timestamp()!r} {offset}\n')
+            self._since_index_entry = 0
+        self._since_index_entry += 1
+
+        return offset
+
+    def extend(self, events: Iterable[AnyCloudEvent]) -> None:
+        for event in events:
+            self.append(event)
+
+    def flush(self) -> None:
+        # The log is flushed first, so that the index never points past the end of the log
+        self._file.flush()
+        self._index_file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+        self._index_file.close()
+
+
+class EventLogReader:
+    """Reads events from a log file, through a memory map.
+
+    The reader can be used as a context manager, the memory map is closed on exit.
+    """
+
+    def __init__(self, path: PathLike, event_format: Type[CloudEventFormat] = JSONCloudEventFormat) -> None:
+        self.path = Path(path)
+        self.event_format = event_format
+
+        self._file = open(self.path, 'rb')  # noqa: WPS515
+        self._map: Optional[mmap.mmap] = None
+        if self.path.stat().st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._index_times: List[float] = []
+        self._index_offsets: List[int] = []
+        self._load_index()
+
+    def __enter__(self) -> 'EventLogReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[CloudEvent]:
+        return self.read()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    @property
+    def size(self) -> int:
+        return len(self._map) if self._map is not None else 0
+
+    def _load_index(self) -> None:
+        try:
+            index_lines = index_path(self.path).read_text().splitlines()
+        except FileNotFoundError:
+            return
+
+        for line in index_lines:
+            try:
+                timestamp, offset = line.split(' ')
+                entry = (float(timestamp), int(offset))
+            except ValueError:
+                # An incomplete line, the writer didn't flush the index
+                continue
+
+            # The writer flushes the log before the index, but the log
+            # could have been truncated since then
+            if entry[1] < self.size:
+                self._index_times.append(entry[0])
+                self._index_offsets.append(entry[1])
+
+    def records(self, offset: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """Iterate over the raw records in the log.
+
+        An incomplete record at the end of the log (e.g. after a crash) is ignored.
+
+        Args:
+            offset (int): The offset to start at, which must be the start of a record. Defaults to 0.
+            end (int, optional): Stop at the first record that starts at or after this offset.
+
+        Yields:
+            Tuple[int, bytes]: The offset of each record, and the encoded event.
+        """
+        if self._map is None:
+            return
+
+        log_map = self._map
+        if end is None:
+            end = len(log_map)
+
+        while offset < end:
+            record_end = log_map.find(_record_separator, offset)
+            if record_end < 0:
+                return
+            yield offset, log_map[offset:record_end]
+            offset = record_end + 1
+
+    def read_range(self, start: int, end: int) -> Iterator[CloudEvent]:
+        """Iterate over the events in a range of the log, e.g. returned by `split`.
+
+        Args:
+            start (int): The offset to start at, which must be the start of a record.
+            end (int): Stop at the first record that starts at or after this offset.
+
+        Yields:
+            CloudEvent: The events.
+        """
+        for _, record in self.records(start, end):
+            yield self.event_format.decode(record)
+
+    def split(self, chunks: int) -> List[Tuple[int, int]]:
+        """Split the log into ranges of whole records, of roughly equal sizes.
+
+        Args:
+            chunks (int): The maximum number of ranges.
+
+        Returns:
+            List[Tuple[int, int]]: The (start, end) offsets of each range.
+
+        Raises:
+            ValueError: If the number of ranges is less than 1.
+        """
+        if chunks < 1:
+            raise ValueError('The log must be split into at least one range')
+
+        ranges: List[Tuple[int, int]] = []
+        if self._map is None:
+            return ranges
+
+        chunk_size = max(1, self.size // chunks)
+        start = 0
+        while start < self.size:
+            boundary = self._map.find(_record_separator, min(start + chunk_size, self.size) - 1)
+            end = self.size if boundary < 0 else boundary + 1
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    def read(self, offset: int = 0) -> Iterator[CloudEvent]:
+        """Iterate over the events in the log.
+
+        Args:
+            offset (int): The offset to start at, which must be the start of a record. Defaults to 0.
+
+        Yields:
+            CloudEvent: The events.
+        """
+        for _, record in self.records(offset):
+            yield self.event_format.decode(record)
+
+    def read_from(self, time: datetime.datetime) -> Iterator[CloudEvent]:
+        """Iterate over the events in the log, starting at the first event at or after `time`.
+
+        The index is used to skip to the last indexed event before `time`, the events
+        that follow it are decoded until an event at or after `time` is found.
+
+        Args:
+            time (datetime.datetime): The time to start at.
+
+        Yields:
+            CloudEvent: The events.
+        """
+        timestamp = time.timestamp()
+        position = bisect.bisect_left(self._index_times, timestamp)
+        offset = self._index_offsets[position - 1] if position else 0
+
+        records = self.records(offset)
+        for _, record in records:
+            event = self.event_format.decode(record)
+            if event.time is not None and event.time.timestamp() >= timestamp:
+                yield event
+                break
+
+        for _, record in records:  # noqa: WPS440
+            yield self.event_format.decode(record)
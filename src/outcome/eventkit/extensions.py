@@ -0,0 +1,234 @@
+"""CloudEvents extension attributes.
+
+Extension attributes (e.g. `traceparent`, `partitionkey` or `sequence`) aren't fields
+of the `CloudEvent` model, so they don't go through pydantic validation. They're kept
+in a separate mapping, that's only allocated for events that have extensions:
+
+```py
+event = CloudEvent(type='co.outcome.invoice.created', source='billing', extensions={'partitionkey': 'customer-1'})
+event.extensions['partitionkey']
+```
+
+Extensions are validated by the validator registered for their name, which is looked
+up once per extension. The validators also convert the string representation used
+by protocol bindings (e.g. an HTTP header) to the type of the extension. Extensions
+that aren't registered can have any of the types of the CloudEvents type system.
+
+See https://github.com/cloudevents/spec/blob/v1.0/spec.md#extension-context-attributes
+"""
+
+import base64
+import datetime
+import re
+import threading
+import types
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
+
+import pendulum
+
+ExtensionValue = Union[str, int, bool, bytes, datetime.datetime]
+ExtensionValidator = Callable[[Any], ExtensionValue]
+Extensions = Mapping[str, ExtensionValue]
+
+# The mapping of events without extensions
+no_extensions: Extensions = types.MappingProxyType({})
+
+# The attributes and members that aren't extensions, as named in the spec
+reserved_names = frozenset(  # noqa: WPS407
+    ('id', 'source', 'specversion', 'type', 'subject', 'time', 'datacontenttype', 'dataschema', 'data', 'data_base64'),
+)
+
+# The spec requires lowercase alphanumeric names, and recommends at most 20 characters
+_name_pattern = re.compile('[a-z0-9]{1,20}')
+
+_min_integer = -(2 ** 31)
+_max_integer = 2 ** 31 - 1
+
+
+class ExtensionError(ValueError):
+    ...
+
+
+def validate_string(extension_value: Any) -> str:
+    if not isinstance(extension_value, str):
+        raise ExtensionError(f'Expected a string: {extension_value!r}')
+    return extension_value
+
+
+def validate_integer(extension_value: Any) -> int:
+    if isinstance(extension_value, str):
+        try:
+            extension_value = int(extension_value)
+        except ValueError:
+            raise ExtensionError(f'Expected an integer: {extension_value!r}')
+
+    if isinstance(extension_value, bool) or not isinstance(extension_value, int):
+        raise ExtensionError(f'Expected an integer: {extension_value!r}')
+    if not _min_integer <= extension_value <= _max_integer:
+        raise ExtensionError(f'Integer out of range: {extension_value!r}')
+    return extension_value
+
+
+def validate_boolean(extension_value: Any) -> bool:
+    if isinstance(extension_value, bool):
+        return extension_value
+    if extension_value in {'true', 'false'}:
+        return extension_value == 'true'
+    raise ExtensionError(f'Expected a boolean: {extension_value!r}')
+
+
+def validate_uri(extension_value: Any) -> str:
+    extension_value = validate_string(extension_value)
+    if ':' not in extension_value:
+        raise ExtensionError(f'Expected an absolute URI: {extension_value!r}')
+    return extension_value
+
+
+def validate_timestamp(extension_value: Any) -> datetime.datetime:
+    if isinstance(extension_value, str):
+        try:
+            return pendulum.parse(extension_value)
+        except ValueError:
+            raise ExtensionError(f'Expected a timestamp: {extension_value!r}')
+    if isinstance(extension_value, datetime.datetime):
+        return pendulum.instance(extension_value)
+    raise ExtensionError(f'Expected a timestamp: {extension_value!r}')
+
+
+def validate_binary(extension_value: Any) -> bytes:
+    if isinstance(extension_value, str):
+        try:
+            return base64.b64decode(extension_value, validate=True)
+        except ValueError:
+            raise ExtensionError(f'Expected base64 encoded bytes: {extension_value!r}')
+    if isinstance(extension_value, bytes):
+        return extension_value
+    raise ExtensionError(f'Expected bytes: {extension_value!r}')
+
+
+def validate_any(extension_value: Any) -> ExtensionValue:
+    """The validator of unregistered extensions, that accepts any type of the type system."""
+    if isinstance(extension_value, (str, bool, bytes)):
+        return extension_value
+    if isinstance(extension_value, int):
+        return validate_integer(extension_value)
+    if isinstance(extension_value, datetime.datetime):
+        return pendulum.instance(extension_value)
+    raise ExtensionError(f'Unsupported extension value: {extension_value!r}')
+
+
+def to_string(extension_value: ExtensionValue) -> str:
+    """The canonical string representation of a value, e.g. for HTTP headers.
+
+    Args:
+        extension_value (ExtensionValue): The value.
+
+    Returns:
+        str: The string.
+    """
+    if isinstance(extension_value, str):
+        return extension_value
+    if isinstance(extension_value, bool):
+        return 'true' if extension_value else 'false'
+    if isinstance(extension_value, bytes):
+        return base64.b64encode(extension_value).decode('utf-8')
+    if isinstance(extension_value, datetime.datetime):
+        return pendulum.instance(extension_value).isoformat()
+    return str(extension_value)
+
+
+def to_json(extension_value: ExtensionValue) -> Union[str, int, bool]:
+    """The representation of a value in the JSON format, where booleans and integers are native."""
+    if isinstance(extension_value, (bool, int)):
+        return extension_value
+    return to_string(extension_value)
+
+
+class ExtensionRegistry:
+    """Maps extension names to their validators."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._validators: Dict[str, ExtensionValidator] = {}
+
+    def register(self, name: str, validator: ExtensionValidator) -> None:
+        """Register the validator of an extension.
+
+        Args:
+            name (str): The name of the extension.
+            validator (ExtensionValidator): Validates a value, and returns it converted to the type of the extension.
+
+        Raises:
+            ExtensionError: If the name isn't a valid extension name.
+        """
+        check_name(name)
+        with self._lock:
+            # Copied on write, so lookups don't need the lock
+            self._validators = {**self._validators, name: validator}
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            validators = dict(self._validators)
+            validators.pop(name, None)
+            self._validators = validators
+
+    def validator(self, name: str) -> ExtensionValidator:
+        return self._validators.get(name, validate_any)
+
+    def validate(self, extensions: Mapping[str, Any]) -> Optional[Dict[str, ExtensionValue]]:
+        """Validate extensions.
+
+        Args:
+            extensions (Mapping[str, Any]): The extensions.
+
+        Returns:
+            Optional[Dict[str, ExtensionValue]]: The validated extensions, or None if there are none.
+
+        Raises:
+            ExtensionError: If an extension is invalid.
+        """
+        if not extensions:
+            return None
+
+        validators = self._validators
+        validated = {}
+        for name, extension_value in extensions.items():
+            validator = validators.get(name)
+            if validator is None:
+                check_name(name)
+                validator = validate_any
+            validated[name] = validator(extension_value)
+        return validated
+
+
+def check_name(name: str) -> None:
+    if name in reserved_names or not _name_pattern.fullmatch(name):
+        raise ExtensionError(f'Invalid extension name: {name!r}')
+
+
+def split_attributes(attributes: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Separate the extensions from the other attributes of an event.
+
+    Args:
+        attributes (Dict[str, Any]): The attributes, as named in the spec, which are modified.
+
+    Returns:
+        Tuple[Dict[str, Any], Optional[Dict[str, Any]]]: The attributes, and the extensions if there are any.
+    """
+    # The common case is checked with a single set operation
+    if reserved_names.issuperset(attributes):
+        return attributes, None
+
+    extensions = {name: attributes.pop(name) for name in list(attributes) if name not in reserved_names}
+    return attributes, extensions
+
+
+extension_types = ExtensionRegistry()
+
+# The documented extensions, see https://github.com/cloudevents/spec/tree/v1.0/extensions
+extension_types.register('traceparent', validate_string)
+extension_types.register('tracestate', validate_string)
+extension_types.register('partitionkey', validate_string)
+extension_types.register('sequence', validate_string)
+extension_types.register('sequencetype', validate_string)
+extension_types.register('dataref', validate_uri)
@@ -0,0 +1,310 @@
+"""Publish each event to several destinations, serializing it only once.
+
+When the same event is sent to a binary HTTP webhook, a structured archive and a
+Kafka topic, each destination would otherwise compute the attributes of the event,
+encode its data and encode the whole event in a format on its own.
+
+`FanoutPublisher` wraps each event in a `PreparedEvent`, that computes these
+artifacts the first time a destination needs them, and hands the same instance to
+every sink. The cost of an additional sink is then mostly the cost of sending.
+
+```py
+publisher = FanoutPublisher([
+    binary_http_sink(webhook.send),
+    event_log_sink(archive),
+    kafka_sink(broker.produce, topic='invoices', event_format=JSONCloudEventFormat),
+])
+publisher.publish(event)
+```
+"""
+
+import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Type, TypeVar, Union
+
+from outcome.eventkit.compact import AnyCloudEvent
+from outcome.eventkit.data.coder import DecodedData, EncodedData
+from outcome.eventkit.eventlog import EventLogWriter
+from outcome.eventkit.extensions import Extensions
+from outcome.eventkit.formats import CloudEventFormat
+from outcome.eventkit.isolation import handler_name
+from outcome.eventkit.protocol_bindings.content_encoding import default_compression_threshold
+from outcome.eventkit.protocol_bindings.http import BinaryHTTPBinding, HTTPEvent
+from outcome.eventkit.protocol_bindings.kafka import (
+    BinaryKafkaBinding,
+    KafkaMessage,
+    KeyMapper,
+    StructuredKafkaBinding,
+    subject_key,
+)
+
+T = TypeVar('T')
+
+_not_encoded = object()
+
+
+class PreparedData:
+    """The data of a prepared event, that encodes the data at most once."""
+
+    __slots__ = ('data', 'data_content_type', 'data_schema', '_source', '_encoded_data')
+
+    def __init__(self, source: Any) -> None:
+        self.data: DecodedData = source.data
+        self.data_content_type: Optional[str] = source.data_content_type
+        self.data_schema: Optional[str] = source.data_schema
+        self._source = source
+        self._encoded_data: Any = _not_encoded
+
+    @property
+    def encoded_data(self) -> EncodedData:
+        if self._encoded_data is _not_encoded:
+            self._encoded_data = self._source.encoded_data
+        return self._encoded_data
+
+
+class PreparedEvent:  # noqa: WPS214
+    """An event that caches the artifacts computed to send it.
+
+    Prepared events are accepted wherever an event is encoded, and are meant to be
+    short-lived: the event must not be modified once it's prepared.
+    """
+
+    __slots__ = ('event', 'data', '_attributes', '_artifacts')
+
+    def __init__(self, event: AnyCloudEvent) -> None:
+        self.event = event
+        self.data = PreparedData(event.data) if event.data is not None else None
+        self._attributes: Optional[Dict[str, Any]] = None
+        self._artifacts: Dict[Hashable, Any] = {}
+
+    @property
+    def id(self) -> str:  # noqa: WPS125, A003
+        return self.event.id
+
+    @property
+    def source(self) -> str:
+        return self.event.source
+
+    @property
+    def spec_version(self) -> str:
+        return self.event.spec_version
+
+    @property
+    def type(self) -> str:  # noqa: WPS125, A003
+        return self.event.type
+
+    @property
+    def subject(self) -> Optional[str]:
+        return self.event.subject
+
+    @property
+    def time(self) -> Optional[datetime.datetime]:
+        return self.event.time
+
+    @property
+    def data_content_type(self) -> Optional[str]:
+        return self.data.data_content_type if self.data is not None else None
+
+    @property
+    def data_schema(self) -> Optional[str]:
+        return self.data.data_schema if self.data is not None else None
+
+    @property
+    def extensions(self) -> Extensions:
+        return self.event.extensions
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        if self._attributes is None:
+            self._attributes = self.event.attributes
+        # Formats modify the attributes they're given, so each caller gets a copy
+        return dict(self._attributes)
+
+    def artifact(self, key: Hashable, factory: Callable[['PreparedEvent'], T]) -> T:
+        """Return an artifact of the event, computing it the first time it's requested.
+
+        Args:
+            key (Hashable): Identifies the artifact, and the parameters used to compute it.
+            factory (Callable[[PreparedEvent], T]): Computes the artifact from the event.
+
+        Returns:
+            T: The artifact.
+        """
+        try:
+            return self._artifacts[key]
+        except KeyError:
+            artifact = factory(self)
+            self._artifacts[key] = artifact
+            return artifact
+
+    def encoded(self, event_format: Type[CloudEventFormat]) -> Union[bytes, str]:
+        """Return the event encoded in a format, encoding it the first time it's requested."""
+        return self.artifact(('format', event_format), event_format.encode)
+
+
+def prepare(event: Union[AnyCloudEvent, PreparedEvent]) -> PreparedEvent:
+    if isinstance(event, PreparedEvent):
+        return event
+    return PreparedEvent(event)
+
+
+# Sends a prepared event to a destination
+Sink = Callable[[PreparedEvent], Any]
+SinkError = Tuple[Sink, BaseException]
+
+
+class PublishError(Exception):
+    """Raised when at least one sink failed to send an event.
+
+    Attributes:
+        event (AnyCloudEvent): The event.
+        errors (List[SinkError]): The (sink, exception) pairs, in the order of the sinks.
+    """
+
+    def __init__(self, event: AnyCloudEvent, errors: List[SinkError]) -> None:
+        self.event = event
+        self.errors = errors
+        names = ', '.join(handler_name(sink) for sink, _ in errors)
+        super().__init__(f'{len(errors)} sink(s) failed for event {event.id} ({event.type}): {names}')
+
+
+class FanoutPublisher:
+    """Sends each event to all of its sinks, sharing the serialization work between them."""
+
+    def __init__(self, sinks: Iterable[Sink] = ()) -> None:
+        self.sinks: List[Sink] = list(sinks)
+
+    def add_sink(self, sink: Sink) -> None:
+        self.sinks.append(sink)
+
+    def publish(self, event: Union[AnyCloudEvent, PreparedEvent]) -> None:
+        """Send an event to all of the sinks.
+
+        Args:
+            event (Union[AnyCloudEvent, PreparedEvent]): The event.
+
+        Raises:
+            PublishError: If any of the sinks failed, after all of them have been called.
+        """
+        prepared = prepare(event)
+        errors: List[SinkError] = []
+
+        for sink in self.sinks:
+            try:
+                sink(prepared)
+            except Exception as exc:
+                errors.append((sink, exc))
+
+        if errors:
+            raise PublishError(prepared.event, errors)
+
+    def publish_many(self, events: Iterable[Union[AnyCloudEvent, PreparedEvent]]) -> None:
+        for event in events:
+            self.publish(event)
+
+
+def _copy_http_event(http_event: HTTPEvent) -> HTTPEvent:
+    # The body is immutable, the headers are copied so sinks can't affect each other
+    return HTTPEvent(http_event.body, http_event.headers)
+
+
+def binary_http_sink(
+    send: Callable[[HTTPEvent], Any],
+    content_encoding: Optional[str] = None,
+    compression_threshold: int = default_compression_threshold,
+) -> Sink:
+    """A sink that sends events as binary HTTP messages.
+
+    Args:
+        send (Callable[[HTTPEvent], Any]): Sends the HTTP message.
+        content_encoding (str, optional): The content coding used to compress the body.
+        compression_threshold (int): The minimum size of the body to compress, in bytes.
+
+    Returns:
+        Sink: The sink.
+    """
+    key = ('binary-http', content_encoding, compression_threshold)
+
+    def build(prepared: PreparedEvent) -> HTTPEvent:
+        return BinaryHTTPBinding.to_http(prepared, content_encoding, compression_threshold)
+
+    def send_binary_http(prepared: PreparedEvent) -> Any:
+        return send(_copy_http_event(prepared.artifact(key, build)))
+
+    return send_binary_http
+
+
+def structured_http_sink(
+    send: Callable[[HTTPEvent], Any],
+    event_format: Type[CloudEventFormat],
+    content_encoding: Optional[str] = None,
+    compression_threshold: int = default_compression_threshold,
+) -> Sink:
+    """A sink that sends events as structured HTTP messages.
+
+    Args:
+        send (Callable[[HTTPEvent], Any]): Sends the HTTP message.
+        event_format (Type[CloudEventFormat]): The format of the body.
+        content_encoding (str, optional): The content coding used to compress the body.
+        compression_threshold (int): The minimum size of the body to compress, in bytes.
+
+    Returns:
+        Sink: The sink.
+    """
+    if event_format.format_content_type is None:  # pragma: no cover
+        raise ValueError('Event format needs to specify a content type')
+
+    key = ('structured-http', event_format, content_encoding, compression_threshold)
+
+    def build(prepared: PreparedEvent) -> HTTPEvent:
+        http_event = HTTPEvent(prepared.encoded(event_format), {'Content-Type': event_format.format_content_type})
+        http_event.compress(content_encoding, compression_threshold)
+        return http_event
+
+    def send_structured_http(prepared: PreparedEvent) -> Any:
+        return send(_copy_http_event(prepared.artifact(key, build)))
+
+    return send_structured_http
+
+
+def kafka_sink(
+    produce: Callable[[str, KafkaMessage], Any],
+    topic: str,
+    event_format: Optional[Type[CloudEventFormat]] = None,
+    key_mapper: KeyMapper = subject_key,
+) -> Sink:
+    """A sink that produces events to a Kafka topic, e.g. with `LocalBroker.produce`.
+
+    Args:
+        produce (Callable[[str, KafkaMessage], Any]): Produces a message to a topic.
+        topic (str): The topic.
+        event_format (Type[CloudEventFormat], optional): The format of structured messages. Binary messages are
+            produced if there's no format.
+        key_mapper (KeyMapper): Returns the key of the message.
+
+    Returns:
+        Sink: The sink.
+    """
+    if event_format is not None and event_format.format_content_type is None:  # pragma: no cover
+        raise ValueError('Event format needs to specify a content type')
+
+    key = ('kafka', event_format, key_mapper)
+
+    def build(prepared: PreparedEvent) -> KafkaMessage:
+        if event_format is None:
+            return BinaryKafkaBinding.to_kafka(prepared, key_mapper)
+        return StructuredKafkaBinding.to_kafka(prepared, event_format, key_mapper, prepared.encoded(event_format))
+
+    def produce_kafka(prepared: PreparedEvent) -> Any:
+        message = prepared.artifact(key, build)
+        return produce(topic, KafkaMessage(message.value, list(message.headers), message.key))
+
+    return produce_kafka
+
+
+def event_log_sink(writer: EventLogWriter) -> Sink:
+    """A sink that appends events to an event log, in the log's format."""
+
+    def append_to_log(prepared: PreparedEvent) -> int:
+        return writer.append_record(prepared.encoded(writer.event_format), prepared.time)
+
+    return append_to_log
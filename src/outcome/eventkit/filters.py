@@ -0,0 +1,267 @@
+"""Subscription filters, in the style of the CloudEvents Subscriptions API filter dialects.
+
+Filters match events on the values of their attributes:
+
+- `Exact(source='billing')` matches if the attribute is equal to the value
+- `Prefix(type='co.outcome.')` matches if the attribute starts with the value
+- `Suffix(subject='.pdf')` matches if the attribute ends with the value
+- `AllOf(...)`, `AnyOf(...)` and `Not(...)` combine other filters
+
+A filter with several attributes matches if all of the attributes match. Events that
+don't have the attribute never match.
+
+Filters are immutable and hashable, and `compile_filter` turns each distinct filter
+into a predicate once, so subscriptions with equal filters share the same predicate.
+See https://github.com/cloudevents/spec/blob/main/subscriptions/spec.md#324-filters
+"""
+
+import operator
+from typing import Any, Callable, Mapping, Optional, Tuple, Union
+
+from outcome.eventkit.cache import BoundedCache
+from outcome.eventkit.compact import AnyCloudEvent
+from outcome.eventkit.extensions import to_string
+
+Predicate = Callable[[AnyCloudEvent], bool]
+AttributeGetter = Callable[[AnyCloudEvent], Optional[str]]
+
+# The attribute names of the spec, and the corresponding properties of the event classes
+_event_properties = {  # noqa: WPS407
+    'id': 'id',
+    'source': 'source',
+    'specversion': 'spec_version',
+    'type': 'type',
+    'subject': 'subject',
+    'datacontenttype': 'data_content_type',
+    'dataschema': 'data_schema',
+}
+
+
+def _time_getter(event: AnyCloudEvent) -> Optional[str]:
+    if event.time is None:
+        return None
+    return event.time.isoformat()
+
+
+def attribute_getter(attribute: str) -> AttributeGetter:
+    """Return a function that reads the value of an attribute from an event, as a string.
+
+    Args:
+        attribute (str): The name of the attribute.
+
+    Returns:
+        AttributeGetter: The getter.
+    """
+    if attribute == 'time':
+        return _time_getter
+
+    event_property = _event_properties.get(attribute)
+    if event_property is not None:
+        return operator.attrgetter(event_property)
+
+    # Other attributes are extensions, which are compared with their canonical string representation
+    def get_extension(event: AnyCloudEvent) -> Optional[str]:
+        extension_value = event.extensions.get(attribute)
+        return None if extension_value is None else to_string(extension_value)
+
+    return get_extension
+
+
+class Filter:
+    """The base class of filters."""
+
+    __slots__ = ('_key',)
+
+    _key: Tuple[Any, ...]
+
+    def __eq__(self, o: Any) -> bool:
+        return isinstance(o, Filter) and self._key == o._key  # noqa: WPS437
+
+    def __hash__(self) -> int:
+        return hash(self._key)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f'{type(self).__name__}{self._key[1:]!r}'
+
+    def compile(self) -> Predicate:  # noqa: WPS125
+        raise NotImplementedError
+
+
+class _AttributeFilter(Filter):
+    __slots__ = ('attributes',)
+
+    def __init__(self, **attributes: str) -> None:
+        if not attributes:
+            raise ValueError(f'{type(self).__name__} needs at least one attribute')
+
+        for attr_value in attributes.values():
+            if not isinstance(attr_value, str):
+                raise ValueError(f'{type(self).__name__} values must be strings: {attr_value!r}')
+
+        self.attributes = attributes
+        self._key = (type(self).__name__, tuple(sorted(attributes.items())))
+
+    def compile(self) -> Predicate:  # noqa: WPS125
+        predicates = [self._compile_attribute(attribute_getter(attr), attr_value) for attr, attr_value in self.attributes.items()]
+        if len(predicates) == 1:
+            return predicates[0]
+        return _all(predicates)
+
+    def _compile_attribute(self, getter: AttributeGetter, expected: str) -> Predicate:
+        raise NotImplementedError
+
+
+class Exact(_AttributeFilter):
+    __slots__ = ()
+
+    def _compile_attribute(self, getter: AttributeGetter, expected: str) -> Predicate:
+        def exact(event: AnyCloudEvent) -> bool:
+            return getter(event) == expected
+
+        return exact
+
+
+class Prefix(_AttributeFilter):
+    __slots__ = ()
+
+    def _compile_attribute(self, getter: AttributeGetter, expected: str) -> Predicate:
+        def prefix(event: AnyCloudEvent) -> bool:
+            attribute_value = getter(event)
+            return attribute_value is not None and attribute_value.startswith(expected)
+
+        return prefix
+
+
+class Suffix(_AttributeFilter):
+    __slots__ = ()
+
+    def _compile_attribute(self, getter: AttributeGetter, expected: str) -> Predicate:
+        def suffix(event: AnyCloudEvent) -> bool:
+            attribute_value = getter(event)
+            return attribute_value is not None and attribute_value.endswith(expected)
+
+        return suffix
+
+
+class _CompositeFilter(Filter):
+    __slots__ = ('filters',)
+
+    def __init__(self, *filters: 'FilterLike') -> None:
+        if not filters:
+            raise ValueError(f'{type(self).__name__} needs at least one filter')
+
+        self.filters = tuple(as_filter(f) for f in filters)
+        self._key = (type(self).__name__, self.filters)
+
+
+def _all(predicates) -> Predicate:
+    def all_predicates(event: AnyCloudEvent) -> bool:
+        for predicate in predicates:
+            if not predicate(event):
+                return False
+        return True
+
+    return all_predicates
+
+
+class AllOf(_CompositeFilter):
+    __slots__ = ()
+
+    def compile(self) -> Predicate:  # noqa: WPS125
+        predicates = tuple(compile_filter(f) for f in self.filters)
+        if len(predicates) == 1:
+            return predicates[0]
+        return _all(predicates)
+
+
+class AnyOf(_CompositeFilter):
+    __slots__ = ()
+
+    def compile(self) -> Predicate:  # noqa: WPS125
+        predicates = tuple(compile_filter(f) for f in self.filters)
+        if len(predicates) == 1:
+            return predicates[0]
+
+        def any_predicate(event: AnyCloudEvent) -> bool:
+            for predicate in predicates:
+                if predicate(event):
+                    return True
+            return False
+
+        return any_predicate
+
+
+class Not(Filter):
+    __slots__ = ('filter',)
+
+    def __init__(self, negated_filter: 'FilterLike') -> None:
+        self.filter = as_filter(negated_filter)
+        self._key = ('Not', self.filter)
+
+    def compile(self) -> Predicate:  # noqa: WPS125
+        predicate = compile_filter(self.filter)
+
+        def not_predicate(event: AnyCloudEvent) -> bool:
+            return not predicate(event)
+
+        return not_predicate
+
+
+# A filter, or its representation in the Subscriptions API, e.g. {'prefix': {'type': 'co.outcome.'}}
+FilterLike = Union[Filter, Mapping[str, Any]]
+
+_attribute_dialects = {'exact': Exact, 'prefix': Prefix, 'suffix': Suffix}
+_composite_dialects = {'all': AllOf, 'any': AnyOf}
+
+
+def as_filter(filter_like: FilterLike) -> Filter:
+    """Return a filter, parsing it from its Subscriptions API representation if needed.
+
+    Args:
+        filter_like (FilterLike): The filter.
+
+    Returns:
+        Filter: The filter.
+
+    Raises:
+        ValueError: If the filter is invalid.
+    """
+    if isinstance(filter_like, Filter):
+        return filter_like
+
+    if len(filter_like) != 1:
+        raise ValueError(f'A filter must have a single dialect: {filter_like!r}')
+
+    [(dialect, expression)] = filter_like.items()
+
+    if dialect in _attribute_dialects:
+        return _attribute_dialects[dialect](**expression)
+    if dialect in _composite_dialects:
+        return _composite_dialects[dialect](*expression)
+    if dialect == 'not':
+        return Not(expression)
+
+    raise ValueError(f'Unknown filter dialect: {dialect}')
+
+
+max_compiled_filters = 1024
+_compiled: BoundedCache[Filter, Predicate] = BoundedCache(max_compiled_filters)
+
+
+def compile_filter(filter_like: FilterLike) -> Predicate:
+    """Compile a filter into a predicate.
+
+    Equal filters are compiled to the same predicate, as long as they're among the most recently compiled filters.
+
+    Args:
+        filter_like (FilterLike): The filter.
+
+    Returns:
+        Predicate: The predicate.
+    """
+    event_filter = as_filter(filter_like)
+    predicate = _compiled.get(event_filter)
+    if predicate is None:
+        predicate = _compiled.add(event_filter, event_filter.compile())
+    return predicate
+
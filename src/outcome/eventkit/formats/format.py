@@ -1,9 +1,11 @@
 """An abstract implementation of the CloudEvent format spec."""
 
-from typing import ClassVar, Optional, Type, TypeVar, Union
+from typing import ClassVar, Iterable, List, Optional, Type, TypeVar, Union
 
+from outcome.eventkit.compact import AnyCloudEvent
 from outcome.eventkit.event import CloudEvent
-from outcome.eventkit.mime import MIMETypeDict, parse_mime_type
+from outcome.eventkit.lazy import LazyCloudEvent
+from outcome.eventkit.mime import MIMETypeDict, resolve_content_type
 
 T = TypeVar('T')
 
@@ -22,7 +24,7 @@ class CloudEventFormatMeta(type):
     @format_content_type.setter
     def format_content_type(cls, content_type: Optional[str]) -> None:  # noqa: N805
         if content_type:
-            cls._format_content_type = parse_mime_type(content_type).name
+            cls._format_content_type = resolve_content_type(content_type).name
         else:
             cls._format_content_type = None
 
@@ -30,11 +32,43 @@ class CloudEventFormatMeta(type):
 class CloudEventFormat(metaclass=CloudEventFormatMeta):
     # The registry of all known format_content_types
     format_content_types: ClassVar[CloudEventFormatMIMETypeDict] = CloudEventFormatMIMETypeDict()
+    # The registry of the formats that support batches, by batch content type
+    batch_content_types: ClassVar[CloudEventFormatMIMETypeDict] = CloudEventFormatMIMETypeDict()
+
+    # The content type of a batch of events, for formats that support batches
+    batch_content_type: ClassVar[Optional[str]] = None
 
     @classmethod
-    def encode(cls, event: CloudEvent) -> Union[bytes, str]:  # pragma: no cover
+    def encode(cls, event: AnyCloudEvent) -> Union[bytes, str]:  # pragma: no cover
         raise NotImplementedError
 
     @classmethod
     def decode(cls, raw_event: Union[bytes, str]) -> CloudEvent:  # pragma: no cover
         raise NotImplementedError
+
+    @classmethod
+    def encode_batch(cls, events: Iterable[AnyCloudEvent]) -> Union[bytes, str]:  # pragma: no cover
+        raise NotImplementedError
+
+    @classmethod
+    def decode_batch(cls, raw_events: Union[bytes, str]) -> List[CloudEvent]:  # pragma: no cover
+        raise NotImplementedError
+
+    @classmethod
+    def join_batch(cls, raw_events: Iterable[Union[bytes, str]]) -> Union[bytes, str]:  # pragma: no cover
+        # Builds a batch from events that are already encoded with the format
+        raise NotImplementedError
+
+    @classmethod
+    def peek(cls, raw_event: Union[bytes, str]) -> LazyCloudEvent:
+        # Formats that can't read the attributes without decoding the data
+        # can rely on this implementation, which decodes the whole event
+        event = cls.decode(raw_event)
+        return LazyCloudEvent(event.attributes, lambda: event.data)
+
+
+# Register known cloud event format types, they're imported on first lookup
+CloudEventFormat.format_content_types.register_lazy('application/cloudevents+json', 'outcome.eventkit.formats.json:cloud_event_format')
+CloudEventFormat.batch_content_types.register_lazy(
+    'application/cloudevents-batch+json', 'outcome.eventkit.formats.json:cloud_event_format',
+)
@@ -2,23 +2,55 @@
 
 import base64
 import json
-from typing import Dict, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
 
 import pendulum
+import pydantic
+from outcome.eventkit.compact import AnyCloudEvent
 from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.data.models import payload_models
 from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.extensions import to_json
 from outcome.eventkit.formats import CloudEventFormat
-from outcome.eventkit.mime import parse_mime_type
+from outcome.eventkit.formats.json_encoder import EncoderRegistry
+from outcome.eventkit.formats.json_scan import scan_attributes
+from outcome.eventkit.interning import attribute_values
+from outcome.eventkit.lazy import LazyCloudEvent
+from outcome.eventkit.mime import resolve_content_type
 
-content_type_name = parse_mime_type('application/cloudevents+json').name
-json_content_type_name = parse_mime_type('application/json').name
+content_type_name = resolve_content_type('application/cloudevents+json').name
+json_content_type_name = resolve_content_type('application/json').name
+batch_content_type_name = resolve_content_type('application/cloudevents-batch+json').name
+
+encoders = EncoderRegistry(json_content_type_name)
 
 
 class JSONCloudEventFormat(CloudEventFormat):
     @classmethod
-    def encode(cls, event: CloudEvent) -> str:
+    def encode(cls, event: AnyCloudEvent) -> str:
+        encoder = encoders.encoder_for(type(event))
+        if encoder is not None:
+            return encoder(event)
+        return cls.encode_attributes(event)
+
+    @classmethod
+    def encode_attributes(cls, event: AnyCloudEvent) -> str:
+        """Encode an event from its attribute dict, which works for any event class.
+
+        The specialized encoders generated for the event classes have the same output.
+
+        Args:
+            event (AnyCloudEvent): The event.
+
+        Returns:
+            str: The encoded event.
+        """
         payload = event.attributes
 
+        # Extensions are written with their JSON type, e.g. timestamps as strings
+        for name, extension_value in event.extensions.items():
+            payload[name] = to_json(extension_value)
+
         # According to the spec:
         #
         # If the event has data, but has no data content type, then it is assumed
@@ -28,10 +60,14 @@ class JSONCloudEventFormat(CloudEventFormat):
         # If the data content type is JSON, we don't encode the data, since it can
         # just be encoded with the rest of the envelope to form one JSON document.
         # https://github.com/cloudevents/spec/blob/v1.0/spec.md#type-system (last paragraph)
+        model_data = None
         if event.data:
             if event.data_content_type is None or event.data_content_type == json_content_type_name:
                 payload['datacontenttype'] = json_content_type_name
-                payload['data'] = event.data.data  # noqa: WPS204
+                if isinstance(event.data.data, pydantic.BaseModel):
+                    model_data = event.data.data
+                else:
+                    payload['data'] = event.data.data  # noqa: WPS204
             else:
                 payload['data'] = event.data.encoded_data
 
@@ -53,11 +89,43 @@ class JSONCloudEventFormat(CloudEventFormat):
         except KeyError:
             pass
 
-        return json.dumps(payload)
+        encoded_event = json.dumps(payload)
+
+        # Payload models are encoded directly, without converting them to a dict first,
+        # data is always the last member
+        if model_data is not None:
+            encoded_event = f'{encoded_event[:-1]}, "data": {model_data.json()}}}'
+
+        return encoded_event
+
+    @classmethod
+    def encode_batch(cls, events: Iterable[AnyCloudEvent]) -> str:
+        """Encode a batch of events as a JSON array.
+
+        See https://github.com/cloudevents/spec/blob/v1.0/json-format.md#4-json-batch-format
+        """
+        return cls.join_batch(cls.encode(event) for event in events)
+
+    @classmethod
+    def join_batch(cls, raw_events: Iterable[Union[bytes, str]]) -> str:
+        """Build a batch from encoded events, without decoding them."""
+        return f'[{", ".join(raw_event if isinstance(raw_event, str) else raw_event.decode() for raw_event in raw_events)}]'
 
     @classmethod
     def decode(cls, raw_event: Union[bytes, str]) -> CloudEvent:
-        payload: Dict[str] = json.loads(raw_event)
+        return cls.decode_payload(json.loads(raw_event))
+
+    @classmethod
+    def decode_batch(cls, raw_events: Union[bytes, str]) -> List[CloudEvent]:
+        payloads = json.loads(raw_events)
+        if not isinstance(payloads, list):
+            raise ValueError('A JSON batch must be an array of events')
+        return [cls.decode_payload(payload) for payload in payloads]
+
+    @classmethod
+    def decode_payload(cls, payload: Dict[str, Any]) -> CloudEvent:
+        """Decode an event from its parsed JSON object, which is modified."""
+        attribute_values.intern_attributes(payload)
 
         try:
             payload['data'] = base64.b64decode(payload.pop('data_base64')).decode('utf-8')  # noqa: WPS204
@@ -66,18 +134,7 @@ class JSONCloudEventFormat(CloudEventFormat):
 
         # If we have data, we need to unpack it
         if payload.get('data') is not None:
-            data_schema = payload.pop('dataschema', None)
-
-            # if there was no content type, or it was JSON, it's already unpacked
-            data_content_type = payload.pop('datacontenttype', json_content_type_name)
-            if data_content_type == json_content_type_name:
-                payload['data'] = CloudEventData(
-                    data=payload['data'], data_content_type=json_content_type_name, data_schema=data_schema,
-                )
-            else:
-                payload['data'] = CloudEventData.from_encoded(
-                    payload['data'], data_content_type=data_content_type, data_schema=data_schema,
-                )
+            payload['data'] = decode_data(payload)
 
         # Parse with pendulum to get the timezone right
         try:
@@ -85,8 +142,72 @@ class JSONCloudEventFormat(CloudEventFormat):
         except KeyError:
             pass
 
-        return CloudEvent(**payload)
+        return CloudEvent.from_attributes(payload)
+
+    @classmethod
+    def peek(cls, raw_event: Union[bytes, str]) -> LazyCloudEvent:
+        """Read the attributes of the event, without decoding the data.
+
+        The data is only parsed if it's accessed.
+
+        Args:
+            raw_event (Union[bytes, str]): The encoded event.
+
+        Returns:
+            LazyCloudEvent: The event.
+        """
+        if isinstance(raw_event, bytes):
+            raw_event = raw_event.decode('utf-8')
+
+        attributes, deferred_data = scan_attributes(raw_event, data_fields)
+        attribute_values.intern_attributes(attributes)
+
+        def decode_lazy_data() -> Optional[CloudEventData]:  # noqa: WPS430
+            payload = dict(attributes)
+
+            try:
+                payload['data'] = base64.b64decode(deferred_data['data_base64']()).decode('utf-8')
+            except KeyError:
+                if 'data' in deferred_data:
+                    payload['data'] = deferred_data['data']()
+
+            if payload.get('data') is None:
+                return None
+            return decode_data(payload)
+
+        return LazyCloudEvent(attributes, decode_lazy_data, raw_event)
+
+
+def decode_data(payload: Dict[str, Any]) -> CloudEventData:
+    """Build the event data from the payload, removing the data attributes from the payload.
+
+    Args:
+        payload (Dict[str, Any]): The decoded JSON payload, with the (base64 decoded) data in `data`.
+
+    Returns:
+        CloudEventData: The event data.
+    """
+    data_schema = payload.pop('dataschema', None)
+    event_type = payload.get('type')
+
+    # if there was no content type, or it was JSON, it's already unpacked
+    data_content_type = payload.pop('datacontenttype', json_content_type_name)
+    if data_content_type == json_content_type_name:
+        data = payload['data']
+
+        model = payload_models.model_for(event_type, data_schema)
+        if model is not None:
+            data = model.parse_obj(data)
+
+        return CloudEventData(data=data, data_content_type=json_content_type_name, data_schema=data_schema)
+
+    return CloudEventData.from_encoded(
+        payload['data'], data_content_type=data_content_type, data_schema=data_schema, event_type=event_type,
+    )
+
 
+data_fields = frozenset(('data', 'data_base64'))
 
 JSONCloudEventFormat.format_content_type = content_type_name
+JSONCloudEventFormat.batch_content_type = batch_content_type_name
 cloud_event_format = JSONCloudEventFormat
@@ -0,0 +1,230 @@
+"""Specialized JSON encoders, generated once per event class (and per set of extensions).
+
+`JSONCloudEventFormat.encode_attributes` works for any event: it builds the attribute
+dict of the event, patches the data, time and extension members, and encodes the dict
+with `json.dumps`. For `CloudEvent`, building the attribute dict loops over the pydantic
+fields of the class, and `json.dumps` checks the type of every value it writes.
+
+The attributes of the event classes are fixed, so the encoder of each class is
+generated as a function that reads the attributes directly and writes the members
+of the JSON object in a single pass, in the same order and with the same output as
+`encode_attributes`. The extensions of an event are written by an encoder specialized
+for their names, which is also created once.
+"""
+
+import base64
+import json
+import threading
+from json.encoder import encode_basestring_ascii
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pendulum
+import pydantic
+from outcome.eventkit.cache import BoundedCache
+from outcome.eventkit.compact import AnyCloudEvent, CompactCloudEvent
+from outcome.eventkit.event import CloudEventV1_0
+from outcome.eventkit.extensions import ExtensionValue, Extensions, to_json
+
+Encoder = Callable[[AnyCloudEvent], str]
+
+
+class EncodedAttribute(NamedTuple):
+    # The name of the attribute in the spec, e.g. `specversion`
+    name: str
+    # The property of the event that holds the value, e.g. `spec_version`
+    event_property: str
+    # Attributes that can be None are omitted when they are
+    optional: bool
+
+
+def model_attributes(model: type) -> List[EncodedAttribute]:
+    """The attributes of a pydantic event model, in the order of its fields."""
+    return [
+        EncodedAttribute(field.alias, name, field.allow_none)
+        for name, field in model.__fields__.items()
+        if name != 'data'  # noqa: WPS510
+    ]
+
+
+_header = '''def encode_event(event):
+    parts = []
+    append = parts.append
+'''
+
+# The data attributes, the extensions and the data, see JSONCloudEventFormat.encode_attributes
+_data_members = '''    data = event.data
+    if data is not None:
+        data_content_type = data.data_content_type
+        data_schema = data.data_schema
+        if data_content_type is not None:
+            append(', "datacontenttype": ')
+            append(_string(data_content_type))
+        if data_schema is not None:
+            append(', "dataschema": ')
+            append(_string(data_schema))
+
+    extensions = event._extensions
+    if extensions is not None:
+        append(_encode_extensions(extensions))
+
+    if data is not None:
+        if data_content_type is None or data_content_type == _json_content_type:
+            if data_content_type is None:
+                append(_json_content_type_member)
+            value = data.data
+            if isinstance(value, _BaseModel):
+                append(', "data": ')
+                append(value.json())
+                append('}')
+                return ''.join(parts)
+        else:
+            value = data.encoded_data
+
+        if isinstance(value, bytes):
+            append(', "data_base64": "')
+            append(_b64encode(value).decode('utf-8'))
+            append('"}')
+            return ''.join(parts)
+
+        append(', "data": ')
+        append(_dumps(value))
+
+    append('}')
+    return ''.join(parts)
+'''
+
+# The encoders of the sets of extension names
+max_extension_encoders = 1024
+_extension_encoders: BoundedCache[Tuple[str, ...], Callable[[Extensions], str]] = BoundedCache(max_extension_encoders)
+
+
+def _extension_value(extension_value: ExtensionValue) -> str:
+    if extension_value.__class__ is str:
+        return encode_basestring_ascii(extension_value)
+    return json.dumps(to_json(extension_value))
+
+
+def _extension_set_encoder(names: Tuple[str, ...]) -> Callable[[Extensions], str]:
+    # The members are written with their names already encoded
+    members = tuple((name, f', {encode_basestring_ascii(name)}: ') for name in names)
+
+    def encode_extensions(extensions: Extensions) -> str:  # noqa: WPS430
+        parts = []
+        for name, member in members:
+            parts.append(member)
+            parts.append(_extension_value(extensions[name]))
+        return ''.join(parts)
+
+    return encode_extensions
+
+
+def _encode_extensions(extensions: Extensions) -> str:
+    names = tuple(extensions)
+    encoder = _extension_encoders.get(names)
+    if encoder is None:
+        encoder = _extension_encoders.add(names, _extension_set_encoder(names))
+    return encoder(extensions)
+
+
+def _string(attribute_value) -> str:
+    if attribute_value.__class__ is str:
+        return encode_basestring_ascii(attribute_value)
+    return json.dumps(attribute_value)
+
+
+def _time(attribute_value) -> str:
+    # pendulum.instance returns pendulum instances as they are
+    if not isinstance(attribute_value, pendulum.DateTime):
+        attribute_value = pendulum.instance(attribute_value)
+    return f'"{attribute_value.isoformat()}"'
+
+
+def _attribute_source(attribute: EncodedAttribute, first: bool) -> str:
+    separator = '{' if first else ', '
+    value_function = '_time' if attribute.name == 'time' else '_string'
+    statements = [
+        f'value = event.{attribute.event_property}',
+        f"append('{separator}\"{attribute.name}\": ')",
+        f'append({value_function}(value))',
+    ]
+
+    if not attribute.optional:
+        return ''.join(f'    {statement}\n' for statement in statements)
+
+    source = f'    {statements[0]}\n    if value is not None:\n'
+    return source + ''.join(f'        {statement}\n' for statement in statements[1:])
+
+
+def generate_encoder(class_name: str, attributes: Sequence[EncodedAttribute], json_content_type: str) -> Encoder:
+    """Generate the encoder of an event class.
+
+    Args:
+        class_name (str): The name of the class, used in tracebacks.
+        attributes (Sequence[EncodedAttribute]): The attributes of the class, in order. The first one can't be optional.
+        json_content_type (str): The name of the JSON content type.
+
+    Returns:
+        Encoder: The encoder.
+
+    Raises:
+        ValueError: If the attributes are invalid.
+    """
+    if not attributes or attributes[0].optional:
+        raise ValueError('The first attribute of an encoder cannot be optional')
+
+    for attribute in attributes:
+        if not (attribute.name.isidentifier() and attribute.event_property.isidentifier()):
+            raise ValueError(f'Invalid attribute: {attribute}')
+
+    source = _header
+    for index, attribute in enumerate(attributes):
+        source += _attribute_source(attribute, first=not index)
+    source += _data_members
+
+    namespace = {
+        '_string': _string,
+        '_encode_extensions': _encode_extensions,
+        '_time': _time,
+        '_dumps': json.dumps,
+        '_b64encode': base64.b64encode,
+        '_BaseModel': pydantic.BaseModel,
+        '_json_content_type': json_content_type,
+        '_json_content_type_member': f', "datacontenttype": {encode_basestring_ascii(json_content_type)}',
+    }
+    exec(compile(source, f'<encoder {class_name}>', 'exec'), namespace)  # noqa: S102, WPS421
+    return namespace['encode_event']
+
+
+class EncoderRegistry:
+    """Generates the encoder of each event class on first use.
+
+    Classes that override `attributes`, and classes that aren't based on `CloudEventV1_0`
+    or `CompactCloudEvent`, don't have a specialized encoder.
+    """
+
+    def __init__(self, json_content_type: str) -> None:
+        self.json_content_type = json_content_type
+        self._lock = threading.Lock()
+        self._encoders: Dict[type, Optional[Encoder]] = {}
+
+    def encoder_for(self, event_class: type) -> Optional[Encoder]:
+        try:
+            return self._encoders[event_class]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if event_class not in self._encoders:
+                # Copied on write, so lookups don't need the lock
+                self._encoders = {**self._encoders, event_class: self._generate(event_class)}
+            return self._encoders[event_class]
+
+    def _generate(self, event_class: type) -> Optional[Encoder]:
+        if issubclass(event_class, CloudEventV1_0) and event_class.attributes is CloudEventV1_0.attributes:
+            return generate_encoder(event_class.__name__, model_attributes(event_class), self.json_content_type)
+
+        # Compact events have the same attributes as CloudEvent
+        if issubclass(event_class, CompactCloudEvent) and event_class.attributes is CompactCloudEvent.attributes:
+            return generate_encoder(event_class.__name__, model_attributes(CloudEventV1_0), self.json_content_type)
+
+        return None
@@ -0,0 +1,123 @@
+"""A scanner that reads the top-level members of a JSON object, deferring the decoding of some values.
+
+This is used to read the attributes of a structured event without decoding its data.
+
+String values (e.g. `data_base64`) are skipped by searching for their closing quote with
+`str.find`, and are only decoded on demand. Object and array values are parsed with the C decoder, which is
+much faster than any pure-Python scan over their structure, but are only processed further
+(validated, decoded by a coder...) on demand.
+"""
+
+import functools
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Callable, Dict, FrozenSet, Tuple
+
+DeferredValue = Callable[[], Any]
+
+_whitespace = re.compile(r'[ \t\n\r]*')
+
+_decoder = json.JSONDecoder()
+
+
+def _skip_whitespace(document: str, index: int) -> int:
+    return _whitespace.match(document, index).end()
+
+
+def _expect(document: str, index: int, character: str) -> int:
+    if document[index : index + 1] != character:  # noqa: E203
+        raise ValueError(f'Expected {character!r} at position {index}')
+    return index + 1
+
+
+def _expect_end(document: str, index: int) -> None:
+    # Like `json.loads`, only whitespace can follow the value
+    index = _skip_whitespace(document, index)
+    if index != len(document):
+        raise ValueError(f'Extra data at position {index}')
+
+
+def _string_end(document: str, index: int) -> int:
+    # Find the closing quote of the string whose opening quote is at `index`,
+    # str.find is much faster than a regex over long strings (e.g. base64 data)
+    position = index + 1
+    while True:  # noqa: WPS457
+        quote = document.find('"', position)
+        if quote < 0:
+            raise ValueError('Unterminated JSON string')
+
+        # The quote is escaped if it's preceded by an odd number of backslashes,
+        # we can't run past the start of the string since it's preceded by a quote
+        backslashes = 0
+        while document[quote - backslashes - 1] == '\\':
+            backslashes += 1
+
+        if backslashes % 2 == 0:
+            return quote + 1
+        position = quote + 1
+
+
+def _decoded(value: Any) -> Any:
+    return value
+
+
+def defer_value(document: str, index: int) -> Tuple[DeferredValue, int]:
+    """Read the JSON value that starts at `index`, deferring its decoding where possible.
+
+    Args:
+        document (str): The JSON document.
+        index (int): The start of the value.
+
+    Returns:
+        Tuple[DeferredValue, int]: A function that returns the decoded value, and the index just after the value.
+
+    Raises:
+        ValueError: If the value is invalid.
+    """
+    if document[index : index + 1] == '"':  # noqa: E203
+        end = _string_end(document, index)
+        return functools.partial(json.loads, document[index:end]), end
+
+    value, end = _decoder.raw_decode(document, index)
+    return functools.partial(_decoded, value), end
+
+
+def scan_attributes(document: str, deferred_keys: FrozenSet[str]) -> Tuple[Dict[str, Any], Dict[str, DeferredValue]]:
+    """Decode the top-level members of a JSON object, deferring the decoding of some of them.
+
+    Args:
+        document (str): The JSON document.
+        deferred_keys (FrozenSet[str]): The keys whose values should be deferred.
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, DeferredValue]]: The decoded members, and the deferred members.
+
+    Raises:
+        ValueError: If the document isn't a JSON object, or there's anything but whitespace after it.
+    """
+    members: Dict[str, Any] = {}
+    deferred: Dict[str, DeferredValue] = {}
+
+    index = _expect(document, _skip_whitespace(document, 0), '{')
+    index = _skip_whitespace(document, index)
+
+    if document[index : index + 1] == '}':  # noqa: E203
+        _expect_end(document, index + 1)
+        return members, deferred
+
+    while True:  # noqa: WPS457
+        index = _expect(document, index, '"')
+        key, index = scanstring(document, index)
+        index = _skip_whitespace(document, _expect(document, _skip_whitespace(document, index), ':'))
+
+        if key in deferred_keys:
+            deferred[key], end = defer_value(document, index)
+        else:
+            members[key], end = _decoder.raw_decode(document, index)
+
+        index = _skip_whitespace(document, end)
+        if document[index : index + 1] == '}':  # noqa: E203
+            _expect_end(document, index + 1)
+            return members, deferred
+        index = _skip_whitespace(document, _expect(document, index, ','))
@@ -0,0 +1,66 @@
+"""A bounded pool of interned strings, for the attribute values repeated across events.
+
+When a large batch of events is decoded, the `specversion`, `type`, `source`,
+`datacontenttype` and `dataschema` of most events have one of a few values, but the
+decoders allocate a new string for each event. The decoders pass these values through
+an `InternPool`, so that equal values share a single string.
+
+`sys.intern` isn't used, since interned strings can't be released on recent versions
+of Python. The pool is a `BoundedCache` instead, so input with many distinct values
+(e.g. from an untrusted producer) can't make it grow without limit.
+"""
+
+from typing import Any, MutableMapping
+
+from outcome.eventkit.cache import BoundedCache
+
+# The attributes that usually have few distinct values. `id`, `subject` and `time` are
+# (almost) unique to each event, so interning them would only fill the pool
+interned_attributes = ('specversion', 'type', 'source', 'datacontenttype', 'dataschema')
+
+default_max_size = 4096
+
+
+class InternPool:
+    """Maps each string to a canonical instance of itself."""
+
+    __slots__ = ('max_size', '_values')
+
+    def __init__(self, max_size: int = default_max_size) -> None:
+        self.max_size = max_size
+        self._values: BoundedCache[str, str] = BoundedCache(max_size)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, value: str) -> str:  # noqa: WPS125
+        """Return the canonical instance of a string.
+
+        Args:
+            value (str): The string.
+
+        Returns:
+            str: An equal string, which is the same object for all equal strings while they stay in the pool.
+        """
+        interned = self._values.get(value)
+        if interned is None:
+            interned = self._values.add(value, value)
+        return interned
+
+    def intern_attributes(self, attributes: MutableMapping[str, Any]) -> None:
+        """Intern the values of the low-cardinality attributes, in place.
+
+        Args:
+            attributes (MutableMapping[str, Any]): The attributes of an event, as named in the spec.
+        """
+        for name in interned_attributes:
+            attribute_value = attributes.get(name)
+            if attribute_value.__class__ is str:
+                attributes[name] = self.intern(attribute_value)
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+# The pool used by the formats and protocol bindings
+attribute_values = InternPool()
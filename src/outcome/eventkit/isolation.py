@@ -0,0 +1,355 @@
+"""Dispatch policies that isolate event handlers from each other.
+
+`IsolatedDispatcher` delivers each event to every registered handler, even if some
+of them fail, and raises a single `DispatchError` with all of the errors afterwards.
+
+Handlers can be given a deadline: they're run on threads, and the dispatcher stops
+waiting for them after the timeout. Python threads can't be interrupted, so a handler
+that hangs keeps its thread busy, but it no longer blocks the dispatcher. Each handler
+has its own threads, so the handlers that hang can't hold up the others.
+
+Each handler has a circuit breaker, that skips the handler for a while after a
+number of consecutive failures (errors, timeouts or slow calls), and then lets a
+single trial call through to check whether the handler has recovered.
+"""
+
+import enum
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError  # noqa: N812
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from outcome.eventkit.dispatch import CloudEventHandler, CloudEventHandlerRegistry, cloud_event_handler_registry
+from outcome.eventkit.event import CloudEvent
+
+Clock = Callable[[], float]
+HandlerError = Tuple[CloudEventHandler, BaseException]
+
+
+class HandlerTimeoutError(Exception):
+    ...
+
+
+class CircuitOpenError(Exception):
+    ...
+
+
+class DispatchError(Exception):
+    """Raised when at least one handler failed to handle an event.
+
+    Attributes:
+        event (CloudEvent): The event.
+        errors (List[HandlerError]): The (handler, exception) pairs, in order of registration.
+    """
+
+    def __init__(self, event: CloudEvent, errors: List[HandlerError]) -> None:
+        self.event = event
+        self.errors = errors
+        names = ', '.join(handler_name(handler) for handler, _ in errors)
+        super().__init__(f'{len(errors)} handler(s) failed for event {event.id} ({event.type}): {names}')
+
+
+class CircuitState(enum.Enum):
+    # Calls go through
+    closed = 'closed'
+    # Calls are skipped until the reset timeout has passed
+    open = 'open'
+    # A single trial call is allowed through
+    half_open = 'half_open'
+
+
+class HandlerStats(NamedTuple):
+    handler: str
+    calls: int
+    errors: int
+    timeouts: int
+    # Calls skipped because the circuit was open
+    skipped: int
+    # In seconds
+    total_time: float
+    max_time: float
+    state: CircuitState
+
+    @property
+    def mean_time(self) -> float:
+        if not self.calls:
+            return 0.0
+        return self.total_time / self.calls
+
+
+def handler_name(handler: CloudEventHandler) -> str:
+    module = getattr(handler, '__module__', None)
+    name = getattr(handler, '__qualname__', None) or repr(handler)
+    if module:
+        return f'{module}.{name}'
+    return name
+
+
+class CircuitBreaker:  # noqa: WPS214
+    """Tracks the failures of a handler, and decides whether it should be called.
+
+    The circuit opens after `failure_threshold` consecutive failures. After
+    `reset_timeout` seconds, a single trial call is allowed: if it succeeds the
+    circuit closes, otherwise it opens again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, clock: Clock = time.monotonic) -> None:
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be at least 1')
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._state = CircuitState.closed
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """Check whether a call should go through, and reserve the trial call if needed.
+
+        Returns:
+            bool: True if the handler should be called.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CircuitState.closed:
+                return True
+            if state == CircuitState.half_open and self._state == CircuitState.open:
+                # Only one caller gets the trial call
+                self._state = CircuitState.half_open
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CircuitState.closed
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == CircuitState.half_open or self._failures >= self.failure_threshold:
+                self._state = CircuitState.open
+                self._opened_at = self.clock()
+
+    def _current_state(self) -> CircuitState:
+        if self._state == CircuitState.open and self.clock() - self._opened_at >= self.reset_timeout:
+            return CircuitState.half_open
+        return self._state
+
+
+class _HandlerCounters:  # noqa: WPS230
+    def __init__(self, handler: CloudEventHandler, breaker: CircuitBreaker, executor: Optional[ThreadPoolExecutor]) -> None:
+        self.handler = handler
+        self.breaker = breaker
+        # Runs the calls of the handler, if it has a timeout
+        self.executor = executor
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record_call(self, duration: float, error: bool = False, timeout: bool = False) -> None:
+        with self.lock:
+            self.calls += 1
+            self.errors += error
+            self.timeouts += timeout
+            self.total_time += duration
+            self.max_time = max(self.max_time, duration)
+
+    def record_skip(self) -> None:
+        with self.lock:
+            self.skipped += 1
+
+    def stats(self) -> HandlerStats:
+        with self.lock:
+            return HandlerStats(
+                handler=handler_name(self.handler),
+                calls=self.calls,
+                errors=self.errors,
+                timeouts=self.timeouts,
+                skipped=self.skipped,
+                total_time=self.total_time,
+                max_time=self.max_time,
+                state=self.breaker.state,
+            )
+
+
+class IsolatedDispatcher:  # noqa: WPS214, WPS230
+    """A dispatcher that isolates the handlers of an event from each other.
+
+    The dispatcher can be used anywhere a `CloudEventDispatcher` is expected, e.g. by
+    an `EventBus`, and as a context manager to shut down its threads.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+        timeout: Optional[float] = None,
+        slow_call_threshold: Optional[float] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        max_workers: Optional[int] = None,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        """Create a dispatcher.
+
+        Args:
+            registry (CloudEventHandlerRegistry): The handler registry. Defaults to the global registry.
+            timeout (float, optional): The deadline for each handler call, in seconds.
+            slow_call_threshold (float, optional): Successful calls that take longer count as failures.
+            failure_threshold (int): The number of consecutive failures that open a handler's circuit.
+            reset_timeout (float): How long a handler is skipped once its circuit is open, in seconds.
+            max_workers (int, optional): The number of threads of each handler, when there's a timeout.
+            clock (Clock): The clock used to time calls.
+        """
+        self.registry = registry
+        self.timeout = timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_workers = max_workers
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._counters: Dict[CloudEventHandler, _HandlerCounters] = {}
+
+    def __call__(self, event: CloudEvent) -> None:
+        """Send an event to all of the registered handlers.
+
+        Args:
+            event (CloudEvent): The event to dispatch.
+
+        Raises:
+            DispatchError: If any of the handlers failed, after all of them have been called.
+        """
+        errors: List[HandlerError] = []
+
+        for handler in self.registry.handlers_for(event):
+            error = self._call(handler, event)
+            if error is not None:
+                errors.append((handler, error))
+
+        if errors:
+            raise DispatchError(event, errors)
+
+    def stats(self) -> List[HandlerStats]:
+        """Return the stats of the registered handlers that have been called.
+
+        Returns:
+            List[HandlerStats]: The stats of each handler.
+        """
+        with self._lock:
+            self._prune()
+            counters = list(self._counters.values())
+        return [c.stats() for c in counters]
+
+    def circuit_breaker(self, handler: CloudEventHandler) -> CircuitBreaker:
+        return self._counters_for(handler).breaker
+
+    def close(self) -> None:
+        with self._lock:
+            counters = list(self._counters.values())
+
+        for handler_counters in counters:
+            if handler_counters.executor is not None:
+                # Don't wait for handlers that are stuck
+                handler_counters.executor.shutdown(wait=False)
+
+    def __enter__(self) -> 'IsolatedDispatcher':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _call(self, handler: CloudEventHandler, event: CloudEvent) -> Optional[BaseException]:
+        counters = self._counters_for(handler)
+
+        if not counters.breaker.allow():
+            counters.record_skip()
+            return CircuitOpenError(f'Circuit open for handler {handler_name(handler)}')
+
+        start = self.clock()
+        try:
+            self._run(counters, event)
+        except HandlerTimeoutError as timeout_error:
+            counters.record_call(self.clock() - start, timeout=True)
+            counters.breaker.record_failure()
+            return timeout_error
+        except Exception as exc:
+            counters.record_call(self.clock() - start, error=True)
+            counters.breaker.record_failure()
+            return exc
+
+        duration = self.clock() - start
+        counters.record_call(duration)
+        if self.slow_call_threshold is not None and duration > self.slow_call_threshold:
+            counters.breaker.record_failure()
+        else:
+            counters.breaker.record_success()
+        return None
+
+    def _run(self, counters: _HandlerCounters, event: CloudEvent) -> None:
+        handler = counters.handler
+        if counters.executor is None:
+            handler(event)
+            return
+
+        started = threading.Event()
+
+        def run_handler() -> None:  # noqa: WPS430
+            started.set()
+            handler(event)
+
+        future = counters.executor.submit(run_handler)
+
+        # The deadline starts when the handler starts running. A call can only be queued behind
+        # the calls of the same handler, and is abandoned if it doesn't start within the timeout
+        if not started.wait(self.timeout) and future.cancel():
+            raise HandlerTimeoutError(f'Handler {handler_name(handler)} did not start within {self.timeout}s')
+
+        try:
+            future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Since Python 3.11, it's the builtin TimeoutError, that the handler itself can raise
+            if future.done():
+                raise
+            raise HandlerTimeoutError(f'Handler {handler_name(handler)} timed out after {self.timeout}s')
+
+    def _counters_for(self, handler: CloudEventHandler) -> _HandlerCounters:
+        counters = self._counters.get(handler)
+        if counters is None:
+            with self._lock:
+                counters = self._counters.get(handler)
+                if counters is None:
+                    # The counters are only created for new handlers, so the unregistered ones are pruned then
+                    self._prune()
+                    counters = self._create_counters(handler)
+                    self._counters[handler] = counters
+        return counters
+
+    def _create_counters(self, handler: CloudEventHandler) -> _HandlerCounters:
+        breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+        executor = None
+        if self.timeout is not None:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f'eventkit-{handler_name(handler)}')
+        return _HandlerCounters(handler, breaker, executor)
+
+    def _prune(self) -> None:
+        # Drop the counters of the handlers that have been unregistered, along with their
+        # threads, which exit once they're idle and their executor is garbage collected
+        registered = {handler for handlers in self.registry.snapshot().values() for handler in handlers}
+        for handler in list(self._counters):
+            if handler not in registered:
+                del self._counters[handler]  # noqa: WPS420
@@ -0,0 +1,122 @@
+"""An event whose data is only decoded when it's accessed.
+
+In many cases (e.g. routing), the attributes of an event are enough to decide what to
+do with it. Protocol bindings and formats can provide a `LazyCloudEvent`, built from the
+attributes alone, along with the undecoded body and a function to decode it on demand.
+
+A `LazyCloudEvent` can be dispatched like a `CloudEvent`: the data is only decoded if
+a handler accesses `data`.
+"""
+
+import datetime
+from typing import Any, Callable, Dict, Optional
+
+import pendulum
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.extensions import reserved_names
+from outcome.eventkit.mime import resolve_content_type
+
+DataDecoder = Callable[[], Optional[CloudEventData]]
+
+# The attributes that describe the data, rather than the event
+data_attributes = frozenset(('datacontenttype', 'dataschema'))
+
+
+def _no_data() -> Optional[CloudEventData]:
+    return None
+
+
+class LazyCloudEvent:  # noqa: WPS214
+    __slots__ = ('_attributes', '_decode_data', '_data', '_decoded', 'body')
+
+    def __init__(self, attributes: Dict[str, Any], decode_data: DataDecoder = _no_data, body: Any = None) -> None:
+        """Creates the event.
+
+        Args:
+            attributes (Dict[str, Any]): The event attributes, as named in the spec (e.g. `specversion`).
+            decode_data (DataDecoder): The function that decodes the data.
+            body (Any): The undecoded body of the message, if any.
+        """
+        self._attributes = attributes
+        self._decode_data = decode_data
+        self._data: Optional[CloudEventData] = None
+        self._decoded = False
+        self.body = body
+
+    def __repr__(self) -> str:
+        return f'LazyCloudEvent({self._attributes!r})'
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        return dict(self._attributes)
+
+    @property
+    def id(self) -> Optional[str]:  # noqa: WPS125, A003
+        return self._attributes.get('id')
+
+    @property
+    def source(self) -> Optional[str]:
+        return self._attributes.get('source')
+
+    @property
+    def spec_version(self) -> Optional[str]:
+        return self._attributes.get('specversion')
+
+    @property
+    def type(self) -> Optional[str]:  # noqa: WPS125, A003
+        return self._attributes.get('type')
+
+    @property
+    def subject(self) -> Optional[str]:
+        return self._attributes.get('subject')
+
+    @property
+    def time(self) -> Optional[datetime.datetime]:
+        time = self._attributes.get('time')
+        if isinstance(time, str):
+            return pendulum.parse(time)
+        return time
+
+    @property
+    def data_content_type(self) -> Optional[str]:
+        data_content_type = self._attributes.get('datacontenttype')
+        if data_content_type is None:
+            return None
+        return resolve_content_type(data_content_type).name
+
+    @property
+    def data_schema(self) -> Optional[str]:
+        return self._attributes.get('dataschema')
+
+    @property
+    def extensions(self) -> Dict[str, Any]:
+        # The values are the undecoded representations of the extensions, e.g. strings from HTTP headers
+        return {attr: attr_value for attr, attr_value in self._attributes.items() if attr not in reserved_names}
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._decoded
+
+    @property
+    def data(self) -> Optional[CloudEventData]:
+        if not self._decoded:
+            self._data = self._decode_data()
+            self._decoded = True
+            # The body isn't needed anymore
+            self.body = None
+        return self._data
+
+    def to_event(self) -> CloudEvent:
+        """Decode the data, and validate the event.
+
+        Returns:
+            CloudEvent: The event.
+        """
+        attributes = {attr: value for attr, value in self._attributes.items() if attr not in data_attributes}
+        attributes['data'] = self.data
+
+        if isinstance(attributes.get('time'), str):
+            attributes['time'] = pendulum.parse(attributes['time'])
+
+        return CloudEvent.from_attributes(attributes)
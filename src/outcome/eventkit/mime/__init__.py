@@ -1,3 +1,3 @@
-from outcome.eventkit.mime.mime import MIMEType, MIMETypeDict, parse_mime_type
+from outcome.eventkit.mime.mime import ContentType, MIMEType, MIMETypeDict, parse_mime_type, resolve_content_type
 
-__all__ = ['parse_mime_type', 'MIMEType', 'MIMETypeDict']
+__all__ = ['parse_mime_type', 'resolve_content_type', 'ContentType', 'MIMEType', 'MIMETypeDict']
@@ -1,10 +1,10 @@
 """Tools to parse and register MIME types."""
 
-from typing import Dict, List, Optional, Tuple, TypeVar
+import importlib
+import threading
+from typing import Dict, Iterator, List, MutableMapping, Optional, Tuple, TypeVar
 
-from lark import Lark, Tree
-from lark.visitors import Interpreter
-from outcome.utils.transformer_dict import TransformerDict
+from outcome.eventkit.cache import BoundedCache
 
 type_separator = '/'
 subtype_separator = '.'
@@ -54,80 +54,143 @@ class MIMEType:
         return hash(self.name)
 
 
-class MIMEParseTreeInterpreter(Interpreter):
-    """This class interprets the AST that results from the MIME parser.
+CacheKey = Tuple[str, Optional[str]]
+max_parsed_mime_types = 1024
+_cache: BoundedCache[CacheKey, MIMEType] = BoundedCache(max_parsed_mime_types)
 
-    As the nodes of the AST are encountered, the MIMEType instance is built.
 
-    The `type`, `subtype`, etc. methods are called for each node with the
-    same name in the AST.
-    """
+def parse_mime_type(mime_type_str: str, default_charset: Optional[str] = 'utf-8') -> MIMEType:
+    key = (mime_type_str, default_charset)
 
-    def __init__(self, default_charset: Optional[str]):
-        self.mime_type = MIMEType(default_charset)
+    mime_type = _cache.get(key)
+    if mime_type is not None:
+        return mime_type
 
-    def type(self, tree: Tree) -> None:  # noqa: WPS125, A003
-        # There is only one root type, and it only has one token
-        self.mime_type.type = tree.children[0].value.lower()  # noqa: WPS125
+    # The parser is only loaded the first time we see an unknown MIME type
+    from outcome.eventkit.mime import parser  # noqa: WPS433
 
-    def subtype(self, tree: Tree) -> None:
-        # A subtype is made up of a sequence of dot-separated terms, followed
-        # by an optional suffix
-        children: List[Tree] = []
-        for child in tree.children:
-            if child.data == 'subtype_suffix':
-                # The suffix only has one token
-                self.mime_type.suffix = child.children[0].value.lower()
-            else:
-                children.append(child)
+    return _cache.add(key, parser.parse(mime_type_str, default_charset))
 
-        # Each part of the subtype only has one token
-        self.mime_type.subtype = subtype_separator.join(c.children[0].value for c in children).lower()
 
-    def parameter(self, tree: Tree) -> None:
-        # The parameters are made up of two tokens, after stripping whitespace
-        param_key_token, param_value_token = [t for t in tree.children if not (isinstance(t, Tree) and t.data == 'whitespace')]
+class ContentType:
+    """A content type string, resolved to its canonical name and parsed MIME type.
 
-        param_key = param_key_token.value.lower()
-        param_value = param_value_token.value.lower()
+    Content types are resolved with `resolve_content_type`, which returns the same
+    instance for every spelling of a content type, so the canonical name is a single
+    shared string that can be used directly as a key in registries.
+    """
 
-        self.mime_type.parameters[param_key] = param_value
+    __slots__ = ('name', 'mime_type')
 
+    def __init__(self, mime_type: MIMEType) -> None:
+        self.mime_type = mime_type
+        self.name = mime_type.name
 
-_parser = None
-CacheKey = Tuple[str, Optional[str]]
-_cache: Dict[CacheKey, MIMEType] = {}
+    def __repr__(self) -> str:  # pragma: no cover
+        return f'ContentType({self.name!r})'
 
 
-def parse_mime_type(mime_type_str: str, default_charset: Optional[str] = 'utf-8') -> MIMEType:
-    # It's easier to build a mini-parser than try to do this with regex
-    global _parser
-    if not _parser:
-        _parser = Lark.open('mime.lark', rel_to=__file__)  # noqa: WPS442,WPS122
+# Maps content type strings, as they're received, to their resolved content type
+max_resolved_content_types = 1024
+_content_types: BoundedCache[str, ContentType] = BoundedCache(max_resolved_content_types)
 
-    key = (mime_type_str, default_charset)
 
-    if key not in _cache:
-        try:
-            tree = _parser.parse(mime_type_str)  # noqa: WPS442,WPS122,WPS121
-        except Exception:
-            raise ValueError(f'Invalid MIME type: {mime_type_str}')
+def resolve_content_type(content_type: str) -> ContentType:
+    """Resolve a content type string to its canonical representation.
 
-        interpreter = MIMEParseTreeInterpreter(default_charset)
-        interpreter.visit(tree)
+    The MIME type is parsed with the default charset, like the keys of `MIMETypeDict`.
 
-        _cache[key] = interpreter.mime_type
+    Args:
+        content_type (str): The content type.
 
-    return _cache.get(key)
+    Returns:
+        ContentType: The resolved content type.
+
+    Raises:
+        ValueError: If the content type is invalid.
+    """
+    resolved = _content_types.get(content_type)
+    if resolved is not None:
+        return resolved
+
+    mime_type = parse_mime_type(content_type)
+
+    # All the spellings of a content type share the instance registered under the canonical name
+    resolved = _content_types.get(mime_type.name)
+    if resolved is None:
+        resolved = _content_types.add(mime_type.name, ContentType(mime_type))
+
+    return _content_types.add(content_type, resolved)
 
 
 T = TypeVar('T')
 
 
 def normalize_key(key: str) -> str:
-    return parse_mime_type(key).name
+    return resolve_content_type(key).name
+
 
+class MIMETypeDict(MutableMapping[str, T]):  # noqa: WPS214
+    """A dict whose keys are normalized MIME type names.
+
+    Entries can also be registered lazily with `register_lazy`, using an
+    entry-point style `module:attribute` reference. Lazy entries are imported and
+    normalized on the first access to the dict, so registering them is free.
+    """
 
-class MIMETypeDict(TransformerDict[str, T, str]):
-    def __init__(self, *args, **kwargs) -> None:
-        super().__init__(*args, transformer=normalize_key, **kwargs)
+    def __init__(self) -> None:
+        self._inner_dict: Dict[str, T] = {}
+        self._pending: List[Tuple[str, str]] = []
+        self._lock = threading.RLock()
+        self._loading = False
+
+    def register_lazy(self, key: str, target: str) -> None:
+        """Register an entry that will be imported on the first access to the dict.
+
+        Args:
+            key (str): The MIME type.
+            target (str): The `module:attribute` reference to the value.
+        """
+        self._pending.append((key, target))
+
+    def _load_pending(self) -> None:
+        if not self._pending:
+            return
+
+        # Concurrent first lookups wait for the entries to be loaded
+        with self._lock:
+            # The import of a pending entry can use the dict
+            if self._loading:
+                return
+
+            self._loading = True
+            try:
+                while self._pending:
+                    key, target = self._pending[0]
+                    module_name, attribute = target.split(':')
+                    self._inner_dict[normalize_key(key)] = getattr(importlib.import_module(module_name), attribute)
+                    # The entry stays pending if the import fails, so the next lookup retries it
+                    self._pending.pop(0)
+            finally:
+                self._loading = False
+
+    def __len__(self) -> int:
+        self._load_pending()
+        return len(self._inner_dict)
+
+    def __getitem__(self, key: str) -> T:
+        self._load_pending()
+        return self._inner_dict[normalize_key(key)]
+
+    def __setitem__(self, key: str, value: T) -> None:
+        # Pending entries are loaded first, so that they don't override explicit registrations
+        self._load_pending()
+        self._inner_dict[normalize_key(key)] = value
+
+    def __delitem__(self, key: str) -> None:  # noqa: WPS603
+        self._load_pending()
+        del self._inner_dict[normalize_key(key)]  # noqa: WPS420
+
+    def __iter__(self) -> Iterator[str]:
+        self._load_pending()
+        return iter(self._inner_dict)
@@ -0,0 +1,68 @@
+"""The Lark-based MIME type parser.
+
+This module is only imported the first time `parse_mime_type` sees a MIME type
+that isn't in its cache, since importing Lark and building the parser account for
+most of the cost of parsing.
+"""
+
+from typing import List, Optional
+
+from lark import Lark, Tree
+from lark.visitors import Interpreter
+from outcome.eventkit.mime.mime import MIMEType, subtype_separator
+
+
+class MIMEParseTreeInterpreter(Interpreter):
+    """This class interprets the AST that results from the MIME parser.
+
+    As the nodes of the AST are encountered, the MIMEType instance is built.
+
+    The `type`, `subtype`, etc. methods are called for each node with the
+    same name in the AST.
+    """
+
+    def __init__(self, default_charset: Optional[str]):
+        self.mime_type = MIMEType(default_charset)
+
+    def type(self, tree: Tree) -> None:  # noqa: WPS125, A003
+        # There is only one root type, and it only has one token
+        self.mime_type.type = tree.children[0].value.lower()  # noqa: WPS125
+
+    def subtype(self, tree: Tree) -> None:
+        # A subtype is made up of a sequence of dot-separated terms, followed
+        # by an optional suffix
+        children: List[Tree] = []
+        for child in tree.children:
+            if child.data == 'subtype_suffix':
+                # The suffix only has one token
+                self.mime_type.suffix = child.children[0].value.lower()
+            else:
+                children.append(child)
+
+        # Each part of the subtype only has one token
+        self.mime_type.subtype = subtype_separator.join(c.children[0].value for c in children).lower()
+
+    def parameter(self, tree: Tree) -> None:
+        # The parameters are made up of two tokens, after stripping whitespace
+        param_key_token, param_value_token = [t for t in tree.children if not (isinstance(t, Tree) and t.data == 'whitespace')]
+
+        param_key = param_key_token.value.lower()
+        param_value = param_value_token.value.lower()
+
+        self.mime_type.parameters[param_key] = param_value
+
+
+# It's easier to build a mini-parser than try to do this with regex
+_parser = Lark.open('mime.lark', rel_to=__file__)
+
+
+def parse(mime_type_str: str, default_charset: Optional[str]) -> MIMEType:
+    try:
+        tree = _parser.parse(mime_type_str)
+    except Exception:
+        raise ValueError(f'Invalid MIME type: {mime_type_str}')
+
+    interpreter = MIMEParseTreeInterpreter(default_charset)
+    interpreter.visit(tree)
+
+    return interpreter.mime_type
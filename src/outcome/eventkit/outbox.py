@@ -0,0 +1,502 @@
+"""A transactional outbox, to emit events atomically with other database writes.
+
+Events are encoded with a `CloudEventFormat` and inserted into a SQLite table, in
+the same transaction as the rest of the producer's writes. If the transaction is
+rolled back, the events are never sent. An `OutboxRelay` then reads the pending
+events in order, sends them as structured HTTP messages, and marks them delivered.
+
+Delivery is at-least-once: if the relay stops after sending a batch, but before
+marking it delivered, the batch is sent again when the relay restarts.
+
+When a batch can't be sent, the relay backs off, then retries its events one at a
+time, so that an event that can never be sent is found. Errors are transient (e.g. the
+receiver is unavailable) unless a classifier says they're permanent (by default, a 4xx
+response): transient errors are retried until they succeed, while an event that fails
+`max_attempts` times with a permanent error is moved to a dead-letter table, and the
+relay moves on to the next events.
+"""
+
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Type, Union
+
+from outcome.eventkit.compact import AnyCloudEvent
+from outcome.eventkit.formats import CloudEventFormat
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.protocol_bindings.http import HTTPEvent
+from outcome.eventkit.retry import RetryPolicy
+
+if TYPE_CHECKING:  # pragma: no cover
+    import requests  # noqa: WPS433
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+# Sends a batch of HTTP messages, and raises if any of them couldn't be sent
+Sender = Callable[[List[HTTPEvent]], None]
+Clock = Callable[[], float]
+# Whether an error of the sender is permanent, i.e. sending the same events again would fail again
+ErrorClassifier = Callable[[Exception], bool]
+
+default_table = 'eventkit_outbox'
+_dead_letter_suffix = '_dead_letters'
+default_batch_size = 500
+# The client errors that can succeed on a retry: request timeout, and too many requests
+_transient_client_errors = frozenset((408, 429))
+
+
+class OutboxRecord(NamedTuple):
+    id: int  # noqa: WPS125
+    content_type: str
+    body: str
+    attempts: int
+
+
+class Outbox:  # noqa: WPS214, WPS230
+    """Stores encoded events in a SQLite table until they're relayed.
+
+    The events that can't be relayed are moved to a second table, named after the
+    first one with a `_dead_letters` suffix.
+
+    The outbox can be used as a context manager, its connection is closed on exit.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        event_format: Type[CloudEventFormat] = JSONCloudEventFormat,
+        table: str = default_table,
+    ) -> None:
+        """Open the outbox, creating the table if needed.
+
+        Args:
+            path (PathLike): The path of the SQLite database.
+            event_format (Type[CloudEventFormat]): The format used to encode the events. Defaults to JSON.
+            table (str): The name of the table.
+
+        Raises:
+            ValueError: If the table name isn't a valid identifier.
+        """
+        if not table.isidentifier():
+            raise ValueError(f'Invalid table name: {table}')
+        if event_format.format_content_type is None:  # pragma: no cover
+            raise ValueError('Event format needs to specify a content type')
+
+        self.path = Path(path)
+        self.event_format = event_format
+        self.table = table
+        self.dead_letter_table = f'{table}{_dead_letter_suffix}'
+
+        # Reentrant, so that `add` can be called without a connection inside `transaction`
+        self._lock = threading.RLock()
+        self._in_transaction = False
+        self._connection = self.connect()
+        self._create_table()
+
+    def __enter__(self) -> 'Outbox':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new connection to the database, e.g. for the producer's own writes.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        # The write-ahead log lets the relay read while producers write, and commits
+        # only need to sync the log
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def add(self, events: Iterable[AnyCloudEvent], connection: Optional[sqlite3.Connection] = None) -> int:
+        """Add events to the outbox, with a single statement.
+
+        When a connection is provided, the events are added in its current transaction,
+        and the caller is responsible for committing it. Inside `transaction`, they're
+        added in the outbox's transaction. Otherwise, they're committed immediately.
+
+        Args:
+            events (Iterable[AnyCloudEvent]): The events.
+            connection (sqlite3.Connection, optional): The producer's connection.
+
+        Returns:
+            int: The number of events that were added.
+        """
+        content_type = self.event_format.format_content_type
+        created = time.time()
+        rows = [(content_type, self.event_format.encode(event), created) for event in events]
+        statement = f'INSERT INTO {self.table} (content_type, body, created) VALUES (?, ?, ?)'  # noqa: S608
+
+        if connection is not None:
+            connection.executemany(statement, rows)
+            return len(rows)
+
+        with self._lock:
+            if self._in_transaction:
+                self._connection.executemany(statement, rows)
+                return len(rows)
+
+            with self._connection:
+                self._connection.executemany(statement, rows)
+        return len(rows)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """A transaction on the outbox's connection, committed on exit unless there's an exception.
+
+        Yields:
+            sqlite3.Connection: The connection, to use for the producer's writes and `add`.
+
+        Raises:
+            RuntimeError: If a transaction is already in progress in the same thread.
+        """
+        with self._lock:
+            # Exiting a nested transaction would commit the outer one
+            if self._in_transaction:
+                raise RuntimeError('Outbox transactions cannot be nested')
+
+            with self._connection:
+                self._in_transaction = True
+                try:
+                    yield self._connection
+                finally:
+                    self._in_transaction = False
+
+    def pending(self, limit: int = default_batch_size) -> List[OutboxRecord]:
+        """Return the oldest events that haven't been delivered.
+
+        Args:
+            limit (int): The maximum number of events.
+
+        Returns:
+            List[OutboxRecord]: The events, in the order they were added.
+        """
+        statement = (
+            f'SELECT id, content_type, body, attempts FROM {self.table} '  # noqa: S608
+            + 'WHERE delivered IS NULL ORDER BY id LIMIT ?'
+        )
+        with self._lock:
+            return [OutboxRecord(*row) for row in self._connection.execute(statement, (limit,))]
+
+    def mark_delivered(self, ids: Iterable[int]) -> None:
+        statement = f'UPDATE {self.table} SET delivered = ? WHERE id = ?'  # noqa: S608
+        delivered = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(statement, ((delivered, record_id) for record_id in ids))
+
+    def mark_failed(self, ids: Iterable[int]) -> None:
+        statement = f'UPDATE {self.table} SET attempts = attempts + 1 WHERE id = ?'  # noqa: S608
+        with self._lock, self._connection:
+            self._connection.executemany(statement, ((record_id,) for record_id in ids))
+
+    def dead_letter(self, ids: Iterable[int]) -> None:
+        """Move events that can't be relayed to the dead-letter table.
+
+        Args:
+            ids (Iterable[int]): The ids of the events.
+        """
+        copy_statement = (
+            f'INSERT INTO {self.dead_letter_table} (id, content_type, body, created, attempts, failed) '  # noqa: S608
+            + f'SELECT id, content_type, body, created, attempts, ? FROM {self.table} WHERE id = ?'
+        )
+        delete_statement = f'DELETE FROM {self.table} WHERE id = ?'  # noqa: S608
+        failed = time.time()
+        ids = list(ids)
+        with self._lock, self._connection:
+            self._connection.executemany(copy_statement, ((failed, record_id) for record_id in ids))
+            self._connection.executemany(delete_statement, ((record_id,) for record_id in ids))
+
+    def dead_letters(self, limit: int = default_batch_size) -> List[OutboxRecord]:
+        """Return the oldest events in the dead-letter table.
+
+        Args:
+            limit (int): The maximum number of events.
+
+        Returns:
+            List[OutboxRecord]: The events, in the order they were added to the outbox.
+        """
+        statement = f'SELECT id, content_type, body, attempts FROM {self.dead_letter_table} ORDER BY id LIMIT ?'  # noqa: S608
+        with self._lock:
+            return [OutboxRecord(*row) for row in self._connection.execute(statement, (limit,))]
+
+    def requeue(self, ids: Iterable[int]) -> int:
+        """Move dead letters back to the outbox, after the pending events, e.g. once the receiver is fixed.
+
+        Args:
+            ids (Iterable[int]): The ids of the dead letters.
+
+        Returns:
+            int: The number of events that were requeued.
+        """
+        copy_statement = (
+            f'INSERT INTO {self.table} (content_type, body, created) '  # noqa: S608
+            + f'SELECT content_type, body, created FROM {self.dead_letter_table} WHERE id = ?'
+        )
+        delete_statement = f'DELETE FROM {self.dead_letter_table} WHERE id = ?'  # noqa: S608
+        requeued = 0
+        with self._lock, self._connection:
+            for record_id in ids:
+                requeued += self._connection.execute(copy_statement, (record_id,)).rowcount
+                self._connection.execute(delete_statement, (record_id,))
+        return requeued
+
+    def purge(self, delivered_before: float) -> int:
+        """Delete the events that were delivered before a time.
+
+        Args:
+            delivered_before (float): The timestamp.
+
+        Returns:
+            int: The number of deleted events.
+        """
+        statement = f'DELETE FROM {self.table} WHERE delivered < ?'  # noqa: S608
+        with self._lock, self._connection:
+            return self._connection.execute(statement, (delivered_before,)).rowcount
+
+    def pending_count(self) -> int:
+        statement = f'SELECT COUNT(*) FROM {self.table} WHERE delivered IS NULL'  # noqa: S608
+        with self._lock:
+            return self._connection.execute(statement).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _create_table(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                + 'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                + 'content_type TEXT NOT NULL, '
+                + 'body TEXT NOT NULL, '
+                + 'created REAL NOT NULL, '
+                + 'attempts INTEGER NOT NULL DEFAULT 0, '
+                + 'delivered REAL)',
+            )
+            # Only the pending events are indexed, so the index stays small
+            self._connection.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_pending ON {self.table} (id) WHERE delivered IS NULL',
+            )
+            self._connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.dead_letter_table} ('
+                + 'id INTEGER PRIMARY KEY, '
+                + 'content_type TEXT NOT NULL, '
+                + 'body TEXT NOT NULL, '
+                + 'created REAL NOT NULL, '
+                + 'attempts INTEGER NOT NULL, '
+                + 'failed REAL NOT NULL)',
+            )
+
+
+def is_permanent_error(exc: Exception) -> bool:
+    """Whether an error is a client error response, e.g. the `requests.HTTPError` of a 400 response.
+
+    Connection errors and server errors are transient, the receiver may accept the same events later.
+
+    Args:
+        exc (Exception): The error raised by the sender.
+
+    Returns:
+        bool: True if the error is permanent.
+    """
+    status_code = getattr(getattr(exc, 'response', None), 'status_code', None)
+    if not isinstance(status_code, int):
+        return False
+    return 400 <= status_code < 500 and status_code not in _transient_client_errors  # noqa: WPS432
+
+
+def to_http(record: OutboxRecord) -> HTTPEvent:
+    """Build a structured HTTP message from an outbox record, without decoding the event."""
+    return HTTPEvent(record.body, {'Content-Type': record.content_type})
+
+
+def _batch_format(http_event: HTTPEvent) -> Optional[Type[CloudEventFormat]]:
+    # Only plain structured messages are batched, e.g. not the ones with a content encoding
+    if len(http_event.headers) != 1:
+        return None
+
+    try:
+        event_format = CloudEventFormat.format_content_types[http_event.headers['Content-Type']]
+    except KeyError:
+        return None
+
+    return event_format if event_format.batch_content_type is not None else None
+
+
+class HTTPSender:
+    """Posts HTTP messages to a URL, reusing a `requests` session.
+
+    With `batch`, consecutive structured messages of a format that supports batches, e.g.
+    the ones built by the relay, are posted in a single batched request. The receiver must
+    accept the batch content type of the format.
+    """
+
+    def __init__(
+        self, url: str, session: Optional['requests.Session'] = None, timeout: float = 10, batch: bool = False,
+    ) -> None:
+        if session is None:
+            import requests  # noqa: WPS433
+
+            session = requests.Session()
+
+        self.url = url
+        self.session = session
+        self.timeout = timeout
+        self.batch = batch
+
+    def __call__(self, batch: List[HTTPEvent]) -> None:
+        if not self.batch:
+            for http_event in batch:
+                self._post(http_event.body, dict(http_event.headers))
+            return
+
+        for event_format, http_events in itertools.groupby(batch, _batch_format):
+            if event_format is None:
+                for http_event in http_events:
+                    self._post(http_event.body, dict(http_event.headers))
+            else:
+                body = event_format.join_batch(http_event.body for http_event in http_events)
+                self._post(body, {'Content-Type': event_format.batch_content_type})
+
+    def _post(self, body: Optional[Union[bytes, str]], headers: Dict[str, str]) -> None:
+        response = self.session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class OutboxRelay:  # noqa: WPS214
+    """Sends the pending events of an outbox, in order, and marks them delivered.
+
+    The relay can run its own thread with `start`, or be driven by calling `relay_once`.
+    It can be used as a context manager, that starts the thread and stops it on exit.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        sender: Sender,
+        batch_size: int = default_batch_size,
+        poll_interval: float = 0.5,
+        policy: Optional[RetryPolicy] = None,
+        clock: Clock = time.monotonic,
+        is_permanent: ErrorClassifier = is_permanent_error,
+    ) -> None:
+        """Create a relay.
+
+        Args:
+            outbox (Outbox): The outbox.
+            sender (Sender): Sends a batch of structured HTTP messages.
+            batch_size (int): The maximum number of events per batch.
+            poll_interval (float): How long to wait when there are no pending events, in seconds.
+            policy (RetryPolicy, optional): The backoff between attempts, and the number of attempts after permanent errors.
+            clock (Clock): The clock used for the backoff.
+            is_permanent (ErrorClassifier): Whether an error of the sender is permanent. Defaults to `is_permanent_error`.
+        """
+        self.outbox = outbox
+        self.sender = sender
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.policy = policy or RetryPolicy()
+        self.clock = clock
+        self.is_permanent = is_permanent
+
+        self.delivered = 0
+        self.failures = 0
+        self.dead_lettered = 0
+
+        # No batch is sent before this time, after a failure
+        self._retry_at = 0.0
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'OutboxRelay':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def relay_once(self) -> int:
+        """Send a batch of pending events.
+
+        If the batch can't be sent, it's left pending, so the order of the events is kept,
+        and nothing is sent until the backoff delay has passed. Events that have failed
+        are then sent one at a time, and the ones that fail `max_attempts` times with a
+        permanent error are moved to the dead-letter table. Transient errors are retried,
+        at most `max_delay` apart, until they succeed.
+
+        Returns:
+            int: The number of events that were delivered.
+        """
+        if self.clock() < self._retry_at:
+            return 0
+
+        records = self.outbox.pending(self.batch_size)
+        if not records:
+            return 0
+
+        if records[0].attempts:
+            # Isolates the events that can't be sent from the rest of the batch they failed with
+            records = records[:1]
+
+        ids = [record.id for record in records]
+        try:
+            self.sender([to_http(record) for record in records])
+        except Exception as exc:
+            self._on_failure(records, self.is_permanent(exc))
+            return 0
+
+        self.outbox.mark_delivered(ids)
+        self.delivered += len(ids)
+        return len(ids)
+
+    def _on_failure(self, records: List[OutboxRecord], permanent: bool) -> None:
+        self.failures += 1
+        logger.exception('Error relaying %d events from the outbox', len(records))
+        self.outbox.mark_failed(record.id for record in records)
+
+        attempts = records[0].attempts + 1
+        if permanent and len(records) == 1 and attempts >= self.policy.max_attempts:
+            logger.error('Moving event %d to the outbox dead letters after %d attempts', records[0].id, attempts)
+            self.outbox.dead_letter([records[0].id])
+            self.dead_lettered += 1
+            return
+
+        self._retry_at = self.clock() + self.policy.delay(attempts)
+
+    def relay_all(self) -> int:
+        """Send batches until there are no pending events, or a batch fails.
+
+        Returns:
+            int: The number of events that were delivered.
+        """
+        delivered = 0
+        while True:
+            batch_delivered = self.relay_once()
+            if not batch_delivered:
+                return delivered
+            delivered += batch_delivered
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='eventkit-outbox-relay', daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self.relay_all():
+                self._stop.wait(self.poll_interval)
@@ -0,0 +1,234 @@
+"""Compression of HTTP message bodies, as described by the `Content-Encoding` header.
+
+The `gzip` and `deflate` codings use `zlib`. The `zstd` coding requires the optional
+`zstandard` package, which is only imported when a body is (de)compressed with zstd.
+
+Bodies are decompressed incrementally, chunk by chunk, so a body provided as a
+file-like object (e.g. a WSGI input stream) is never held in memory in its compressed form.
+"""
+
+import zlib
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+Body = Union[bytes, str, BinaryIO]
+
+identity = 'identity'
+chunk_size = 64 * 1024
+
+# Bodies smaller than this aren't worth compressing, the framing overhead outweighs the savings
+default_compression_threshold = 1024
+
+
+class StreamCoder:
+    """The interface shared by zlib (de)compression objects, and the zstandard adapters."""
+
+    # The input that wasn't decompressed because the output reached `max_length`
+    unconsumed_tail: bytes
+    # The input after the end of the compressed stream
+    unused_data: bytes
+    # Whether the end of the compressed stream has been reached
+    eof: bool
+
+    def compress(self, chunk: bytes) -> bytes:  # pragma: no cover
+        raise NotImplementedError
+
+    def decompress(self, chunk: bytes, max_length: int = 0) -> bytes:  # pragma: no cover
+        raise NotImplementedError
+
+    def flush(self) -> bytes:  # pragma: no cover
+        raise NotImplementedError
+
+
+class ContentCoding:
+    def __init__(self, name: str, compressor: Callable[[], StreamCoder], decompressor: Callable[[], StreamCoder]) -> None:
+        self.name = name
+        self.compressor = compressor
+        self.decompressor = decompressor
+
+
+def _zstd_compressor() -> StreamCoder:
+    return _zstandard().ZstdCompressor().compressobj()
+
+
+class _ZstdDecompressor(StreamCoder):
+    """Adds `max_length` to zstandard decompression objects, which decompress all their input at once.
+
+    The input is fed in slices that can't decompress to more than `max_length`, plus a block.
+    A zstd block holds at most 128KiB, and takes at least 4 bytes.
+    """
+
+    max_expansion = 32 * 1024
+
+    def __init__(self) -> None:
+        self._decompressor = _zstandard().ZstdDecompressor().decompressobj()
+        self.unconsumed_tail = b''
+
+    @property
+    def unused_data(self) -> bytes:  # type: ignore
+        return self._decompressor.unused_data
+
+    @property
+    def eof(self) -> bool:  # type: ignore
+        return self._decompressor.eof
+
+    def decompress(self, chunk: bytes, max_length: int = 0) -> bytes:
+        if max_length:
+            slice_size = max(1, max_length // self.max_expansion)
+            chunk, self.unconsumed_tail = chunk[:slice_size], chunk[slice_size:]
+        return self._decompressor.decompress(chunk)
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush()
+
+
+def _zstd_decompressor() -> StreamCoder:
+    return _ZstdDecompressor()
+
+
+def _zstandard():
+    try:
+        import zstandard  # noqa: WPS433
+    except ImportError:  # pragma: no cover
+        raise ValueError('The zstd content coding requires the zstandard package')
+    return zstandard
+
+
+# The gzip format is selected with wbits=31, the zlib format (used by deflate) with wbits=15
+content_codings: Dict[str, ContentCoding] = {
+    'gzip': ContentCoding('gzip', lambda: zlib.compressobj(wbits=31), lambda: zlib.decompressobj(wbits=31)),
+    'deflate': ContentCoding('deflate', lambda: zlib.compressobj(wbits=15), lambda: zlib.decompressobj(wbits=15)),
+    'zstd': ContentCoding('zstd', _zstd_compressor, _zstd_decompressor),
+}
+
+
+def get_content_coding(name: str) -> ContentCoding:
+    try:
+        return content_codings[name]
+    except KeyError:
+        raise ValueError(f'Unknown content coding {name}')
+
+
+def parse_content_encoding(content_encoding: Optional[str]) -> List[str]:
+    """Split a `Content-Encoding` header into the list of codings, in the order they were applied.
+
+    Args:
+        content_encoding (str, optional): The header value.
+
+    Returns:
+        List[str]: The codings.
+    """
+    if not content_encoding:
+        return []
+    codings = (coding.strip().lower() for coding in content_encoding.split(','))
+    return [coding for coding in codings if coding and coding != identity]
+
+
+def _body_chunks(body: Body) -> Iterator[bytes]:
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+
+    if isinstance(body, bytes):
+        view = memoryview(body)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start : start + chunk_size])  # noqa: E203
+        return
+
+    chunk = body.read(chunk_size)
+    while chunk:
+        yield chunk
+        chunk = body.read(chunk_size)
+
+
+def _decompress_chunks(coding: ContentCoding, chunks: Iterable[bytes], max_size: Optional[int]) -> Iterator[bytes]:
+    decompressor = coding.decompressor()
+    # One more byte than the maximum size is enough to tell that the body is too large
+    max_length = max_size + 1 if max_size is not None else 0
+
+    for chunk in chunks:
+        # The output of each call is bounded, the rest of the input is kept in the unconsumed tail
+        while chunk:
+            if decompressor.eof or decompressor.unused_data:
+                raise ValueError(f'Unexpected data after the end of the {coding.name} body')
+
+            decompressed = decompressor.decompress(chunk, max_length)
+            if decompressed:
+                yield decompressed
+            chunk = decompressor.unconsumed_tail
+
+    if decompressor.unused_data:
+        raise ValueError(f'Unexpected data after the end of the {coding.name} body')
+
+    # The input is consumed, but there can be output left when it was bounded
+    while not decompressor.eof:
+        decompressed = decompressor.decompress(b'', max_length)
+        if not decompressed:
+            raise ValueError(f'The {coding.name} body is truncated')
+        yield decompressed
+
+
+def decompress_body(body: Optional[Body], content_encoding: Optional[str], max_size: Optional[int] = None) -> Optional[Union[bytes, str]]:
+    """Decompress a body according to its `Content-Encoding`.
+
+    Args:
+        body (Body, optional): The body, as bytes, a string or a binary file-like object.
+        content_encoding (str, optional): The `Content-Encoding` header.
+        max_size (int, optional): The maximum size of the decompressed body, to guard against decompression bombs.
+
+    Returns:
+        Optional[Union[bytes, str]]: The decompressed body.
+
+    Raises:
+        ValueError: If a content coding is unknown, the body is invalid or truncated, or it exceeds `max_size`.
+    """
+    if body is None:
+        return None
+
+    codings = parse_content_encoding(content_encoding)
+
+    if not codings:
+        if isinstance(body, (bytes, str)):
+            return body
+        return body.read()
+
+    chunks: Iterable[bytes] = _body_chunks(body)
+    for coding in reversed(codings):
+        # Each coding is bounded, so that the intermediate bodies can't be bombs either
+        chunks = _decompress_chunks(get_content_coding(coding), chunks, max_size)
+
+    decompressed: List[bytes] = []
+    size = 0
+    try:
+        for chunk in chunks:
+            decompressed.append(chunk)
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise ValueError(f'The decompressed body exceeds {max_size} bytes')
+    except ValueError:
+        raise
+    except Exception as exc:
+        # zlib and zstandard have their own exception types for corrupt input
+        raise ValueError(f'Invalid {content_encoding} body') from exc
+
+    return b''.join(decompressed)
+
+
+def compress_body(body: Union[bytes, str], content_encoding: str) -> bytes:
+    """Compress a body with the provided content coding.
+
+    Args:
+        body (Union[bytes, str]): The body, strings are encoded as UTF-8.
+        content_encoding (str): The content coding.
+
+    Returns:
+        bytes: The compressed body.
+    """
+    compressor = get_content_coding(content_encoding.strip().lower()).compressor()
+    chunks = [compressor.compress(chunk) for chunk in _body_chunks(body)]
+    chunks.append(compressor.flush())
+    return b''.join(chunks)
+
+
+def should_compress(body: Optional[Union[bytes, str]], content_encoding: Optional[str], threshold: int) -> bool:
+    if body is None or not parse_content_encoding(content_encoding):
+        return False
+    return len(body) >= threshold
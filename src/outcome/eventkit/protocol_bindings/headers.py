@@ -0,0 +1,97 @@
+"""A compact, case-insensitive mapping for HTTP headers."""
+
+import re
+from typing import Any, Dict, Iterable, Iterator, Mapping, MutableMapping, Optional, Tuple, Union
+
+# Header names can't start with whitespace, and neither names nor values can contain line breaks
+_valid_header_name = re.compile(r'^[^:\s][^:\r\n]*\Z')
+
+HeaderItems = Union[Mapping[str, str], Iterable[Tuple[str, str]]]
+
+
+def check_header_validity(name: str, value: str) -> None:
+    """Checks that the header name and value can be safely sent over HTTP.
+
+    Args:
+        name (str): The header name.
+        value (str): The header value.
+
+    Raises:
+        ValueError: If the name or value contains leading whitespace, reserved characters, or line breaks.
+    """
+    if not isinstance(name, str) or not _valid_header_name.match(name):
+        raise ValueError(f'Invalid header name: {name!r}')
+
+    check_header_value(name, value)
+
+
+def check_header_value(name: str, value: str) -> None:
+    """Checks that a header value can be safely sent over HTTP, for names that are already checked.
+
+    Args:
+        name (str): The header name.
+        value (str): The header value.
+
+    Raises:
+        ValueError: If the value contains leading whitespace or line breaks.
+    """
+    # Values can be empty, but can't start with whitespace. String methods are faster than a regular expression
+    if not isinstance(value, str) or value[:1].isspace() or '\r' in value or '\n' in value:
+        raise ValueError(f'Invalid value for header {name}: {value!r}')
+
+
+class HTTPHeaders(MutableMapping[str, str]):  # noqa: WPS214
+    """A case-insensitive dict of HTTP headers.
+
+    Each entry is stored once, under the lower-cased header name, alongside the
+    name as it was originally set. Iterating over the headers returns the original names.
+    """
+
+    __slots__ = ('_store',)
+
+    def __init__(self, headers: Optional[HeaderItems] = None) -> None:
+        self._store: Dict[str, Tuple[str, str]] = {}
+        if isinstance(headers, HTTPHeaders):
+            # The names are already lower-cased
+            self._store = headers._store.copy()  # noqa: WPS437
+        elif headers:
+            self.update(headers)
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._store[key.lower()] = (key, value)
+
+    def __getitem__(self, key: str) -> str:
+        return self._store[key.lower()][1]
+
+    def __delitem__(self, key: str) -> None:  # noqa: WPS603
+        del self._store[key.lower()]  # noqa: WPS420
+
+    def __contains__(self, key: Any) -> bool:
+        return isinstance(key, str) and key.lower() in self._store
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _ in self._store.values())
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return dict(self.lower_items()) == dict(HTTPHeaders(other).lower_items())
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def lower_items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over the headers, with lower-cased names.
+
+        Returns:
+            Iterator[Tuple[str, str]]: The (lower-cased name, value) pairs.
+        """
+        return ((key, pair[1]) for key, pair in self._store.items())
+
+    def copy(self) -> 'HTTPHeaders':
+        headers = HTTPHeaders()
+        headers._store = self._store.copy()  # noqa: WPS437
+        return headers
@@ -1,36 +1,85 @@
 """Tools to build HTTP messages from CloudEvents."""
 
-import re
-import urllib
-from typing import Any, Dict, List, Optional, Type, Union, cast
+import urllib.parse
+from typing import Any, Dict, Iterable, List, Optional, Type, Union, cast
 
 import pendulum
+from outcome.eventkit.cache import BoundedCache
+from outcome.eventkit.compact import AnyCloudEvent
 from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.data.models import payload_models
 from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.extensions import to_string
 from outcome.eventkit.formats import CloudEventFormat
-from outcome.eventkit.mime import parse_mime_type
-from requests.structures import CaseInsensitiveDict
-from requests.utils import check_header_validity
+from outcome.eventkit.interning import attribute_values
+from outcome.eventkit.lazy import LazyCloudEvent
+from outcome.eventkit.mime import resolve_content_type
+from outcome.eventkit.protocol_bindings.content_encoding import (
+    Body,
+    compress_body,
+    decompress_body,
+    default_compression_threshold,
+    should_compress,
+)
+from outcome.eventkit.protocol_bindings.headers import HTTPHeaders, check_header_validity, check_header_value
 
 HeaderDict = Dict[str, str]
 
 
 _header_attribute_prefix = 'ce-'
-_header_attribute_prefix_pattern = r'^ce-'
 
 _content_type_header = 'Content-Type'
+_content_encoding_header = 'Content-Encoding'
+
+# Compressed bodies are decompressed up to this size, to guard against decompression bombs
+max_decompressed_body_size = 64 * 1024 * 1024
+
+# The header names of the attributes, by attribute name
+max_cached_header_names = 1024
+_header_names: BoundedCache[str, str] = BoundedCache(max_cached_header_names)
 
 
 class HTTPEvent:
     """A basic container for HTTP headers and a body."""
 
-    headers: HeaderDict
-    body: Optional[Union[bytes, str]]
+    headers: HTTPHeaders
+    body: Optional[Body]
 
-    def __init__(self, body: Optional[Union[bytes, str]] = None, headers: Optional[HeaderDict] = None) -> None:
-        self.headers: HeaderDict = CaseInsensitiveDict(headers or {})
+    def __init__(self, body: Optional[Body] = None, headers: Optional[HeaderDict] = None) -> None:
+        self.headers = HTTPHeaders(headers)
         self.body = body
 
+    def compress(self, content_encoding: Optional[str], threshold: int = default_compression_threshold) -> None:
+        """Compress the body with the content coding, if it's larger than the threshold.
+
+        Args:
+            content_encoding (str, optional): The content coding, e.g. `gzip` or `zstd`.
+            threshold (int): The minimum size of the body to compress, in bytes. Defaults to 1KiB.
+        """
+        if content_encoding and should_compress(self.body, content_encoding, threshold):
+            self.body = compress_body(self.body, content_encoding)
+            self.headers[_content_encoding_header] = content_encoding
+
+    def decompressed_body(self, max_size: Optional[int] = None) -> Optional[Union[bytes, str]]:
+        """Returns the body, decompressed according to the `Content-Encoding` header.
+
+        Args:
+            max_size (int, optional): The maximum size of the decompressed body.
+
+        Returns:
+            Optional[Union[bytes, str]]: The body.
+        """
+        return decompress_body(self.body, self.headers.get(_content_encoding_header), max_size)
+
+
+def _header_name(attr: str) -> str:
+    header = _header_names.get(attr)
+    if header is None:
+        header = f'{_header_attribute_prefix}{attr.lower()}'
+        check_header_validity(header, '')
+        header = _header_names.add(attr, header)
+    return header
+
 
 def attributes_to_headers(attributes: Dict[str, Any]) -> HeaderDict:
     """Constructs a header dict from the attributes of an event.
@@ -43,22 +92,25 @@ def attributes_to_headers(attributes: Dict[str, Any]) -> HeaderDict:
     Returns:
         HeaderDict: The header dict.
     """
-    exclude_from_headers = {'datacontenttype'}
-
-    headers = CaseInsensitiveDict()
+    headers = HTTPHeaders()
 
     for attr, value in attributes.items():
-        if attr not in exclude_from_headers:
-            # Time is the only attribute in the spec that isn't represented
-            # by a python str-like object
-            if attr == 'time':
-                value = pendulum.instance(value).isoformat()
+        if attr == 'datacontenttype':
+            continue
 
-            header = f'{_header_attribute_prefix}{attr.lower()}'
+        # Time is the only attribute in the spec that isn't represented
+        # by a python str-like object
+        if attr == 'time':
+            value = pendulum.instance(value).isoformat()
+        elif value.__class__ is not str:
+            # Extensions can have any type of the type system, e.g. booleans are `true`
+            value = to_string(value)
 
-            check_header_validity((header, value))
+        # The names are checked once, when they're cached
+        header = _header_name(attr)
+        check_header_value(header, value)
 
-            headers[header] = value
+        headers[header] = value
 
     return headers
 
@@ -71,6 +123,15 @@ def from_http(http_event: HTTPEvent) -> CloudEvent:
     return StructuredHTTPBinding.from_http(http_event)
 
 
+# Method to read the attributes of a cloud event from either a binary or structured HTTP message,
+# deferring the decoding of the data until it's accessed
+def peek_http(http_event: HTTPEvent) -> LazyCloudEvent:
+    if looks_like_binary(http_event):
+        return BinaryHTTPBinding.peek(http_event)
+
+    return StructuredHTTPBinding.peek(http_event)
+
+
 def looks_like_binary(http_event: HTTPEvent) -> bool:
     # Not an exact science, but we can check for some headers
     expected_headers = {'Content-Type', 'ce-specversion', 'ce-id', 'ce-type', 'ce-source'}
@@ -82,7 +143,7 @@ def looks_like_binary(http_event: HTTPEvent) -> bool:
     # The presence of the headers is not sufficient, since structured HTTP bindings can also contain the
     # headers, instead we must check the Content-Type header to ensure it's not of the type application/cloudevents
     # which is mandated by the spec
-    content_type = parse_mime_type(http_event.headers['Content-Type'])
+    content_type = resolve_content_type(http_event.headers['Content-Type']).mime_type
 
     return not (content_type.type == 'application' and content_type.subtype == 'cloudevents')
 
@@ -98,7 +159,26 @@ class BinaryHTTPBinding:
     """
 
     @staticmethod
-    def to_http(event: CloudEvent) -> HTTPEvent:  # noqa: WPS602
+    def to_http(  # noqa: WPS602
+        event: AnyCloudEvent,
+        content_encoding: Optional[str] = None,
+        compression_threshold: int = default_compression_threshold,
+        encoded_data: Optional[Body] = None,
+    ) -> HTTPEvent:
+        """Create a binary HTTP message.
+
+        Args:
+            event (AnyCloudEvent): The event.
+            content_encoding (str, optional): The content coding used to compress the body.
+            compression_threshold (int): The minimum size of the body to compress, in bytes.
+            encoded_data (Body, optional): The data of the event, already encoded. The data is encoded if it's not provided.
+
+        Returns:
+            HTTPEvent: The message.
+
+        Raises:
+            ValueError: If the event has data, but no data content type.
+        """
         if event.data is not None and event.data_content_type is None:
             raise ValueError('Cannot construct a binary HTTP message from an event without a data content type')
 
@@ -107,40 +187,93 @@ class BinaryHTTPBinding:
 
         if event.data:
             headers[_content_type_header] = event.data_content_type
-            body = event.data.encoded_data
+            body = encoded_data if encoded_data is not None else event.data.encoded_data
+
+        http_event = HTTPEvent(body, headers)
+        http_event.compress(content_encoding, compression_threshold)
 
-        return HTTPEvent(body, headers)
+        return http_event
 
     @staticmethod
     def from_http(http_event: HTTPEvent) -> CloudEvent:  # noqa: WPS602
+        attributes = BinaryHTTPBinding.header_attributes(http_event)
+        data = BinaryHTTPBinding.decode_data(http_event)
+
+        return CloudEvent.from_attributes({'data': data, **attributes})
+
+    @staticmethod
+    def peek(http_event: HTTPEvent) -> LazyCloudEvent:  # noqa: WPS602
+        """Read the attributes of the event from the headers, without decoding the body.
+
+        The body is only decoded if the data of the event is accessed.
+
+        Args:
+            http_event (HTTPEvent): The HTTP message.
+
+        Returns:
+            LazyCloudEvent: The event.
+        """
+        attributes = BinaryHTTPBinding.header_attributes(http_event)
+
+        data_content_type = http_event.headers.get(_content_type_header)
+        if data_content_type is not None:
+            attributes['datacontenttype'] = attribute_values.intern(data_content_type)
+
+        data_schema = BinaryHTTPBinding.data_schema(http_event)
+        if data_schema is not None:
+            attributes['dataschema'] = data_schema
+
+        return LazyCloudEvent(attributes, lambda: BinaryHTTPBinding.decode_data(http_event), http_event.body)
+
+    @staticmethod
+    def header_attributes(http_event: HTTPEvent) -> Dict[str, str]:  # noqa: WPS602
         # We don't want to add data_schema as an attribute of the event itself
         # since its attached to the CloudEventData instance instead
         excluded_attributes = {'ce-dataschema'}
 
         # We want to ignore case, since we don't know what case we're dealing with
+        prefix_length = len(_header_attribute_prefix)
         attributes = {
-            re.sub(_header_attribute_prefix_pattern, '', attr, flags=re.I): urllib.parse.unquote(value)
-            for attr, value in http_event.headers.items()
-            if attr.lower().startswith(_header_attribute_prefix) and attr.lower() not in excluded_attributes
+            attr[prefix_length:]: urllib.parse.unquote(value)
+            for attr, value in http_event.headers.lower_items()
+            if attr.startswith(_header_attribute_prefix) and attr not in excluded_attributes
         }
+        attribute_values.intern_attributes(attributes)
+        return attributes
 
+    @staticmethod
+    def data_schema(http_event: HTTPEvent) -> Optional[str]:  # noqa: WPS602
+        # Like the other attributes, the data schema is percent-decoded
+        data_schema = http_event.headers.get('ce-dataschema')
+        if data_schema is not None:
+            data_schema = attribute_values.intern(urllib.parse.unquote(data_schema))
+        return data_schema
+
+    @staticmethod
+    def decode_data(http_event: HTTPEvent) -> Optional[CloudEventData]:  # noqa: WPS602
         data = None
         data_content_type = http_event.headers.get(_content_type_header)
-        data_schema = http_event.headers.get('ce-dataschema')
+        data_schema = BinaryHTTPBinding.data_schema(http_event)
 
         if http_event.body is not None:
             if data_content_type is None:
                 raise ValueError('Cannot create event from binary HTTP message without a Content-Type header')
 
             coder = CloudEventData.get_coder(data_content_type)
-            decoded_data = coder.decode(http_event.body, data_content_type)
+            body = http_event.decompressed_body(max_decompressed_body_size)
+
+            model = payload_models.model_for(http_event.headers.get('ce-type'), data_schema)
+            if model is not None:
+                decoded_data = coder.decode_model(body, data_content_type, model)
+            else:
+                decoded_data = coder.decode(body, data_content_type)
 
             data = CloudEventData(data=decoded_data, data_content_type=data_content_type, data_schema=data_schema)
 
         if data is None and (data_content_type or data_schema):
             data = CloudEventData(data_content_type=data_content_type, data_schema=data_schema)
 
-        return CloudEvent(**{'data': data, **attributes})
+        return data
 
 
 class StructuredHTTPBinding:
@@ -151,8 +284,12 @@ class StructuredHTTPBinding:
     """
 
     @staticmethod
-    def to_http(  # noqa: WPS602
-        event: CloudEvent, event_format: Type[CloudEventFormat], include_attributes_in_headers: bool = False,
+    def to_http(  # noqa: WPS602, WPS211
+        event: AnyCloudEvent,
+        event_format: Type[CloudEventFormat],
+        include_attributes_in_headers: bool = False,
+        content_encoding: Optional[str] = None,
+        compression_threshold: int = default_compression_threshold,
     ) -> HTTPEvent:
 
         if event_format.format_content_type is None:  # pragma: no cover
@@ -161,23 +298,83 @@ class StructuredHTTPBinding:
         if include_attributes_in_headers:
             headers = attributes_to_headers(event.attributes)
         else:
-            headers = cast(HeaderDict, CaseInsensitiveDict())
+            headers = cast(HeaderDict, HTTPHeaders())
 
         headers[_content_type_header] = event_format.format_content_type
         body = event_format.encode(event)
 
-        return HTTPEvent(body, headers)
+        http_event = HTTPEvent(body, headers)
+        http_event.compress(content_encoding, compression_threshold)
+
+        return http_event
 
     @staticmethod
     def from_http(http_event: HTTPEvent) -> List[CloudEvent]:  # noqa: WPS602
+        event_format = StructuredHTTPBinding.event_format(http_event)
+
+        # The Content-Encoding doesn't affect the format, the body is decompressed before it's decoded
+        return event_format.decode(http_event.decompressed_body(max_decompressed_body_size))
+
+    @staticmethod
+    def peek(http_event: HTTPEvent) -> LazyCloudEvent:  # noqa: WPS602
+        """Read the attributes of the event, deferring the decoding of its data if the format allows it.
+
+        Args:
+            http_event (HTTPEvent): The HTTP message.
+
+        Returns:
+            LazyCloudEvent: The event.
+        """
+        event_format = StructuredHTTPBinding.event_format(http_event)
+        return event_format.peek(http_event.decompressed_body(max_decompressed_body_size))
+
+    @staticmethod
+    def event_format(http_event: HTTPEvent) -> Type[CloudEventFormat]:  # noqa: WPS602
         try:
             format_content_type = http_event.headers[_content_type_header]
         except KeyError:
             raise ValueError('The HTTP event does not contain a content-type')
 
         try:
-            event_format = CloudEventFormat.format_content_types[format_content_type]
+            return CloudEventFormat.format_content_types[format_content_type]
         except KeyError:
             raise ValueError(f'Unknown format content type {format_content_type}')
 
-        return event_format.decode(http_event.body)
+
+class BatchHTTPBinding:
+    """Creates a batched HTTP message.
+
+    Several events are transmitted in the HTTP body, with the batch format of the provided `event_format`.
+    """
+
+    @staticmethod
+    def to_http(  # noqa: WPS602
+        events: Iterable[AnyCloudEvent],
+        event_format: Type[CloudEventFormat],
+        content_encoding: Optional[str] = None,
+        compression_threshold: int = default_compression_threshold,
+    ) -> HTTPEvent:
+        if event_format.batch_content_type is None:
+            raise ValueError('Event format does not support batches')
+
+        headers = cast(HeaderDict, HTTPHeaders())
+        headers[_content_type_header] = event_format.batch_content_type
+
+        http_event = HTTPEvent(event_format.encode_batch(events), headers)
+        http_event.compress(content_encoding, compression_threshold)
+
+        return http_event
+
+    @staticmethod
+    def from_http(http_event: HTTPEvent) -> List[CloudEvent]:  # noqa: WPS602
+        try:
+            batch_content_type = http_event.headers[_content_type_header]
+        except KeyError:
+            raise ValueError('The HTTP event does not contain a content-type')
+
+        try:
+            event_format = CloudEventFormat.batch_content_types[batch_content_type]
+        except KeyError:
+            raise ValueError(f'Unknown batch content type {batch_content_type}')
+
+        return event_format.decode_batch(http_event.decompressed_body(max_decompressed_body_size))
@@ -0,0 +1,307 @@
+"""Tools to build Kafka messages from CloudEvents.
+
+See https://github.com/cloudevents/spec/blob/v1.0/kafka-protocol-binding.md
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+import pendulum
+from outcome.eventkit.compact import AnyCloudEvent
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.data.models import payload_models
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.extensions import to_string
+from outcome.eventkit.formats import CloudEventFormat
+from outcome.eventkit.interning import attribute_values
+from outcome.eventkit.lazy import LazyCloudEvent
+
+KafkaHeaders = List[Tuple[str, bytes]]
+# Returns the key of the message for an event, which determines its partition
+KeyMapper = Callable[[AnyCloudEvent], Optional[str]]
+
+_header_attribute_prefix = 'ce_'
+_content_type_header = 'content-type'
+_encoding = 'utf-8'
+
+
+def subject_key(event: AnyCloudEvent) -> Optional[str]:
+    """Use the subject of the event as the message key, so events with the same subject stay in order."""
+    return event.subject
+
+
+def partition_key(event: AnyCloudEvent) -> Optional[str]:
+    """Use the `partitionkey` extension of the event as the message key, as described by the Kafka binding."""
+    return event.extensions.get('partitionkey')
+
+
+def no_key(event: AnyCloudEvent) -> Optional[str]:
+    return None
+
+
+class KafkaMessage:
+    """A basic container for the key, headers and value of a Kafka message.
+
+    Messages read from a broker also have a topic, partition and offset.
+    """
+
+    __slots__ = ('key', 'headers', 'value', 'topic', 'partition', 'offset')
+
+    def __init__(  # noqa: WPS211
+        self,
+        value: Optional[bytes] = None,
+        headers: Optional[KafkaHeaders] = None,
+        key: Optional[bytes] = None,
+        topic: Optional[str] = None,
+        partition: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> None:
+        self.value = value
+        self.headers = headers if headers is not None else []
+        self.key = key
+        self.topic = topic
+        self.partition = partition
+        self.offset = offset
+
+    def header(self, name: str) -> Optional[bytes]:
+        """Return the value of the last header with the name, since Kafka allows repeated headers."""
+        for header_name, header_value in reversed(self.headers):
+            if header_name == name:
+                return header_value
+        return None
+
+    def __eq__(self, o: Any) -> bool:
+        if not isinstance(o, KafkaMessage):
+            return NotImplemented
+        return (self.key, self.headers, self.value) == (o.key, o.headers, o.value)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f'KafkaMessage(key={self.key!r}, headers={self.headers!r}, value={self.value!r})'
+
+
+def _encode_key(event: AnyCloudEvent, key_mapper: KeyMapper) -> Optional[bytes]:
+    key = key_mapper(event)
+    return key.encode(_encoding) if key is not None else None
+
+
+def _to_bytes(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode(_encoding)
+
+
+def attributes_to_headers(attributes: Dict[str, Any]) -> KafkaHeaders:
+    """Constructs Kafka headers from the attributes of an event.
+
+    `data` and `datacontenttype` are excluded.
+
+    Args:
+        attributes (Dict[str, Any]): The event attributes.
+
+    Returns:
+        KafkaHeaders: The headers.
+    """
+    headers: KafkaHeaders = []
+
+    for attr, value in attributes.items():
+        if attr == 'datacontenttype':
+            continue
+
+        if attr == 'time':
+            value = pendulum.instance(value).isoformat()
+        elif value.__class__ is not str:
+            # Extensions can have any type of the type system, e.g. booleans are `true`
+            value = to_string(value)
+
+        headers.append((f'{_header_attribute_prefix}{attr.lower()}', _to_bytes(value)))
+
+    return headers
+
+
+# Method to attempt to parse a cloud event from either a binary or structured Kafka message
+def from_kafka(message: KafkaMessage) -> CloudEvent:
+    if looks_like_binary(message):
+        return BinaryKafkaBinding.from_kafka(message)
+
+    return StructuredKafkaBinding.from_kafka(message)
+
+
+# Method to read the attributes of a cloud event from either a binary or structured Kafka message,
+# deferring the decoding of the data until it's accessed
+def peek_kafka(message: KafkaMessage) -> LazyCloudEvent:
+    if looks_like_binary(message):
+        return BinaryKafkaBinding.peek(message)
+
+    return StructuredKafkaBinding.peek(message)
+
+
+def looks_like_binary(message: KafkaMessage) -> bool:
+    # The spec requires a ce_specversion header in binary mode, and the structured
+    # content type is application/cloudevents(+format)
+    if message.header(f'{_header_attribute_prefix}specversion') is None:
+        return False
+
+    content_type = message.header(_content_type_header)
+    return content_type is None or not content_type.lower().startswith(b'application/cloudevents')
+
+
+class BinaryKafkaBinding:
+    """Creates a Kafka message in binary format.
+
+    - Event `datacontenttype` is mapped to the `content-type` header
+    - Other event attributes are mapped to headers, prefixed with `ce_`
+    - Event data is serialized and used as the message value
+
+    See more at https://github.com/cloudevents/spec/blob/v1.0/kafka-protocol-binding.md#32-binary-content-mode
+    """
+
+    @staticmethod
+    def to_kafka(event: AnyCloudEvent, key_mapper: KeyMapper = subject_key) -> KafkaMessage:  # noqa: WPS602
+        if event.data is not None and event.data_content_type is None:
+            raise ValueError('Cannot construct a binary Kafka message from an event without a data content type')
+
+        headers = attributes_to_headers(event.attributes)
+        value = None
+
+        if event.data is not None:
+            # The data schema is one of the event attributes, so it's already in the headers
+            headers.append((_content_type_header, event.data_content_type.encode(_encoding)))
+            if event.data.data is not None:
+                value = _to_bytes(event.data.encoded_data)
+
+        return KafkaMessage(value, headers, _encode_key(event, key_mapper))
+
+    @staticmethod
+    def from_kafka(message: KafkaMessage) -> CloudEvent:  # noqa: WPS602
+        attributes = BinaryKafkaBinding.header_attributes(message)
+        data = BinaryKafkaBinding.decode_data(message)
+
+        return CloudEvent.from_attributes({'data': data, **attributes})
+
+    @staticmethod
+    def peek(message: KafkaMessage) -> LazyCloudEvent:  # noqa: WPS602
+        """Read the attributes of the event from the headers, without decoding the value.
+
+        Args:
+            message (KafkaMessage): The Kafka message.
+
+        Returns:
+            LazyCloudEvent: The event.
+        """
+        attributes: Dict[str, Any] = BinaryKafkaBinding.header_attributes(message)
+
+        data_content_type = message.header(_content_type_header)
+        if data_content_type is not None:
+            attributes['datacontenttype'] = attribute_values.intern(data_content_type.decode(_encoding))
+
+        data_schema = message.header(f'{_header_attribute_prefix}dataschema')
+        if data_schema is not None:
+            attributes['dataschema'] = attribute_values.intern(data_schema.decode(_encoding))
+
+        return LazyCloudEvent(attributes, lambda: BinaryKafkaBinding.decode_data(message), message.value)
+
+    @staticmethod
+    def header_attributes(message: KafkaMessage) -> Dict[str, str]:  # noqa: WPS602
+        # The data schema is attached to the CloudEventData instance
+        excluded_attributes = {'dataschema'}
+
+        prefix_length = len(_header_attribute_prefix)
+        attributes = {}
+        for name, header_value in message.headers:
+            if name.startswith(_header_attribute_prefix):
+                attr = name[prefix_length:]
+                if attr not in excluded_attributes:
+                    attributes[attr] = header_value.decode(_encoding)
+
+        attribute_values.intern_attributes(attributes)
+        return attributes
+
+    @staticmethod
+    def decode_data(message: KafkaMessage) -> Optional[CloudEventData]:  # noqa: WPS602
+        data = None
+        data_content_type_header = message.header(_content_type_header)
+        data_schema_header = message.header(f'{_header_attribute_prefix}dataschema')
+
+        data_content_type = data_content_type_header.decode(_encoding) if data_content_type_header is not None else None
+        data_schema = None
+        if data_schema_header is not None:
+            data_schema = attribute_values.intern(data_schema_header.decode(_encoding))
+
+        if message.value is not None:
+            if data_content_type is None:
+                raise ValueError('Cannot create event from binary Kafka message without a content-type header')
+
+            coder = CloudEventData.get_coder(data_content_type)
+
+            # The data is validated along with the event, so it's only decoded here
+            event_type = message.header(f'{_header_attribute_prefix}type')
+            model = payload_models.model_for(event_type.decode(_encoding) if event_type is not None else None, data_schema)
+            if model is not None:
+                decoded_data = coder.decode_model(message.value, data_content_type, model)
+            else:
+                decoded_data = coder.decode(message.value, data_content_type)
+
+            data = CloudEventData(data=decoded_data, data_content_type=data_content_type, data_schema=data_schema)
+
+        if data is None and (data_content_type or data_schema):
+            data = CloudEventData(data_content_type=data_content_type, data_schema=data_schema)
+
+        return data
+
+
+class StructuredKafkaBinding:
+    """Creates a structured Kafka message.
+
+    The entire event is transmitted in the message value.
+    The provided `event_format` determines how the event is serialized.
+    """
+
+    @staticmethod
+    def to_kafka(  # noqa: WPS602
+        event: AnyCloudEvent,
+        event_format: Type[CloudEventFormat],
+        key_mapper: KeyMapper = subject_key,
+        encoded_event: Optional[Union[bytes, str]] = None,
+    ) -> KafkaMessage:
+        """Create a structured Kafka message.
+
+        Args:
+            event (AnyCloudEvent): The event.
+            event_format (Type[CloudEventFormat]): The format of the message value.
+            key_mapper (KeyMapper): Returns the key of the message.
+            encoded_event (Union[bytes, str], optional): The event already encoded with the format, e.g. shared
+                with other messages. The event is encoded if it's not provided.
+
+        Returns:
+            KafkaMessage: The message.
+        """
+        if event_format.format_content_type is None:  # pragma: no cover
+            raise ValueError('Event format needs to specify a content type')
+
+        if encoded_event is None:
+            encoded_event = event_format.encode(event)
+
+        headers = [(_content_type_header, event_format.format_content_type.encode(_encoding))]
+        value = _to_bytes(encoded_event)
+
+        return KafkaMessage(value, headers, _encode_key(event, key_mapper))
+
+    @staticmethod
+    def from_kafka(message: KafkaMessage) -> CloudEvent:  # noqa: WPS602
+        event_format = StructuredKafkaBinding.event_format(message)
+        return event_format.decode(message.value)
+
+    @staticmethod
+    def peek(message: KafkaMessage) -> LazyCloudEvent:  # noqa: WPS602
+        event_format = StructuredKafkaBinding.event_format(message)
+        return event_format.peek(message.value)
+
+    @staticmethod
+    def event_format(message: KafkaMessage) -> Type[CloudEventFormat]:  # noqa: WPS602
+        format_content_type = message.header(_content_type_header)
+        if format_content_type is None:
+            raise ValueError('The Kafka message does not contain a content-type')
+
+        try:
+            return CloudEventFormat.format_content_types[format_content_type.decode(_encoding)]
+        except KeyError:
+            raise ValueError(f'Unknown format content type {format_content_type!r}')
@@ -0,0 +1,345 @@
+"""A local stand-in for a Kafka cluster, to test producers and consumers without a real broker.
+
+Topics are split into partitions, and each partition is an append-only sequence of
+messages, addressed by offset. Messages with the same key always go to the same
+partition, messages without a key are spread over the partitions in turn.
+
+By default, partitions are kept in memory. When the broker has a directory, each
+partition is stored in its own file, and the topics are reloaded when a broker is
+created on the same directory.
+"""
+
+import itertools
+import re
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from outcome.eventkit.protocol_bindings.kafka import KafkaHeaders, KafkaMessage
+
+PathLike = Union[str, Path]
+
+# Lengths are stored as signed 32-bit integers, -1 for None
+_length = struct.Struct('>i')
+_no_value = -1
+
+_partition_suffix = '.partition'
+
+# The rule of Kafka for topic names, which also keeps the partition files in the broker's directory
+_valid_topic = re.compile(r'[a-zA-Z0-9._-]{1,249}')
+_reserved_topics = frozenset(('.', '..'))
+
+
+class UnknownTopicError(KeyError):
+    ...
+
+
+def _write_bytes(buffer: bytearray, value: Optional[bytes]) -> None:
+    if value is None:
+        buffer += _length.pack(_no_value)
+    else:
+        buffer += _length.pack(len(value))
+        buffer += value
+
+
+def _read_bytes(data: bytes, position: int) -> Tuple[Optional[bytes], int]:
+    (length,) = _length.unpack_from(data, position)
+    position += _length.size
+    if length == _no_value:
+        return None, position
+    return data[position : position + length], position + length  # noqa: E203
+
+
+def encode_record(message: KafkaMessage) -> bytes:
+    """Serialize a message as a length-prefixed record.
+
+    Args:
+        message (KafkaMessage): The message.
+
+    Returns:
+        bytes: The record.
+    """
+    payload = bytearray()
+    _write_bytes(payload, message.key)
+    payload += _length.pack(len(message.headers))
+    for name, header_value in message.headers:
+        _write_bytes(payload, name.encode('utf-8'))
+        _write_bytes(payload, header_value)
+    _write_bytes(payload, message.value)
+
+    return _length.pack(len(payload)) + payload
+
+
+def decode_record(data: bytes, position: int = 0) -> Tuple[KafkaMessage, int]:
+    """Read a record written by `encode_record`.
+
+    Args:
+        data (bytes): The data containing the record.
+        position (int): The position of the record in the data.
+
+    Returns:
+        Tuple[KafkaMessage, int]: The message, and the position of the next record.
+    """
+    (size,) = _length.unpack_from(data, position)
+    position += _length.size
+    end = position + size
+
+    key, position = _read_bytes(data, position)
+    (header_count,) = _length.unpack_from(data, position)
+    position += _length.size
+
+    headers: KafkaHeaders = []
+    for _ in range(header_count):
+        name, position = _read_bytes(data, position)
+        header_value, position = _read_bytes(data, position)
+        headers.append((name.decode('utf-8'), header_value))  # type: ignore
+
+    value, position = _read_bytes(data, position)
+    if position != end:
+        raise ValueError('Corrupt record')
+
+    return KafkaMessage(value, headers, key), end
+
+
+class Partition:
+    """An append-only sequence of messages, optionally backed by a file."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        # The messages, for in-memory partitions
+        self._messages: List[KafkaMessage] = []
+        # The position of each record, for file-backed partitions
+        self._positions: List[int] = []
+        self._file: Optional[BinaryIO] = None
+
+        if path is not None:
+            self._load()
+            self._file = open(path, 'ab')  # noqa: WPS515
+
+    def __len__(self) -> int:
+        return len(self._positions) if self.path is not None else len(self._messages)
+
+    def append(self, messages: List[KafkaMessage]) -> int:
+        """Append messages, and return the offset of the first one."""
+        with self._lock:
+            first_offset = len(self)
+
+            if self._file is None:
+                self._messages.extend(messages)
+                return first_offset
+
+            position = self._file.tell()
+            records = []
+            positions = []
+            for message in messages:
+                record = encode_record(message)
+                records.append(record)
+                positions.append(position)
+                position += len(record)
+
+            # A single write per batch, the records are only visible to readers once they're written
+            self._file.write(b''.join(records))
+            self._file.flush()
+            self._positions.extend(positions)
+
+            return first_offset
+
+    def read(self, offset: int, max_messages: Optional[int] = None) -> List[KafkaMessage]:
+        end = len(self) if max_messages is None else min(len(self), offset + max_messages)
+        if offset >= end:
+            return []
+
+        if self.path is None:
+            return self._messages[offset:end]
+
+        start_position = self._positions[offset]
+        end_position = self._positions[end] if end < len(self._positions) else None
+
+        with open(self.path, 'rb') as partition_file:
+            partition_file.seek(start_position)
+            data = partition_file.read(-1 if end_position is None else end_position - start_position)
+
+        messages = []
+        position = 0
+        for _ in range(end - offset):
+            message, position = decode_record(data, position)
+            messages.append(message)
+        return messages
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def _load(self) -> None:
+        try:
+            data = self.path.read_bytes()  # type: ignore
+        except FileNotFoundError:
+            return
+
+        position = 0
+        while position + _length.size <= len(data):
+            (size,) = _length.unpack_from(data, position)
+            if position + _length.size + size > len(data):
+                # An incomplete record at the end of the file, after a crash
+                break
+            self._positions.append(position)
+            position += _length.size + size
+
+        if position < len(data):
+            with open(self.path, 'r+b') as partition_file:  # type: ignore
+                partition_file.truncate(position)
+
+
+class LocalBroker:  # noqa: WPS214
+    """A local broker with topics split into partitions.
+
+    The broker can be used as a context manager, its files are closed on exit.
+    """
+
+    def __init__(self, directory: Optional[PathLike] = None, default_partitions: int = 1) -> None:
+        """Create a broker.
+
+        Args:
+            directory (PathLike, optional): Where to store the partitions. Defaults to memory.
+            default_partitions (int): The number of partitions of topics created on first use.
+        """
+        self.directory = Path(directory) if directory is not None else None
+        self.default_partitions = default_partitions
+
+        self._lock = threading.Lock()
+        self._topics: Dict[str, List[Partition]] = {}
+        self._round_robin: Dict[str, Iterator[int]] = {}
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_topics()
+
+    def __enter__(self) -> 'LocalBroker':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def create_topic(self, topic: str, partitions: Optional[int] = None) -> None:
+        """Create a topic, unless it already exists.
+
+        Args:
+            topic (str): The topic, made of ASCII letters, digits, `.`, `_` and `-`, as in Kafka.
+            partitions (int, optional): The number of partitions. Defaults to the broker's `default_partitions`.
+
+        Raises:
+            ValueError: If the topic name is invalid.
+        """
+        if not _valid_topic.fullmatch(topic) or topic in _reserved_topics:
+            raise ValueError(f'Invalid topic name: {topic!r}')
+
+        with self._lock:
+            if topic in self._topics:
+                return
+
+            partition_count = partitions or self.default_partitions
+            self._topics[topic] = [Partition(self._partition_path(topic, index)) for index in range(partition_count)]
+            self._round_robin[topic] = itertools.cycle(range(partition_count))
+
+    def topics(self) -> Dict[str, int]:
+        """The number of partitions of each topic."""
+        return {topic: len(partitions) for topic, partitions in self._topics.items()}
+
+    def partition_for(self, topic: str, key: Optional[bytes]) -> int:
+        partitions = self._partitions(topic)
+        if key is None:
+            return next(self._round_robin[topic])
+        return zlib.crc32(key) % len(partitions)
+
+    def produce(self, topic: str, message: KafkaMessage) -> Tuple[int, int]:
+        """Append a message to a topic, creating the topic if needed.
+
+        Args:
+            topic (str): The topic.
+            message (KafkaMessage): The message.
+
+        Returns:
+            Tuple[int, int]: The partition and offset of the message.
+        """
+        [position] = self.produce_batch(topic, [message])
+        return position
+
+    def produce_batch(self, topic: str, messages: Iterable[KafkaMessage]) -> List[Tuple[int, int]]:
+        """Append messages to a topic, with a single write per partition.
+
+        Args:
+            topic (str): The topic.
+            messages (Iterable[KafkaMessage]): The messages.
+
+        Returns:
+            List[Tuple[int, int]]: The partition and offset of each message.
+        """
+        self.create_topic(topic)
+        partitions = self._partitions(topic)
+
+        batches: Dict[int, List[int]] = {}
+        message_list = list(messages)
+        for index, message in enumerate(message_list):
+            batches.setdefault(self.partition_for(topic, message.key), []).append(index)
+
+        positions: List[Tuple[int, int]] = [(0, 0)] * len(message_list)
+        for partition_index, message_indexes in batches.items():
+            first_offset = partitions[partition_index].append([message_list[i] for i in message_indexes])
+            for offset, message_index in enumerate(message_indexes, first_offset):
+                positions[message_index] = (partition_index, offset)
+
+        return positions
+
+    def consume(self, topic: str, partition: int, offset: int = 0, max_messages: Optional[int] = None) -> List[KafkaMessage]:
+        """Read messages from a partition.
+
+        Args:
+            topic (str): The topic.
+            partition (int): The partition.
+            offset (int): The offset of the first message.
+            max_messages (int, optional): The maximum number of messages.
+
+        Returns:
+            List[KafkaMessage]: The messages, with their topic, partition and offset.
+        """
+        messages = self._partitions(topic)[partition].read(offset, max_messages)
+
+        consumed = []
+        for message_offset, message in enumerate(messages, offset):
+            consumed.append(
+                KafkaMessage(message.value, message.headers, message.key, topic, partition, message_offset),
+            )
+        return consumed
+
+    def end_offsets(self, topic: str) -> List[int]:
+        """The offset of the next message of each partition of a topic."""
+        return [len(partition) for partition in self._partitions(topic)]
+
+    def close(self) -> None:
+        with self._lock:
+            for partitions in self._topics.values():
+                for partition in partitions:
+                    partition.close()
+
+    def _partitions(self, topic: str) -> List[Partition]:
+        try:
+            return self._topics[topic]
+        except KeyError:
+            raise UnknownTopicError(topic)
+
+    def _partition_path(self, topic: str, index: int) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        return self.directory / f'{topic}-{index}{_partition_suffix}'
+
+    def _load_topics(self) -> None:
+        partition_counts: Dict[str, int] = {}
+        for path in self.directory.glob(f'*{_partition_suffix}'):  # type: ignore
+            topic, _, index = path.stem.rpartition('-')
+            partition_counts[topic] = max(partition_counts.get(topic, 0), int(index) + 1)
+
+        for topic, count in partition_counts.items():
+            self.create_topic(topic, count)
@@ -0,0 +1,408 @@
+"""Content negotiation of HTTP messages, from the `Accept` and `Accept-Encoding` headers of a consumer.
+
+A `Negotiator` selects how events are sent to a consumer: in binary mode (the body is
+the data of the event), in structured mode with one of the registered formats, or as
+a batch, and which content coding compresses the body. Among the representations the
+consumer accepts, it selects the cheapest according to a `CostModel`, where a
+representation with a lower quality (`q`) is proportionally more expensive.
+
+The headers of a binary message take longer to build than the attributes of a
+structured message take to encode, so binary mode costs more for events with little
+data, and these events are sent in structured mode when the consumer accepts it.
+
+Consumers tend to send the same headers with every request, so the outcome of each
+distinct combination of headers is cached.
+"""
+
+import enum
+import importlib.util
+import types
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Type
+
+from outcome.eventkit.cache import BoundedCache
+from outcome.eventkit.compact import AnyCloudEvent
+from outcome.eventkit.formats import CloudEventFormat
+from outcome.eventkit.mime import MIMEType, parse_mime_type, resolve_content_type
+from outcome.eventkit.protocol_bindings.content_encoding import content_codings, default_compression_threshold, identity
+from outcome.eventkit.protocol_bindings.http import BatchHTTPBinding, BinaryHTTPBinding, HTTPEvent, StructuredHTTPBinding
+
+_wildcard = '*'
+
+default_max_cache_size = 1024
+# Negotiations can be cached as None, when nothing is acceptable
+_not_cached = object()
+
+
+class Mode(enum.Enum):
+    binary = 'binary'
+    structured = 'structured'
+    batch = 'batch'
+
+
+class MediaRange(NamedTuple):
+    type: str  # noqa: WPS125, A003
+    subtype: str
+    suffix: Optional[str]
+    parameters: Tuple[Tuple[str, str], ...]
+    quality: float
+
+    def precedence(self, mime_type: MIMEType) -> int:
+        """How specifically the range matches a MIME type, or -1 if it doesn't.
+
+        Args:
+            mime_type (MIMEType): The MIME type.
+
+        Returns:
+            int: The precedence, the most specific matching range applies.
+        """
+        # `*/*`, the only range with a wildcard type
+        if self.type == _wildcard:
+            return 0
+
+        if self.type != mime_type.type:
+            return -1
+
+        if self.subtype == _wildcard:
+            # e.g. `application/*+json`
+            if self.suffix is not None and self.suffix != mime_type.suffix:
+                return -1
+            return 1 if self.suffix is None else 2
+
+        if self.subtype != mime_type.subtype or self.suffix != mime_type.suffix:
+            return -1
+
+        for name, parameter_value in self.parameters:
+            if mime_type.parameters.get(name) != parameter_value:
+                return -1
+
+        return 3 + len(self.parameters)
+
+
+class Negotiation(NamedTuple):
+    mode: Mode
+    # The content type of the body
+    content_type: str
+    # The format of the structured and batch modes
+    event_format: Optional[Type[CloudEventFormat]]
+    # None if the body isn't compressed
+    content_encoding: Optional[str]
+
+
+class CostModel(NamedTuple):
+    """The relative cost of sending an event in each representation, lower is cheaper."""
+
+    # The body only contains the data
+    binary: float = 1
+    # Added to the cost of binary mode for events with less than `binary_min_size` bytes of data, since
+    # building the headers costs more than encoding the attributes with the data
+    binary_headers: float = 0.5
+    binary_min_size: int = 2048
+    # The body also contains the attributes, which are encoded with the data
+    structured: float = 1.25
+    # The cost per event, a batch only takes one message
+    batch: float = 0.75
+    # The factor applied to the cost of each format, by format content type
+    formats: Mapping[str, float] = types.MappingProxyType({})
+    # The cost of each content coding, which trade CPU for smaller bodies
+    codings: Mapping[str, float] = types.MappingProxyType({identity: 1, 'gzip': 0.6, 'deflate': 0.6, 'zstd': 0.5})
+
+
+default_cost_model = CostModel()
+
+
+class NegotiationError(ValueError):
+    """None of the representations are acceptable to the consumer, e.g. for a `406 Not Acceptable` response."""
+
+
+def _quality(quality_value: str) -> Optional[float]:
+    try:
+        quality = float(quality_value)
+    except ValueError:
+        return None
+    return min(max(quality, 0), 1)
+
+
+def _media_range(media_range: str) -> Optional[MediaRange]:
+    try:
+        mime_type = parse_mime_type(media_range, default_charset=None)
+    except ValueError:
+        return None
+
+    # Only `*/*` can have a wildcard type, `*/json` isn't a media range
+    if mime_type.type == _wildcard and (mime_type.subtype != _wildcard or mime_type.suffix is not None):
+        return None
+
+    parameters: List[Tuple[str, str]] = []
+    quality: Optional[float] = 1
+
+    # The parameters after the quality are extensions of the Accept header, not of the media range
+    for name, parameter_value in mime_type.parameters.items():
+        if name == 'q':
+            quality = _quality(parameter_value)
+            break
+        parameters.append((name, parameter_value))
+
+    if quality is None:
+        return None
+    return MediaRange(mime_type.type, mime_type.subtype, mime_type.suffix, tuple(parameters), quality)
+
+
+def parse_accept(accept: Optional[str]) -> Tuple[MediaRange, ...]:
+    """Parse an `Accept` header.
+
+    Args:
+        accept (str, optional): The header value.
+
+    Returns:
+        Tuple[MediaRange, ...]: The media ranges. Invalid ranges are ignored, and a missing header accepts anything.
+    """
+    media_ranges = tuple(
+        media_range
+        for media_range in (_media_range(item.strip()) for item in (accept or '').split(',') if item.strip())
+        if media_range is not None
+    )
+
+    return media_ranges or (MediaRange(_wildcard, _wildcard, None, (), 1),)
+
+
+def parse_accept_encoding(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Parse an `Accept-Encoding` header.
+
+    Args:
+        accept_encoding (str, optional): The header value.
+
+    Returns:
+        Dict[str, float]: The quality of each coding, which can include `*`. A missing header only accepts `identity`.
+    """
+    if accept_encoding is None:
+        return {identity: 1}
+
+    codings: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        coding, *parameters = (part.strip() for part in item.split(';'))
+        if not coding:
+            continue
+
+        quality: Optional[float] = 1
+        for parameter in parameters:
+            name, _, parameter_value = parameter.partition('=')
+            if name.strip().lower() == 'q':
+                quality = _quality(parameter_value.strip())
+
+        if quality is not None:
+            codings[coding.lower()] = quality
+
+    return codings
+
+
+def quality_of(media_ranges: Sequence[MediaRange], content_type: str) -> float:
+    """The quality of a content type, according to the most specific media range that matches it.
+
+    Args:
+        media_ranges (Sequence[MediaRange]): The media ranges of an `Accept` header.
+        content_type (str): The content type.
+
+    Returns:
+        float: The quality, 0 if the content type isn't acceptable.
+    """
+    mime_type = resolve_content_type(content_type).mime_type
+    best_precedence = -1
+    quality: float = 0
+
+    for media_range in media_ranges:
+        precedence = media_range.precedence(mime_type)
+        if precedence > best_precedence:
+            best_precedence = precedence
+            quality = media_range.quality
+
+    return quality
+
+
+def _available(coding: str) -> bool:
+    # The zstd coding depends on an optional package
+    return coding != 'zstd' or importlib.util.find_spec('zstandard') is not None
+
+
+_CacheKey = Tuple[Optional[str], Optional[str], Optional[str], bool, bool]
+
+
+class Negotiator:
+    """Selects the cheapest representation of events that's acceptable to a consumer."""
+
+    def __init__(
+        self,
+        formats: Optional[Iterable[Type[CloudEventFormat]]] = None,
+        cost_model: CostModel = default_cost_model,
+        compression_threshold: int = default_compression_threshold,
+        max_cache_size: int = default_max_cache_size,
+    ) -> None:
+        """Create a negotiator.
+
+        Args:
+            formats (Iterable[Type[CloudEventFormat]], optional): The formats to offer. Defaults to the registered formats.
+            cost_model (CostModel): The relative costs of the representations.
+            compression_threshold (int): The minimum size of the bodies to compress, in bytes. Defaults to 1KiB.
+            max_cache_size (int): The maximum number of cached negotiations.
+        """
+        if formats is None:
+            formats = CloudEventFormat.format_content_types.values()
+
+        # Unique, in order
+        self.formats: Tuple[Type[CloudEventFormat], ...] = tuple(dict.fromkeys(formats))
+        self.cost_model = cost_model
+        self.compression_threshold = compression_threshold
+        self.max_cache_size = max_cache_size
+
+        self.codings = tuple(
+            coding for coding in cost_model.codings if coding == identity or (coding in content_codings and _available(coding))
+        )
+
+        self._cache: BoundedCache[_CacheKey, Optional[Negotiation]] = BoundedCache(max_cache_size)
+
+    def negotiate(
+        self,
+        accept: Optional[str],
+        accept_encoding: Optional[str] = None,
+        data_content_type: Optional[str] = None,
+        batch: bool = False,
+        data_size: Optional[int] = None,
+    ) -> Negotiation:
+        """Select the representation of events for a consumer.
+
+        Args:
+            accept (str, optional): The `Accept` header of the consumer.
+            accept_encoding (str, optional): The `Accept-Encoding` header of the consumer.
+            data_content_type (str, optional): The data content type of the event, binary mode is only offered if it's provided.
+            batch (bool): Whether to negotiate for several events, which offers the batch mode.
+            data_size (int, optional): The size of the encoded data, in bytes. Unknown sizes are costed as large.
+
+        Returns:
+            Negotiation: The cheapest acceptable representation.
+
+        Raises:
+            NegotiationError: If none of the representations are acceptable.
+        """
+        small = data_size is not None and data_size < self.cost_model.binary_min_size
+        negotiation = self._cached(accept, accept_encoding, data_content_type, batch, small)
+        if negotiation is None:
+            raise NegotiationError(f'No acceptable representation for {accept!r} and {accept_encoding!r}')
+        return negotiation
+
+    def to_http(self, event: AnyCloudEvent, accept: Optional[str], accept_encoding: Optional[str] = None) -> HTTPEvent:
+        """Create the HTTP message of an event, in the representation negotiated for the consumer.
+
+        Raises:
+            NegotiationError: If none of the representations are acceptable.
+        """
+        if event.data is None:
+            negotiation = self.negotiate(accept, accept_encoding)
+        else:
+            negotiation = self.negotiate(accept, accept_encoding, event.data_content_type, data_size=0)
+
+        encoded_data = None
+        if negotiation.mode is not Mode.binary and event.data is not None:
+            # The data is only encoded to measure it if binary mode would be selected for large data
+            large = self.negotiate(accept, accept_encoding, event.data_content_type)
+            if large.mode is Mode.binary:
+                encoded_data = event.data.encoded_data
+                if len(encoded_data) >= self.cost_model.binary_min_size:
+                    negotiation = large
+
+        if negotiation.mode is Mode.binary:
+            return BinaryHTTPBinding.to_http(event, negotiation.content_encoding, self.compression_threshold, encoded_data)
+
+        return StructuredHTTPBinding.to_http(
+            event,
+            negotiation.event_format,
+            content_encoding=negotiation.content_encoding,
+            compression_threshold=self.compression_threshold,
+        )
+
+    def to_http_batch(
+        self, events: Sequence[AnyCloudEvent], accept: Optional[str], accept_encoding: Optional[str] = None,
+    ) -> List[HTTPEvent]:
+        """Create the HTTP messages of several events: a single batch, or a message per event.
+
+        Raises:
+            NegotiationError: If none of the representations are acceptable.
+        """
+        negotiation = self._cached(accept, accept_encoding, None, True, False)
+
+        if negotiation is not None and negotiation.mode is Mode.batch:
+            batch_event = BatchHTTPBinding.to_http(events, negotiation.event_format, negotiation.content_encoding, self.compression_threshold)
+            return [batch_event]
+
+        return [self.to_http(event, accept, accept_encoding) for event in events]
+
+    def _cached(
+        self, accept: Optional[str], accept_encoding: Optional[str], data_content_type: Optional[str], batch: bool, small: bool,
+    ) -> Optional[Negotiation]:
+        key = (accept, accept_encoding, data_content_type, batch, small)
+        negotiation = self._cache.get(key, _not_cached)
+        if negotiation is not _not_cached:
+            return negotiation
+
+        media_ranges = parse_accept(accept)
+        negotiation = self._negotiate(media_ranges, parse_accept_encoding(accept_encoding), data_content_type, batch, small)
+        return self._cache.add(key, negotiation)
+
+    def _negotiate(  # noqa: WPS211
+        self,
+        media_ranges: Sequence[MediaRange],
+        codings: Mapping[str, float],
+        data_content_type: Optional[str],
+        batch: bool,
+        small: bool,
+    ) -> Optional[Negotiation]:
+        content_encoding = self._content_encoding(codings)
+        if content_encoding is None:
+            return None
+        if content_encoding == identity:
+            content_encoding = None
+
+        best: Optional[Tuple[float, Negotiation]] = None
+
+        for mode, cost, content_type, event_format in self._candidates(data_content_type, batch, small):
+            quality = quality_of(media_ranges, content_type)
+            if quality <= 0:
+                continue
+
+            cost /= quality
+            if best is None or cost < best[0]:
+                best = (cost, Negotiation(mode, content_type, event_format, content_encoding))
+
+        return best[1] if best is not None else None
+
+    def _candidates(
+        self, data_content_type: Optional[str], batch: bool, small: bool,
+    ) -> Iterable[Tuple[Mode, float, str, Optional[Type[CloudEventFormat]]]]:
+        cost_model = self.cost_model
+
+        if data_content_type is not None:
+            binary_cost = cost_model.binary + cost_model.binary_headers if small else cost_model.binary
+            yield Mode.binary, binary_cost, data_content_type, None
+
+        for event_format in self.formats:
+            format_cost = cost_model.formats.get(event_format.format_content_type, 1)
+            yield Mode.structured, cost_model.structured * format_cost, event_format.format_content_type, event_format
+
+            if batch and event_format.batch_content_type is not None:
+                yield Mode.batch, cost_model.batch * format_cost, event_format.batch_content_type, event_format
+
+    def _content_encoding(self, codings: Mapping[str, float]) -> Optional[str]:
+        any_quality = codings.get(_wildcard)
+        best: Optional[Tuple[float, str]] = None
+
+        for coding in self.codings:
+            quality = codings.get(coding, any_quality)
+            if quality is None:
+                # Identity is acceptable unless it's explicitly excluded
+                quality = 1 if coding == identity else 0
+            if quality <= 0:
+                continue
+
+            cost = self.cost_model.codings[coding] / quality
+            if best is None or cost < best[0]:
+                best = (cost, coding)
+
+        return best[1] if best is not None else None
@@ -0,0 +1,454 @@
+"""Rate limiting and load shedding for dispatch, by event type (and source).
+
+Each limited event type has a token bucket, that refills at `rate` tokens per second
+up to `burst` tokens. An event that finds a token in its bucket is admitted, other
+events are shed according to the policy of their limit:
+
+- `drop` discards the event
+- `sample` admits one in every `1 / sample_rate` of the excess events, and drops the rest
+- `defer` sets the event aside, to be dispatched once there are tokens again
+
+A global limit can also be shared by all event types. Priority classes decide who
+gets its tokens when it runs low: `low` events are only admitted while half of the
+burst is left, `normal` events while a quarter is left, and `high` events until it's
+empty (a full bucket admits any event). `critical` events are never limited.
+
+Limits can be changed at any time. The buckets are published as an immutable dict,
+like the handler registry, so checking an event costs a dict lookup and a bucket
+update, without taking a lock. Concurrent checks of the same bucket can race, which
+only makes the limit slightly approximate.
+"""
+
+import collections
+import enum
+import functools
+import itertools
+import threading
+import time
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+
+from outcome.eventkit.cache import BoundedCache
+from outcome.eventkit.dispatch import (
+    CloudEventDispatcher,
+    CloudEventHandlerRegistry,
+    cloud_event_handler_registry,
+    dispatch,
+)
+from outcome.eventkit.event import CloudEvent
+
+Clock = Callable[[], float]
+# An event type, or an (event type, source) pair
+_LimitKey = Union[str, tuple]
+
+# The buckets of the default limit are created on demand, for each event type
+max_default_buckets = 1024
+default_max_deferred = 10000
+
+
+class Priority(enum.IntEnum):
+    critical = 0
+    high = 1
+    normal = 2
+    low = 3
+
+
+# The fraction of the global burst that must be left for each priority class
+_reserves = {  # noqa: WPS407
+    Priority.critical: 0.0,
+    Priority.high: 0.0,
+    Priority.normal: 0.25,
+    Priority.low: 0.5,
+}
+
+
+class ShedPolicy(enum.Enum):
+    drop = 'drop'
+    sample = 'sample'
+    defer = 'defer'
+
+
+class Verdict(enum.Enum):
+    admit = 'admit'
+    drop = 'drop'
+    defer = 'defer'
+
+
+# Enum members are looked up once, since class attribute access is slow on the fast path
+_admit = Verdict.admit
+_drop = Verdict.drop
+_defer = Verdict.defer
+_defer_policy = ShedPolicy.defer
+_sample_policy = ShedPolicy.sample
+_normal_reserve = _reserves[Priority.normal]
+
+
+class RateLimit(NamedTuple):
+    # Events per second
+    rate: float
+    # The number of events that can be admitted at once, defaults to the rate
+    burst: Optional[float] = None
+    priority: Priority = Priority.normal
+    policy: ShedPolicy = ShedPolicy.drop
+    # The fraction of the excess events that are admitted, with the sample policy
+    sample_rate: float = 0.01
+
+
+class LimitStats(NamedTuple):
+    event_type: Optional[str]
+    source: Optional[str]
+    admitted: int
+    # Excess events admitted by the sample policy
+    sampled: int
+    dropped: int
+    deferred: int
+
+    @property
+    def shed(self) -> int:
+        return self.dropped + self.deferred
+
+
+class _Bucket:  # noqa: WPS230
+    __slots__ = (
+        'limit',
+        'policy',
+        'unlimited',
+        'global_reserve',
+        'rate',
+        'burst',
+        'sample_every',
+        'tokens',
+        'updated',
+        'admitted',
+        'excess',
+        'sampled',
+        'dropped',
+        'deferred',
+    )
+
+    def __init__(self, limit: RateLimit, now: float) -> None:
+        burst = limit.burst if limit.burst is not None else limit.rate
+        if limit.rate <= 0 or burst < 1:
+            raise ValueError(f'Invalid rate limit: {limit}')
+        if not 0 < limit.sample_rate <= 1:
+            raise ValueError(f'Invalid sample rate: {limit.sample_rate}')
+
+        self.limit = limit
+        self.policy = limit.policy
+        self.unlimited = limit.priority == Priority.critical
+        self.global_reserve = _reserves[limit.priority]
+        self.rate = float(limit.rate)
+        self.burst = float(burst)
+        self.sample_every = max(1, round(1 / limit.sample_rate))
+
+        self.tokens = self.burst
+        self.updated = now
+
+        self.admitted = 0
+        self.excess = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.deferred = 0
+
+    def take(self, now: float, reserve: float = 1) -> bool:
+        tokens = self.tokens + (now - self.updated) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        self.updated = now
+
+        if tokens >= reserve:
+            self.tokens = tokens - 1
+            return True
+
+        self.tokens = tokens
+        return False
+
+    def stats(self, event_type: Optional[str], source: Optional[str]) -> LimitStats:
+        return LimitStats(event_type, source, self.admitted, self.sampled, self.dropped, self.deferred)
+
+
+class RateLimiter:  # noqa: WPS214, WPS230
+    """Decides whether events should be dispatched, according to their rate limits."""
+
+    def __init__(
+        self,
+        default: Optional[RateLimit] = None,
+        global_limit: Optional[RateLimit] = None,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        """Create a rate limiter.
+
+        Args:
+            default (RateLimit, optional): The limit of each event type that doesn't have its own limit.
+            global_limit (RateLimit, optional): A limit shared by all of the event types.
+            clock (Clock): The clock used to refill the buckets.
+        """
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._limits: Dict[_LimitKey, RateLimit] = {}
+        self._buckets: Dict[_LimitKey, _Bucket] = {}
+        self._has_source_limits = False
+        # Whether the lookup needs more than the bucket of the event type
+        self._slow_lookup = default is not None
+
+        self._default = default
+        self._default_buckets: BoundedCache[str, _Bucket] = BoundedCache(max_default_buckets)
+        self._global_bucket: Optional[_Bucket] = None
+        if global_limit is not None:
+            self._global_bucket = _Bucket(global_limit, clock())
+
+    def set_limit(self, event_type: str, limit: RateLimit, source: Optional[str] = None) -> None:
+        """Set the rate limit of an event type, or of the events of a type from a source.
+
+        A limit for a source takes precedence over the limit of the event type.
+
+        Args:
+            event_type (str): The event type.
+            limit (RateLimit): The limit.
+            source (str, optional): The source.
+        """
+        bucket = _Bucket(limit, self.clock())
+        with self._lock:
+            self._limits[_key(event_type, source)] = limit
+            self._publish({_key(event_type, source): bucket})
+
+    def remove_limit(self, event_type: str, source: Optional[str] = None) -> None:
+        with self._lock:
+            if self._limits.pop(_key(event_type, source), None) is not None:
+                self._publish({})
+
+    def set_default(self, default: Optional[RateLimit]) -> None:
+        if default is not None:
+            # Validate the limit before it's used
+            _Bucket(default, self.clock())
+        with self._lock:
+            self._default = default
+            self._default_buckets = BoundedCache(max_default_buckets)
+            self._slow_lookup = self._has_source_limits or default is not None
+
+    def set_global_limit(self, global_limit: Optional[RateLimit]) -> None:
+        bucket = _Bucket(global_limit, self.clock()) if global_limit is not None else None
+        with self._lock:
+            self._global_bucket = bucket
+
+    def limit(self, event_type: str, source: Optional[str] = None) -> Optional[RateLimit]:
+        """Return the limit that applies to the events of a type (and source)."""
+        bucket = self._bucket(event_type, source, create=False)
+        if bucket is not None:
+            return bucket.limit
+        return self._default
+
+    def check(self, event: CloudEvent) -> Verdict:
+        """Take a token for an event, and apply the shedding policy if there are none left.
+
+        Args:
+            event (CloudEvent): The event.
+
+        Returns:
+            Verdict: Whether the event should be dispatched, dropped or deferred.
+        """
+        bucket = self._bucket(event.type, event.source) if self._slow_lookup else self._buckets.get(event.type)
+        if bucket is None:
+            if self._global_bucket is None or self._take_global(_normal_reserve, self.clock()):
+                return _admit
+            return _drop
+
+        if self._take(bucket):
+            bucket.admitted += 1
+            return _admit
+
+        policy = bucket.policy
+        if policy is _defer_policy:
+            bucket.deferred += 1
+            return _defer
+
+        if policy is _sample_policy:
+            bucket.excess += 1
+            if not bucket.excess % bucket.sample_every:
+                bucket.sampled += 1
+                return _admit
+
+        bucket.dropped += 1
+        return _drop
+
+    def try_acquire(self, event: CloudEvent) -> bool:
+        """Take a token for an event, without applying the shedding policy, e.g. for deferred events.
+
+        Args:
+            event (CloudEvent): The event.
+
+        Returns:
+            bool: True if the event can be dispatched.
+        """
+        bucket = self._bucket(event.type, event.source) if self._slow_lookup else self._buckets.get(event.type)
+        if bucket is None:
+            return self._global_bucket is None or self._take_global(_normal_reserve, self.clock())
+
+        if self._take(bucket):
+            bucket.admitted += 1
+            return True
+        return False
+
+    def stats(self) -> List[LimitStats]:
+        """Return the counters of each limited event type (and source)."""
+        stats = []
+        for key, bucket in itertools.chain(self._buckets.items(), self._default_buckets.items()):
+            event_type, source = (key, None) if isinstance(key, str) else key
+            stats.append(bucket.stats(event_type, source))
+        return stats
+
+    def global_stats(self) -> Optional[LimitStats]:
+        if self._global_bucket is None:
+            return None
+        return self._global_bucket.stats(None, None)
+
+    def _take(self, bucket: _Bucket) -> bool:
+        if bucket.unlimited:
+            return True
+
+        now = self.clock()
+        if not bucket.take(now):
+            return False
+
+        if self._global_bucket is not None and not self._take_global(bucket.global_reserve, now):
+            # Give the token back, since the event isn't admitted
+            bucket.tokens += 1
+            return False
+        return True
+
+    def _take_global(self, reserve: float, now: float) -> bool:
+        global_bucket = self._global_bucket
+        if global_bucket is None:  # pragma: no cover
+            return True
+
+        # A full bucket admits any event, however small the burst
+        burst = global_bucket.burst
+        if global_bucket.take(now, min(burst, 1 + reserve * burst)):
+            global_bucket.admitted += 1
+            return True
+
+        global_bucket.dropped += 1
+        return False
+
+    def _bucket(self, event_type: str, source: Optional[str], create: bool = True) -> Optional[_Bucket]:
+        buckets = self._buckets
+        if self._has_source_limits and source is not None:
+            bucket = buckets.get((event_type, source))
+            if bucket is not None:
+                return bucket
+
+        bucket = buckets.get(event_type)
+        if bucket is not None or self._default is None or not create:
+            return bucket
+
+        default_buckets = self._default_buckets
+        bucket = default_buckets.get(event_type)
+        if bucket is None:
+            bucket = default_buckets.add(event_type, _Bucket(self._default, self.clock()))
+        return bucket
+
+    def _publish(self, new_buckets: Dict[_LimitKey, _Bucket]) -> None:
+        # The existing buckets keep their tokens and counters
+        buckets = {key: new_buckets.get(key) or self._buckets[key] for key in self._limits}
+        self._has_source_limits = any(not isinstance(key, str) for key in buckets)
+        self._buckets = buckets
+        self._slow_lookup = self._has_source_limits or self._default is not None
+
+
+def _key(event_type: str, source: Optional[str]) -> _LimitKey:
+    if source is None:
+        return event_type
+    return (event_type, source)
+
+
+class RateLimitedDispatcher:
+    """A dispatcher that applies rate limits before dispatching events.
+
+    Deferred events are kept in memory, in order, and dispatched by `drain` once
+    there are tokens for them. The events of each type (and source) are dispatched
+    in order, but the events of a type that's still over its limit don't hold up the
+    others. When the queue of deferred events is full, the oldest events are dropped.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        dispatcher: Optional[CloudEventDispatcher] = None,
+        registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+        max_deferred: int = default_max_deferred,
+    ) -> None:
+        """Create a dispatcher.
+
+        Args:
+            limiter (RateLimiter): The rate limiter.
+            dispatcher (CloudEventDispatcher, optional): Dispatches the admitted events. Defaults to the registry.
+            registry (CloudEventHandlerRegistry): The handler registry. Defaults to the global registry.
+            max_deferred (int): The maximum number of deferred events.
+        """
+        if dispatcher is None:
+            dispatcher = functools.partial(dispatch, registry=registry)
+
+        self.limiter = limiter
+        self.dispatcher = dispatcher
+        self.deferred: Deque[CloudEvent] = collections.deque(maxlen=max_deferred)
+        self.overflowed = 0
+
+        self._drain_lock = threading.Lock()
+        # Guards the queue of deferred events, which `drain` takes and puts back
+        self._deferred_lock = threading.Lock()
+
+    def __call__(self, event: CloudEvent) -> None:
+        verdict = self.limiter.check(event)
+
+        if verdict is _admit:
+            self.dispatcher(event)
+        elif verdict is _defer:
+            with self._deferred_lock:
+                if len(self.deferred) == self.deferred.maxlen:
+                    self.overflowed += 1
+                self.deferred.append(event)
+
+    def drain(self) -> int:
+        """Dispatch the deferred events that are within their limits, in order.
+
+        An event that's still over its limit stays deferred, along with the later events
+        of the same type and source, and the events after it are tried.
+
+        Returns:
+            int: The number of dispatched events.
+        """
+        dispatched = 0
+        with self._drain_lock:
+            with self._deferred_lock:
+                pending = list(self.deferred)
+                self.deferred.clear()
+
+            kept: List[CloudEvent] = []
+            blocked: Set[Tuple[str, str]] = set()
+            index = 0
+            try:
+                while index < len(pending):
+                    event = pending[index]
+                    index += 1
+
+                    key = (event.type, event.source)
+                    if key in blocked or not self.limiter.try_acquire(event):
+                        blocked.add(key)
+                        kept.append(event)
+                        continue
+
+                    self.dispatcher(event)
+                    dispatched += 1
+            finally:
+                self._restore([*kept, *pending[index:]])
+        return dispatched
+
+    def _restore(self, events: List[CloudEvent]) -> None:
+        # The events are put back ahead of the ones deferred during the drain
+        with self._deferred_lock:
+            deferred_since = list(self.deferred)
+            self.deferred.clear()
+            self.deferred.extend(events)
+            self.deferred.extend(deferred_since)
+            if self.deferred.maxlen is not None:
+                self.overflowed += max(0, len(events) + len(deferred_since) - self.deferred.maxlen)
@@ -0,0 +1,493 @@
+"""Retries for failed deliveries, with a dead-letter sink for the events that can't be delivered.
+
+Failed deliveries are kept in a heap ordered by the time of their next attempt, and
+a single thread (or the caller, with `run_pending`) performs the attempts that are
+due. Waiting retries only cost a heap entry, so a queue can hold a large number of
+them.
+
+The delay between attempts grows exponentially, with some jitter so that the
+retries of a batch of failures don't all happen at the same time. Once an event has
+used all of its attempts, it's written to a `DeadLetterSink`, from which it can be
+replayed later. When the failed delivery was a single handler with a stable key (see
+`handler_key`), the key is recorded in the dead letter, so that a replay only calls that
+handler.
+"""
+
+import functools
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+import types
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Protocol, Tuple, Type
+
+from outcome.eventkit.dispatch import (
+    CloudEventDispatcher,
+    CloudEventHandler,
+    CloudEventHandlerRegistry,
+    cloud_event_handler_registry,
+    dispatch,
+)
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.eventlog import EventLogReader, EventLogWriter, PathLike, index_path
+from outcome.eventkit.formats import CloudEventFormat
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+
+logger = logging.getLogger(__name__)
+
+Clock = Callable[[], float]
+# A delivery is a single handler, or a dispatcher that sends the event to several handlers
+Delivery = Callable[[CloudEvent], None]
+# (due time, sequence number, attempt, delivery, event, handler key), the sequence number keeps the order stable
+_RetryEntry = Tuple[float, int, int, Delivery, CloudEvent, Optional[str]]
+
+# The extension attribute of dead letters that records the key of the handler that failed
+dead_letter_handler_extension = 'deadletterhandler'
+# The attribute that gives a handler an explicit key, e.g. for callable instances or partials
+handler_key_attribute = 'dead_letter_key'
+
+
+def handler_key(handler: CloudEventHandler) -> Optional[str]:
+    """The key that identifies a handler across restarts, to replay its dead letters.
+
+    A handler's `dead_letter_key` attribute is its key. Otherwise, module-level functions and
+    the methods of module-level classes are identified by their qualified name. Lambdas, nested
+    functions, partials and callable instances don't have a stable key, unless they're given one.
+
+    Args:
+        handler (CloudEventHandler): The handler.
+
+    Returns:
+        Optional[str]: The key, or None if the handler doesn't have a stable key.
+    """
+    key = getattr(handler, handler_key_attribute, None)
+    if isinstance(key, str):
+        return key
+
+    # Bound methods are identified by their function
+    function = getattr(handler, '__func__', handler)
+    if not isinstance(function, types.FunctionType) or '<' in function.__qualname__:
+        return None
+    return f'{function.__module__}.{function.__qualname__}'
+
+
+class RetryPolicy:
+    """Exponential backoff: the delay before attempt `n + 1` is `base_delay * multiplier ** (n - 1)`."""
+
+    def __init__(  # noqa: WPS211
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 1,
+        multiplier: float = 2,
+        max_delay: float = 300,
+        jitter: float = 0.1,
+        random_source: Callable[[], float] = random.random,
+    ) -> None:
+        """Create a retry policy.
+
+        Args:
+            max_attempts (int): The total number of attempts, including the first one.
+            base_delay (float): The delay before the first retry, in seconds.
+            multiplier (float): The factor applied to the delay after each retry.
+            max_delay (float): The maximum delay between attempts, in seconds.
+            jitter (float): The proportion of the delay that's randomized, between 0 and 1.
+            random_source (Callable[[], float]): Returns a random number in [0, 1).
+
+        Raises:
+            ValueError: If `max_attempts` is less than 1.
+        """
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.random_source = random_source
+
+    def delay(self, attempt: int) -> float:
+        """The delay before the next attempt, after attempt number `attempt` failed.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 1.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        delay = min(self.base_delay * self.multiplier ** (attempt - 1), self.max_delay)
+        return delay * (1 - self.jitter * self.random_source())
+
+
+class DeadLetterSink(Protocol):
+    def put(self, event: CloudEvent) -> None:
+        ...
+
+    def events(self) -> Iterator[CloudEvent]:
+        ...
+
+    def discard(self, count: int) -> None:
+        """Remove the `count` oldest dead letters."""
+
+    def clear(self) -> None:
+        ...
+
+
+def with_dead_letter_handler(event: CloudEvent, handler: str) -> CloudEvent:
+    dead_letter = event.copy()
+    dead_letter._extensions = {**event.extensions, dead_letter_handler_extension: handler}  # noqa: WPS437
+    return dead_letter
+
+
+def without_dead_letter_handler(event: CloudEvent) -> Tuple[CloudEvent, Optional[str]]:
+    """Split a dead letter into the original event, and the key of the handler that failed.
+
+    Args:
+        event (CloudEvent): The dead letter.
+
+    Returns:
+        Tuple[CloudEvent, Optional[str]]: The event, and the key of the handler if it's recorded.
+    """
+    handler = event.extensions.get(dead_letter_handler_extension)
+    if handler is None:
+        return event, None
+
+    original = event.copy()
+    extensions = {name: extension for name, extension in event.extensions.items() if name != dead_letter_handler_extension}
+    original._extensions = extensions or None  # noqa: WPS437
+    return original, handler
+
+
+class MemoryDeadLetterSink:
+    """Stores dead letters in memory, encoded with a `CloudEventFormat`."""
+
+    def __init__(self, event_format: Type[CloudEventFormat] = JSONCloudEventFormat) -> None:
+        self.event_format = event_format
+        self._lock = threading.Lock()
+        self._records: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def put(self, event: CloudEvent) -> None:
+        record = self.event_format.encode(event)
+        with self._lock:
+            self._records.append(record)
+
+    def events(self) -> Iterator[CloudEvent]:
+        with self._lock:
+            records = list(self._records)
+        return (self.event_format.decode(record) for record in records)
+
+    def discard(self, count: int) -> None:
+        with self._lock:
+            self._records = self._records[count:]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records = []
+
+
+class FileDeadLetterSink:
+    """Appends dead letters to an event log, see `outcome.eventkit.eventlog`.
+
+    Each event is flushed to the file as soon as it's written.
+    """
+
+    def __init__(self, path: PathLike, event_format: Type[CloudEventFormat] = JSONCloudEventFormat) -> None:
+        self.path = Path(path)
+        self.event_format = event_format
+        self._lock = threading.Lock()
+        self._writer = EventLogWriter(self.path, event_format)
+
+    def put(self, event: CloudEvent) -> None:
+        with self._lock:
+            self._writer.append(event)
+            self._writer.flush()
+
+    def events(self) -> Iterator[CloudEvent]:
+        with self._lock:
+            with EventLogReader(self.path, self.event_format) as reader:
+                # The memory map is closed with the reader
+                return iter(list(reader.read()))
+
+    def discard(self, count: int) -> None:
+        with self._lock:
+            self._writer.close()
+
+            with EventLogReader(self.path, self.event_format) as reader:
+                # Each record is a line of the log
+                kept = b''.join(bytes(record) + b'\n' for _, record in itertools.islice(reader.records(), count, None))
+
+            # Replacing the file is atomic, so a crash doesn't lose the dead letters
+            tmp_path = Path(f'{self.path}.tmp')
+            tmp_path.write_bytes(kept)
+            tmp_path.replace(self.path)
+            # The offsets of the index no longer match the log
+            index_path(self.path).write_bytes(b'')
+            self._writer = EventLogWriter(self.path, self.event_format)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._writer.close()
+            self.path.write_bytes(b'')
+            index_path(self.path).write_bytes(b'')
+            self._writer = EventLogWriter(self.path, self.event_format)
+
+    def close(self) -> None:
+        with self._lock:
+            self._writer.close()
+
+
+def log_dead_letter(event: CloudEvent, exc: Exception) -> None:
+    logger.warning('Giving up on event %s (%s)', event.id, event.type, exc_info=exc)
+
+
+class RetryQueue:  # noqa: WPS214, WPS230
+    """Performs deliveries, and schedules retries for the ones that fail.
+
+    The queue can run its own thread with `start`, or be driven by calling `run_pending`.
+    It can be used as a context manager, that starts the thread and stops it on exit.
+    """
+
+    def __init__(
+        self,
+        dead_letter_sink: DeadLetterSink,
+        policy: Optional[RetryPolicy] = None,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        """Create a retry queue.
+
+        Args:
+            dead_letter_sink (DeadLetterSink): Where to send events once their attempts are exhausted.
+            policy (RetryPolicy, optional): The retry policy. Defaults to `RetryPolicy()`.
+            clock (Clock): The clock used to schedule retries. It must be monotonic when using the thread.
+        """
+        self.dead_letter_sink = dead_letter_sink
+        self.policy = policy or RetryPolicy()
+        self.clock = clock
+
+        self.delivered = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+        self._heap: List[_RetryEntry] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __enter__(self) -> 'RetryQueue':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(self, delivery: Delivery, event: CloudEvent, handler: Optional[str] = None) -> bool:
+        """Attempt a delivery immediately, and schedule a retry if it fails.
+
+        Args:
+            delivery (Delivery): The handler (or dispatcher) to call.
+            event (CloudEvent): The event.
+            handler (str, optional): The key of the handler that's delivered to, recorded in the dead letter.
+
+        Returns:
+            bool: True if the first attempt succeeded.
+        """
+        return self._attempt(delivery, event, 1, handler)
+
+    def next_due(self) -> Optional[float]:
+        """The time of the next retry, according to the queue's clock."""
+        with self._condition:
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """Perform the retries that are due.
+
+        Args:
+            now (float, optional): The current time. Defaults to the queue's clock.
+
+        Returns:
+            int: The number of attempts.
+        """
+        if now is None:
+            now = self.clock()
+
+        attempts = 0
+        while True:
+            with self._condition:
+                if not self._heap or self._heap[0][0] > now:
+                    return attempts
+                _, _, attempt, delivery, event, handler = heapq.heappop(self._heap)
+
+            self._attempt(delivery, event, attempt, handler)
+            attempts += 1
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='eventkit-retry', daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the thread. Pending retries are kept, and can still be run with `run_pending`."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _attempt(self, delivery: Delivery, event: CloudEvent, attempt: int, handler: Optional[str]) -> bool:
+        try:
+            delivery(event)
+        except Exception as exc:
+            self._on_failure(delivery, event, attempt, handler, exc)
+            return False
+
+        with self._condition:
+            self.delivered += 1
+        return True
+
+    def _on_failure(  # noqa: WPS211
+        self, delivery: Delivery, event: CloudEvent, attempt: int, handler: Optional[str], exc: Exception,
+    ) -> None:
+        if attempt >= self.policy.max_attempts:
+            with self._condition:
+                self.dead_lettered += 1
+            log_dead_letter(event, exc)
+            self.dead_letter_sink.put(with_dead_letter_handler(event, handler) if handler else event)
+            return
+
+        due = self.clock() + self.policy.delay(attempt)
+        with self._condition:
+            self.retried += 1
+            heapq.heappush(self._heap, (due, next(self._sequence), attempt + 1, delivery, event, handler))
+            # Only wake the thread up if its next deadline has changed
+            if self._heap[0][0] == due:
+                self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed:
+                    timeout = None
+                    if self._heap:
+                        timeout = self._heap[0][0] - self.clock()
+                        if timeout <= 0:
+                            break
+                    self._condition.wait(timeout)
+
+                if self._closed:
+                    return
+
+            self.run_pending()
+
+
+class RetryingDispatcher:
+    """A dispatcher that retries each failed handler separately, through a `RetryQueue`.
+
+    Handlers that succeeded aren't called again when another handler of the same event
+    is retried, or when its dead letter is replayed with `replay`. That requires a stable
+    key (see `handler_key`) that no other handler of the event shares, otherwise the dead
+    letter is replayed to all the handlers. The dispatcher never raises, failures are
+    handled by the queue.
+    """
+
+    def __init__(
+        self, retry_queue: RetryQueue, registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+    ) -> None:
+        self.retry_queue = retry_queue
+        self.registry = registry
+
+    def __call__(self, event: CloudEvent) -> None:
+        handlers = self.registry.handlers_for(event)
+        keys = [handler_key(handler) for handler in handlers]
+        counts = Counter(keys)
+
+        for handler, key in zip(handlers, keys):
+            # A shared key can't tell the handlers apart when the dead letter is replayed
+            self.retry_queue.submit(handler, event, key if counts[key] == 1 else None)
+
+    def redeliver(self, event: CloudEvent, key: str) -> None:
+        """Submit an event to the retry queue again, for the handler with a key.
+
+        Args:
+            event (CloudEvent): The event.
+            key (str): The key of the handler.
+
+        Raises:
+            LookupError: If no handler of the event has the key.
+        """
+        handlers = [handler for handler in self.registry.handlers_for(event) if handler_key(handler) == key]
+        if not handlers:
+            raise LookupError(f'Handler {key} is not registered for {event.type}')
+
+        for handler in handlers:
+            self.retry_queue.submit(handler, event, key)
+
+
+def replay(
+    dead_letter_sink: DeadLetterSink,
+    dispatcher: Optional[CloudEventDispatcher] = None,
+    registry: CloudEventHandlerRegistry = cloud_event_handler_registry,
+) -> Tuple[int, int]:
+    """Send the events in a dead-letter sink back through a dispatcher.
+
+    Dead letters that record the handler that failed are only sent to the handler with
+    that key: with a `RetryingDispatcher`, the handler of its registry is submitted to its
+    retry queue, so a failure is retried again. Otherwise, the handler of the registry is
+    called directly. The dead letters are removed from the sink once they've been replayed,
+    and the ones that fail again are put back into it, so a crash during a replay doesn't
+    lose them.
+
+    Args:
+        dead_letter_sink (DeadLetterSink): The sink.
+        dispatcher (CloudEventDispatcher, optional): Used to dispatch events instead of the registry.
+        registry (CloudEventHandlerRegistry): The handler registry, if the dispatcher isn't a `RetryingDispatcher`.
+            Defaults to the global registry.
+
+    Returns:
+        Tuple[int, int]: The number of events that were replayed, and the number that failed.
+    """
+    dispatcher = dispatcher or functools.partial(dispatch, registry=registry)
+
+    dead_letters = list(dead_letter_sink.events())
+
+    failed: List[CloudEvent] = []
+    for dead_letter in dead_letters:
+        event, handler = without_dead_letter_handler(dead_letter)
+        try:
+            if handler is None:
+                dispatcher(event)
+            elif isinstance(dispatcher, RetryingDispatcher):
+                dispatcher.redeliver(event, handler)
+            else:
+                _replay_to_handler(event, handler, registry)
+        except Exception as exc:
+            log_dead_letter(event, exc)
+            failed.append(dead_letter)
+
+    # The failures are put back before the replayed dead letters are removed, a crash in
+    # between results in duplicate dead letters rather than lost ones
+    for dead_letter in failed:  # noqa: WPS440
+        dead_letter_sink.put(dead_letter)
+    dead_letter_sink.discard(len(dead_letters))
+
+    return len(dead_letters), len(failed)
+
+
+def _replay_to_handler(event: CloudEvent, key: str, registry: CloudEventHandlerRegistry) -> None:
+    handlers = [handler for handler in registry.handlers_for(event) if handler_key(handler) == key]
+    if not handlers:
+        raise LookupError(f'Handler {key} is not registered for {event.type}')
+
+    for handler in handlers:
+        handler(event)
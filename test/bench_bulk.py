@@ -0,0 +1,131 @@
+"""A benchmark of the bulk decoding functions, with 1, 2, 4 and 8 worker processes.
+
+It reports the throughput of `decode_many` and `decode_log` for each number of workers,
+and the two costs that bound it: decoding an event in a worker, and unpickling the
+decoded event in the parent. The throughput can't exceed `workers / decode cost`,
+nor `1 / unpickle cost`, and it only scales with the workers on as many CPU cores.
+
+    PYTHONPATH=src python -m test.bench_bulk --events 40000
+"""
+
+import argparse
+import os
+import pickle  # noqa: S403
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterator, List, NamedTuple, Optional, Sequence
+
+from outcome.eventkit.bulk import decode_log, decode_many
+from outcome.eventkit.compact import CompactCloudEvent
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.eventlog import EventLogWriter
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+
+default_workers = (1, 2, 4, 8)
+
+
+class BenchmarkResult(NamedTuple):
+    workers: int
+    compact: bool
+    # In events per second
+    decode_many: float
+    decode_log: float
+
+
+class EventCosts(NamedTuple):
+    # In seconds per event
+    decode: float
+    unpickle: float
+
+
+def make_records(count: int) -> List[str]:
+    return [
+        JSONCloudEventFormat.encode(
+            CloudEvent(
+                id=str(index),
+                type='co.outcome.bench',
+                source='bench',
+                subject='subject',
+                time='2021-01-01T00:00:00Z',
+                data=CloudEventData(data_content_type='application/json', data={'index': index, 'name': 'abc' * 5}),
+            ),
+        )
+        for index in range(count)
+    ]
+
+
+def _throughput(count: int, decode: Callable[[], Iterator[object]]) -> float:
+    start = time.perf_counter()
+    decoded = sum(1 for _ in decode())
+    elapsed = time.perf_counter() - start
+    assert decoded == count  # noqa: S101
+    return count / elapsed
+
+
+def event_costs(records: Sequence[str], compact: bool = False) -> EventCosts:
+    """Measure the costs of an event in a single process.
+
+    Args:
+        records (Sequence[str]): The encoded events.
+        compact (bool): Measure `CompactCloudEvent`s.
+
+    Returns:
+        EventCosts: The costs.
+    """
+    start = time.perf_counter()
+    events = [JSONCloudEventFormat.decode(record) for record in records]
+    if compact:
+        events = [CompactCloudEvent.from_event(event) for event in events]
+    decode_cost = (time.perf_counter() - start) / len(records)
+
+    pickled = pickle.dumps(events)
+    start = time.perf_counter()
+    pickle.loads(pickled)  # noqa: S301
+    unpickle_cost = (time.perf_counter() - start) / len(records)
+
+    return EventCosts(decode_cost, unpickle_cost)
+
+
+def benchmark(records: Sequence[str], log_path: Path, workers: int, compact: bool) -> BenchmarkResult:
+    count = len(records)
+    return BenchmarkResult(
+        workers,
+        compact,
+        _throughput(count, lambda: decode_many(records, workers=workers, compact=compact)),
+        _throughput(count, lambda: decode_log(log_path, workers=workers, compact=compact)),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=40_000)
+    parser.add_argument('--workers', type=int, nargs='*', default=list(default_workers))
+    arguments = parser.parse_args(argv)
+
+    records = make_records(arguments.events)
+    print(f'{arguments.events} events, {os.cpu_count()} CPU(s)')  # noqa: WPS421
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = Path(directory) / 'events.log'
+        with EventLogWriter(log_path) as writer:
+            for record in records:
+                writer.append_record(record)
+
+        for compact in (False, True):
+            costs = event_costs(records, compact)
+            print(  # noqa: WPS421
+                f'compact={compact}: decode {costs.decode * 1e6:.1f}us/event, unpickle {costs.unpickle * 1e6:.1f}us/event',
+            )
+            print('  workers  decode_many ev/s  decode_log ev/s')  # noqa: WPS421
+            for workers in arguments.workers:
+                result = benchmark(records, log_path, workers, compact)
+                print(f'  {workers:>7}  {result.decode_many:>16,.0f}  {result.decode_log:>15,.0f}')  # noqa: WPS421
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import pytest
+
+from test.helpers import FakeClock
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,155 @@
+from typing import List
+
+import pendulum
+import pydantic
+import pytest
+from outcome.eventkit.data import CloudEventData, DataCoder
+from outcome.eventkit.data.models import PayloadModelRegistry, payload_model, payload_models
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.protocol_bindings import http, kafka
+
+event_type = 'co.outcome.invoice.created'
+
+
+class Invoice(pydantic.BaseModel):
+    invoice_id: str
+    amount: int
+    lines: List[str] = []
+
+
+class InvoiceV2(pydantic.BaseModel):
+    invoice_id: str
+    total: int
+
+
+@pytest.fixture(autouse=True)
+def registered_models():
+    payload_model(event_type)(Invoice)
+    payload_models.register(event_type, InvoiceV2, data_schema='https://schemas/invoice/v2')
+    yield
+    payload_models.clear()
+
+
+@pytest.fixture
+def event():
+    return CloudEvent(
+        id='1',
+        type=event_type,
+        source='test',
+        time=pendulum.datetime(2021, 1, 1),
+        data=CloudEventData(data_content_type='application/json', data=Invoice(invoice_id='i-1', amount=10, lines=['a'])),
+    )
+
+
+class TestRegistry:
+    def test_lookup(self):
+        registry = PayloadModelRegistry()
+        registry.register('a', Invoice)
+        registry.register('a', InvoiceV2, data_schema='v2')
+
+        assert registry.model_for('a') is Invoice
+        assert registry.model_for('a', 'v1') is Invoice
+        assert registry.model_for('a', 'v2') is InvoiceV2
+        assert registry.model_for('b') is None
+        assert registry.model_for(None) is None
+
+    def test_register_invalidates_cache(self):
+        registry = PayloadModelRegistry()
+
+        assert registry.model_for('a') is None
+
+        registry.register('a', Invoice)
+        assert registry.model_for('a') is Invoice
+
+        registry.unregister('a')
+        assert registry.model_for('a') is None
+
+    def test_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr('outcome.eventkit.data.models.max_cached_lookups', 10)
+        registry = PayloadModelRegistry()
+
+        for index in range(100):
+            registry.model_for(f'type-{index}')
+
+        assert len(registry._cache) <= 10  # noqa: WPS437
+
+
+class TestDecoding:
+    def test_from_encoded(self):
+        data = CloudEventData.from_encoded('{"invoice_id": "i-1", "amount": 10}', 'application/json', event_type=event_type)
+
+        assert data.data == Invoice(invoice_id='i-1', amount=10)
+
+    def test_from_encoded_data_schema(self):
+        data = CloudEventData.from_encoded(
+            '{"invoice_id": "i-1", "total": 10}', 'application/json', 'https://schemas/invoice/v2', event_type,
+        )
+
+        assert isinstance(data.data, InvoiceV2)
+
+    def test_from_encoded_without_type(self):
+        data = CloudEventData.from_encoded('{"invoice_id": "i-1", "amount": 10}', 'application/json')
+
+        assert data.data == {'invoice_id': 'i-1', 'amount': 10}
+
+    def test_invalid_payload(self):
+        with pytest.raises(pydantic.ValidationError):
+            CloudEventData.from_encoded('{"invoice_id": "i-1"}', 'application/json', event_type=event_type)
+
+    def test_default_decode_model(self):
+        class DictCoder(DataCoder):
+            @classmethod
+            def decode(cls, encoded_data, content_type):
+                return {'invoice_id': encoded_data, 'amount': 1}
+
+        assert DictCoder.decode_model('i-1', 'text/plain', Invoice) == Invoice(invoice_id='i-1', amount=1)
+
+
+class TestFormats:
+    def test_json_round_trip(self, event):
+        encoded = JSONCloudEventFormat.encode(event)
+        decoded = JSONCloudEventFormat.decode(encoded)
+
+        assert isinstance(decoded.data.data, Invoice)
+        assert decoded == event
+
+    def test_json_encoding_matches_dict(self, event):
+        dict_event = event.copy(update={'data': CloudEventData(data_content_type='application/json', data=event.data.data.dict())})
+
+        assert JSONCloudEventFormat.encode(event) == JSONCloudEventFormat.encode(dict_event)
+
+    def test_json_peek(self, event):
+        lazy_event = JSONCloudEventFormat.peek(JSONCloudEventFormat.encode(event))
+
+        assert isinstance(lazy_event.data.data, Invoice)
+
+    def test_binary_http(self, event):
+        decoded = http.from_http(http.BinaryHTTPBinding.to_http(event))
+
+        assert isinstance(decoded.data.data, Invoice)
+        assert decoded == event
+
+    def test_binary_kafka(self, event):
+        decoded = kafka.from_kafka(kafka.BinaryKafkaBinding.to_kafka(event))
+
+        assert isinstance(decoded.data.data, Invoice)
+        assert decoded == event
+
+    def test_binary_kafka_data_schema(self):
+        message = kafka.KafkaMessage(
+            b'{"invoice_id": "i-1", "total": 10}',
+            [
+                ('ce_id', b'1'),
+                ('ce_source', b'test'),
+                ('ce_specversion', b'1.0'),
+                ('ce_type', event_type.encode()),
+                ('ce_dataschema', b'https://schemas/invoice/v2'),
+                ('content-type', b'application/json'),
+            ],
+        )
+
+        decoded = kafka.from_kafka(message)
+
+        assert decoded.data.data == InvoiceV2(invoice_id='i-1', total=10)
+        assert decoded.data.data_schema == 'https://schemas/invoice/v2'
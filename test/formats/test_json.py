@@ -138,3 +138,48 @@ def test_decode_json_data():
     assert ce.data.data_schema is None
     assert ce.data.data_content_type == 'application/json;charset=utf-8'
     assert ce.data.data == {'hello': 'world'}
+
+
+def test_peek_json_data():
+    raw = '{"id": "c6cc55e8-3bf6-4fd5-9271-43116b03ee27", "source": "test", "specversion": "1.0", "type": "co.outcome.type", "time": "2020-11-04T00:00:00+00:00", "datacontenttype": "application/json;charset=utf-8", "dataschema": "schema", "data": {"hello": "world"}}'  # noqa: E501
+
+    lazy_event = JSONCloudEventFormat.peek(raw.encode('utf-8'))
+
+    assert lazy_event.type == 'co.outcome.type'
+    assert lazy_event.body == raw
+    assert not lazy_event.is_decoded
+
+    assert lazy_event.data.data == {'hello': 'world'}
+    assert lazy_event.to_event() == JSONCloudEventFormat.decode(raw)
+
+
+@pytest.mark.usefixtures('test_encoders')
+def test_peek_non_json_data():
+    raw = '{"id": "c6cc55e8-3bf6-4fd5-9271-43116b03ee27", "source": "test", "specversion": "1.0", "type": "co.outcome.type", "datacontenttype": "application/test+binary;charset=utf-8", "data_base64": "c29tZSBieXRlcw=="}'  # noqa: E501
+
+    lazy_event = JSONCloudEventFormat.peek(raw)
+
+    assert lazy_event.data.data == 'some decoded bytes'
+    assert lazy_event.data.data_content_type == 'application/test+binary;charset=utf-8'
+
+
+def test_peek_no_data():
+    raw = '{"id": "c6cc55e8-3bf6-4fd5-9271-43116b03ee27", "source": "test", "specversion": "1.0", "type": "co.outcome.type"}'
+
+    lazy_event = JSONCloudEventFormat.peek(raw)
+
+    assert lazy_event.data is None
+
+
+def test_default_peek():
+    class DecodingFormat(CloudEventFormat):
+        @classmethod
+        def decode(cls, raw_event):
+            return JSONCloudEventFormat.decode(raw_event)
+
+    raw = '{"id": "c6cc55e8-3bf6-4fd5-9271-43116b03ee27", "source": "test", "specversion": "1.0", "type": "co.outcome.type", "datacontenttype": "application/json;charset=utf-8", "data": {"hello": "world"}}'  # noqa: E501
+
+    lazy_event = DecodingFormat.peek(raw)
+
+    assert lazy_event.type == 'co.outcome.type'
+    assert lazy_event.data.data == {'hello': 'world'}
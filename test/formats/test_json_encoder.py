@@ -0,0 +1,218 @@
+import datetime
+import random
+from typing import Any, Dict, Optional
+
+import pydantic
+import pytest
+from outcome.eventkit.cache import BoundedCache
+from outcome.eventkit.compact import CompactCloudEvent
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.data.coder import DataCoder, DecodedData, EncodedData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.formats import json_encoder
+from outcome.eventkit.formats.json import JSONCloudEventFormat, encoders, json_content_type_name
+from outcome.eventkit.formats.json_encoder import EncodedAttribute, EncoderRegistry, generate_encoder
+from outcome.eventkit.lazy import LazyCloudEvent
+
+# Characters that need escaping in JSON, or that aren't ASCII
+_alphabet = 'abcXYZ019 .-_/:"\\\n\té中\U0001f600'
+_binary_content_type = 'application/test+binary'
+
+
+class Invoice(pydantic.BaseModel):
+    invoice_id: str
+    amount: float
+
+
+class BinaryCoder(DataCoder):
+    @classmethod
+    def encode(cls, data: DecodedData, content_type: str) -> EncodedData:
+        return bytes(data)
+
+    @classmethod
+    def decode(cls, encoded_data: EncodedData, content_type: str) -> DecodedData:  # pragma: no cover
+        return list(encoded_data)
+
+    @classmethod
+    def validate(cls, data: DecodedData, content_type: str, schema_name: Optional[str]) -> None:
+        ...
+
+
+@pytest.fixture(autouse=True)
+def binary_coder():
+    DataCoder.data_content_types[_binary_content_type] = BinaryCoder
+    yield
+    del DataCoder.data_content_types[_binary_content_type]  # noqa: WPS420
+
+
+def random_string(rng: random.Random, min_length: int = 1) -> str:
+    return ''.join(rng.choice(_alphabet) for _ in range(rng.randint(min_length, 12))).strip() or 'x'
+
+
+def random_json(rng: random.Random, depth: int = 0) -> Any:
+    kinds = ['str', 'int', 'float', 'bool', 'none']
+    if depth < 3:
+        kinds += ['list', 'dict']
+
+    kind = rng.choice(kinds)
+    if kind == 'str':
+        return random_string(rng, 0)
+    if kind == 'int':
+        return rng.randint(-(10 ** 12), 10 ** 12)
+    if kind == 'float':
+        return rng.uniform(-1e6, 1e6)
+    if kind == 'bool':
+        return rng.random() < 0.5
+    if kind == 'list':
+        return [random_json(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    if kind == 'dict':
+        return {random_string(rng): random_json(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    return None
+
+
+def random_time(rng: random.Random) -> Optional[datetime.datetime]:
+    kind = rng.choice(['none', 'utc', 'offset', 'naive', 'micro'])
+    if kind == 'none':
+        return None
+
+    timestamp = rng.randint(0, 4 * 10 ** 9)
+    if kind == 'naive':
+        return datetime.datetime.utcfromtimestamp(timestamp)
+    if kind == 'micro':
+        return datetime.datetime.fromtimestamp(timestamp + rng.random(), datetime.timezone.utc)
+
+    offset = datetime.timedelta(minutes=rng.randint(-12 * 60, 14 * 60)) if kind == 'offset' else datetime.timedelta(0)
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone(offset))
+
+
+def random_data(rng: random.Random) -> Optional[CloudEventData]:  # noqa: WPS212
+    data_schema = random_string(rng) if rng.random() < 0.3 else None
+    kind = rng.choice(['none', 'empty', 'json', 'untyped', 'bytes', 'model', 'encoded', 'binary'])
+
+    if kind == 'none':
+        return None
+    if kind == 'empty':
+        return CloudEventData(data_content_type=rng.choice([None, 'application/json']), data_schema=data_schema)
+    if kind in {'json', 'untyped'}:
+        data_content_type = 'application/json' if kind == 'json' else None
+        return CloudEventData(data=random_json(rng), data_content_type=data_content_type, data_schema=data_schema)
+    if kind == 'bytes':
+        return CloudEventData(data=random_string(rng).encode('utf-8'), data_content_type='application/json')
+    if kind == 'model':
+        invoice = Invoice(invoice_id=random_string(rng), amount=rng.uniform(0, 1000))
+        return CloudEventData(data=invoice, data_content_type='application/json', data_schema=data_schema)
+    if kind == 'encoded':
+        # The data is encoded separately from the envelope, since the content type has parameters
+        return CloudEventData(data=random_json(rng), data_content_type='application/json;charset=utf-8', data_schema=data_schema)
+
+    data = [rng.randint(0, 255) for _ in range(rng.randint(0, 16))]
+    return CloudEventData(data=data, data_content_type=_binary_content_type, data_schema=data_schema)
+
+
+def random_extensions(rng: random.Random) -> Dict[str, Any]:
+    values = [
+        lambda: random_string(rng),
+        lambda: rng.randint(-(2 ** 31), 2 ** 31 - 1),
+        lambda: rng.random() < 0.5,
+        lambda: random_string(rng).encode('utf-8'),
+        lambda: random_time(rng) or datetime.datetime(2021, 1, 1),
+    ]
+    names = rng.sample(['ext1', 'ext2', 'ext3', 'ext4', 'ext5'], rng.randint(0, 3))
+    return {name: rng.choice(values)() for name in names}
+
+
+def random_event(rng: random.Random) -> CloudEvent:
+    return CloudEvent(
+        extensions=random_extensions(rng),
+        id=random_string(rng),
+        source=random_string(rng),
+        type=random_string(rng),
+        subject=random_string(rng) if rng.random() < 0.5 else None,
+        time=random_time(rng),
+        data=random_data(rng),
+    )
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_same_output_as_attribute_encoding(seed: int):
+    rng = random.Random(seed)
+
+    for _ in range(100):
+        event = random_event(rng)
+        assert JSONCloudEventFormat.encode(event) == JSONCloudEventFormat.encode_attributes(event)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_same_output_for_compact_events(seed: int):
+    rng = random.Random(seed)
+
+    for _ in range(100):
+        event = CompactCloudEvent.from_event(random_event(rng))
+        assert JSONCloudEventFormat.encode(event) == JSONCloudEventFormat.encode_attributes(event)
+
+
+def test_compact_event_naive_time():
+    event = CompactCloudEvent(id='1', source='test', type='co.outcome.test', time=datetime.datetime(2021, 1, 1))
+
+    assert JSONCloudEventFormat.encode(event) == JSONCloudEventFormat.encode_attributes(event)
+
+
+def test_compact_event_missing_required_attribute():
+    event = CompactCloudEvent(id=None, source='test', type='co.outcome.test')
+
+    assert JSONCloudEventFormat.encode(event) == JSONCloudEventFormat.encode_attributes(event)
+
+
+def test_encoders_are_cached():
+    assert encoders.encoder_for(CloudEvent) is encoders.encoder_for(CloudEvent)
+
+
+def test_extension_encoders_are_bounded(monkeypatch):
+    monkeypatch.setattr(json_encoder, '_extension_encoders', BoundedCache(2))
+
+    for index in range(5):
+        event = CloudEvent(id='1', source='test', type='co.outcome.test', extensions={f'ext{index}': 'value'})
+        assert JSONCloudEventFormat.encode(event) == JSONCloudEventFormat.encode_attributes(event)
+
+    assert len(json_encoder._extension_encoders) <= 2  # noqa: WPS437
+
+
+def test_lazy_events_use_attributes():
+    assert encoders.encoder_for(LazyCloudEvent) is None
+
+
+def test_overridden_attributes():
+    class ExtendedEvent(CloudEvent):
+        @property
+        def attributes(self):
+            return {**super().attributes, 'extension': 'value'}
+
+    registry = EncoderRegistry(json_content_type_name)
+    event = ExtendedEvent(id='1', source='test', type='co.outcome.test', time=None)
+
+    assert registry.encoder_for(ExtendedEvent) is None
+    assert '"extension": "value"' in JSONCloudEventFormat.encode(event)
+
+
+def test_subclass_fields():
+    class SubclassEvent(CloudEvent):
+        ...
+
+    event = SubclassEvent(id='1', source='test', type='co.outcome.test')
+
+    assert EncoderRegistry(json_content_type_name).encoder_for(SubclassEvent) is not None
+    assert JSONCloudEventFormat.encode(event) == JSONCloudEventFormat.encode_attributes(event)
+
+
+@pytest.mark.parametrize(
+    'attributes',
+    [
+        [],
+        [EncodedAttribute('subject', 'subject', optional=True)],
+        [EncodedAttribute('id', 'id', optional=False), EncodedAttribute('bad name', 'subject', optional=True)],
+        [EncodedAttribute('id', 'id); import os; (', optional=False)],
+    ],
+)
+def test_invalid_attributes(attributes):
+    with pytest.raises(ValueError):
+        generate_encoder('Invalid', attributes, json_content_type_name)
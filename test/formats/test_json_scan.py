@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from outcome.eventkit.formats.json_scan import defer_value, scan_attributes
+
+deferred_keys = frozenset(('data',))
+
+
+@pytest.mark.parametrize(
+    'value',
+    [
+        '{}',
+        '[]',
+        '"a string"',
+        r'"escaped \" quote \\"',
+        r'"\\\\"',
+        r'"\\\""',
+        '{"nested": {"a": [1, 2, {"b": "}]{["}]}, "c": null}',
+        '12.5e3',
+        'null',
+    ],
+)
+def test_defer_value(value):
+    document = f' {value} , "next"'
+    deferred, end = defer_value(document, 1)
+
+    assert document[1:end] == value
+    assert deferred() == json.loads(value)
+
+
+@pytest.mark.parametrize('document', ['{"a": [1, 2', '{"a": "unterminated'])
+def test_defer_invalid_value(document):
+    with pytest.raises(ValueError):
+        defer_value(document, 5)
+
+
+def test_scan_attributes():
+    data = {'large': ['x' * 100] * 100, 'quote': '"}'}  # noqa: WPS432
+    document = json.dumps({'id': '1', 'data': data, 'type': 'co.outcome.type', 'count': 3, 'flag': None})
+
+    members, deferred = scan_attributes(document, deferred_keys)
+
+    assert members == {'id': '1', 'type': 'co.outcome.type', 'count': 3, 'flag': None}
+    assert deferred['data']() == data
+
+
+def test_scan_string_value():
+    members, deferred = scan_attributes('{"id":"1","data":"some \\"data\\""}', deferred_keys)
+
+    assert members == {'id': '1'}
+    assert deferred['data']() == 'some "data"'
+
+
+def test_scan_empty_object():
+    assert scan_attributes(' { } ', deferred_keys) == ({}, {})
+
+
+@pytest.mark.parametrize('document', ['[]', '{"a" 1}', '{"a": 1 "b": 2}', '{"a": 1', '{a: 1}', '{"a": 1} x', '{} {}'])
+def test_scan_invalid_document(document):
+    with pytest.raises(ValueError):
+        scan_attributes(document, deferred_keys)
+
+
+@pytest.mark.parametrize('document', ['{"a": 1}x', '{}[]'])
+def test_scan_agrees_with_json(document):
+    with pytest.raises(ValueError):
+        json.loads(document)
+
+    with pytest.raises(ValueError):
+        scan_attributes(document, deferred_keys)
@@ -0,0 +1,44 @@
+"""Helpers shared by the tests."""
+
+from typing import List
+
+import pendulum
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+
+# The time of the first event made by `make_events`
+events_start = pendulum.datetime(2020, 11, 4)  # noqa: WPS432
+
+
+class FakeClock:
+    """A clock that only moves when `now` is set."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_events(count: int, start: int = 0) -> List[CloudEvent]:
+    """Make events with consecutive ids, one second apart from `events_start`.
+
+    The data contains a line break, which must be escaped by the line-based encodings.
+
+    Args:
+        count (int): The number of events.
+        start (int): The id of the first event.
+
+    Returns:
+        List[CloudEvent]: The events.
+    """
+    return [
+        CloudEvent(
+            id=str(index),
+            type='co.outcome.type',
+            source='test',
+            time=events_start.add(seconds=index),
+            data=CloudEventData(data_content_type='application/json', data={'index': index, 'text': 'line\nbreak'}),
+        )
+        for index in range(start, start + count)
+    ]
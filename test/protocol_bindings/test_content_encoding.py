@@ -0,0 +1,125 @@
+import gzip
+import io
+import tracemalloc
+import zlib
+
+import pytest
+from outcome.eventkit.protocol_bindings import content_encoding
+
+body = b'{"hello": "world"}' * 10000  # noqa: WPS432
+
+@pytest.fixture(params=['gzip', 'deflate', 'zstd'])
+def coding(request):
+    if request.param == 'zstd':
+        pytest.importorskip('zstandard')
+    return request.param
+
+
+def test_round_trip(coding):
+    compressed = content_encoding.compress_body(body, coding)
+
+    assert len(compressed) < len(body)
+    assert content_encoding.decompress_body(compressed, coding) == body
+
+
+def test_round_trip_stream(coding):
+    compressed = content_encoding.compress_body(body, coding)
+
+    assert content_encoding.decompress_body(io.BytesIO(compressed), coding) == body
+
+
+def test_compress_str():
+    assert gzip.decompress(content_encoding.compress_body('héllo', 'gzip')) == 'héllo'.encode('utf-8')
+
+
+def test_deflate_is_zlib_format():
+    assert zlib.decompress(content_encoding.compress_body(body, 'deflate')) == body
+
+
+def test_multiple_codings():
+    compressed = content_encoding.compress_body(content_encoding.compress_body(body, 'deflate'), 'gzip')
+
+    assert content_encoding.decompress_body(compressed, 'deflate, gzip') == body
+
+
+@pytest.mark.parametrize('header', [None, '', 'identity', 'Identity'])
+def test_identity(header):
+    assert content_encoding.decompress_body(body, header) is body
+    assert content_encoding.decompress_body(io.BytesIO(body), header) == body
+    assert content_encoding.decompress_body(None, 'gzip') is None
+
+
+def test_parse_content_encoding():
+    assert content_encoding.parse_content_encoding(' GZIP , identity,,zstd') == ['gzip', 'zstd']
+
+
+def test_unknown_coding():
+    with pytest.raises(ValueError):
+        content_encoding.decompress_body(body, 'br')
+
+    with pytest.raises(ValueError):
+        content_encoding.compress_body(body, 'br')
+
+
+def test_invalid_body():
+    with pytest.raises(ValueError):
+        content_encoding.decompress_body(b'not gzip', 'gzip')
+
+
+def test_max_size():
+    compressed = content_encoding.compress_body(body, 'gzip')
+
+    with pytest.raises(ValueError):
+        content_encoding.decompress_body(compressed, 'gzip', max_size=1000)  # noqa: WPS432
+
+
+def test_max_size_boundary(coding):
+    compressed = content_encoding.compress_body(body, coding)
+
+    assert content_encoding.decompress_body(compressed, coding, max_size=len(body)) == body
+
+    with pytest.raises(ValueError):
+        content_encoding.decompress_body(compressed, coding, max_size=len(body) - 1)
+
+
+def test_bomb_is_not_inflated(coding):
+    bomb = content_encoding.compress_body(bytes(100 * 1024 * 1024), coding)
+
+    tracemalloc.start()
+    try:
+        with pytest.raises(ValueError):
+            content_encoding.decompress_body(bomb, coding, max_size=1000)  # noqa: WPS432
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # The output is bounded by the maximum size, plus a zstd block
+    assert peak < 1024 * 1024
+
+
+def test_truncated_body(coding):
+    compressed = content_encoding.compress_body(body, coding)
+
+    with pytest.raises(ValueError):
+        content_encoding.decompress_body(compressed[:-10], coding)
+
+    with pytest.raises(ValueError):
+        content_encoding.decompress_body(compressed[:-10], coding, max_size=len(body))
+
+
+def test_trailing_data(coding):
+    compressed = content_encoding.compress_body(body, coding)
+
+    with pytest.raises(ValueError):
+        content_encoding.decompress_body(compressed + b'trailing', coding)
+
+    with pytest.raises(ValueError):
+        content_encoding.decompress_body(io.BytesIO(compressed + compressed), coding, max_size=len(body) * 2)
+
+
+@pytest.mark.parametrize(
+    'value,coding,threshold,expected',
+    [(None, 'gzip', 0, False), (b'abc', None, 0, False), (b'abc', 'identity', 0, False), (b'abc', 'gzip', 3, True), (b'abc', 'gzip', 4, False)],
+)
+def test_should_compress(value, coding, threshold, expected):
+    assert content_encoding.should_compress(value, coding, threshold) is expected
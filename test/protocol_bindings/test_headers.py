@@ -0,0 +1,64 @@
+import pytest
+from outcome.eventkit.protocol_bindings.headers import HTTPHeaders, check_header_validity
+
+
+class TestHTTPHeaders:
+    def test_case_insensitive(self):
+        headers = HTTPHeaders({'Content-Type': 'application/json'})
+
+        assert headers['content-type'] == 'application/json'
+        assert headers['CONTENT-TYPE'] == 'application/json'
+        assert 'content-TYPE' in headers
+        assert 1 not in headers
+
+    def test_preserves_case(self):
+        headers = HTTPHeaders()
+        headers['Content-Type'] = 'application/json'
+        headers['ce-ID'] = '1'
+
+        assert list(headers) == ['Content-Type', 'ce-ID']
+        assert list(headers.lower_items()) == [('content-type', 'application/json'), ('ce-id', '1')]
+
+    def test_overwrite(self):
+        headers = HTTPHeaders({'content-type': 'text/plain'})
+        headers['Content-Type'] = 'application/json'
+
+        assert len(headers) == 1
+        assert dict(headers) == {'Content-Type': 'application/json'}
+
+    def test_delete(self):
+        headers = HTTPHeaders([('Content-Type', 'application/json')])
+        del headers['content-type']  # noqa: WPS420
+
+        assert not headers
+
+    def test_equality(self):
+        headers = HTTPHeaders({'Content-Type': 'application/json'})
+
+        assert headers == {'content-type': 'application/json'}
+        assert headers != {'content-type': 'text/plain'}
+        assert headers != 'Content-Type'
+
+    def test_copy(self):
+        headers = HTTPHeaders({'Content-Type': 'application/json'})
+        copy = headers.copy()
+        copy['ce-id'] = '1'
+
+        assert 'ce-id' not in headers
+        assert repr(copy) == "{'Content-Type': 'application/json', 'ce-id': '1'}"
+
+    def test_slots(self):
+        assert not hasattr(HTTPHeaders(), '__dict__')
+
+
+@pytest.mark.parametrize('name,value', [('ce-id', '1'), ('ce-subject', ''), ('X-Header', 'some value')])
+def test_valid_header(name, value):
+    check_header_validity(name, value)
+
+
+@pytest.mark.parametrize(
+    'name,value', [(' ce-id', '1'), ('ce:id', '1'), ('ce-id', ' 1'), ('ce-id', '1\r\n'), ('ce-id', 1), (None, '1')],
+)
+def test_invalid_header(name, value):
+    with pytest.raises(ValueError):
+        check_header_validity(name, value)
@@ -1,5 +1,6 @@
 import pendulum
 import pytest
+from outcome.eventkit import dispatch
 from outcome.eventkit.data import CloudEventData
 from outcome.eventkit.event import CloudEvent
 from outcome.eventkit.formats.json import JSONCloudEventFormat
@@ -151,6 +152,39 @@ class TestStructuredBinding:
             http.StructuredHTTPBinding.from_http(http_event)
 
 
+class TestBatchBinding:
+    def test_round_trip(self, event_with_data, event):
+        http_event = http.BatchHTTPBinding.to_http([event_with_data, event], JSONCloudEventFormat)
+
+        assert dict(http_event.headers) == {'Content-Type': JSONCloudEventFormat.batch_content_type}
+        assert http.BatchHTTPBinding.from_http(http_event) == [event_with_data, event]
+
+    def test_empty(self):
+        http_event = http.BatchHTTPBinding.to_http([], JSONCloudEventFormat)
+
+        assert http_event.body == '[]'
+        assert http.BatchHTTPBinding.from_http(http_event) == []
+
+    def test_compressed(self, event_with_data):
+        http_event = http.BatchHTTPBinding.to_http([event_with_data] * 20, JSONCloudEventFormat, content_encoding='gzip')
+
+        assert http_event.headers['Content-Encoding'] == 'gzip'
+        assert len(http.BatchHTTPBinding.from_http(http_event)) == 20
+
+    def test_from_http_not_an_array(self, event_with_data):
+        http_event = http.BatchHTTPBinding.to_http([event_with_data], JSONCloudEventFormat)
+        http_event.body = JSONCloudEventFormat.encode(event_with_data)
+
+        with pytest.raises(ValueError):
+            http.BatchHTTPBinding.from_http(http_event)
+
+    def test_from_http_unknown_content_type(self):
+        http_event = http.HTTPEvent(body='[]', headers={'Content-Type': JSONCloudEventFormat.format_content_type})
+
+        with pytest.raises(ValueError):
+            http.BatchHTTPBinding.from_http(http_event)
+
+
 def test_looks_like_binary_true_binary(event_with_data):
     http_event = http.BinaryHTTPBinding.to_http(event_with_data)
     assert http.looks_like_binary(http_event)
@@ -176,3 +210,138 @@ def test_from_http_binary(event_with_data):
     http_event = http.BinaryHTTPBinding.to_http(event_with_data)
     event = http.from_http(http_event)
     assert event == event_with_data
+
+
+@pytest.fixture
+def large_event(event):
+    event.data = CloudEventData(data_content_type='application/json', data={'items': list(range(1000))})  # noqa: WPS432
+    return event
+
+
+class TestCompression:
+    def test_binary_round_trip(self, large_event):
+        http_event = http.BinaryHTTPBinding.to_http(large_event, content_encoding='gzip')
+
+        assert http_event.headers['Content-Encoding'] == 'gzip'
+        assert http_event.headers['Content-Type'] == 'application/json;charset=utf-8'
+        assert isinstance(http_event.body, bytes)
+
+        assert http.from_http(http_event) == large_event
+
+    def test_structured_round_trip(self, large_event):
+        http_event = http.StructuredHTTPBinding.to_http(large_event, JSONCloudEventFormat, content_encoding='deflate')
+
+        assert http_event.headers['Content-Encoding'] == 'deflate'
+        assert http_event.headers['Content-Type'] == JSONCloudEventFormat.format_content_type
+
+        assert http.from_http(http_event) == large_event
+
+    def test_below_threshold(self, event_with_data):
+        http_event = http.BinaryHTTPBinding.to_http(event_with_data, content_encoding='gzip')
+
+        assert 'Content-Encoding' not in http_event.headers
+        assert http_event.body == '{"hello": "world"}'
+
+    def test_custom_threshold(self, event_with_data):
+        http_event = http.StructuredHTTPBinding.to_http(
+            event_with_data, JSONCloudEventFormat, content_encoding='gzip', compression_threshold=0,
+        )
+
+        assert http_event.headers['Content-Encoding'] == 'gzip'
+        assert http.from_http(http_event) == event_with_data
+
+    def test_decompressed_body_max_size(self, large_event):
+        http_event = http.BinaryHTTPBinding.to_http(large_event, content_encoding='gzip')
+
+        with pytest.raises(ValueError):
+            http_event.decompressed_body(max_size=10)
+
+    def test_binary_limits_decompressed_size(self, large_event, monkeypatch):
+        http_event = http.BinaryHTTPBinding.to_http(large_event, content_encoding='gzip')
+        monkeypatch.setattr(http, 'max_decompressed_body_size', 100)
+
+        with pytest.raises(ValueError, match='exceeds'):
+            http.from_http(http_event)
+
+        with pytest.raises(ValueError, match='exceeds'):
+            http.peek_http(http_event).data  # noqa: WPS428
+
+    def test_structured_limits_decompressed_size(self, large_event, monkeypatch):
+        http_event = http.StructuredHTTPBinding.to_http(large_event, JSONCloudEventFormat, content_encoding='gzip')
+        monkeypatch.setattr(http, 'max_decompressed_body_size', 100)
+
+        with pytest.raises(ValueError, match='exceeds'):
+            http.from_http(http_event)
+
+        with pytest.raises(ValueError, match='exceeds'):
+            http.peek_http(http_event)
+
+    def test_batch_limits_decompressed_size(self, large_event, monkeypatch):
+        http_event = http.BatchHTTPBinding.to_http([large_event], JSONCloudEventFormat, content_encoding='gzip')
+        monkeypatch.setattr(http, 'max_decompressed_body_size', 100)
+
+        with pytest.raises(ValueError, match='exceeds'):
+            http.BatchHTTPBinding.from_http(http_event)
+
+
+class TestPeek:
+    def test_binary_quoted_data_schema(self, event_with_data):
+        http_event = http.BinaryHTTPBinding.to_http(event_with_data)
+        http_event.headers['ce-dataschema'] = 'https://example.com/schema%20v1'
+
+        lazy_event = http.peek_http(http_event)
+
+        assert lazy_event.data_schema == 'https://example.com/schema v1'
+        assert lazy_event.to_event().data_schema == lazy_event.data_schema
+        assert http.from_http(http_event).data_schema == lazy_event.data_schema
+
+    def test_binary(self, event_with_data):
+        http_event = http.BinaryHTTPBinding.to_http(event_with_data, content_encoding='gzip', compression_threshold=0)
+
+        lazy_event = http.peek_http(http_event)
+
+        assert lazy_event.type == 'co.outcome.type'
+        assert lazy_event.subject == 'subject?'
+        assert lazy_event.data_schema == 'schema'
+        assert lazy_event.data_content_type == 'application/json;charset=utf-8'
+        assert lazy_event.body == http_event.body
+        assert not lazy_event.is_decoded
+
+        assert lazy_event.to_event() == event_with_data
+
+    def test_binary_no_data(self, http_event, event):
+        lazy_event = http.BinaryHTTPBinding.peek(http_event)
+
+        assert lazy_event.data is None
+        assert lazy_event.to_event() == event
+
+    def test_structured(self, event_with_data):
+        http_event = http.StructuredHTTPBinding.to_http(event_with_data, JSONCloudEventFormat)
+
+        lazy_event = http.peek_http(http_event)
+
+        assert lazy_event.type == 'co.outcome.type'
+        assert not lazy_event.is_decoded
+        assert lazy_event.to_event() == event_with_data
+
+    def test_dispatch_only_decodes_for_handlers(self, event_with_data):
+        registry = dispatch.HandlerRegistry()
+        received = []
+
+        def handler(lazy_event):
+            received.append(lazy_event.data.data)
+
+        dispatch.register_handler('co.outcome.other', handler, registry=registry)
+
+        unhandled = http.peek_http(http.BinaryHTTPBinding.to_http(event_with_data))
+        dispatch.dispatch(unhandled, registry=registry)
+        assert not unhandled.is_decoded
+        assert not dispatch.has_handlers(unhandled.type, registry=registry)
+
+        event_with_data.type = 'co.outcome.other'
+        handled = http.peek_http(http.BinaryHTTPBinding.to_http(event_with_data))
+        assert dispatch.has_handlers(handled.type, registry=registry)
+        dispatch.dispatch(handled, registry=registry)
+
+        assert handled.is_decoded
+        assert received == [{'hello': 'world'}]
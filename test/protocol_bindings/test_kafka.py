@@ -0,0 +1,107 @@
+import pendulum
+import pytest
+from outcome.eventkit.compact import CompactCloudEvent
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.protocol_bindings import kafka
+
+
+@pytest.fixture
+def event():
+    return CloudEvent(
+        id='1',
+        type='co.outcome.type',
+        source='test',
+        subject='user-1',
+        time=pendulum.datetime(2021, 1, 1),
+        data=CloudEventData(data_content_type='application/json', data={'key': 'value'}, data_schema='https://schema'),
+    )
+
+
+@pytest.fixture
+def event_without_data():
+    return CloudEvent(id='2', type='co.outcome.type', source='test', time=pendulum.datetime(2021, 1, 1))
+
+
+class TestBinaryKafkaBinding:
+    def test_to_kafka(self, event):
+        message = kafka.BinaryKafkaBinding.to_kafka(event)
+
+        assert message.key == b'user-1'
+        assert message.value == b'{"key": "value"}'
+        assert message.header('ce_id') == b'1'
+        assert message.header('ce_specversion') == b'1.0'
+        assert message.header('ce_time') == b'2021-01-01T00:00:00+00:00'
+        assert message.header('ce_dataschema') == b'https://schema'
+        assert message.header('content-type') == b'application/json;charset=utf-8'
+        assert message.header('ce_datacontenttype') is None
+        assert [name for name, _ in message.headers].count('ce_dataschema') == 1
+
+    def test_round_trip(self, event):
+        message = kafka.BinaryKafkaBinding.to_kafka(event)
+
+        assert kafka.from_kafka(message) == event
+
+    def test_round_trip_compact(self, event):
+        message = kafka.BinaryKafkaBinding.to_kafka(CompactCloudEvent.from_event(event))
+
+        assert kafka.from_kafka(message) == event
+
+    def test_without_data(self, event_without_data):
+        message = kafka.BinaryKafkaBinding.to_kafka(event_without_data)
+
+        assert message.key is None
+        assert message.value is None
+        assert kafka.from_kafka(message) == event_without_data
+
+    def test_key_mapper(self, event):
+        message = kafka.BinaryKafkaBinding.to_kafka(event, key_mapper=lambda e: e.source)
+
+        assert message.key == b'test'
+
+    def test_missing_content_type(self, event):
+        message = kafka.BinaryKafkaBinding.to_kafka(event)
+        message.headers = [(name, header) for name, header in message.headers if name != 'content-type']
+
+        with pytest.raises(ValueError):
+            kafka.BinaryKafkaBinding.from_kafka(message)
+
+    def test_peek(self, event):
+        lazy_event = kafka.peek_kafka(kafka.BinaryKafkaBinding.to_kafka(event))
+
+        assert lazy_event.type == 'co.outcome.type'
+        assert lazy_event.data_schema == 'https://schema'
+        assert not lazy_event.is_decoded
+        assert lazy_event.to_event() == event
+
+
+class TestStructuredKafkaBinding:
+    def test_to_kafka(self, event):
+        message = kafka.StructuredKafkaBinding.to_kafka(event, JSONCloudEventFormat)
+
+        assert message.key == b'user-1'
+        assert message.headers == [('content-type', b'application/cloudevents+json;charset=utf-8')]
+        assert not kafka.looks_like_binary(message)
+
+    def test_round_trip(self, event):
+        message = kafka.StructuredKafkaBinding.to_kafka(event, JSONCloudEventFormat)
+
+        assert kafka.from_kafka(message) == event
+        assert kafka.peek_kafka(message).to_event() == event
+
+    def test_encoded_event(self, event):
+        message = kafka.StructuredKafkaBinding.to_kafka(event, JSONCloudEventFormat, encoded_event='{}')
+
+        assert message.value == b'{}'
+        assert message.key == b'user-1'
+
+    def test_unknown_format(self, event):
+        message = kafka.KafkaMessage(b'{}', [('content-type', b'application/cloudevents+xml')])
+
+        with pytest.raises(ValueError):
+            kafka.from_kafka(message)
+
+    def test_missing_content_type(self):
+        with pytest.raises(ValueError):
+            kafka.from_kafka(kafka.KafkaMessage(b'{}'))
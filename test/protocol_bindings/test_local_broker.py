@@ -0,0 +1,110 @@
+import pytest
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.protocol_bindings.kafka import BinaryKafkaBinding, KafkaMessage, from_kafka
+from outcome.eventkit.protocol_bindings.local_broker import LocalBroker, UnknownTopicError, decode_record, encode_record
+
+
+def make_message(index, key=None):
+    return KafkaMessage(f'value-{index}'.encode(), [('ce_id', str(index).encode()), ('empty', None)], key)
+
+
+@pytest.fixture(params=['memory', 'file'])
+def broker(request, tmp_path):
+    directory = tmp_path if request.param == 'file' else None
+    with LocalBroker(directory, default_partitions=3) as local_broker:
+        yield local_broker
+
+
+def test_record_round_trip():
+    message = make_message(1, b'key')
+    record = encode_record(message)
+
+    assert decode_record(record) == (message, len(record))
+
+
+def test_produce_consume(broker):
+    positions = broker.produce_batch('events', [make_message(index, b'key') for index in range(5)])
+
+    partition = positions[0][0]
+    assert positions == [(partition, offset) for offset in range(5)]
+
+    consumed = broker.consume('events', partition, offset=2, max_messages=2)
+
+    assert consumed == [make_message(2, b'key'), make_message(3, b'key')]
+    assert [(m.topic, m.partition, m.offset) for m in consumed] == [('events', partition, 2), ('events', partition, 3)]
+
+
+def test_keys_are_stable(broker):
+    broker.create_topic('events')
+
+    assert broker.partition_for('events', b'a') == broker.partition_for('events', b'a')
+
+
+def test_messages_without_keys_are_spread(broker):
+    broker.produce_batch('events', [make_message(index) for index in range(6)])
+
+    assert broker.end_offsets('events') == [2, 2, 2]
+
+
+def test_unknown_topic(broker):
+    with pytest.raises(UnknownTopicError):
+        broker.consume('unknown', 0)
+
+
+@pytest.mark.parametrize('topic', ['../events', 'a/b', '/tmp/events', '.', '..', '', 'events!', 'a' * 250])
+def test_invalid_topic(tmp_path, topic):
+    directory = tmp_path / 'broker'
+    directory.mkdir()
+
+    with LocalBroker(directory) as broker:
+        with pytest.raises(ValueError, match='Invalid topic name'):
+            broker.create_topic(topic)
+
+        with pytest.raises(ValueError, match='Invalid topic name'):
+            broker.produce(topic, make_message(1))
+
+        assert broker.topics() == {}
+
+    assert list(tmp_path.iterdir()) == [directory]
+    assert not list(directory.iterdir())
+
+
+def test_valid_topic(broker):
+    broker.create_topic('Events_1.v2-a')
+
+    assert broker.topics() == {'Events_1.v2-a': 3}
+
+
+def test_reload(tmp_path):
+    with LocalBroker(tmp_path, default_partitions=2) as broker:
+        broker.produce('events', make_message(1, b'key'))
+        partition, offset = broker.produce('events', make_message(2, b'key'))
+
+    with LocalBroker(tmp_path) as broker:
+        assert broker.topics() == {'events': 2}
+        assert broker.consume('events', partition, offset) == [make_message(2, b'key')]
+
+
+def test_incomplete_record(tmp_path):
+    with LocalBroker(tmp_path) as broker:
+        broker.produce_batch('events', [make_message(1), make_message(2)])
+
+    path = tmp_path / 'events-0.partition'
+    path.write_bytes(path.read_bytes()[:-3])
+
+    with LocalBroker(tmp_path) as broker:
+        assert broker.consume('events', 0) == [make_message(1)]
+        broker.produce('events', make_message(3))
+        assert broker.consume('events', 0) == [make_message(1), make_message(3)]
+
+
+def test_events(broker):
+    events = [CloudEvent(type='co.outcome.type', source='test', subject=f'user-{index % 2}') for index in range(10)]
+
+    broker.produce_batch('events', (BinaryKafkaBinding.to_kafka(event) for event in events))
+
+    consumed = [
+        from_kafka(message) for partition in range(3) for message in broker.consume('events', partition)
+    ]
+
+    assert sorted(consumed, key=lambda e: e.id) == sorted(events, key=lambda e: e.id)
@@ -0,0 +1,210 @@
+import pendulum
+import pytest
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.protocol_bindings import http
+from outcome.eventkit.protocol_bindings.negotiation import (
+    CostModel,
+    MediaRange,
+    Mode,
+    NegotiationError,
+    Negotiator,
+    parse_accept,
+    parse_accept_encoding,
+    quality_of,
+)
+
+json_type = 'application/json'
+structured_type = 'application/cloudevents+json'
+batch_type = 'application/cloudevents-batch+json'
+
+
+@pytest.fixture
+def event():
+    return CloudEvent(
+        id='0870f425-c26f-44af-a0e0-be469e9aa305',
+        type='co.outcome.type',
+        source='test',
+        time=pendulum.datetime(year=2020, month=11, day=5),  # noqa: WPS432
+        data=CloudEventData(data_content_type=json_type, data={'lines': [{'amount': index} for index in range(200)]}),
+    )
+
+
+@pytest.fixture
+def small_event(event):
+    return event.copy(update={'data': CloudEventData(data_content_type=json_type, data={'amount': 1})})
+
+
+@pytest.fixture
+def negotiator():
+    return Negotiator(formats=[JSONCloudEventFormat], cost_model=CostModel(codings={'identity': 1, 'gzip': 0.6, 'deflate': 0.7}))
+
+
+class TestParseAccept:
+    def test_quality(self):
+        assert parse_accept('application/json;q=0.5, */*;q=0.1') == (
+            MediaRange('application', 'json', None, (), 0.5),
+            MediaRange('*', '*', None, (), 0.1),
+        )
+
+    def test_parameters(self):
+        # The parameters after the quality are extensions of the header
+        media_ranges = parse_accept('text/plain; format=flowed; q=0.8; level=1')
+
+        assert media_ranges == (MediaRange('text', 'plain', None, (('format', 'flowed'),), 0.8),)
+
+    @pytest.mark.parametrize('accept', [None, '', 'not a media range', 'application/json;q=high'])
+    def test_missing_or_invalid(self, accept):
+        assert parse_accept(accept) == (MediaRange('*', '*', None, (), 1),)
+
+    def test_quality_is_clamped(self):
+        assert parse_accept('application/json;q=2')[0].quality == 1
+
+    def test_wildcard_type(self):
+        # A wildcard type is only valid with a wildcard subtype
+        assert parse_accept('*/json, */*+json, text/*;q=0.5') == (MediaRange('text', '*', None, (), 0.5),)
+
+
+class TestParseAcceptEncoding:
+    def test_codings(self):
+        assert parse_accept_encoding('gzip;q=0.5, zstd, *;q=0, identity') == {'gzip': 0.5, 'zstd': 1, '*': 0, 'identity': 1}
+
+    def test_missing(self):
+        assert parse_accept_encoding(None) == {'identity': 1}
+
+
+class TestQuality:
+    @pytest.mark.parametrize(
+        'accept,content_type,quality',
+        [
+            ('*/*;q=0.1', json_type, 0.1),
+            ('application/*;q=0.3, */*;q=0.1', json_type, 0.3),
+            ('application/*+json;q=0.4, application/*;q=0.3', structured_type, 0.4),
+            ('application/*+json;q=0.4, application/*;q=0.3', json_type, 0.3),
+            ('application/json;q=0, */*', json_type, 0),
+            ('application/json;charset=latin1, */*;q=0.2', json_type, 0.2),
+            ('application/json;charset=utf-8;q=0.9, */*;q=0.2', json_type, 0.9),
+            ('text/plain', json_type, 0),
+        ],
+    )
+    def test_most_specific_range(self, accept, content_type, quality):
+        assert quality_of(parse_accept(accept), content_type) == quality
+
+
+class TestNegotiator:
+    def test_binary_is_cheapest(self, negotiator):
+        negotiation = negotiator.negotiate('*/*', data_content_type=json_type)
+
+        assert negotiation.mode is Mode.binary
+        assert negotiation.event_format is None
+        assert negotiation.content_encoding is None
+
+    def test_structured(self, negotiator):
+        negotiation = negotiator.negotiate(structured_type, data_content_type=json_type)
+
+        assert negotiation.mode is Mode.structured
+        assert negotiation.event_format is JSONCloudEventFormat
+
+    def test_no_data(self, negotiator):
+        assert negotiator.negotiate('*/*').mode is Mode.structured
+
+    def test_quality_makes_representations_more_expensive(self, negotiator):
+        negotiation = negotiator.negotiate(f'{json_type};q=0.5, {structured_type}', data_content_type=json_type)
+
+        assert negotiation.mode is Mode.structured
+
+    def test_small_data(self, negotiator):
+        assert negotiator.negotiate('*/*', data_content_type=json_type, data_size=100).mode is Mode.structured
+        assert negotiator.negotiate('*/*', data_content_type=json_type, data_size=4096).mode is Mode.binary
+        # Binary mode is still used when it's the only acceptable representation
+        assert negotiator.negotiate(json_type, data_content_type=json_type, data_size=100).mode is Mode.binary
+
+    def test_cost_model(self):
+        negotiator = Negotiator(formats=[JSONCloudEventFormat], cost_model=CostModel(binary=2))
+
+        assert negotiator.negotiate('*/*', data_content_type=json_type).mode is Mode.structured
+
+    def test_batch(self, negotiator):
+        negotiation = negotiator.negotiate('application/*+json', batch=True)
+
+        assert negotiation.mode is Mode.batch
+        assert negotiation.content_type.startswith(batch_type)
+
+    @pytest.mark.parametrize(
+        'accept_encoding,content_encoding',
+        [
+            (None, None),
+            ('identity', None),
+            ('gzip, deflate', 'gzip'),
+            ('gzip;q=0.5, deflate', 'deflate'),
+            ('br', None),
+            ('*', 'gzip'),
+            ('gzip;q=0, *', 'deflate'),
+        ],
+    )
+    def test_content_encoding(self, negotiator, accept_encoding, content_encoding):
+        assert negotiator.negotiate('*/*', accept_encoding).content_encoding == content_encoding
+
+    @pytest.mark.parametrize('accept,accept_encoding', [('text/html', None), ('*/*', 'identity;q=0'), ('*/*', 'br, *;q=0')])
+    def test_not_acceptable(self, negotiator, accept, accept_encoding):
+        with pytest.raises(NegotiationError):
+            negotiator.negotiate(accept, accept_encoding, data_content_type=json_type)
+
+    def test_cached(self, negotiator):
+        assert negotiator.negotiate('*/*') is negotiator.negotiate('*/*')
+
+    def test_bounded_cache(self):
+        negotiator = Negotiator(formats=[JSONCloudEventFormat], max_cache_size=2)
+
+        for index in range(5):
+            negotiator.negotiate(f'application/json;q=0.{index + 1}', data_content_type=json_type)
+
+        assert len(negotiator._cache) <= 2  # noqa: WPS437
+
+    def test_unavailable_codings_are_ignored(self):
+        negotiator = Negotiator(cost_model=CostModel(codings={'identity': 1, 'br': 0.1}))
+
+        assert negotiator.codings == ('identity',)
+
+
+class TestToHTTP:
+    def test_binary(self, negotiator, event):
+        http_event = negotiator.to_http(event, '*/*', 'gzip')
+
+        assert http.looks_like_binary(http_event)
+        assert http_event.headers['Content-Encoding'] == 'gzip'
+        assert http.from_http(http_event) == event
+
+    def test_small_data(self, negotiator, small_event):
+        http_event = negotiator.to_http(small_event, '*/*')
+
+        assert http_event.headers['Content-Type'] == JSONCloudEventFormat.format_content_type
+        assert http.from_http(http_event) == small_event
+
+        http_event = negotiator.to_http(small_event, json_type)
+
+        assert http.looks_like_binary(http_event)
+        assert http.from_http(http_event) == small_event
+
+    def test_structured(self, negotiator, event):
+        http_event = negotiator.to_http(event, structured_type)
+
+        assert http_event.headers['Content-Type'] == JSONCloudEventFormat.format_content_type
+        assert http.from_http(http_event) == event
+
+    def test_batch(self, negotiator, event):
+        http_events = negotiator.to_http_batch([event, event], f'{batch_type}, {json_type}')
+
+        assert len(http_events) == 1
+        assert http.BatchHTTPBinding.from_http(http_events[0]) == [event, event]
+
+    def test_batch_not_accepted(self, negotiator, event):
+        http_events = negotiator.to_http_batch([event, event], json_type)
+
+        assert len(http_events) == 2
+        assert all(http.looks_like_binary(http_event) for http_event in http_events)
+
+    def test_not_acceptable(self, negotiator, event):
+        with pytest.raises(NegotiationError):
+            negotiator.to_http_batch([event], 'text/html')
@@ -0,0 +1,236 @@
+"""A soak test harness, to find memory that grows with the number of events handled.
+
+Each scenario pushes varied events through part of the toolkit. The harness runs a
+warmup, so that the bounded caches fill up, and then samples the memory traced by
+`tracemalloc`, the RSS of the process and the number of objects tracked by the
+garbage collector as it runs. It fails if the traced memory keeps growing over the
+second half of the run, which rules out caches that fill up and then stay flat.
+
+The tests run short soaks, longer soaks can be run directly:
+
+    PYTHONPATH=src python -m test.soak --events 1000000
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.dispatch import HandlerRegistry, dispatch
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.protocol_bindings.http import BinaryHTTPBinding, HTTPEvent, StructuredHTTPBinding, from_http
+
+# Handles the event with the given index
+Scenario = Callable[[int], None]
+
+# The number of distinct values of each attribute, large enough to exercise the caches, but finite
+event_types = 200
+registered_types = 20
+sources = 50
+content_type_spellings = 200
+
+
+def data_content_type(index: int) -> str:
+    # Equivalent spellings of the JSON content type, as they'd come from different producers
+    spelling = index % content_type_spellings
+    charset = ' ' * (spelling % 50) + ('charset=UTF-8' if spelling % 2 else 'charset=utf-8')
+    return f'{"Application/JSON" if spelling >= 100 else "application/json"};{charset}'
+
+
+def make_event(index: int) -> CloudEvent:
+    """Make a varied event, whose attributes cycle through large sets of values."""
+    return CloudEvent(
+        id=f'event-{index}',
+        type=f'co.outcome.soak.type{index % event_types}',
+        source=f'//soak/{index % sources}',
+        subject=f'subject-{index}' if index % 3 else None,
+        data=CloudEventData(
+            data={'index': index, 'values': list(range(index % 10))},
+            data_content_type=data_content_type(index),
+        ),
+        extensions={'partitionkey': f'key-{index % 100}'} if index % 2 else None,
+    )
+
+
+def from_http_scenario(index: int) -> None:
+    event = make_event(index)
+    if index % 2:
+        http_event = BinaryHTTPBinding.to_http(event)
+    else:
+        http_event = StructuredHTTPBinding.to_http(event, JSONCloudEventFormat)
+
+    # The messages are decoded from their wire representation, with new strings
+    headers = {name: f'{header_value} '.rstrip() for name, header_value in http_event.headers.items()}
+    from_http(HTTPEvent(http_event.body, headers))
+
+
+def json_round_trip_scenario(index: int) -> None:
+    JSONCloudEventFormat.decode(JSONCloudEventFormat.encode(make_event(index)))
+
+
+def dispatch_scenario_factory() -> Scenario:
+    registry = HandlerRegistry()
+    handled: List[int] = [0]
+
+    def handle(event: CloudEvent) -> None:  # noqa: WPS430
+        handled[0] += 1
+
+    for type_index in range(registered_types):
+        registry.register(f'co.outcome.soak.type{type_index}', handle)
+        registry.register(f'co.outcome.soak.type{type_index}', handle, {'prefix': {'subject': 'subject-1'}})
+
+    def dispatch_scenario(index: int) -> None:  # noqa: WPS430
+        # Most of the events don't have handlers
+        dispatch(make_event(index), registry)
+
+    return dispatch_scenario
+
+
+scenarios: Dict[str, Callable[[], Scenario]] = {
+    'from_http': lambda: from_http_scenario,
+    'json_round_trip': lambda: json_round_trip_scenario,
+    'dispatch': dispatch_scenario_factory,
+}
+
+
+class Sample(NamedTuple):
+    events: int
+    # The memory allocated by Python, in bytes
+    traced: int
+    # The resident set size of the process, in bytes, if it's available
+    rss: Optional[int]
+    objects: int
+
+
+class SoakReport(NamedTuple):
+    scenario: str
+    samples: List[Sample]
+    # The growth of the traced memory over the second half of the run
+    growth_per_event: float
+    max_growth_per_event: float
+    # The call sites that allocated the most memory since the warmup
+    top_allocations: List[str]
+
+    @property
+    def passed(self) -> bool:
+        return self.growth_per_event <= self.max_growth_per_event
+
+    def format(self) -> str:  # noqa: WPS125
+        status = 'ok' if self.passed else 'FAILED'
+        lines = [
+            f'{self.scenario}: {status}, {self.growth_per_event:.3f} B/event (max {self.max_growth_per_event} B/event)',
+            '    events      traced         rss     objects',
+        ]
+        lines.extend(
+            f'{sample.events:>10} {sample.traced:>11} {sample.rss if sample.rss is not None else "-":>11} {sample.objects:>11}'
+            for sample in self.samples
+        )
+        lines.append('    top allocations:')
+        lines.extend(f'    {allocation}' for allocation in self.top_allocations)
+        return '\n'.join(lines)
+
+
+def rss() -> Optional[int]:
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    import resource  # noqa: WPS433
+
+    return resident_pages * resource.getpagesize()
+
+
+def _slope(samples: List[Sample]) -> float:
+    # The least squares fit of the traced memory, in bytes per event
+    count = len(samples)
+    mean_events = sum(sample.events for sample in samples) / count
+    mean_traced = sum(sample.traced for sample in samples) / count
+    covariance = sum((sample.events - mean_events) * (sample.traced - mean_traced) for sample in samples)
+    variance = sum((sample.events - mean_events) ** 2 for sample in samples)
+    return covariance / variance if variance else 0
+
+
+def soak(  # noqa: WPS210
+    name: str,
+    scenario: Scenario,
+    events: int,
+    warmup: int = 2000,
+    samples: int = 10,
+    max_growth_per_event: float = 1,
+    top: int = 10,
+) -> SoakReport:
+    """Run a scenario, and measure how its memory grows.
+
+    Args:
+        name (str): The name of the scenario.
+        scenario (Scenario): The scenario.
+        events (int): The number of events, after the warmup.
+        warmup (int): The number of events handled before measuring.
+        samples (int): The number of samples.
+        max_growth_per_event (float): The maximum growth of the traced memory, in bytes per event.
+        top (int): The number of call sites to report.
+
+    Returns:
+        SoakReport: The report.
+    """
+    for index in range(warmup):
+        scenario(index)
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+
+    recorded: List[Sample] = []
+    chunk = max(events // samples, 1)
+    index = warmup
+
+    try:
+        for _ in range(samples):
+            for index in range(index, index + chunk):  # noqa: WPS440
+                scenario(index)
+            index += 1
+
+            gc.collect()
+            recorded.append(Sample(index - warmup, tracemalloc.get_traced_memory()[0], rss(), len(gc.get_objects())))
+
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    statistics = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), 'lineno')
+    top_allocations = [str(statistic) for statistic in statistics[:top]]
+
+    growth = _slope(recorded[len(recorded) // 2 :])  # noqa: E203
+    return SoakReport(name, recorded, growth, max_growth_per_event, top_allocations)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=100_000, help='The number of events of each scenario')
+    parser.add_argument('--samples', type=int, default=20)
+    parser.add_argument('--max-growth', type=float, default=1, help='The maximum growth, in bytes per event')
+    parser.add_argument('scenarios', nargs='*', help=f'The scenarios, all of them by default: {", ".join(scenarios)}')
+    arguments = parser.parse_args(argv)
+
+    unknown = set(arguments.scenarios) - scenarios.keys()
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    passed = True
+    for name in arguments.scenarios or scenarios:
+        scenario = scenarios[name]()
+        report = soak(name, scenario, arguments.events, samples=arguments.samples, max_growth_per_event=arguments.max_growth)
+        print(report.format())  # noqa: WPS421
+        passed = passed and report.passed
+
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
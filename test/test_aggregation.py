@@ -0,0 +1,256 @@
+import math
+from fractions import Fraction
+from typing import List, Optional
+
+import pendulum
+import pytest
+from outcome.eventkit import CloudEvent
+from outcome.eventkit.aggregation import (
+    AggregationStats,
+    HyperLogLog,
+    SlidingWindows,
+    TumblingWindows,
+    WindowedAggregator,
+    by_type_and_subject,
+    data_field,
+)
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.dispatch import HandlerRegistry
+
+from test.helpers import FakeClock
+
+viewed_type = 'co.outcome.page.viewed'
+paid_type = 'co.outcome.invoice.paid'
+
+
+def make_event(
+    timestamp: Optional[float], event_type: str = viewed_type, subject: Optional[str] = None, amount: Optional[float] = None,
+) -> CloudEvent:
+    data = CloudEventData(data={'amount': amount}, data_content_type='application/json') if amount is not None else None
+    event_time = pendulum.from_timestamp(timestamp) if timestamp is not None else None
+    event = CloudEvent(type=event_type, source='test', subject=subject, data=data)
+    # The time defaults to now when it isn't given
+    event.time = event_time
+    return event
+
+
+@pytest.fixture
+def summaries():
+    return []
+
+
+def make_aggregator(summaries: List[CloudEvent], windows=None, **kwargs) -> WindowedAggregator:
+    return WindowedAggregator(windows or TumblingWindows(60), emit=summaries.append, **kwargs)
+
+
+class TestHyperLogLog:
+    @pytest.mark.parametrize('cardinality', [0, 1, 10, 1000, 20_000])
+    def test_count(self, cardinality):
+        estimate = HyperLogLog(precision=12)
+        for index in range(cardinality):
+            estimate.add(f'user-{index}')
+            estimate.add(f'user-{index}')
+
+        assert estimate.count() == pytest.approx(cardinality, rel=0.05, abs=1)
+
+    def test_merge(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for index in range(1000):
+            first.add(f'user-{index}')
+            second.add(f'user-{index + 500}')
+
+        first.merge(second)
+
+        assert first.count() == pytest.approx(1500, rel=0.1)
+
+    def test_merge_different_precisions(self):
+        with pytest.raises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+    @pytest.mark.parametrize('precision', [3, 17])
+    def test_invalid_precision(self, precision):
+        with pytest.raises(ValueError):
+            HyperLogLog(precision)
+
+
+class TestWindows:
+    def test_tumbling(self):
+        assert TumblingWindows(60).starts(125) == (120,)
+
+    def test_sliding(self):
+        assert SlidingWindows(60, 20).starts(125) == (120, 100, 80)
+
+    def test_sliding_boundary(self):
+        assert SlidingWindows(60, 20).starts(120) == (120, 100, 80)
+
+    def test_fractional_sizes(self):
+        assert SlidingWindows(0.3, 0.1).starts(1.0) == (1.0, 0.9, 0.8)
+        assert TumblingWindows(0.1).starts(0.3) == (3 * 0.1,)
+
+    def test_sliding_contains_timestamp(self):
+        for windows in (SlidingWindows(0.3, 0.1), SlidingWindows(50, 20), SlidingWindows(1, 0.7)):
+            for step in range(1000):
+                timestamp = step * 0.01
+                # The windows that contain the timestamp, in exact arithmetic
+                exact_timestamp = Fraction(step, 100)
+                slide = Fraction(str(windows.slide))
+                size = Fraction(str(windows.size))
+                indexes = range(math.floor(exact_timestamp / slide), math.floor((exact_timestamp - size) / slide), -1)
+
+                assert windows.starts(timestamp) == tuple(index * windows.slide for index in indexes)
+
+    @pytest.mark.parametrize('windows', [lambda: TumblingWindows(0), lambda: SlidingWindows(60, 0)])
+    def test_invalid(self, windows):
+        with pytest.raises(ValueError):
+            windows()
+
+
+class TestWindowedAggregator:
+    def test_tumbling(self, summaries):
+        aggregator = make_aggregator(summaries, value=data_field('amount'))
+
+        for timestamp, amount in ((0, 5), (10, 1), (59, 3)):
+            aggregator(make_event(timestamp, amount=amount))
+        assert not summaries
+
+        aggregator(make_event(60, amount=100))
+
+        assert len(summaries) == 1
+        summary = summaries[0]
+        assert summary.type == 'co.outcome.eventkit.aggregate'
+        assert summary.subject == viewed_type
+        assert summary.time == pendulum.from_timestamp(60)
+        assert summary.data.data == {
+            'key': viewed_type,
+            'start': '1970-01-01T00:00:00+00:00',
+            'end': '1970-01-01T00:01:00+00:00',
+            'count': 3,
+            'sum': 9,
+            'min': 1,
+            'max': 5,
+        }
+
+    def test_keys(self, summaries):
+        aggregator = make_aggregator(summaries, key=by_type_and_subject)
+
+        aggregator(make_event(0, subject='home'))
+        aggregator(make_event(1, subject='home'))
+        aggregator(make_event(2, event_type=paid_type))
+        aggregator.flush()
+
+        assert {(tuple(summary.data.data['key']), summary.data.data['count']) for summary in summaries} == {
+            ((viewed_type, 'home'), 2),
+            ((paid_type, None), 1),
+        }
+
+    def test_sliding(self, summaries):
+        aggregator = make_aggregator(summaries, windows=SlidingWindows(60, 30))
+
+        for timestamp in (0, 40, 70):
+            aggregator(make_event(timestamp))
+        aggregator.flush()
+
+        counts = {summary.data.data['start']: summary.data.data['count'] for summary in summaries}
+        assert counts == {
+            '1969-12-31T23:59:30+00:00': 1,
+            '1970-01-01T00:00:00+00:00': 2,
+            '1970-01-01T00:00:30+00:00': 2,
+            '1970-01-01T00:01:00+00:00': 1,
+        }
+
+    def test_distinct(self, summaries):
+        aggregator = make_aggregator(summaries, distinct=lambda event: event.subject)
+
+        for index in range(100):
+            aggregator(make_event(index % 60, subject=f'user-{index % 20}'))
+        aggregator.flush()
+
+        assert summaries[0].data.data['distinct'] == 20
+
+    def test_late_events(self, summaries):
+        aggregator = make_aggregator(summaries)
+
+        aggregator(make_event(0))
+        aggregator(make_event(70))
+        aggregator(make_event(30))
+
+        assert summaries[0].data.data['count'] == 1
+        assert aggregator.stats() == AggregationStats(aggregated=2, late=1, overflowed=0, emitted=1, open_windows=1)
+
+    def test_allowed_lateness(self, summaries):
+        aggregator = make_aggregator(summaries, allowed_lateness=30)
+
+        aggregator(make_event(0))
+        aggregator(make_event(70))
+        aggregator(make_event(30))
+        assert not summaries
+
+        aggregator(make_event(90))
+
+        assert summaries[0].data.data['count'] == 2
+        assert aggregator.stats().late == 0
+
+    def test_max_keys(self, summaries):
+        aggregator = make_aggregator(summaries, max_keys=2, key=lambda event: event.subject)
+
+        for subject in ('a', 'b', 'c', 'a'):
+            aggregator(make_event(0, subject=subject))
+        aggregator.flush()
+
+        assert {summary.subject: summary.data.data['count'] for summary in summaries} == {'a': 2, 'b': 1}
+        assert aggregator.stats().overflowed == 1
+
+    def test_events_without_time(self, summaries):
+        clock = FakeClock()
+        clock.now = 30
+        aggregator = make_aggregator(summaries, clock=clock)
+
+        aggregator(make_event(None))
+        clock.now = 60
+        aggregator.advance()
+
+        assert summaries[0].data.data['count'] == 1
+
+    def test_advance(self, summaries):
+        aggregator = make_aggregator(summaries)
+
+        aggregator(make_event(0))
+        aggregator.advance(59)
+        assert not summaries
+
+        aggregator.advance(60)
+        assert len(summaries) == 1
+        assert aggregator.stats().open_windows == 0
+
+    def test_bounded_windows(self, summaries):
+        aggregator = make_aggregator(summaries, windows=SlidingWindows(60, 10), allowed_lateness=30)
+
+        for timestamp in range(0, 10_000, 7):
+            aggregator(make_event(timestamp))
+
+        assert aggregator.stats().open_windows <= 10
+
+    def test_dispatch(self):
+        registry = HandlerRegistry()
+        summaries = []
+        registry.register('co.outcome.eventkit.aggregate', summaries.append)
+        aggregator = WindowedAggregator(TumblingWindows(60), registry=registry)
+        registry.register(viewed_type, aggregator)
+
+        aggregator(make_event(0))
+        aggregator.flush()
+
+        assert len(summaries) == 1
+
+    @pytest.mark.parametrize('kwargs', [{'allowed_lateness': -1}, {'max_keys': 0}])
+    def test_invalid(self, summaries, kwargs):
+        with pytest.raises(ValueError):
+            make_aggregator(summaries, **kwargs)
+
+
+def test_data_field():
+    amount = data_field('amount')
+
+    assert amount(make_event(0, amount=3)) == 3
+    assert amount(make_event(0)) is None
+    assert amount(make_event(0, amount=True)) is None
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from outcome.eventkit.bulk import decode_log, decode_many
+from outcome.eventkit.compact import CompactCloudEvent
+from outcome.eventkit.eventlog import EventLogWriter
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+
+from test import bench_bulk
+from test.helpers import make_events
+
+
+@pytest.fixture
+def events():
+    return make_events(50)
+
+
+@pytest.fixture
+def log_path(tmp_path, events):
+    path = tmp_path / 'events.log'
+    with EventLogWriter(path) as writer:
+        writer.extend(events)
+    return path
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_decode_many(events, workers):
+    records = (JSONCloudEventFormat.encode(event) for event in events)
+
+    assert list(decode_many(records, workers=workers, chunk_size=7)) == events
+
+
+def test_decode_many_compact(events):
+    records = [JSONCloudEventFormat.encode(event) for event in events]
+
+    decoded = list(decode_many(records, workers=2, chunk_size=10, compact=True))
+
+    assert all(isinstance(event, CompactCloudEvent) for event in decoded)
+    assert [event.to_event() for event in decoded] == events
+
+
+def test_decode_many_executor(events):
+    records = [JSONCloudEventFormat.encode(event) for event in events]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert list(decode_many(records, chunk_size=3, executor=executor)) == events
+
+
+def test_decode_many_error():
+    with pytest.raises(ValueError):
+        list(decode_many(['{}'], workers=2))
+
+
+@pytest.mark.parametrize('workers', [1, 2, 3])
+def test_decode_log(log_path, events, workers):
+    assert list(decode_log(log_path, workers=workers)) == events
+
+
+def test_decode_log_compact(log_path, events):
+    decoded = list(decode_log(log_path, workers=2, compact=True))
+
+    assert [event.to_event() for event in decoded] == events
+
+
+def test_decode_log_in_flight(log_path, events):
+    submitted = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(args[-2:])
+            return super().submit(fn, *args, **kwargs)
+
+    with RecordingExecutor(max_workers=2) as executor:
+        decoded = decode_log(log_path, workers=2, executor=executor, chunk_size=500)
+        first = next(decoded)
+
+        # The ranges are split by size, and only a couple per worker are in flight
+        assert len(submitted) == 4
+        assert [first, *decoded] == events
+
+    assert len(submitted) > 4
+    assert all(end - start < 1000 for start, end in submitted)
+
+
+def test_decode_empty_log(tmp_path):
+    path = tmp_path / 'empty.log'
+    EventLogWriter(path).close()
+
+    assert list(decode_log(path, workers=2)) == []
+
+
+def test_benchmark(capsys):
+    assert bench_bulk.main(['--events', '200', '--workers', '1', '2']) == 0
+
+    output = capsys.readouterr().out
+    assert 'unpickle' in output
+    assert output.count('decode_many') == 2
@@ -0,0 +1,204 @@
+import threading
+from collections import defaultdict
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+from outcome.eventkit.bus import Backpressure, BusClosedError, BusFullError, EventBus, PartitionKey
+from outcome.eventkit.dispatch import HandlerRegistry, register_handler
+from outcome.eventkit.event import CloudEvent
+
+timeout = 5
+
+
+def make_event(subject: str, index: int = 0) -> CloudEvent:
+    return CloudEvent(type='co.outcome.test', source='test', subject=subject, id=f'{subject}-{index}')
+
+
+class BlockingHandler:
+    """A handler that waits until it's released, to fill the partition queues."""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.events: List[CloudEvent] = []
+
+    def __call__(self, event: CloudEvent) -> None:
+        self.started.set()
+        self.release.wait(timeout)
+        self.events.append(event)
+
+
+@pytest.fixture
+def registry():
+    return HandlerRegistry()
+
+
+def test_dispatches_to_registry(registry):
+    handler = Mock()
+    register_handler('co.outcome.test', handler, registry=registry)
+
+    event = make_event('a')
+
+    with EventBus(partitions=2, registry=registry) as bus:
+        bus.publish(event)
+
+    handler.assert_called_once_with(event)
+    assert sum(s.processed for s in bus.stats()) == 1
+
+
+def test_ordering_per_subject():
+    received = defaultdict(list)
+
+    def handler(event: CloudEvent) -> None:
+        received[event.subject].append(event.id)
+
+    subjects = ['a', 'b', 'c', 'd', 'e']
+    with EventBus(partitions=3, dispatcher=handler) as bus:
+        for index in range(100):  # noqa: WPS432
+            for subject in subjects:
+                bus.publish(make_event(subject, index))
+
+    for subject in subjects:
+        assert received[subject] == [f'{subject}-{index}' for index in range(100)]  # noqa: WPS432
+
+
+@pytest.mark.parametrize('partition_key,expected', [(PartitionKey.subject, 'b'), (PartitionKey.source, 'src')])
+def test_partition_key(partition_key, expected):
+    bus = EventBus(partitions=7, partition_key=partition_key)
+    event = CloudEvent(type='co.outcome.test', source='src', subject='b')
+
+    assert bus.partition_for(event) is bus.partitions[hash(expected) % 7]
+
+
+def test_partition_key_no_subject():
+    bus = EventBus(partitions=7)
+    event = CloudEvent(type='co.outcome.test', source='src')
+
+    assert bus.partition_for(event) is bus.partitions[hash('src') % 7]
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        EventBus(partitions=0)
+
+
+def test_reject():
+    handler = BlockingHandler()
+    bus = EventBus(partitions=1, max_queue_size=1, backpressure=Backpressure.reject, dispatcher=handler)
+    bus.start()
+
+    bus.publish(make_event('a', 0))
+    handler.started.wait(timeout)
+    bus.publish(make_event('a', 1))
+
+    with pytest.raises(BusFullError):
+        bus.publish(make_event('a', 2))
+
+    handler.release.set()
+    bus.close()
+
+    (stats,) = bus.stats()
+    assert stats.rejected == 1
+    assert stats.processed == 2
+    assert stats.lag == 0
+
+
+def test_drop_oldest():
+    handler = BlockingHandler()
+    bus = EventBus(partitions=1, max_queue_size=2, backpressure=Backpressure.drop_oldest, dispatcher=handler)
+    bus.start()
+
+    bus.publish(make_event('a', 0))
+    handler.started.wait(timeout)
+    for index in range(1, 5):
+        bus.publish(make_event('a', index))
+
+    (stats,) = bus.stats()
+    assert stats.dropped == 2
+    assert stats.lag == 3
+
+    handler.release.set()
+    bus.close()
+
+    assert [e.id for e in handler.events] == ['a-0', 'a-3', 'a-4']
+
+
+def test_block_timeout():
+    handler = BlockingHandler()
+    bus = EventBus(partitions=1, max_queue_size=1, dispatcher=handler)
+    bus.start()
+
+    bus.publish(make_event('a', 0))
+    handler.started.wait(timeout)
+    bus.publish(make_event('a', 1))
+
+    with pytest.raises(BusFullError):
+        bus.publish(make_event('a', 2), timeout=0.01)
+
+    handler.release.set()
+    bus.publish(make_event('a', 3), timeout=timeout)
+    bus.close()
+
+    assert [e.id for e in handler.events] == ['a-0', 'a-1', 'a-3']
+
+
+def test_block_closed():
+    handler = BlockingHandler()
+    bus = EventBus(partitions=1, max_queue_size=1, dispatcher=handler)
+    bus.start()
+
+    bus.publish(make_event('a', 0))
+    handler.started.wait(timeout)
+    bus.publish(make_event('a', 1))
+
+    def close_later() -> None:
+        bus.close(drain=False, timeout=0)
+
+    timer = threading.Timer(0.05, close_later)
+    timer.start()
+
+    with pytest.raises(BusClosedError):
+        bus.publish(make_event('a', 2))
+
+    timer.join()
+    handler.release.set()
+    bus.close()
+
+    (stats,) = bus.stats()
+    assert stats.dropped == 1
+    assert stats.processed == 1
+
+
+def test_publish_closed():
+    bus = EventBus(partitions=1)
+    bus.close()
+
+    with pytest.raises(BusClosedError):
+        bus.publish(make_event('a'))
+
+
+def test_handler_errors():
+    on_error = Mock()
+    error = RuntimeError('boom')
+    dispatcher = Mock(side_effect=[error, None])
+
+    with EventBus(partitions=1, dispatcher=dispatcher, on_error=on_error) as bus:
+        first = make_event('a', 0)
+        bus.publish(first)
+        bus.publish(make_event('a', 1))
+
+    on_error.assert_called_once_with(first, error)
+
+    (stats,) = bus.stats()
+    assert stats.errors == 1
+    assert stats.processed == 2
+
+
+def test_default_error_logging(caplog):
+    dispatcher = Mock(side_effect=RuntimeError('boom'))
+
+    with EventBus(partitions=1, dispatcher=dispatcher) as bus:
+        bus.publish(make_event('a'))
+
+    assert 'Error dispatching event a-0' in caplog.text
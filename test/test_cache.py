@@ -0,0 +1,52 @@
+import threading
+
+import pytest
+from outcome.eventkit.cache import BoundedCache
+
+
+def test_evicts_oldest():
+    cache = BoundedCache(2)
+
+    cache.add('a', 1)
+    cache.add('b', 2)
+    cache.add('c', 3)
+
+    assert list(cache) == ['b', 'c']
+    assert cache.get('a') is None
+    assert cache['c'] == 3
+
+
+def test_add_keeps_existing_value():
+    cache = BoundedCache(2)
+
+    assert cache.add('a', 1) == 1
+    assert cache.add('a', 2) == 1
+    assert len(cache) == 1
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        BoundedCache(0)
+
+
+def test_concurrent_eviction():
+    cache = BoundedCache(1)
+    cache.add('first', 1)
+    evicting = threading.Event()
+
+    class EvictingDict(dict):  # noqa: WPS600
+        def __delitem__(self, key):
+            # Another thread adds an entry while this one is evicting
+            if not evicting.is_set():
+                evicting.set()
+                other.start()
+                other.join(0.05)
+            super().__delitem__(key)
+
+    other = threading.Thread(target=cache.add, args=('other', 2))
+    cache._entries = EvictingDict(cache._entries)  # noqa: WPS437
+
+    cache.add('second', 3)
+    other.join()
+
+    assert list(cache) == ['other']
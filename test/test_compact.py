@@ -0,0 +1,128 @@
+import pickle  # noqa: S403
+import tracemalloc
+
+import pendulum
+import pytest
+from outcome.eventkit.compact import CompactCloudEvent, CompactCloudEventData
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.protocol_bindings import http
+
+
+@pytest.fixture
+def event():
+    return CloudEvent(
+        id='0870f425-c26f-44af-a0e0-be469e9aa305',
+        type='co.outcome.type',
+        source='test',
+        subject='subject',
+        time=pendulum.datetime(year=2020, month=11, day=5),  # noqa: WPS432
+        data=CloudEventData(data_content_type='application/json', data={'hello': 'world'}, data_schema='schema'),
+    )
+
+
+@pytest.fixture
+def compact_event(event):
+    return CompactCloudEvent.from_event(event)
+
+
+def test_round_trip(event, compact_event):
+    assert compact_event.to_event() == event
+
+
+def test_round_trip_no_data():
+    event = CloudEvent(type='co.outcome.type', source='test', time=None)
+    compact_event = CompactCloudEvent.from_event(event)
+
+    assert compact_event.data is None
+    assert compact_event.data_content_type is None
+    assert compact_event.data_schema is None
+    assert compact_event.to_event() == event
+
+
+def test_attributes(event, compact_event):
+    assert list(compact_event.attributes.items()) == list(event.attributes.items())
+    assert compact_event.data_content_type == event.data_content_type
+    assert compact_event.data_schema == event.data_schema
+
+
+def test_immutable(compact_event):
+    with pytest.raises(AttributeError):
+        compact_event.type = 'other'
+
+    with pytest.raises(AttributeError):
+        del compact_event.data.data  # noqa: WPS420
+
+
+def test_slots(compact_event):
+    assert not hasattr(compact_event, '__dict__')
+    assert not hasattr(compact_event.data, '__dict__')
+
+
+def test_equality(compact_event):
+    assert compact_event == CompactCloudEvent.from_event(compact_event.to_event())
+    assert compact_event != compact_event.data
+    assert 'CompactCloudEvent(id=' in repr(compact_event)
+
+
+def test_pickle(compact_event):
+    assert pickle.loads(pickle.dumps(compact_event)) == compact_event  # noqa: S301
+
+
+def test_encoded_data():
+    assert CompactCloudEventData().encoded_data is None
+    assert CompactCloudEventData(data={'a': 1}, data_content_type='application/json').encoded_data == '{"a": 1}'
+
+    with pytest.raises(ValueError):
+        CompactCloudEventData(data='data').encoded_data  # noqa: WPS428
+
+
+def test_json_format(event, compact_event):
+    assert JSONCloudEventFormat.encode(compact_event) == JSONCloudEventFormat.encode(event)
+
+
+def test_binary_http_binding(event, compact_event):
+    http_event = http.BinaryHTTPBinding.to_http(compact_event)
+    expected = http.BinaryHTTPBinding.to_http(event)
+
+    assert http_event.headers == expected.headers
+    assert http_event.body == expected.body
+
+
+def test_structured_http_binding(event, compact_event):
+    http_event = http.StructuredHTTPBinding.to_http(compact_event, JSONCloudEventFormat, include_attributes_in_headers=True)
+    expected = http.StructuredHTTPBinding.to_http(event, JSONCloudEventFormat, include_attributes_in_headers=True)
+
+    assert http_event.headers == expected.headers
+    assert http_event.body == expected.body
+
+
+def allocated_per_event(factory, count: int = 1000) -> float:
+    tracemalloc.start()
+    try:
+        events = [factory(index) for index in range(count)]  # noqa: F841
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return allocated / count
+
+
+def test_memory_per_event(event):
+    def make_event(index: int) -> CloudEvent:
+        return CloudEvent(
+            id=event.id,
+            type=event.type,
+            source=event.source,
+            subject=event.subject,
+            time=event.time,
+            data=CloudEventData(data=event.data.data, data_content_type=event.data.data_content_type),
+        )
+
+    events = [make_event(index) for index in range(1000)]  # noqa: WPS432
+
+    pydantic_size = allocated_per_event(make_event)
+    compact_size = allocated_per_event(lambda index: CompactCloudEvent.from_event(events[index]))
+
+    # A compact event takes less than a quarter of the memory
+    assert compact_size * 4 < pydantic_size
@@ -0,0 +1,142 @@
+from unittest.mock import Mock
+
+import pytest
+from outcome.eventkit.dedup import DeduplicationCache, Deduplicator
+from outcome.eventkit.dispatch import HandlerRegistry, register_handler
+from outcome.eventkit.event import CloudEvent
+
+
+class TestDeduplicationCache:
+    def test_add(self):
+        cache = DeduplicationCache()
+
+        assert cache.add(('src', '1'))
+        assert not cache.add(('src', '1'))
+        assert cache.add(('other', '1'))
+
+        assert ('src', '1') in cache
+        assert cache.hits == 1
+        assert cache.misses == 2
+        assert cache.hit_rate == pytest.approx(1 / 3)
+
+    def test_empty_hit_rate(self):
+        assert DeduplicationCache().hit_rate == 0
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            DeduplicationCache(max_size=0)
+
+    def test_evicts_least_recently_seen(self):
+        cache = DeduplicationCache(max_size=2)
+
+        cache.add(('src', '1'))
+        cache.add(('src', '2'))
+        # Seeing the first pair again makes the second one the least recently seen
+        cache.add(('src', '1'))
+        cache.add(('src', '3'))
+
+        assert len(cache) == 2
+        assert ('src', '1') in cache
+        assert ('src', '2') not in cache
+
+    def test_ttl(self, clock):
+        cache = DeduplicationCache(ttl=10, clock=clock)
+
+        cache.add(('src', '1'))
+        clock.now += 5
+        cache.add(('src', '2'))
+
+        clock.now += 6
+        assert ('src', '1') not in cache
+        assert ('src', '2') in cache
+
+        # Adding a pair purges the expired ones
+        clock.now += 5
+        assert cache.add(('src', '2'))
+        assert len(cache) == 1
+
+    def test_hits_refresh_ttl(self, clock):
+        cache = DeduplicationCache(ttl=10, clock=clock)
+
+        cache.add(('src', '1'))
+        clock.now += 8
+        assert not cache.add(('src', '1'))
+        clock.now += 8
+        cache.add(('src', '2'))
+
+        # The hot pair is remembered from the last time it was seen
+        assert ('src', '1') in cache
+        assert list(cache._entries.values()) == [8, 16]  # noqa: WPS437
+
+    def test_no_ttl(self, clock):
+        cache = DeduplicationCache(ttl=None, clock=clock)
+
+        cache.add(('src', '1'))
+        clock.now += 10 ** 9
+
+        assert ('src', '1') in cache
+
+    def test_discard_and_clear(self):
+        cache = DeduplicationCache()
+
+        cache.add(('src', '1'))
+        cache.discard(('src', '1'))
+        cache.discard(('src', '2'))
+
+        assert cache.add(('src', '1'))
+
+        cache.clear()
+        assert not cache
+        assert cache.misses == 0
+
+    def test_persistence(self, tmp_path, clock):
+        path = tmp_path / 'dedup.json'
+
+        cache = DeduplicationCache(ttl=10, clock=clock)
+        cache.add(('src', '1'))
+        clock.now += 5
+        cache.add(('src', '2'))
+        cache.save(path)
+
+        clock.now += 6
+        loaded = DeduplicationCache.load(path, ttl=10, clock=clock)
+
+        assert len(loaded) == 1
+        assert ('src', '2') in loaded
+
+    def test_load_missing_file(self, tmp_path):
+        assert not DeduplicationCache.load(tmp_path / 'missing.json')
+
+
+class TestDeduplicator:
+    def test_drops_duplicates(self):
+        registry = HandlerRegistry()
+        handler = Mock()
+        register_handler('co.outcome.test', handler, registry=registry)
+
+        dedup = Deduplicator(registry=registry)
+        event = CloudEvent(type='co.outcome.test', source='src', id='1')
+
+        assert dedup(event)
+        assert not dedup(event.copy())
+        assert dedup(CloudEvent(type='co.outcome.test', source='src', id='2'))
+
+        assert handler.call_count == 2
+        assert dedup.cache.hits == 1
+
+    def test_failure_forgets_event(self):
+        dispatcher = Mock(side_effect=[RuntimeError('boom'), None])
+        dedup = Deduplicator(dispatcher=dispatcher)
+        event = CloudEvent(type='co.outcome.test', source='src', id='1')
+
+        with pytest.raises(RuntimeError):
+            dedup(event)
+
+        assert dedup(event)
+        assert dispatcher.call_count == 2
+
+    def test_empty_cache(self):
+        cache = DeduplicationCache(max_size=10)
+
+        # An empty cache is falsy, but it's still used
+        assert Deduplicator(cache=cache, dispatcher=Mock()).cache is cache
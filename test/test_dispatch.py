@@ -1,8 +1,18 @@
+import threading
 from unittest.mock import Mock, call
 
 import pytest
 from outcome.eventkit import CloudEvent
-from outcome.eventkit.dispatch import cloud_event_handler_registry, dispatch, handles_events, register_handler
+from outcome.eventkit import dispatch as dispatch_module
+from outcome.eventkit.dispatch import (
+    HandlerRegistry,
+    cloud_event_handler_registry,
+    dispatch,
+    handles_events,
+    has_handlers,
+    register_handler,
+)
+from outcome.eventkit.filters import Exact, Prefix
 
 
 @pytest.fixture(autouse=True)
@@ -46,3 +56,182 @@ def test_handler_decorator():
 
     assert m1.call_count == 2
     assert m1.mock_calls == [call(ev1), call(ev2)]
+
+
+def test_custom_registry():
+    m1 = Mock(spec_set=handler)
+    registry = HandlerRegistry()
+
+    register_handler('co.outcome.test', m1, registry=registry)
+
+    ev = CloudEvent(type='co.outcome.test', source='test')
+
+    dispatch(ev)
+    m1.assert_not_called()
+
+    dispatch(ev, registry=registry)
+    m1.assert_called_once_with(ev)
+
+
+class TestHandlerRegistry:
+    def test_unknown_event_type(self):
+        registry = HandlerRegistry()
+
+        assert registry.handlers('co.outcome.unknown') == ()
+        assert not has_handlers('co.outcome.unknown', registry=registry)
+        assert len(registry) == 0
+
+    def test_unregister(self):
+        registry = HandlerRegistry()
+        m1 = Mock(spec_set=handler)
+        m2 = Mock(spec_set=handler)
+
+        registry.register_many([('co.outcome.test', m1), ('co.outcome.test', m2)])
+        registry.unregister('co.outcome.test', m1)
+
+        assert registry['co.outcome.test'] == (m2,)
+
+        registry.unregister('co.outcome.test', m2)
+
+        assert 'co.outcome.test' not in registry
+
+    def test_unregister_many_is_atomic(self):
+        registry = HandlerRegistry()
+        m1 = Mock(spec_set=handler)
+
+        registry.register('co.outcome.test', m1)
+
+        with pytest.raises(KeyError):
+            registry.unregister_many([('co.outcome.test', m1), ('co.outcome.other', m1)])
+
+        assert registry.handlers('co.outcome.test') == (m1,)
+
+    def test_snapshot_is_immutable(self):
+        registry = HandlerRegistry()
+        m1 = Mock(spec_set=handler)
+
+        registry.register('co.outcome.test', m1)
+        snapshot = registry.snapshot()
+        registry.clear()
+
+        assert snapshot['co.outcome.test'] == (m1,)
+        with pytest.raises(TypeError):
+            snapshot['co.outcome.test'] = ()  # type: ignore
+
+    def test_replace(self):
+        registry = HandlerRegistry()
+        m1 = Mock(spec_set=handler)
+        m2 = Mock(spec_set=handler)
+
+        registry.register('co.outcome.test', m1)
+        registry.replace([('co.outcome.other', m2)])
+
+        assert dict(registry) == {'co.outcome.other': (m2,)}
+
+    def test_replace_keeps_handlers_while_building(self, monkeypatch):
+        registry = HandlerRegistry()
+        m1 = Mock(spec_set=handler)
+        m2 = Mock(spec_set=handler)
+        seen_during_replace = []
+
+        build_routes = dispatch_module._routes
+
+        def observing_routes(subscriptions):
+            seen_during_replace.append(dict(registry))
+            return build_routes(subscriptions)
+
+        registry.register('co.outcome.test', m1)
+        monkeypatch.setattr(dispatch_module, '_routes', observing_routes)
+        registry.replace([('co.outcome.other', m2, Exact(subject='a'))])
+
+        # Readers see the previous handlers until the new ones are published
+        assert seen_during_replace == [{'co.outcome.test': (m1,)}]
+        assert dict(registry) == {'co.outcome.other': (m2,)}
+
+    def test_register_during_dispatch(self):
+        registry = HandlerRegistry()
+        ev = CloudEvent(type='co.outcome.test', source='test')
+        calls = []
+
+        def registering_handler(event: CloudEvent) -> None:
+            calls.append(event)
+            # The new handler isn't called for the event being dispatched
+            registry.register('co.outcome.test', registering_handler)
+
+        registry.register('co.outcome.test', registering_handler)
+        dispatch(ev, registry=registry)
+
+        assert calls == [ev]
+        assert len(registry.handlers('co.outcome.test')) == 2
+
+    def test_concurrent_registration(self):
+        registry = HandlerRegistry()
+        handlers_per_thread = 200
+
+        def register():
+            for _ in range(handlers_per_thread):
+                registry.register('co.outcome.test', Mock(spec_set=handler))
+
+        threads = [threading.Thread(target=register) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(registry.handlers('co.outcome.test')) == 4 * handlers_per_thread
+
+
+class TestFilters:
+    def test_filtered_handlers(self):
+        registry = HandlerRegistry()
+        billing = Mock(spec_set=handler)
+        shipping = Mock(spec_set=handler)
+        unfiltered = Mock(spec_set=handler)
+
+        handles_events('co.outcome.test', registry=registry, filter=Prefix(source='billing/'))(billing)
+        handles_events('co.outcome.test', registry=registry, filter={'prefix': {'source': 'shipping/'}})(shipping)
+        register_handler('co.outcome.test', unfiltered, registry=registry)
+
+        ev = CloudEvent(type='co.outcome.test', source='billing/eu')
+        dispatch(ev, registry=registry)
+
+        billing.assert_called_once_with(ev)
+        shipping.assert_not_called()
+        unfiltered.assert_called_once_with(ev)
+        assert registry.handlers('co.outcome.test') == (billing, shipping, unfiltered)
+
+    def test_shared_evaluation(self):
+        registry = HandlerRegistry()
+        calls = []
+
+        def counting_handler(event: CloudEvent) -> None:
+            calls.append(event)
+
+        handlers = [Mock(spec_set=handler) for _ in range(10)]
+        for index, registered in enumerate(handlers):
+            # Equal, but distinct filter instances
+            registry.register('co.outcome.test', registered, {'exact': {'subject': 'a'}})
+            registry.register('co.outcome.test', counting_handler, Exact(subject=str(index)))
+
+        [(predicate, grouped), *_] = registry._snapshot.routes['co.outcome.test']  # noqa: WPS437
+        assert grouped == tuple(handlers)
+
+        dispatch(CloudEvent(type='co.outcome.test', source='test', subject='a'), registry=registry)
+
+        for registered in handlers:
+            registered.assert_called_once()
+        assert calls == []
+
+    def test_unregister_filtered(self):
+        registry = HandlerRegistry()
+        m1 = Mock(spec_set=handler)
+
+        registry.register('co.outcome.test', m1, Exact(subject='a'))
+
+        with pytest.raises(KeyError):
+            registry.unregister('co.outcome.test', m1)
+
+        registry.unregister('co.outcome.test', m1, {'exact': {'subject': 'a'}})
+
+        assert len(registry) == 0
+        assert registry._snapshot.routes == {}  # noqa: WPS437
@@ -0,0 +1,201 @@
+import pytest
+from outcome.eventkit.compact import CompactCloudEvent
+from outcome.eventkit.eventlog import EventLogReader, EventLogWriter, index_path
+from outcome.eventkit.formats import CloudEventFormat
+
+from test.helpers import events_start, make_events
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return tmp_path / 'events.log'
+
+
+def test_round_trip(log_path):
+    events = make_events(10)
+
+    with EventLogWriter(log_path) as writer:
+        writer.extend(events)
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader) == events
+
+
+def test_append_to_existing_log(log_path):
+    events = make_events(10)
+
+    with EventLogWriter(log_path) as writer:
+        writer.extend(events[:5])
+
+    with EventLogWriter(log_path) as writer:
+        offset = writer.append(events[5])
+        writer.extend(events[6:])
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader) == events
+        assert list(reader.read(offset)) == events[5:]
+
+
+def test_compact_events(log_path):
+    events = make_events(3)
+
+    with EventLogWriter(log_path) as writer:
+        writer.extend(CompactCloudEvent.from_event(e) for e in events)
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader) == events
+
+
+def test_empty_log(log_path):
+    EventLogWriter(log_path).close()
+
+    with EventLogReader(log_path) as reader:
+        assert reader.size == 0
+        assert list(reader) == []
+        assert list(reader.read_from(events_start)) == []
+
+
+def test_incomplete_record(log_path):
+    events = make_events(3)
+
+    with EventLogWriter(log_path) as writer:
+        writer.extend(events)
+
+    with open(log_path, 'ab') as log_file:
+        log_file.write(b'{"id": "incompl')
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader) == events
+
+
+def test_append_after_incomplete_record(log_path, monkeypatch):
+    events = make_events(6)
+
+    with EventLogWriter(log_path, index_interval=1) as writer:
+        writer.extend(events[:3])
+
+    with open(log_path, 'ab') as log_file:
+        log_file.write(b'{"id": "incompl')
+    with open(index_path(log_path), 'a') as index_file:
+        index_file.write(f'{events_start.add(seconds=99).timestamp()!r} {log_path.stat().st_size - 5}\n')
+
+    # The log is scanned backwards in chunks
+    monkeypatch.setattr('outcome.eventkit.eventlog._repair_chunk_size', 16)
+    with EventLogWriter(log_path, index_interval=1) as writer:
+        writer.extend(events[3:])
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader) == events
+        assert list(reader.read_from(events_start.add(seconds=4))) == events[4:]
+        assert len(reader._index_offsets) == 6  # noqa: WPS437
+
+
+def test_append_after_incomplete_only_record(log_path):
+    log_path.write_bytes(b'{"id": "incompl')
+
+    with EventLogWriter(log_path) as writer:
+        writer.extend(make_events(1))
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader) == make_events(1)
+
+
+class SingleLineFormat(CloudEventFormat):
+    @classmethod
+    def encode(cls, event):
+        return 'multi\nline'
+
+
+def test_line_breaks_rejected(log_path):
+    with EventLogWriter(log_path, event_format=SingleLineFormat) as writer:
+        with pytest.raises(ValueError):
+            writer.append(make_events(1)[0])
+
+
+def test_index(log_path):
+    events = make_events(100)  # noqa: WPS432
+
+    with EventLogWriter(log_path, index_interval=10) as writer:
+        writer.extend(events)
+
+    index_lines = index_path(log_path).read_text().splitlines()
+    assert len(index_lines) == 10
+
+
+@pytest.mark.parametrize('seconds,first_id', [(-10, 0), (0, 0), (15, 15), (20, 20), (99, 99)])
+def test_read_from(log_path, seconds, first_id):
+    events = make_events(100)  # noqa: WPS432
+
+    with EventLogWriter(log_path, index_interval=10) as writer:
+        writer.extend(events)
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader.read_from(events_start.add(seconds=seconds))) == events[first_id:]
+
+
+def test_read_from_after_end(log_path):
+    with EventLogWriter(log_path, index_interval=10) as writer:
+        writer.extend(make_events(20))
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader.read_from(events_start.add(days=1))) == []
+
+
+def test_index_skips_events_without_time(log_path):
+    events = make_events(3)
+    events[0].time = None
+
+    with EventLogWriter(log_path, index_interval=1) as writer:
+        writer.extend(events)
+
+    assert len(index_path(log_path).read_text().splitlines()) == 2
+
+
+def test_damaged_index(log_path):
+    events = make_events(20)
+
+    with EventLogWriter(log_path, index_interval=5) as writer:
+        writer.extend(events)
+
+    with open(index_path(log_path), 'a') as index_file:
+        index_file.write(f'{events_start.add(seconds=30).timestamp()!r} 100000000\n')
+        index_file.write('12')
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader.read_from(events_start.add(seconds=12))) == events[12:]
+
+
+def test_missing_index(log_path):
+    events = make_events(20)
+
+    with EventLogWriter(log_path, index_interval=5) as writer:
+        writer.extend(events)
+
+    index_path(log_path).unlink()
+
+    with EventLogReader(log_path) as reader:
+        assert list(reader.read_from(events_start.add(seconds=12))) == events[12:]
+
+
+@pytest.mark.parametrize('chunks', [1, 3, 7, 100])
+def test_split(log_path, chunks):
+    events = make_events(20)
+
+    with EventLogWriter(log_path) as writer:
+        writer.extend(events)
+
+    with EventLogReader(log_path) as reader:
+        ranges = reader.split(chunks)
+
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == reader.size
+        assert len(ranges) <= max(chunks, 20)
+        assert [event for start, end in ranges for event in reader.read_range(start, end)] == events
+
+
+def test_split_invalid(log_path):
+    EventLogWriter(log_path).close()
+
+    with EventLogReader(log_path) as reader:
+        with pytest.raises(ValueError):
+            reader.split(0)
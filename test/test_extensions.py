@@ -0,0 +1,227 @@
+import datetime
+
+import pendulum
+import pytest
+from outcome.eventkit.compact import CompactCloudEvent
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.extensions import (
+    ExtensionError,
+    ExtensionRegistry,
+    extension_types,
+    split_attributes,
+    to_json,
+    to_string,
+    validate_any,
+    validate_binary,
+    validate_boolean,
+    validate_integer,
+    validate_timestamp,
+)
+from outcome.eventkit.filters import Exact, compile_filter
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.protocol_bindings.http import BinaryHTTPBinding, from_http
+from outcome.eventkit.protocol_bindings.kafka import BinaryKafkaBinding, from_kafka, partition_key
+
+_time = pendulum.datetime(2021, 1, 1, 12, 30)
+
+
+@pytest.fixture
+def typed_extensions():
+    extension_types.register('retries', validate_integer)
+    extension_types.register('replayed', validate_boolean)
+    extension_types.register('expires', validate_timestamp)
+    extension_types.register('signature', validate_binary)
+    yield
+    for name in ('retries', 'replayed', 'expires', 'signature'):
+        extension_types.unregister(name)
+
+
+def make_event(**extensions) -> CloudEvent:
+    data = CloudEventData(data={'amount': 10}, data_content_type='application/json')
+    return CloudEvent(id='1', source='billing', type='co.outcome.invoice.created', time=_time, data=data, extensions=extensions)
+
+
+class TestValidators:
+    @pytest.mark.parametrize('extension_value, expected', [(3, 3), ('-3', -3)])
+    def test_integer(self, extension_value, expected):
+        assert validate_integer(extension_value) == expected
+
+    @pytest.mark.parametrize('extension_value', [True, 1.5, 'one', 2 ** 31])
+    def test_invalid_integer(self, extension_value):
+        with pytest.raises(ExtensionError):
+            validate_integer(extension_value)
+
+    @pytest.mark.parametrize('extension_value, expected', [(True, True), ('true', True), ('false', False)])
+    def test_boolean(self, extension_value, expected):
+        assert validate_boolean(extension_value) is expected
+
+    def test_invalid_boolean(self):
+        with pytest.raises(ExtensionError):
+            validate_boolean('True')
+
+    def test_timestamp(self):
+        assert validate_timestamp('2021-01-01T12:30:00+00:00') == _time
+
+    def test_binary(self):
+        assert validate_binary('AAE=') == b'\x00\x01'
+
+    def test_any(self):
+        with pytest.raises(ExtensionError):
+            validate_any(1.5)
+
+
+class TestRepresentations:
+    @pytest.mark.parametrize(
+        'extension_value, expected',
+        [
+            ('value', 'value'),
+            (True, 'true'),
+            (False, 'false'),
+            (3, '3'),
+            (b'\x00\x01', 'AAE='),
+            (_time, '2021-01-01T12:30:00+00:00'),
+        ],
+    )
+    def test_to_string(self, extension_value, expected):
+        assert to_string(extension_value) == expected
+
+    @pytest.mark.parametrize('extension_value, expected', [(True, True), (3, 3), (b'\x00\x01', 'AAE=')])
+    def test_to_json(self, extension_value, expected):
+        assert to_json(extension_value) == expected
+
+
+class TestRegistry:
+    def test_validate(self):
+        registry = ExtensionRegistry()
+        registry.register('retries', validate_integer)
+
+        assert registry.validate({'retries': '3', 'other': 'value'}) == {'retries': 3, 'other': 'value'}
+
+    def test_no_extensions(self):
+        assert ExtensionRegistry().validate({}) is None
+
+    @pytest.mark.parametrize('name', ['Upper', 'with-dash', 'a' * 21, 'subject', 'data'])
+    def test_invalid_names(self, name):
+        with pytest.raises(ExtensionError):
+            ExtensionRegistry().validate({name: 'value'})
+
+        with pytest.raises(ExtensionError):
+            ExtensionRegistry().register(name, validate_any)
+
+    def test_split_attributes(self):
+        attributes, extensions = split_attributes({'id': '1', 'traceparent': 'trace'})
+
+        assert attributes == {'id': '1'}
+        assert extensions == {'traceparent': 'trace'}
+
+    def test_split_attributes_without_extensions(self):
+        assert split_attributes({'id': '1'}) == ({'id': '1'}, None)
+
+
+class TestEvent:
+    def test_no_extensions(self):
+        event = make_event()
+
+        assert event._extensions is None
+        assert not event.extensions
+        assert 'traceparent' not in event.attributes
+
+    def test_extensions(self):
+        event = make_event(traceparent='trace')
+
+        assert event.extensions == {'traceparent': 'trace'}
+        assert event.attributes['traceparent'] == 'trace'
+        # Extensions aren't fields of the model
+        assert 'traceparent' not in event.dict()
+
+    def test_validated(self, typed_extensions):
+        assert make_event(retries='3').extensions['retries'] == 3
+
+        with pytest.raises(ExtensionError):
+            make_event(retries='three')
+
+    def test_equality(self):
+        assert make_event(traceparent='trace') == make_event(traceparent='trace')
+        assert make_event(traceparent='trace') != make_event(traceparent='other')
+        assert make_event(traceparent='trace') != make_event()
+
+    def test_from_attributes(self):
+        event = CloudEvent.from_attributes({'id': '1', 'source': 'billing', 'type': 'co.outcome.test', 'partitionkey': 'key'})
+
+        assert event.extensions == {'partitionkey': 'key'}
+
+    def test_compact(self):
+        event = make_event(traceparent='trace')
+        compact_event = CompactCloudEvent.from_event(event)
+
+        assert compact_event.extensions == {'traceparent': 'trace'}
+        assert compact_event.attributes == event.attributes
+        assert compact_event.to_event() == event
+
+    def test_compact_no_extensions(self):
+        assert not CompactCloudEvent.from_event(make_event()).extensions
+
+
+class TestBindings:
+    def test_http_headers(self, typed_extensions):
+        event = make_event(traceparent='trace', retries=3, replayed=True, expires=_time)
+
+        headers = BinaryHTTPBinding.to_http(event).headers
+
+        assert headers['ce-traceparent'] == 'trace'
+        assert headers['ce-retries'] == '3'
+        assert headers['ce-replayed'] == 'true'
+        assert headers['ce-expires'] == '2021-01-01T12:30:00+00:00'
+
+    def test_http_round_trip(self, typed_extensions):
+        event = make_event(traceparent='trace', retries=3, replayed=False, signature=b'\x00\x01')
+
+        assert from_http(BinaryHTTPBinding.to_http(event)) == event
+
+    def test_http_peek(self):
+        lazy_event = BinaryHTTPBinding.peek(BinaryHTTPBinding.to_http(make_event(traceparent='trace')))
+
+        assert lazy_event.extensions == {'traceparent': 'trace'}
+        assert lazy_event.to_event().extensions == {'traceparent': 'trace'}
+
+    def test_kafka_round_trip(self, typed_extensions):
+        event = make_event(partitionkey='customer-1', retries=3, expires=_time)
+        message = BinaryKafkaBinding.to_kafka(event, key_mapper=partition_key)
+
+        assert message.key == b'customer-1'
+        assert (b'ce_retries', b'3') in [(name.encode('utf-8'), header) for name, header in message.headers]
+        assert from_kafka(message) == event
+
+    def test_json(self, typed_extensions):
+        event = make_event(traceparent='trace', retries=3, replayed=True, expires=_time)
+
+        encoded = JSONCloudEventFormat.encode(event)
+
+        assert '"traceparent": "trace", "retries": 3, "replayed": true, "expires": "2021-01-01T12:30:00+00:00"' in encoded
+        assert encoded == JSONCloudEventFormat.encode_attributes(event)
+        assert JSONCloudEventFormat.decode(encoded) == event
+
+    def test_json_compact(self, typed_extensions):
+        event = CompactCloudEvent.from_event(make_event(signature=b'\x00\x01'))
+
+        assert JSONCloudEventFormat.encode(event) == JSONCloudEventFormat.encode_attributes(event)
+
+
+def test_filter():
+    predicate = compile_filter(Exact(partitionkey='customer-1'))
+
+    assert predicate(make_event(partitionkey='customer-1'))
+    assert predicate(CompactCloudEvent.from_event(make_event(partitionkey='customer-1')))
+    assert not predicate(make_event(partitionkey='customer-2'))
+    assert not predicate(make_event())
+
+
+def test_naive_timestamp():
+    extension_types.register('expires', validate_timestamp)
+    try:
+        event = make_event(expires=datetime.datetime(2021, 1, 1, 12, 30))
+    finally:
+        extension_types.unregister('expires')
+
+    assert event.extensions['expires'] == _time
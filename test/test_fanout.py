@@ -0,0 +1,247 @@
+from typing import List
+from unittest.mock import Mock, PropertyMock, patch
+
+import pytest
+from outcome.eventkit.compact import CompactCloudEvent
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.eventlog import EventLogReader, EventLogWriter
+from outcome.eventkit.fanout import (
+    FanoutPublisher,
+    PreparedEvent,
+    PublishError,
+    binary_http_sink,
+    event_log_sink,
+    kafka_sink,
+    structured_http_sink,
+)
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.protocol_bindings.http import BinaryHTTPBinding, HTTPEvent, StructuredHTTPBinding, from_http
+from outcome.eventkit.protocol_bindings.kafka import BinaryKafkaBinding, StructuredKafkaBinding, from_kafka
+from outcome.eventkit.protocol_bindings.local_broker import LocalBroker
+
+
+@pytest.fixture
+def event() -> CloudEvent:
+    return CloudEvent(
+        id='1',
+        source='test',
+        type='co.outcome.test',
+        subject='invoice',
+        time='2021-01-01T00:00:00Z',
+        data=CloudEventData(data={'amount': 10}, data_content_type='application/json'),
+    )
+
+
+@pytest.fixture
+def encoded_data_event() -> CloudEvent:
+    # The data is encoded separately from the envelope, since the content type has parameters
+    return CloudEvent(
+        id='2',
+        source='test',
+        type='co.outcome.test',
+        data=CloudEventData(data={'amount': 10}, data_content_type='application/json;charset=utf-8', data_schema='schema'),
+    )
+
+
+class TestPreparedEvent:
+    def test_attributes(self, event: CloudEvent):
+        prepared = PreparedEvent(event)
+
+        assert prepared.attributes == event.attributes
+        assert prepared.id == event.id
+        assert prepared.type == event.type
+        assert prepared.subject == event.subject
+        assert prepared.time == event.time
+        assert prepared.data_content_type == event.data_content_type
+
+    def test_attributes_are_copied(self, event: CloudEvent):
+        prepared = PreparedEvent(event)
+
+        prepared.attributes['id'] = 'modified'
+
+        assert prepared.attributes['id'] == '1'
+
+    def test_attributes_computed_once(self, event: CloudEvent):
+        compact = CompactCloudEvent.from_event(event)
+        with patch.object(CompactCloudEvent, 'attributes', new_callable=PropertyMock, return_value=compact.attributes) as attributes:
+            prepared = PreparedEvent(compact)
+            prepared.attributes  # noqa: WPS428
+            prepared.attributes  # noqa: WPS428
+
+        assert attributes.call_count == 1
+
+    def test_encoded_data_computed_once(self, encoded_data_event: CloudEvent):
+        prepared = PreparedEvent(encoded_data_event)
+
+        with patch.object(CloudEventData, 'get_coder', wraps=CloudEventData.get_coder) as get_coder:
+            first = prepared.data.encoded_data
+            second = prepared.data.encoded_data
+
+        assert first == second == encoded_data_event.data.encoded_data
+        assert get_coder.call_count == 1
+
+    def test_no_data(self):
+        prepared = PreparedEvent(CloudEvent(id='1', source='test', type='co.outcome.test'))
+
+        assert prepared.data is None
+        assert prepared.data_content_type is None
+        assert prepared.data_schema is None
+
+    def test_encoded_once_per_format(self, event: CloudEvent):
+        prepared = PreparedEvent(event)
+
+        with patch.object(JSONCloudEventFormat, 'encode', wraps=JSONCloudEventFormat.encode) as encode:
+            first = prepared.encoded(JSONCloudEventFormat)
+            second = prepared.encoded(JSONCloudEventFormat)
+
+        assert first is second
+        assert encode.call_count == 1
+
+    @pytest.mark.parametrize('event_fixture', ['event', 'encoded_data_event'])
+    def test_encoding_is_identical(self, event_fixture: str, request):
+        source_event = request.getfixturevalue(event_fixture)
+
+        assert PreparedEvent(source_event).encoded(JSONCloudEventFormat) == JSONCloudEventFormat.encode(source_event)
+
+    @pytest.mark.parametrize('event_fixture', ['event', 'encoded_data_event'])
+    def test_bindings_are_identical(self, event_fixture: str, request):
+        source_event = request.getfixturevalue(event_fixture)
+        prepared = PreparedEvent(source_event)
+
+        binary = BinaryHTTPBinding.to_http(prepared)
+        expected = BinaryHTTPBinding.to_http(source_event)
+
+        assert binary.body == expected.body
+        assert dict(binary.headers) == dict(expected.headers)
+        assert BinaryKafkaBinding.to_kafka(prepared) == BinaryKafkaBinding.to_kafka(source_event)
+
+    def test_artifact(self, event: CloudEvent):
+        prepared = PreparedEvent(event)
+        factory = Mock(return_value='artifact')
+
+        assert prepared.artifact('key', factory) == 'artifact'
+        assert prepared.artifact('key', factory) == 'artifact'
+        factory.assert_called_once_with(prepared)
+
+
+class TestSinks:
+    def test_binary_http(self, event: CloudEvent):
+        sent: List[HTTPEvent] = []
+        sink = binary_http_sink(sent.append)
+
+        sink(PreparedEvent(event))
+
+        assert from_http(sent[0]) == event
+
+    def test_binary_http_copies_headers(self, event: CloudEvent):
+        sent: List[HTTPEvent] = []
+        sink = binary_http_sink(sent.append)
+        prepared = PreparedEvent(event)
+
+        sink(prepared)
+        sent[0].headers['Authorization'] = 'secret'
+        sink(prepared)
+
+        assert 'Authorization' not in sent[1].headers
+
+    def test_structured_http(self, event: CloudEvent):
+        sent: List[HTTPEvent] = []
+        sink = structured_http_sink(sent.append, JSONCloudEventFormat)
+
+        sink(PreparedEvent(event))
+
+        expected = StructuredHTTPBinding.to_http(event, JSONCloudEventFormat)
+        assert sent[0].body == expected.body
+        assert dict(sent[0].headers) == dict(expected.headers)
+
+    def test_structured_http_compressed(self, event: CloudEvent):
+        sent: List[HTTPEvent] = []
+        sink = structured_http_sink(sent.append, JSONCloudEventFormat, content_encoding='gzip', compression_threshold=0)
+
+        sink(PreparedEvent(event))
+
+        assert sent[0].headers['Content-Encoding'] == 'gzip'
+        assert from_http(sent[0]) == event
+
+    def test_kafka_binary(self, event: CloudEvent):
+        broker = LocalBroker()
+        sink = kafka_sink(broker.produce, 'events')
+
+        sink(PreparedEvent(event))
+
+        [message] = broker.consume('events', 0, 0)
+        assert message == BinaryKafkaBinding.to_kafka(event)
+        assert from_kafka(message) == event
+
+    def test_kafka_structured(self, event: CloudEvent):
+        broker = LocalBroker()
+        sink = kafka_sink(broker.produce, 'events', JSONCloudEventFormat)
+
+        sink(PreparedEvent(event))
+
+        [message] = broker.consume('events', 0, 0)
+        assert message == StructuredKafkaBinding.to_kafka(event, JSONCloudEventFormat)
+        assert from_kafka(message) == event
+
+    def test_event_log(self, event: CloudEvent, tmp_path):
+        path = tmp_path / 'events.log'
+        with EventLogWriter(path, index_interval=1) as writer:
+            sink = event_log_sink(writer)
+            sink(PreparedEvent(event))
+
+        with EventLogReader(path) as reader:
+            assert list(reader) == [event]
+            assert list(reader.read_from(event.time)) == [event]
+
+
+class TestFanoutPublisher:
+    def test_encodes_once(self, event: CloudEvent, tmp_path):
+        broker = LocalBroker()
+        sent: List[HTTPEvent] = []
+
+        with EventLogWriter(tmp_path / 'events.log') as writer:
+            publisher = FanoutPublisher(
+                [
+                    structured_http_sink(sent.append, JSONCloudEventFormat),
+                    event_log_sink(writer),
+                    kafka_sink(broker.produce, 'events', JSONCloudEventFormat),
+                ],
+            )
+
+            with patch.object(JSONCloudEventFormat, 'encode', wraps=JSONCloudEventFormat.encode) as encode:
+                publisher.publish(event)
+
+        assert encode.call_count == 1
+        assert len(sent) == 1
+        assert broker.end_offsets('events') == [1]
+
+    def test_publish_many(self, event: CloudEvent):
+        sink = Mock()
+        publisher = FanoutPublisher()
+        publisher.add_sink(sink)
+
+        publisher.publish_many([event, event])
+
+        assert sink.call_count == 2
+
+    def test_prepared_events_are_reused(self, event: CloudEvent):
+        sink = Mock()
+        prepared = PreparedEvent(event)
+
+        FanoutPublisher([sink]).publish(prepared)
+
+        sink.assert_called_once_with(prepared)
+
+    def test_errors(self, event: CloudEvent):
+        error = ConnectionError('Unavailable')
+        failing = Mock(side_effect=error)
+        succeeding = Mock()
+        publisher = FanoutPublisher([failing, succeeding])
+
+        with pytest.raises(PublishError) as exc_info:
+            publisher.publish(event)
+
+        assert exc_info.value.event is event
+        assert exc_info.value.errors == [(failing, error)]
+        succeeding.assert_called_once()
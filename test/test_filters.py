@@ -0,0 +1,77 @@
+import pendulum
+import pytest
+from outcome.eventkit.compact import CompactCloudEvent
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.filters import AllOf, AnyOf, Exact, Not, Prefix, Suffix, as_filter, compile_filter
+
+
+@pytest.fixture(params=['event', 'compact'])
+def event(request):
+    event = CloudEvent(
+        type='co.outcome.invoice.created',
+        source='billing/eu',
+        subject='invoices/1.pdf',
+        time=pendulum.datetime(2021, 1, 1),
+        data=CloudEventData(data_content_type='application/json', data={}),
+    )
+    if request.param == 'compact':
+        return CompactCloudEvent.from_event(event)
+    return event
+
+
+@pytest.mark.parametrize(
+    'event_filter,expected',
+    [
+        (Exact(source='billing/eu'), True),
+        (Exact(source='billing'), False),
+        (Exact(source='billing/eu', type='co.outcome.other'), False),
+        (Prefix(type='co.outcome.invoice.'), True),
+        (Prefix(source='shipping'), False),
+        (Suffix(subject='.pdf'), True),
+        (Suffix(subject='.png'), False),
+        (Exact(time='2021-01-01T00:00:00+00:00'), True),
+        (Exact(datacontenttype='application/json;charset=utf-8'), True),
+        (Exact(specversion='1.0'), True),
+        # Missing attributes never match
+        (Prefix(dataschema=''), False),
+        (Exact(unknownextension='value'), False),
+        (AllOf(Prefix(source='billing'), Suffix(subject='.pdf')), True),
+        (AllOf(Prefix(source='billing'), Suffix(subject='.png')), False),
+        (AnyOf(Prefix(source='shipping'), Suffix(subject='.pdf')), True),
+        (AnyOf(Prefix(source='shipping'), Suffix(subject='.png')), False),
+        (Not(Prefix(source='shipping')), True),
+        (Not(AnyOf(Exact(source='billing/eu'))), False),
+    ],
+)
+def test_filters(event, event_filter, expected):
+    assert compile_filter(event_filter)(event) is expected
+
+
+def test_dialects(event):
+    event_filter = as_filter({
+        'all': [
+            {'prefix': {'type': 'co.outcome.'}},
+            {'not': {'exact': {'source': 'shipping'}}},
+            {'any': [{'suffix': {'subject': '.pdf'}}, {'suffix': {'subject': '.png'}}]},
+        ],
+    })
+
+    assert event_filter == AllOf(
+        Prefix(type='co.outcome.'), Not(Exact(source='shipping')), AnyOf(Suffix(subject='.pdf'), Suffix(subject='.png')),
+    )
+    assert compile_filter(event_filter)(event)
+
+
+@pytest.mark.parametrize(
+    'filter_dict', [{}, {'exact': {'a': 'b'}, 'prefix': {'a': 'b'}}, {'unknown': {}}, {'exact': {}}, {'exact': {'a': 1}}, {'all': []}],
+)
+def test_invalid_filters(filter_dict):
+    with pytest.raises(ValueError):
+        as_filter(filter_dict)
+
+
+def test_equal_filters_share_predicate():
+    assert Exact(source='a', type='b') == Exact(type='b', source='a')
+    assert Exact(source='a') != Prefix(source='a')
+    assert compile_filter(Exact(source='a')) is compile_filter({'exact': {'source': 'a'}})
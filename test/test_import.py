@@ -0,0 +1,88 @@
+import os
+import subprocess  # noqa: S404
+import sys
+from typing import Dict, Set, Tuple
+
+import pytest
+
+# Modules that are expensive to import, and shouldn't be imported until they're needed
+heavy_modules = ['pydantic', 'pendulum', 'lark', 'requests', 'outcome.utils']
+# Modules that are only imported on the first lookup of a coder, format or MIME type
+lazy_modules = ['outcome.eventkit.data.json', 'outcome.eventkit.formats.json', 'outcome.eventkit.mime.parser']
+
+
+def run_import_timed(statement: str) -> Tuple[Dict[str, int], Set[str]]:
+    """Run the statement in a fresh interpreter with `-X importtime`.
+
+    Args:
+        statement (str): The python statement.
+
+    Returns:
+        Tuple[Dict[str, int], Set[str]]: The cumulative import time (in us) of each module imported
+            with an `import` statement, and the names of all the modules loaded once the statement has run.
+    """
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    statement = f"{statement}; import sys; print('\\n'.join(sys.modules))"
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, '-X', 'importtime', '-c', statement], env=env, capture_output=True, text=True, check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line.split('|')
+        times[module.strip()] = int(cumulative)
+
+    return times, set(result.stdout.splitlines())
+
+
+def run_import(statement: str) -> Set[str]:
+    return run_import_timed(statement)[1]
+
+
+def test_import_package():
+    modules = run_import('import outcome.eventkit')
+
+    assert 'outcome.eventkit' in modules
+    for module in heavy_modules + lazy_modules:
+        assert module not in modules
+
+
+def test_import_time():
+    # Compared with a heavy module imported in the same interpreter, so the check doesn't depend on the speed of the machine
+    times, _ = run_import_timed('import outcome.eventkit; import pydantic')
+
+    assert times['outcome.eventkit'] < times['pydantic'] / 4
+
+
+def test_import_data_does_not_load_parser():
+    modules = run_import('import outcome.eventkit.data, outcome.eventkit.formats')
+
+    assert 'lark' not in modules
+    assert 'outcome.eventkit.formats.json' not in modules
+
+
+@pytest.mark.parametrize('module', ['outcome.eventkit.data.json', 'lark'])
+def test_lookup_loads_registered_coders(module):
+    modules = run_import("from outcome.eventkit.data import CloudEventData; CloudEventData.get_coder('application/json')")
+
+    assert module in modules
+
+
+def test_lazy_attributes():
+    import outcome.eventkit  # noqa: WPS433
+    from outcome.eventkit.event import CloudEvent  # noqa: WPS433
+
+    assert outcome.eventkit.CloudEvent is CloudEvent
+    assert 'dispatch' in dir(outcome.eventkit)
+
+    with pytest.raises(AttributeError):
+        outcome.eventkit.unknown  # noqa: WPS428
+
+
+def test_import_http_binding():
+    modules = run_import('import outcome.eventkit.protocol_bindings.http')
+
+    assert 'requests' not in modules
+    assert 'urllib3' not in modules
@@ -0,0 +1,113 @@
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.interning import InternPool
+from outcome.eventkit.protocol_bindings.http import BinaryHTTPBinding, HTTPEvent, from_http
+from outcome.eventkit.protocol_bindings.kafka import BinaryKafkaBinding, KafkaMessage, from_kafka
+
+
+def fresh(value: str) -> str:
+    # An equal string that isn't the same object
+    return value.encode('utf-8').decode('utf-8')
+
+
+def make_event(event_id: str) -> CloudEvent:
+    return CloudEvent(
+        id=event_id,
+        source='//billing.outcome.co',
+        type='co.outcome.invoice.created',
+        data=CloudEventData(data={'amount': 10}, data_content_type='application/json', data_schema='invoice.json'),
+    )
+
+
+class TestInternPool:
+    def test_intern(self):
+        pool = InternPool()
+        first = fresh('co.outcome.test')
+        second = fresh('co.outcome.test')
+
+        assert first is not second
+        assert pool.intern(first) is first
+        assert pool.intern(second) is first
+        assert len(pool) == 1
+
+    def test_bounded(self):
+        pool = InternPool(max_size=3)
+
+        for index in range(10):
+            pool.intern(f'value{index}')
+
+        assert len(pool) <= 3
+
+    def test_clear(self):
+        pool = InternPool()
+        pool.intern('value')
+
+        pool.clear()
+
+        assert not pool
+
+    def test_intern_attributes(self):
+        pool = InternPool()
+        source = fresh('source')
+        pool.intern(source)
+        attributes = {'source': fresh('source'), 'id': fresh('id'), 'specversion': 1}
+
+        pool.intern_attributes(attributes)
+
+        assert attributes['source'] is source
+        # Only the low-cardinality string attributes are interned
+        assert len(pool) == 1
+        assert attributes['specversion'] == 1
+
+
+class TestDecoders:
+    def test_json(self):
+        first, second = (JSONCloudEventFormat.decode(JSONCloudEventFormat.encode(make_event(event_id))) for event_id in 'ab')
+
+        assert first.source is second.source
+        assert first.type is second.type
+        assert first.data.data_schema is second.data.data_schema
+        assert first.id is not second.id
+
+    def test_json_peek(self):
+        first, second = (JSONCloudEventFormat.peek(JSONCloudEventFormat.encode(make_event(event_id))) for event_id in 'ab')
+
+        assert first.source is second.source
+        assert first.type is second.type
+
+    def test_binary_http(self):
+        def wire_message(event: CloudEvent) -> HTTPEvent:
+            http_event = BinaryHTTPBinding.to_http(event)
+            return HTTPEvent(http_event.body, {name: fresh(header) for name, header in http_event.headers.items()})
+
+        first, second = (from_http(wire_message(make_event(event_id))) for event_id in 'ab')
+
+        assert first.source is second.source
+        assert first.type is second.type
+        assert first.data.data_schema is second.data.data_schema
+
+    def test_binary_http_peek(self):
+        messages = [BinaryHTTPBinding.to_http(make_event(event_id)) for event_id in 'ab']
+        for message in messages:
+            message.headers['ce-dataschema'] = fresh('invoice.json')
+        first, second = (BinaryHTTPBinding.peek(message) for message in messages)
+
+        assert first.data_schema is second.data_schema
+
+    def test_binary_kafka(self):
+        def wire_message(event: CloudEvent) -> KafkaMessage:
+            message = BinaryKafkaBinding.to_kafka(event)
+            return KafkaMessage(message.value, [(name, bytes(header)) for name, header in message.headers], message.key)
+
+        first, second = (from_kafka(wire_message(make_event(event_id))) for event_id in 'ab')
+
+        assert first.source is second.source
+        assert first.type is second.type
+        assert first.data.data_schema is second.data.data_schema
+
+    def test_binary_kafka_peek(self):
+        first, second = (BinaryKafkaBinding.peek(BinaryKafkaBinding.to_kafka(make_event(event_id))) for event_id in 'ab')
+
+        assert first.source is second.source
+        assert first.data_schema is second.data_schema
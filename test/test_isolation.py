@@ -0,0 +1,193 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+from outcome.eventkit import CloudEvent
+from outcome.eventkit.dispatch import HandlerRegistry
+from outcome.eventkit.isolation import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    DispatchError,
+    HandlerTimeoutError,
+    IsolatedDispatcher,
+)
+
+from test.helpers import FakeClock
+
+
+def make_event():
+    return CloudEvent(type='co.outcome.test', source='test')
+
+
+def failing_handler(event: CloudEvent) -> None:
+    raise RuntimeError('boom')
+
+
+@pytest.fixture
+def registry():
+    return HandlerRegistry()
+
+
+class TestIsolatedDispatcher:
+    def test_continues_after_error(self, registry):
+        handler = Mock()
+        registry.register_many([('co.outcome.test', failing_handler), ('co.outcome.test', handler)])
+        event = make_event()
+
+        with pytest.raises(DispatchError) as exc_info:
+            IsolatedDispatcher(registry=registry)(event)
+
+        handler.assert_called_once_with(event)
+        assert exc_info.value.event is event
+        assert [(h, type(e)) for h, e in exc_info.value.errors] == [(failing_handler, RuntimeError)]
+
+    def test_no_errors(self, registry):
+        handler = Mock()
+        registry.register('co.outcome.test', handler)
+
+        IsolatedDispatcher(registry=registry)(make_event())
+
+        handler.assert_called_once()
+
+    def test_timeout(self, registry):
+        release = threading.Event()
+        handler = Mock()
+
+        def hanging_handler(event: CloudEvent) -> None:
+            release.wait(5)
+
+        registry.register_many([('co.outcome.test', hanging_handler), ('co.outcome.test', handler)])
+
+        with IsolatedDispatcher(registry=registry, timeout=0.05) as dispatcher:
+            with pytest.raises(DispatchError) as exc_info:
+                dispatcher(make_event())
+            release.set()
+
+        assert isinstance(exc_info.value.errors[0][1], HandlerTimeoutError)
+        handler.assert_called_once()
+
+        stats = {s.handler.rsplit('.', 1)[-1]: s for s in dispatcher.stats()}
+        assert stats['hanging_handler'].timeouts == 1
+
+    def test_hung_handlers_dont_time_out_others(self, registry):
+        release = threading.Event()
+        healthy_handler = Mock()
+
+        def hanging_handler(event: CloudEvent) -> None:
+            release.wait(5)
+
+        registry.register_many([('co.outcome.test', hanging_handler), ('co.outcome.test', healthy_handler)])
+
+        with IsolatedDispatcher(registry=registry, timeout=0.05, max_workers=2) as dispatcher:
+            # The calls of the hung handler take up all of its threads
+            for _ in range(4):
+                with pytest.raises(DispatchError) as exc_info:
+                    dispatcher(make_event())
+                assert [handler for handler, _ in exc_info.value.errors] == [hanging_handler]
+            release.set()
+
+        assert healthy_handler.call_count == 4
+        assert dispatcher.circuit_breaker(healthy_handler).state == CircuitState.closed
+
+    def test_handler_timeout_error(self, registry):
+        def timing_out_handler(event: CloudEvent) -> None:
+            raise TimeoutError('upstream timed out')
+
+        registry.register('co.outcome.test', timing_out_handler)
+
+        with IsolatedDispatcher(registry=registry, timeout=1) as dispatcher:
+            with pytest.raises(DispatchError) as exc_info:
+                dispatcher(make_event())
+
+        error = exc_info.value.errors[0][1]
+        assert type(error) is TimeoutError
+        assert dispatcher.stats()[0].errors == 1
+        assert dispatcher.stats()[0].timeouts == 0
+
+    def test_unregistered_handlers_are_pruned(self, registry):
+        first_handler, second_handler = Mock(), Mock()
+        registry.register('co.outcome.test', first_handler)
+        dispatcher = IsolatedDispatcher(registry=registry)
+        dispatcher(make_event())
+
+        registry.replace([('co.outcome.test', second_handler)])
+        dispatcher(make_event())
+
+        assert list(dispatcher._counters) == [second_handler]  # noqa: WPS437
+        assert len(dispatcher.stats()) == 1
+
+    def test_circuit_opens(self, registry):
+        clock = FakeClock()
+        handler = Mock(side_effect=RuntimeError)
+        registry.register('co.outcome.test', handler)
+        dispatcher = IsolatedDispatcher(registry=registry, failure_threshold=2, reset_timeout=10, clock=clock)
+
+        for _ in range(3):
+            with pytest.raises(DispatchError):
+                dispatcher(make_event())
+
+        # The third call was skipped
+        assert handler.call_count == 2
+        [stats] = dispatcher.stats()
+        assert (stats.calls, stats.errors, stats.skipped, stats.state) == (2, 2, 1, CircuitState.open)
+
+        with pytest.raises(DispatchError) as exc_info:
+            dispatcher(make_event())
+        assert isinstance(exc_info.value.errors[0][1], CircuitOpenError)
+
+        # The trial call succeeds, and closes the circuit
+        clock.now = 10
+        handler.side_effect = None
+        dispatcher(make_event())
+
+        assert handler.call_count == 3
+        assert dispatcher.circuit_breaker(handler).state == CircuitState.closed
+
+    def test_slow_calls_open_circuit(self, registry):
+        clock = FakeClock()
+
+        def slow_handler(event: CloudEvent) -> None:
+            clock.now += 2
+
+        registry.register('co.outcome.test', slow_handler)
+        dispatcher = IsolatedDispatcher(registry=registry, slow_call_threshold=1, failure_threshold=2, clock=clock)
+
+        dispatcher(make_event())
+        dispatcher(make_event())
+
+        [stats] = dispatcher.stats()
+        assert stats.state == CircuitState.open
+        assert stats.mean_time == 2
+        assert stats.max_time == 2
+
+
+class TestCircuitBreaker:
+    def test_failed_trial_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        clock.now = 5
+        assert breaker.state == CircuitState.half_open
+        assert breaker.allow()
+        # Only one trial call at a time
+        assert not breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.state == CircuitState.open
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.closed
+
+    def test_invalid_threshold(self):
+        with pytest.raises(ValueError):
+            CircuitBreaker(failure_threshold=0)
@@ -0,0 +1,76 @@
+from unittest.mock import Mock
+
+import pendulum
+from outcome.eventkit.data import CloudEventData
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.lazy import LazyCloudEvent
+
+attributes = {
+    'id': '1',
+    'source': 'test',
+    'specversion': '1.0',
+    'type': 'co.outcome.type',
+    'subject': 'subject',
+    'time': '2020-11-05T00:00:00+00:00',
+    'datacontenttype': 'application/json',
+    'dataschema': 'schema',
+}
+
+data = CloudEventData(data={'hello': 'world'}, data_content_type='application/json', data_schema='schema')
+
+
+def test_attributes():
+    decode_data = Mock(return_value=data)
+    event = LazyCloudEvent(attributes, decode_data, body='{"hello": "world"}')
+
+    assert event.id == '1'
+    assert event.source == 'test'
+    assert event.spec_version == '1.0'
+    assert event.type == 'co.outcome.type'
+    assert event.subject == 'subject'
+    assert event.time == pendulum.datetime(2020, 11, 5)  # noqa: WPS432
+    assert event.data_content_type == 'application/json;charset=utf-8'
+    assert event.data_schema == 'schema'
+    assert event.attributes == attributes
+    assert event.attributes is not attributes
+    assert 'co.outcome.type' in repr(event)
+
+    decode_data.assert_not_called()
+    assert not event.is_decoded
+    assert event.body == '{"hello": "world"}'
+
+
+def test_data_decoded_once():
+    decode_data = Mock(return_value=data)
+    event = LazyCloudEvent(attributes, decode_data, body='{"hello": "world"}')
+
+    assert event.data == data
+    assert event.data == data
+
+    decode_data.assert_called_once_with()
+    assert event.is_decoded
+    assert event.body is None
+
+
+def test_no_data():
+    event = LazyCloudEvent({'id': '1', 'source': 'test', 'type': 'co.outcome.type'})
+
+    assert event.data is None
+    assert event.data_content_type is None
+    assert event.time is None
+
+
+def test_to_event():
+    event = LazyCloudEvent(attributes, lambda: data)
+
+    assert event.to_event() == CloudEvent(
+        id='1', source='test', type='co.outcome.type', subject='subject', time=pendulum.datetime(2020, 11, 5), data=data,  # noqa: WPS432
+    )
+
+
+def test_datetime_time():
+    time = pendulum.datetime(2020, 11, 5)  # noqa: WPS432
+    event = LazyCloudEvent({**attributes, 'time': time})
+
+    assert event.time is time
+    assert event.to_event().time == time
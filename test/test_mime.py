@@ -1,7 +1,13 @@
+import concurrent.futures
+import importlib
+import threading
+import time
+
 import pytest
 from outcome.eventkit import mime
+from outcome.eventkit.cache import BoundedCache
 
-invalid_mime_types = ['app', 'app/type/foo', 'app+suffix', 'application/json suffix']
+invalid_mime_types = ['app', 'app/type/foo', 'app+suffix', 'application/json suffix', '-app/json', 'app/**']
 
 valid_mime_types = {
     'application/json': {'type': 'application', 'subtype': 'json', 'suffix': None, 'parameters': {'charset': 'utf-8'}},
@@ -17,6 +23,19 @@ valid_mime_types = {
         'suffix': 'json',
         'parameters': {'charset': 'latin9'},
     },
+    'application/cloudevents-batch+json': {
+        'type': 'application',
+        'subtype': 'cloudevents-batch',
+        'suffix': 'json',
+        'parameters': {'charset': 'utf-8'},
+    },
+    '*/*': {'type': '*', 'subtype': '*', 'suffix': None, 'parameters': {'charset': 'utf-8'}},
+    'application/*+json; q=0.5': {
+        'type': 'application',
+        'subtype': '*',
+        'suffix': 'json',
+        'parameters': {'charset': 'utf-8', 'q': '0.5'},
+    },
     'application/cloudevents+json; charset=latin9; param=otherKey': {
         'type': 'application',
         'subtype': 'cloudevents',
@@ -88,3 +107,91 @@ class TestMIMETypeDict:
 
         assert d['application/json;charset=utf-8'] == 'bar'
         assert d.keys() == {'application/json;charset=utf-8'}
+
+    def test_register_lazy(self):
+        d = mime.MIMETypeDict()
+
+        d.register_lazy('application/json', 'outcome.eventkit.mime:MIMEType')
+
+        assert d['application/json;charset=utf-8'] is mime.MIMEType
+        assert len(d) == 1
+
+    def test_register_lazy_does_not_override(self):
+        d = mime.MIMETypeDict()
+
+        d.register_lazy('application/json', 'outcome.eventkit.mime:MIMEType')
+        d['application/json'] = 'bar'
+
+        assert d['application/json'] == 'bar'
+
+        del d['application/json']  # noqa: WPS420
+        assert list(d) == []
+
+    def test_register_lazy_failed_import(self, monkeypatch):
+        d = mime.MIMETypeDict()
+        d.register_lazy('application/json', 'outcome.eventkit.mime:Missing')
+
+        with pytest.raises(AttributeError):
+            d['application/json']  # noqa: WPS428
+
+        # The entry is still pending, and loaded once it can be
+        monkeypatch.setattr(mime, 'Missing', 'bar', raising=False)
+        assert d['application/json'] == 'bar'
+
+    def test_register_lazy_concurrent_lookups(self, monkeypatch):
+        d = mime.MIMETypeDict()
+        d.register_lazy('application/json', 'outcome.eventkit.mime:MIMEType')
+
+        import_module = importlib.import_module
+        started = threading.Event()
+
+        def slow_import(name):
+            started.set()
+            time.sleep(0.05)
+            return import_module(name)
+
+        monkeypatch.setattr(importlib, 'import_module', slow_import)
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            first = executor.submit(d.__getitem__, 'application/json')
+            started.wait()
+            lookups = [executor.submit(d.__getitem__, 'application/json') for _ in range(3)]
+
+            assert first.result() is mime.MIMEType
+            assert all(lookup.result() is mime.MIMEType for lookup in lookups)
+
+
+class TestResolveContentType:
+    def test_resolve(self):
+        content_type = mime.resolve_content_type('Application/JSON')
+
+        assert content_type.name == 'application/json;charset=utf-8'
+        assert content_type.mime_type == mime.parse_mime_type('application/json')
+
+    def test_spellings_share_instance(self):
+        content_type = mime.resolve_content_type('application/json')
+
+        assert mime.resolve_content_type('application/json; charset=UTF-8') is content_type
+        assert mime.resolve_content_type(content_type.name) is content_type
+
+    def test_cached(self, monkeypatch):
+        mime.resolve_content_type('text/plain')
+
+        def fail(*args, **kwargs):  # pragma: no cover
+            raise AssertionError('Content type was parsed again')
+
+        monkeypatch.setattr('outcome.eventkit.mime.mime.parse_mime_type', fail)
+
+        assert mime.resolve_content_type('text/plain').name == 'text/plain;charset=utf-8'
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            mime.resolve_content_type('app/type/foo')
+
+    def test_bounded(self, monkeypatch):
+        monkeypatch.setattr('outcome.eventkit.mime.mime._content_types', BoundedCache(4))
+
+        for subtype in 'abcdefghij':
+            mime.resolve_content_type(f'application/{subtype}')
+
+        assert len(mime.mime._content_types) <= 4  # noqa: WPS437
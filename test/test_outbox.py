@@ -0,0 +1,329 @@
+import subprocess  # noqa: S404
+import sys
+import textwrap
+import threading
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+from outcome.eventkit.event import CloudEvent
+from outcome.eventkit.formats.json import JSONCloudEventFormat
+from outcome.eventkit.outbox import HTTPSender, Outbox, OutboxRelay, is_permanent_error
+from outcome.eventkit.protocol_bindings.http import BatchHTTPBinding, HTTPEvent, from_http
+from outcome.eventkit.retry import RetryPolicy
+
+from test.helpers import FakeClock, make_events
+
+
+class RejectedError(Exception):
+    response = Mock(status_code=400)
+
+
+class RecordingSender:
+    def __init__(self):
+        self.received: List[CloudEvent] = []
+        self.fail = False
+        # The ids of the events that are always rejected
+        self.rejected: List[str] = []
+
+    def __call__(self, batch: List[HTTPEvent]) -> None:
+        if self.fail:
+            raise ConnectionError('Unavailable')
+        events = [from_http(http_event) for http_event in batch]
+        if any(event.id in self.rejected for event in events):
+            raise RejectedError('Rejected')
+        self.received.extend(events)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / 'outbox.db'
+
+
+@pytest.fixture
+def outbox(db_path):
+    with Outbox(db_path) as outbox:
+        yield outbox
+
+
+@pytest.fixture
+def sender():
+    return RecordingSender()
+
+
+def test_relay(outbox, sender):
+    events = make_events(25)
+    outbox.add(events)
+
+    relay = OutboxRelay(outbox, sender, batch_size=10)
+
+    assert relay.relay_once() == 10
+    assert relay.relay_all() == 15
+    assert sender.received == events
+    assert outbox.pending_count() == 0
+
+
+def test_structured_messages(outbox):
+    sender = Mock()
+    outbox.add(make_events(1))
+
+    OutboxRelay(outbox, sender).relay_once()
+
+    [[batch]] = sender.call_args[0]
+    assert batch.headers['Content-Type'] == JSONCloudEventFormat.format_content_type
+
+
+def test_producer_transaction(outbox, sender):
+    with outbox.transaction() as connection:
+        connection.execute('CREATE TABLE invoices (id TEXT)')
+
+    with outbox.transaction() as connection:
+        connection.execute("INSERT INTO invoices VALUES ('1')")
+        outbox.add(make_events(1), connection)
+
+    with pytest.raises(RuntimeError):
+        with outbox.transaction() as connection:
+            connection.execute("INSERT INTO invoices VALUES ('2')")
+            outbox.add(make_events(1, start=1), connection)
+            raise RuntimeError('Rolled back')
+
+    with outbox.transaction() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM invoices').fetchone() == (1,)
+
+    OutboxRelay(outbox, sender).relay_all()
+    assert [event.id for event in sender.received] == ['0']
+
+
+def test_add_inside_transaction(outbox, sender):
+    with pytest.raises(RuntimeError):
+        with outbox.transaction():
+            outbox.add(make_events(1))
+            raise RuntimeError('Rolled back')
+
+    with outbox.transaction():
+        outbox.add(make_events(1, start=1))
+
+    OutboxRelay(outbox, sender).relay_all()
+    assert [event.id for event in sender.received] == ['1']
+
+
+def test_nested_transaction(outbox):
+    with outbox.transaction():
+        with pytest.raises(RuntimeError):
+            with outbox.transaction():
+                ...  # noqa: WPS428
+
+
+def test_failed_batch_stays_pending(outbox, sender):
+    events = make_events(5)
+    outbox.add(events)
+    clock = FakeClock()
+    relay = OutboxRelay(outbox, sender, batch_size=2, policy=RetryPolicy(base_delay=1, jitter=0), clock=clock)
+
+    sender.fail = True
+    assert relay.relay_all() == 0
+    assert relay.failures == 1
+    assert [record.attempts for record in outbox.pending()] == [1, 1, 0, 0, 0]
+
+    # The relay backs off
+    sender.fail = False
+    assert relay.relay_all() == 0
+
+    clock.now = 1
+    assert relay.relay_all() == 5
+    assert sender.received == events
+
+
+def test_failed_events_are_retried_one_at_a_time(outbox, sender):
+    events = make_events(4)
+    outbox.add(events)
+    relay = OutboxRelay(outbox, sender, batch_size=4, policy=RetryPolicy(base_delay=0))
+    batch_sizes = []
+
+    def recording_sender(batch):
+        batch_sizes.append(len(batch))
+        sender(batch)
+
+    relay.sender = recording_sender
+
+    sender.fail = True
+    relay.relay_once()
+    sender.fail = False
+    relay.relay_all()
+
+    assert batch_sizes == [4, 1, 1, 1, 1]
+    assert sender.received == events
+
+
+def test_dead_letters(outbox, sender):
+    events = make_events(5)
+    outbox.add(events)
+    sender.rejected = ['1']
+    relay = OutboxRelay(outbox, sender, batch_size=5, policy=RetryPolicy(max_attempts=3, base_delay=0))
+
+    for _ in range(10):
+        relay.relay_all()
+
+    # The event that's always rejected no longer blocks the ones after it
+    assert [event.id for event in sender.received] == ['0', '2', '3', '4']
+    assert outbox.pending_count() == 0
+    assert relay.dead_lettered == 1
+
+    [dead_letter] = outbox.dead_letters()
+    assert dead_letter.attempts == 3
+    assert JSONCloudEventFormat.decode(dead_letter.body) == events[1]
+
+    sender.rejected = []
+    assert outbox.requeue([dead_letter.id]) == 1
+    assert outbox.dead_letters() == []
+
+    relay.relay_all()
+    assert sender.received[-1] == events[1]
+
+
+def test_outage(outbox, sender):
+    events = make_events(100)
+    outbox.add(events)
+    clock = FakeClock()
+    policy = RetryPolicy(max_attempts=3, base_delay=1, max_delay=30, jitter=0)
+    relay = OutboxRelay(outbox, sender, batch_size=10, policy=policy, clock=clock)
+
+    # The receiver is unavailable for 10 minutes, polled every 0.5s
+    sender.fail = True
+    for _ in range(1200):
+        relay.relay_all()
+        clock.now += 0.5
+
+    # Transient errors don't dead-letter the events, and the backoff is capped
+    assert relay.dead_lettered == 0
+    assert outbox.dead_letters() == []
+    assert outbox.pending_count() == 100
+    assert relay.failures == 24
+
+    sender.fail = False
+    clock.now += 30
+    assert relay.relay_all() == 100
+    assert sender.received == events
+
+
+@pytest.mark.parametrize(
+    'status_code,permanent',
+    [(400, True), (404, True), (408, False), (429, False), (500, False), (503, False)],
+)
+def test_is_permanent_error(status_code, permanent):
+    error = RejectedError()
+    error.response = Mock(status_code=status_code)
+
+    assert is_permanent_error(error) is permanent
+    assert not is_permanent_error(ConnectionError())
+
+
+def test_crash_before_marking_delivered(db_path, sender):
+    events = make_events(3)
+
+    with Outbox(db_path) as outbox:
+        outbox.add(events)
+
+        def crash(ids):
+            raise SystemExit('Crashed')
+
+        outbox.mark_delivered = crash  # type: ignore
+
+        with pytest.raises(SystemExit):
+            OutboxRelay(outbox, sender).relay_once()
+
+    # The events were sent, but not marked delivered, so they're sent again
+    with Outbox(db_path) as outbox:
+        OutboxRelay(outbox, sender).relay_all()
+
+    assert sender.received == events + events
+
+
+def test_crash_during_transaction(db_path, sender):
+    # The process is killed with a transaction in progress
+    script = textwrap.dedent(f'''
+        import os
+        from outcome.eventkit.event import CloudEvent
+        from outcome.eventkit.outbox import Outbox
+
+        def event(index):
+            return CloudEvent(id=str(index), type='co.outcome.test', source='test')
+
+        outbox = Outbox({str(db_path)!r})
+        outbox.add([event(0), event(1)])
+        connection = outbox.connect()
+        outbox.add([event(2)], connection)
+        os._exit(1)
+    ''')
+    subprocess.run([sys.executable, '-c', script], check=False)  # noqa: S603
+
+    with Outbox(db_path) as outbox:
+        OutboxRelay(outbox, sender).relay_all()
+
+    assert [event.id for event in sender.received] == ['0', '1']
+
+
+def test_relay_thread(outbox):
+    done = threading.Event()
+    received = []
+
+    def sender(batch):
+        received.extend(batch)
+        if len(received) == 10:
+            done.set()
+
+    with OutboxRelay(outbox, sender, poll_interval=0.01):
+        outbox.add(make_events(10))
+        assert done.wait(5)
+
+
+def test_purge(outbox, sender):
+    outbox.add(make_events(3))
+    OutboxRelay(outbox, sender).relay_all()
+
+    assert outbox.purge(delivered_before=float('inf')) == 3
+
+
+def test_invalid_table(db_path):
+    with pytest.raises(ValueError):
+        Outbox(db_path, table='events; DROP TABLE x')
+
+
+def test_http_sender(outbox):
+    session = Mock()
+    sender = HTTPSender('http://localhost/events', session=session)
+    events = make_events(3)
+    outbox.add(events)
+
+    OutboxRelay(outbox, sender).relay_once()
+
+    # Each event is sent in its own structured message
+    assert session.post.call_count == 3
+    assert [from_http(HTTPEvent(kwargs['data'], kwargs['headers'])) for _, kwargs in session.post.call_args_list] == events
+
+
+def test_http_sender_batch(outbox):
+    session = Mock()
+    sender = HTTPSender('http://localhost/events', session=session, batch=True)
+    events = make_events(3)
+    outbox.add(events)
+
+    OutboxRelay(outbox, sender).relay_once()
+
+    # The events are sent in a single batch
+    session.post.assert_called_once()
+    _, kwargs = session.post.call_args
+    http_event = HTTPEvent(kwargs['data'], kwargs['headers'])
+    assert BatchHTTPBinding.from_http(http_event) == events
+    session.post.return_value.raise_for_status.assert_called_once()
+
+
+def test_http_sender_unbatched():
+    session = Mock()
+    sender = HTTPSender('http://localhost/events', session=session, batch=True)
+    headers = {'Content-Type': 'application/json', 'ce-id': '1'}
+
+    sender([HTTPEvent('{}', headers), HTTPEvent('[]', headers)])
+
+    assert session.post.call_count == 2
+    session.post.assert_called_with('http://localhost/events', data='[]', headers=headers, timeout=10)
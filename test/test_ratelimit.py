@@ -0,0 +1,321 @@
+from unittest.mock import Mock
+
+import pytest
+from outcome.eventkit import CloudEvent
+from outcome.eventkit.dispatch import HandlerRegistry
+from outcome.eventkit.ratelimit import (
+    LimitStats,
+    Priority,
+    RateLimit,
+    RateLimitedDispatcher,
+    RateLimiter,
+    ShedPolicy,
+    Verdict,
+)
+
+noisy_type = 'co.outcome.noisy'
+quiet_type = 'co.outcome.quiet'
+
+
+def make_event(event_type: str = noisy_type, source: str = 'test') -> CloudEvent:
+    return CloudEvent(type=event_type, source=source)
+
+
+def verdicts(limiter: RateLimiter, count: int, event_type: str = noisy_type, source: str = 'test'):
+    return [limiter.check(make_event(event_type, source)) for _ in range(count)]
+
+
+class TestRateLimiter:
+    def test_no_limits(self, clock):
+        limiter = RateLimiter(clock=clock)
+
+        assert verdicts(limiter, 100) == [Verdict.admit] * 100
+        assert limiter.stats() == []
+
+    def test_burst_then_drop(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=3))
+
+        assert verdicts(limiter, 5) == [Verdict.admit] * 3 + [Verdict.drop] * 2
+        assert limiter.stats() == [LimitStats(noisy_type, None, admitted=3, sampled=0, dropped=2, deferred=0)]
+
+    def test_refill(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=2, burst=2))
+        verdicts(limiter, 2)
+
+        clock.now += 0.5
+
+        assert verdicts(limiter, 2) == [Verdict.admit, Verdict.drop]
+
+    def test_refill_is_capped(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=10, burst=2))
+
+        clock.now += 100
+
+        assert verdicts(limiter, 3) == [Verdict.admit, Verdict.admit, Verdict.drop]
+
+    def test_other_types_are_unaffected(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1))
+        verdicts(limiter, 10)
+
+        assert verdicts(limiter, 10, quiet_type) == [Verdict.admit] * 10
+
+    def test_sample(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1, policy=ShedPolicy.sample, sample_rate=0.25))
+
+        results = verdicts(limiter, 9)
+
+        assert results == [Verdict.admit] + [Verdict.drop, Verdict.drop, Verdict.drop, Verdict.admit] * 2
+        [stats] = limiter.stats()
+        assert (stats.admitted, stats.sampled, stats.dropped, stats.shed) == (1, 2, 6, 6)
+
+    def test_defer(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1, policy=ShedPolicy.defer))
+
+        assert verdicts(limiter, 2) == [Verdict.admit, Verdict.defer]
+        assert limiter.stats()[0].deferred == 1
+
+    def test_source_limit(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=5))
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1), source='flood')
+
+        assert verdicts(limiter, 2, source='flood') == [Verdict.admit, Verdict.drop]
+        assert verdicts(limiter, 2, source='other') == [Verdict.admit, Verdict.admit]
+        assert limiter.limit(noisy_type, 'flood') == RateLimit(rate=1, burst=1)
+        assert limiter.limit(noisy_type, 'other') == RateLimit(rate=1, burst=5)
+
+    def test_default_limit(self, clock):
+        limiter = RateLimiter(default=RateLimit(rate=1, burst=1), clock=clock)
+
+        assert verdicts(limiter, 2) == [Verdict.admit, Verdict.drop]
+        # Each type has its own bucket
+        assert verdicts(limiter, 2, quiet_type) == [Verdict.admit, Verdict.drop]
+        assert {stats.event_type for stats in limiter.stats()} == {noisy_type, quiet_type}
+
+    def test_default_buckets_are_bounded(self, clock, monkeypatch):
+        monkeypatch.setattr('outcome.eventkit.ratelimit.max_default_buckets', 4)
+        limiter = RateLimiter(default=RateLimit(rate=1, burst=1), clock=clock)
+
+        for index in range(10):
+            limiter.check(make_event(f'co.outcome.type{index}'))
+
+        assert len(limiter.stats()) <= 4
+
+    def test_global_limit_priorities(self, clock):
+        limiter = RateLimiter(global_limit=RateLimit(rate=1, burst=4), clock=clock)
+        limiter.set_limit('co.outcome.low', RateLimit(rate=100, priority=Priority.low))
+        limiter.set_limit('co.outcome.high', RateLimit(rate=100, priority=Priority.high))
+
+        # Low priority events can only use half of the global burst
+        assert verdicts(limiter, 3, 'co.outcome.low') == [Verdict.admit, Verdict.admit, Verdict.drop]
+        assert verdicts(limiter, 3, 'co.outcome.high') == [Verdict.admit, Verdict.admit, Verdict.drop]
+        assert limiter.global_stats().admitted == 4
+
+    def test_global_limit_returns_token(self, clock):
+        limiter = RateLimiter(global_limit=RateLimit(rate=1, burst=1), clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=2, priority=Priority.high))
+
+        verdicts(limiter, 2)
+        clock.now += 1
+
+        # The type bucket still has the token that the global limit refused
+        assert verdicts(limiter, 1) == [Verdict.admit]
+
+    def test_global_limit_unlimited_types(self, clock):
+        limiter = RateLimiter(global_limit=RateLimit(rate=1, burst=1), clock=clock)
+
+        assert verdicts(limiter, 2, quiet_type) == [Verdict.admit, Verdict.drop]
+
+    def test_critical(self, clock):
+        limiter = RateLimiter(global_limit=RateLimit(rate=1, burst=1), clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1, priority=Priority.critical))
+
+        assert verdicts(limiter, 10) == [Verdict.admit] * 10
+
+    def test_update_limit(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1))
+        verdicts(limiter, 2)
+
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=3))
+
+        assert verdicts(limiter, 4) == [Verdict.admit] * 3 + [Verdict.drop]
+
+    def test_update_keeps_other_buckets(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1))
+        verdicts(limiter, 1)
+
+        limiter.set_limit(quiet_type, RateLimit(rate=1, burst=1))
+
+        assert verdicts(limiter, 1) == [Verdict.drop]
+
+    def test_remove_limit(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1))
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1), source='flood')
+
+        limiter.remove_limit(noisy_type)
+        limiter.remove_limit(noisy_type, source='flood')
+
+        assert verdicts(limiter, 5) == [Verdict.admit] * 5
+        assert verdicts(limiter, 5, source='flood') == [Verdict.admit] * 5
+        assert limiter.limit(noisy_type) is None
+
+    def test_set_default_and_global(self, clock):
+        limiter = RateLimiter(clock=clock)
+
+        limiter.set_default(RateLimit(rate=1, burst=1))
+        assert verdicts(limiter, 2) == [Verdict.admit, Verdict.drop]
+
+        limiter.set_default(None)
+        limiter.set_global_limit(RateLimit(rate=1, burst=1))
+        assert verdicts(limiter, 2) == [Verdict.admit, Verdict.drop]
+
+        limiter.set_global_limit(None)
+        assert limiter.global_stats() is None
+        assert verdicts(limiter, 2) == [Verdict.admit, Verdict.admit]
+
+    @pytest.mark.parametrize(
+        'limit', [RateLimit(rate=0), RateLimit(rate=1, burst=0.5), RateLimit(rate=1, sample_rate=0)],
+    )
+    def test_invalid_limits(self, limit, clock):
+        limiter = RateLimiter(clock=clock)
+
+        with pytest.raises(ValueError):
+            limiter.set_limit(noisy_type, limit)
+        with pytest.raises(ValueError):
+            limiter.set_default(limit)
+
+    def test_try_acquire(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1, policy=ShedPolicy.defer))
+
+        assert limiter.try_acquire(make_event())
+        assert not limiter.try_acquire(make_event())
+        assert limiter.try_acquire(make_event(quiet_type))
+        # Failed attempts aren't counted as shed
+        assert limiter.stats()[0].shed == 0
+
+
+class TestRateLimitedDispatcher:
+    @pytest.fixture
+    def registry(self):
+        return HandlerRegistry()
+
+    def test_dispatches_admitted_events(self, registry, clock):
+        handler = Mock()
+        registry.register(noisy_type, handler)
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=2))
+        dispatcher = RateLimitedDispatcher(limiter, registry=registry)
+
+        for _ in range(5):
+            dispatcher(make_event())
+
+        assert handler.call_count == 2
+
+    def test_custom_dispatcher(self, clock):
+        inner = Mock()
+        dispatcher = RateLimitedDispatcher(RateLimiter(clock=clock), dispatcher=inner)
+        event = make_event()
+
+        dispatcher(event)
+
+        inner.assert_called_once_with(event)
+
+    def test_drain_deferred(self, clock):
+        inner = Mock()
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1, policy=ShedPolicy.defer))
+        dispatcher = RateLimitedDispatcher(limiter, dispatcher=inner)
+        events = [make_event() for _ in range(3)]
+
+        for event in events:
+            dispatcher(event)
+
+        assert inner.call_count == 1
+        assert dispatcher.drain() == 0
+
+        clock.now += 1
+        assert dispatcher.drain() == 1
+        clock.now += 1
+        assert dispatcher.drain() == 1
+
+        assert [call.args[0] for call in inner.call_args_list] == events
+        assert not dispatcher.deferred
+
+    def test_drain_skips_limited_types(self, clock):
+        inner = Mock()
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1, policy=ShedPolicy.defer))
+        limiter.set_limit(quiet_type, RateLimit(rate=10, burst=1, policy=ShedPolicy.defer))
+        dispatcher = RateLimitedDispatcher(limiter, dispatcher=inner)
+        noisy = [make_event(noisy_type) for _ in range(3)]
+        quiet = [make_event(quiet_type) for _ in range(3)]
+
+        for event in [noisy[0], quiet[0], noisy[1], quiet[1], noisy[2], quiet[2]]:
+            dispatcher(event)
+        inner.reset_mock()
+
+        # The quiet type refills before the noisy one, and isn't held up by it
+        clock.now += 0.1
+        assert dispatcher.drain() == 1
+        clock.now += 0.1
+        assert dispatcher.drain() == 1
+        assert [call.args[0] for call in inner.call_args_list] == quiet[1:]
+        assert list(dispatcher.deferred) == noisy[1:]
+
+        clock.now += 1
+        assert dispatcher.drain() == 1
+        assert list(dispatcher.deferred) == noisy[2:]
+
+    def test_drain_keeps_events_deferred_meanwhile(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1, policy=ShedPolicy.defer))
+        events = [make_event() for _ in range(4)]
+        dispatched = []
+
+        def inner(event):
+            dispatched.append(event)
+            if event is events[1]:
+                # Deferred while the dispatcher is draining
+                dispatcher(events[3])
+
+        dispatcher = RateLimitedDispatcher(limiter, dispatcher=inner)
+        for event in events[:3]:
+            dispatcher(event)
+
+        clock.now += 1
+        assert dispatcher.drain() == 1
+        assert dispatched == events[:2]
+        assert list(dispatcher.deferred) == [events[2], events[3]]
+
+    def test_default_dispatcher(self, registry, clock):
+        handler = Mock()
+        registry.register(noisy_type, handler)
+        dispatcher = RateLimitedDispatcher(RateLimiter(clock=clock), registry=registry)
+        event = make_event()
+
+        dispatcher(event)
+
+        assert dispatcher.dispatcher.keywords == {'registry': registry}
+        handler.assert_called_once_with(event)
+
+    def test_deferred_overflow(self, clock):
+        limiter = RateLimiter(clock=clock)
+        limiter.set_limit(noisy_type, RateLimit(rate=1, burst=1, policy=ShedPolicy.defer))
+        dispatcher = RateLimitedDispatcher(limiter, dispatcher=Mock(), max_deferred=2)
+        events = [make_event() for _ in range(4)]
+
+        for event in events:
+            dispatcher(event)
+
+        assert list(dispatcher.deferred) == events[2:]
+        assert dispatcher.overflowed == 1
@@ -0,0 +1,302 @@
+import functools
+import threading
+from unittest.mock import Mock
+
+import pytest
+from outcome.eventkit import CloudEvent
+from outcome.eventkit.dispatch import HandlerRegistry
+from outcome.eventkit.retry import (
+    FileDeadLetterSink,
+    MemoryDeadLetterSink,
+    RetryingDispatcher,
+    RetryPolicy,
+    RetryQueue,
+    handler_key,
+    replay,
+    with_dead_letter_handler,
+)
+
+from test.helpers import FakeClock
+
+
+def make_event(event_id='1'):
+    return CloudEvent(type='co.outcome.test', source='test', id=event_id, time='2021-01-01T00:00:00Z')
+
+
+def no_jitter_policy(**kwargs):
+    return RetryPolicy(jitter=0, **kwargs)
+
+
+def module_handler(event):
+    ...
+
+
+class Handlers:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def handle(self, event):
+        if self.fail:
+            raise RuntimeError
+
+
+class TestRetryPolicy:
+    def test_backoff(self):
+        policy = RetryPolicy(base_delay=1, multiplier=2, max_delay=5, jitter=0)
+
+        assert [policy.delay(attempt) for attempt in range(1, 6)] == [1, 2, 4, 5, 5]
+
+    def test_jitter(self):
+        policy = RetryPolicy(base_delay=10, jitter=0.5, random_source=lambda: 1)
+
+        assert policy.delay(1) == 5
+
+    def test_invalid_attempts(self):
+        with pytest.raises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+
+class TestRetryQueue:
+    def test_retries_until_success(self):
+        clock = FakeClock()
+        delivery = Mock(side_effect=[RuntimeError, RuntimeError, None])
+        queue = RetryQueue(MemoryDeadLetterSink(), no_jitter_policy(base_delay=1), clock=clock)
+        event = make_event()
+
+        assert not queue.submit(delivery, event)
+        assert queue.next_due() == 1
+        assert queue.run_pending() == 0
+
+        clock.now = 1
+        assert queue.run_pending() == 1
+        assert queue.next_due() == 3
+
+        clock.now = 3
+        assert queue.run_pending() == 1
+
+        assert len(queue) == 0
+        assert delivery.call_count == 3
+        assert (queue.delivered, queue.retried, queue.dead_lettered) == (1, 2, 0)
+
+    def test_dead_letters(self):
+        clock = FakeClock()
+        sink = MemoryDeadLetterSink()
+        queue = RetryQueue(sink, no_jitter_policy(max_attempts=2), clock=clock)
+        event = make_event()
+
+        queue.submit(Mock(side_effect=RuntimeError), event)
+        queue.run_pending(now=100)
+
+        assert len(queue) == 0
+        assert list(sink.events()) == [event]
+        assert queue.dead_lettered == 1
+
+    def test_order(self):
+        clock = FakeClock()
+        queue = RetryQueue(MemoryDeadLetterSink(), no_jitter_policy(), clock=clock)
+        attempts = []
+
+        def failing(event):
+            attempts.append(event.id)
+            raise RuntimeError
+
+        for index in range(5):
+            clock.now = 4 - index
+            queue.submit(failing, make_event(str(index)))
+
+        attempts.clear()
+        clock.now = 10
+        queue.run_pending()
+
+        assert attempts == ['4', '3', '2', '1', '0']
+
+    def test_many_pending(self):
+        clock = FakeClock()
+        queue = RetryQueue(MemoryDeadLetterSink(), RetryPolicy(max_attempts=2), clock=clock)
+        event = make_event()
+        delivery = Mock(side_effect=RuntimeError)
+
+        for _ in range(10000):
+            queue.submit(delivery, event)
+
+        assert len(queue) == 10000
+
+        delivery.side_effect = None
+        assert queue.run_pending(now=10) == 10000
+        assert queue.delivered == 10000
+
+    def test_thread(self):
+        done = threading.Event()
+        results = [RuntimeError, None]
+
+        def deliver(event):
+            outcome = results.pop(0)
+            if outcome:
+                raise outcome
+            done.set()
+
+        delivery = Mock(side_effect=deliver)
+
+        with RetryQueue(MemoryDeadLetterSink(), no_jitter_policy(base_delay=0.01)) as queue:
+            queue.submit(delivery, make_event())
+            assert done.wait(5)
+
+        assert delivery.call_count == 2
+
+
+class TestRetryingDispatcher:
+    def test_only_retries_failed_handler(self):
+        clock = FakeClock()
+        registry = HandlerRegistry()
+        ok = Mock()
+        failing = Mock(side_effect=[RuntimeError, None])
+        registry.register_many([('co.outcome.test', ok), ('co.outcome.test', failing)])
+        queue = RetryQueue(MemoryDeadLetterSink(), no_jitter_policy(), clock=clock)
+
+        RetryingDispatcher(queue, registry=registry)(make_event())
+        queue.run_pending(now=10)
+
+        assert ok.call_count == 1
+        assert failing.call_count == 2
+
+    def test_shared_key(self):
+        registry = HandlerRegistry()
+        sink = MemoryDeadLetterSink()
+        ok = Handlers()
+        failing = Handlers(fail=True)
+        registry.register_many([('co.outcome.test', ok.handle), ('co.outcome.test', failing.handle)])
+        queue = RetryQueue(sink, no_jitter_policy(max_attempts=1))
+        event = make_event()
+
+        RetryingDispatcher(queue, registry=registry)(event)
+
+        # The key of the methods can't tell the handlers apart, so the dead letter goes to both
+        assert list(sink.events()) == [event]
+
+
+class TestHandlerKey:
+    def test_function(self):
+        assert handler_key(module_handler) == f'{__name__}.module_handler'
+
+    def test_method(self):
+        assert handler_key(Handlers().handle) == f'{__name__}.Handlers.handle'
+
+    @pytest.mark.parametrize(
+        'handler', [lambda event: None, functools.partial(module_handler), Mock()], ids=['lambda', 'partial', 'mock'],
+    )
+    def test_unstable(self, handler):
+        assert handler_key(handler) is None
+
+    def test_explicit(self):
+        assert handler_key(Mock(dead_letter_key='billing')) == 'billing'
+
+
+class TestDeadLetterSinks:
+    def test_file_sink(self, tmp_path):
+        sink = FileDeadLetterSink(tmp_path / 'dlq.log')
+        events = [make_event('1'), make_event('2')]
+
+        for event in events:
+            sink.put(event)
+
+        assert list(sink.events()) == events
+
+        sink.clear()
+        assert list(sink.events()) == []
+
+        sink.put(events[0])
+        sink.close()
+
+        assert list(FileDeadLetterSink(tmp_path / 'dlq.log').events()) == [events[0]]
+
+    @pytest.fixture(params=['memory', 'file'])
+    def sink(self, request, tmp_path):
+        if request.param == 'memory':
+            return MemoryDeadLetterSink()
+        return FileDeadLetterSink(tmp_path / 'dlq.log')
+
+    def test_replay(self, sink):
+        registry = HandlerRegistry()
+        handler = Mock(side_effect=[None, RuntimeError])
+        registry.register('co.outcome.test', handler)
+        events = [make_event('1'), make_event('2')]
+
+        for event in events:
+            sink.put(event)
+
+        assert replay(sink, registry=registry) == (2, 1)
+        assert list(sink.events()) == [events[1]]
+
+    def test_replay_crash_keeps_dead_letters(self, sink):
+        registry = HandlerRegistry()
+        registry.register('co.outcome.test', Mock(side_effect=[None, KeyboardInterrupt]))
+        events = [make_event('1'), make_event('2')]
+
+        for event in events:
+            sink.put(event)
+
+        with pytest.raises(KeyboardInterrupt):
+            replay(sink, registry=registry)
+
+        assert list(sink.events()) == events
+
+    def test_replay_keeps_new_dead_letters(self, sink):
+        registry = HandlerRegistry()
+        sink.put(make_event('1'))
+        # A dead letter that's written during the replay
+        registry.register('co.outcome.test', lambda event: sink.put(make_event('2')) if event.id == '1' else None)
+
+        assert replay(sink, registry=registry) == (1, 0)
+        assert list(sink.events()) == [make_event('2')]
+
+    def test_replay_to_failed_handler(self, sink):
+        clock = FakeClock()
+        registry = HandlerRegistry()
+        ok = Mock(dead_letter_key='ok')
+        failing = Mock(dead_letter_key='failing', side_effect=[RuntimeError, None])
+        registry.register_many([('co.outcome.test', ok), ('co.outcome.test', failing)])
+        queue = RetryQueue(sink, no_jitter_policy(max_attempts=1), clock=clock)
+        event = make_event()
+
+        RetryingDispatcher(queue, registry=registry)(event)
+        assert [dead_letter.extensions for dead_letter in sink.events()] == [{'deadletterhandler': 'failing'}]
+
+        assert replay(sink, registry=registry) == (1, 0)
+
+        assert ok.call_count == 1
+        assert failing.call_count == 2
+        assert failing.call_args[0][0] == event
+        assert list(sink.events()) == []
+
+    def test_replay_through_retrying_dispatcher(self, sink):
+        clock = FakeClock()
+        registry = HandlerRegistry()
+        failing = Mock(dead_letter_key='failing', side_effect=RuntimeError)
+        registry.register('co.outcome.test', failing)
+        queue = RetryQueue(sink, no_jitter_policy(max_attempts=2), clock=clock)
+        dispatcher = RetryingDispatcher(queue, registry=registry)
+        event = make_event()
+
+        dispatcher(event)
+        queue.run_pending(now=10)
+        assert queue.retried == 1
+
+        # The handler is found in the dispatcher's registry, not the global one, and fails again
+        assert replay(sink, dispatcher) == (1, 0)
+        assert failing.call_count == 3
+        assert queue.retried == 2
+        assert len(queue) == 1
+
+        failing.side_effect = None
+        queue.run_pending(now=20)
+
+        assert failing.call_count == 4
+        assert list(sink.events()) == []
+
+    def test_replay_to_unregistered_handler(self, sink):
+        registry = HandlerRegistry()
+        registry.register('co.outcome.test', Mock())
+        sink.put(with_dead_letter_handler(make_event(), 'module.removed_handler'))
+
+        assert replay(sink, registry=registry) == (1, 1)
+        assert len(list(sink.events())) == 1
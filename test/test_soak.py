@@ -0,0 +1,62 @@
+from typing import List
+
+import pytest
+from outcome.eventkit import filters
+from outcome.eventkit.cache import BoundedCache
+from outcome.eventkit.dispatch import HandlerRegistry, dispatch
+from outcome.eventkit.filters import Exact, compile_filter
+from outcome.eventkit.mime import mime
+
+from test import soak
+
+
+@pytest.mark.parametrize('name', list(soak.scenarios))
+def test_scenarios(name):
+    report = soak.soak(name, soak.scenarios[name](), events=4000, warmup=1000, samples=8, max_growth_per_event=8)
+
+    assert report.passed, report.format()
+
+
+def test_leaks_are_detected():
+    leaked: List[str] = []
+
+    def leaky_scenario(index: int) -> None:
+        soak.json_round_trip_scenario(index)
+        leaked.append(f'event-{index}' * 4)
+
+    report = soak.soak('leaky', leaky_scenario, events=2000, warmup=100, samples=4)
+
+    assert not report.passed
+    assert any(__file__ in allocation for allocation in report.top_allocations)
+    assert 'FAILED' in report.format()
+
+
+def test_main(capsys):
+    assert soak.main(['--events', '400', '--samples', '2', '--max-growth', '1000', 'dispatch']) == 0
+    assert 'dispatch: ok' in capsys.readouterr().out
+
+
+def test_mime_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(mime, '_cache', BoundedCache(10))
+
+    for index in range(50):
+        mime.parse_mime_type(f'application/json; version={index}')
+
+    assert len(mime._cache) <= 10  # noqa: WPS437
+
+
+def test_compiled_filters_are_bounded():
+    for index in range(filters.max_compiled_filters + 10):
+        compile_filter(Exact(subject=f'subject-{index}'))
+
+    assert len(filters._compiled) <= filters.max_compiled_filters  # noqa: WPS437
+
+
+def test_unknown_types_dont_grow_the_registry():
+    registry = HandlerRegistry()
+    registry.register('co.outcome.known', lambda event: None)
+
+    for index in range(100):
+        dispatch(soak.make_event(index), registry)
+
+    assert list(registry) == ['co.outcome.known']